@@ -0,0 +1,48 @@
+// Interfaces para el Dashboard del agente - Sistema Alfa
+
+/** Indicadores precalculados de la cartera de un agente */
+export interface ResumenCarteraAgente {
+  /** ID del agente */
+  agente_id: number;
+  /** Clientes asignados */
+  total_clientes: number;
+  /** Bienes de los clientes asignados */
+  total_bienes: number;
+  /** Pólizas vigentes no canceladas */
+  polizas_activas: number;
+  /** Pólizas activas que terminan dentro de la ventana de renovación */
+  renovaciones_proximas: number;
+  /** Cuotas pendientes con fecha máxima de pago vencida */
+  cuotas_vencidas: number;
+  /** Valor de las cuotas vencidas */
+  valor_cartera_vencida: number;
+  /** Cuotas pendientes que vencen dentro de la ventana de cobro */
+  cuotas_por_vencer: number;
+  /** Valor de las cuotas por vencer */
+  valor_por_vencer: number;
+  /** Comisiones de pólizas activas con cuotas pendientes */
+  comisiones_pendientes: number;
+  /** Fecha a la que corresponden los indicadores */
+  fecha_corte: string;
+  /** Momento del último recálculo */
+  actualizado_en: string;
+}
+
+/** Ventanas de tiempo (en días) usadas por los indicadores */
+export interface VentanasDashboard {
+  dias_renovacion: number;
+  dias_por_vencer: number;
+}
+
+/** Datos del dashboard del agente */
+export interface DashboardAgente {
+  agente: any;
+  resumen: ResumenCarteraAgente;
+  ventanas: VentanasDashboard;
+}
+
+/** Respuesta de la API para el dashboard del agente */
+export interface RespuestaDashboardAgente {
+  status: string;
+  data: DashboardAgente;
+}
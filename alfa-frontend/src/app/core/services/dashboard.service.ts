@@ -0,0 +1,51 @@
+import { Injectable } from '@angular/core';
+import { HttpClient } from '@angular/common/http';
+import { Observable, throwError } from 'rxjs';
+import { catchError, map } from 'rxjs/operators';
+
+import { DashboardAgente, RespuestaDashboardAgente } from '@core/models/dashboard.interface';
+
+@Injectable({
+  providedIn: 'root'
+})
+export class DashboardService {
+  private readonly urlBase = '/api';
+
+  constructor(private http: HttpClient) {}
+
+  /**
+   * Obtiene los indicadores de cartera del agente en una sola petición
+   * @param agenteId ID del agente
+   * @returns Observable con el dashboard del agente
+   */
+  obtenerDashboardAgente(agenteId: number): Observable<DashboardAgente> {
+    return this.http.get<RespuestaDashboardAgente>(`${this.urlBase}/agentes/${agenteId}/dashboard`)
+      .pipe(
+        map(respuesta => respuesta.data),
+        catchError(error => this.manejarError(error))
+      );
+  }
+
+  /**
+   * Maneja los errores de las peticiones HTTP
+   * @param error Error de la petición
+   * @returns Observable con el error procesado
+   */
+  private manejarError(error: any): Observable<never> {
+    let mensajeError = 'Ha ocurrido un error desconocido';
+
+    if (error.error instanceof ErrorEvent) {
+      // Error del lado del cliente
+      mensajeError = `Error del cliente: ${error.error.message}`;
+    } else if (error.status === 0) {
+      mensajeError = 'No se puede conectar con el servidor. Verifique que la API esté funcionando.';
+    } else if (error.error && error.error.message) {
+      mensajeError = error.error.message;
+    } else {
+      mensajeError = `Código de error: ${error.status}, mensaje: ${error.statusText}`;
+    }
+
+    console.error('Error en DashboardService:', error);
+    return throwError(() => new Error(mensajeError));
+  }
+}
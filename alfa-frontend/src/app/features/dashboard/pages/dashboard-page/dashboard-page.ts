@@ -9,6 +9,8 @@ import { AgenteAutenticado } from '@core/models/auth.interface';
 import { SidebarComponent } from '@shared/components/ui/sidebar/sidebar';
 import { ConfiguracionSidebar, ElementoMenu } from '@core/models/sidebar.interface';
 import { SidebarConfigService } from '@core/services/sidebar-config.service';
+import { DashboardService } from '@core/services/dashboard.service';
+import { ResumenCarteraAgente, VentanasDashboard } from '@core/models/dashboard.interface';
 
 @Component({
   selector: 'app-dashboard-page',
@@ -22,6 +24,15 @@ export class DashboardPageComponent implements OnInit, OnDestroy {
   /** Datos del agente autenticado */
   agenteActual: AgenteAutenticado | null = null;
   
+  /** Indicadores de cartera del agente */
+  resumenCartera: ResumenCarteraAgente | null = null;
+
+  /** Ventanas de tiempo de los indicadores */
+  ventanasDashboard: VentanasDashboard | null = null;
+
+  /** Error al cargar los indicadores */
+  errorResumen: string | null = null;
+
   /** Configuración del sidebar */
   configuracionSidebar: ConfiguracionSidebar | null = null;
   
@@ -32,7 +43,8 @@ export class DashboardPageComponent implements OnInit, OnDestroy {
     private servicioAuth: AuthService,
     private router: Router,
     private cdr: ChangeDetectorRef,
-    private sidebarConfigService: SidebarConfigService
+    private sidebarConfigService: SidebarConfigService,
+    private dashboardService: DashboardService
   ) {}
 
   ngOnInit(): void {
@@ -48,6 +60,11 @@ export class DashboardPageComponent implements OnInit, OnDestroy {
         } else {
           // Configurar el sidebar con los datos del agente usando el servicio global
           this.sidebarConfigService.configurarSidebar(agente);
+
+          // Los indicadores se cargan una sola vez por agente
+          if (this.resumenCartera?.agente_id !== agente.id) {
+            this.cargarResumenCartera(agente.id);
+          }
         }
         
         this.cdr.markForCheck();
@@ -65,7 +82,26 @@ export class DashboardPageComponent implements OnInit, OnDestroy {
     this.sidebarConfigService.actualizarRutaActiva();
   }
 
-
+  /**
+   * Carga los indicadores precalculados de la cartera del agente
+   * @param agenteId ID del agente
+   */
+  private cargarResumenCartera(agenteId: number): void {
+    this.dashboardService.obtenerDashboardAgente(agenteId)
+      .pipe(takeUntil(this.destruir$))
+      .subscribe({
+        next: dashboard => {
+          this.resumenCartera = dashboard.resumen;
+          this.ventanasDashboard = dashboard.ventanas;
+          this.errorResumen = null;
+          this.cdr.markForCheck();
+        },
+        error: error => {
+          this.errorResumen = error.message;
+          this.cdr.markForCheck();
+        }
+      });
+  }
 
   /**
    * Maneja la selección de un elemento del menú
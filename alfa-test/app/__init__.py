@@ -2,6 +2,7 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 from flasgger import Swagger
+from datetime import datetime
 from app.config import Config
 
 # Inicializar extensiones
@@ -23,7 +24,7 @@ def create_app():
             }
         ],
         "static_url_path": "/flasgger_static",
-        "swagger_ui": True,
+        "swagger_ui": app.config['SWAGGER_UI'],
         "specs_route": "/docs/"
     }
     
@@ -79,6 +80,22 @@ def create_app():
             {
                 "name": "Pólizas",
                 "description": "Gestión de pólizas de seguro y pagos"
+            },
+            {
+                "name": "Cartera",
+                "description": "Reportes de cartera por cobrar"
+            },
+            {
+                "name": "Trabajos",
+                "description": "Tareas en segundo plano y su estado"
+            },
+            {
+                "name": "Eventos",
+                "description": "Notificaciones en vivo de pólizas y pagos (Server-Sent Events)"
+            },
+            {
+                "name": "Batch",
+                "description": "Varias consultas GET en una sola solicitud"
             }
         ]
     }
@@ -95,33 +112,48 @@ def create_app():
     db.init_app(app)
     Swagger(app, config=swagger_config, template=swagger_template)
     
-    # Importar modelos para que SQLAlchemy los reconozca
-    from app.models import (
-        Agente, Cliente, AgenteCliente, 
-        Bien, Hogar, Vehiculo, Copropiedad, OtroBien, ClienteBien,
-        Aseguradora, AseguradoraDeducible, AseguradoraCobertura, AseguradoraFinanciacion,
-        OpcionSeguro, OpcionHogar, OpcionVehiculo, OpcionCopropiedad, OpcionOtro,
-        Poliza, PolizaPlanPago
-    )
+    # Métricas de ejecución: hooks de latencia por endpoint y endpoint /metrics
+    from app.utils.metricas import init_metricas
+    init_metricas(app, db)
     
-    # Registrar blueprints
-    from app.routes.agente_routes import agente_bp
-    from app.routes.cliente_routes import cliente_bp
-    from app.routes.asignacion_routes import asignacion_bp
-    from app.routes.bien_routes import bien_bp
-    from app.routes.aseguradora_routes import aseguradora_bp
-    from app.routes.opcion_seguro_routes import opcion_seguro_bp
-    from app.routes.poliza_routes import poliza_bp
-    from app.routes.auth_routes import auth_bp
+    # Rollups de cartera por agente mantenidos al confirmar cada transacción
+    from app.utils.resumenes import init_resumenes
+    init_resumenes(app, db)
     
-    app.register_blueprint(agente_bp)
-    app.register_blueprint(cliente_bp)
-    app.register_blueprint(asignacion_bp)
-    app.register_blueprint(bien_bp)
-    app.register_blueprint(aseguradora_bp)
-    app.register_blueprint(opcion_seguro_bp)
-    app.register_blueprint(poliza_bp)
-    app.register_blueprint(auth_bp)
+    # Caché de respuestas GET invalidada por etiquetas al confirmar escrituras
+    from app.utils.cache import init_cache
+    init_cache(app, db)
+    
+    # Eventos de dominio: outbox escrito en cada transacción y broker del flujo SSE
+    from app.utils.eventos import init_eventos
+    from app.utils.outbox import init_outbox
+    init_eventos(app)
+    init_outbox(app, db)
+    
+    # Registro de cambios por agente para la sincronización incremental
+    from app.utils.sincronizacion import init_sincronizacion
+    init_sincronizacion(app, db)
+    
+    # Cola de trabajos en segundo plano (el backend se conecta en el primer uso)
+    from app.jobs import init_jobs
+    init_jobs(app, db)
+    
+    # Comandos de mantenimiento (flask --app run ...)
+    from app.cli import init_cli
+    init_cli(app)
+    
+    # Con un manifiesto de rutas vigente (build_openapi.py) los módulos de rutas,
+    # y con ellos los modelos, se importan en la primera solicitud que los usa
+    from app.utils.openapi import cargar_manifiesto_rutas, registrar_rutas_perezosas, usar_spec_estatica
+    manifiesto_rutas = cargar_manifiesto_rutas(app) if app.config['RUTAS_PEREZOSAS'] else None
+    
+    if manifiesto_rutas:
+        registrar_rutas_perezosas(app, manifiesto_rutas)
+    else:
+        _registrar_blueprints(app)
+    
+    # Servir la especificación precompilada en lugar de parsear los docstrings
+    usar_spec_estatica(app)
     
     # Endpoint de salud y verificación CORS
     @app.route('/api/health', methods=['GET'])
@@ -157,10 +189,51 @@ def create_app():
             "message": "API de Seguros funcionando correctamente",
             "cors_enabled": True,
             "allowed_origins": app.config.get('CORS_ORIGINS', []),
-            "timestamp": "2024-01-01T00:00:00Z"
+            "timestamp": datetime.utcnow().isoformat()
         }, 200
     
     # No crear tablas automáticamente - ya existen en MySQL
     # Las tablas se crean mediante el script database/init.sql
     
-    return app 
\ No newline at end of file
+    return app
+
+
+def _registrar_blueprints(app):
+    """Importar los modelos y registrar todos los blueprints al iniciar"""
+    # Importar modelos para que SQLAlchemy los reconozca
+    from app.models import (
+        Agente, Cliente, AgenteCliente, 
+        Bien, Hogar, Vehiculo, Copropiedad, OtroBien, ClienteBien,
+        Aseguradora, AseguradoraDeducible, AseguradoraCobertura, AseguradoraFinanciacion,
+        OpcionSeguro, OpcionHogar, OpcionVehiculo, OpcionCopropiedad, OpcionOtro,
+        Poliza, PolizaPlanPago
+    )
+    
+    # Registrar blueprints
+    from app.routes.agente_routes import agente_bp
+    from app.routes.cliente_routes import cliente_bp
+    from app.routes.asignacion_routes import asignacion_bp
+    from app.routes.bien_routes import bien_bp
+    from app.routes.aseguradora_routes import aseguradora_bp
+    from app.routes.opcion_seguro_routes import opcion_seguro_bp
+    from app.routes.poliza_routes import poliza_bp
+    from app.routes.auth_routes import auth_bp
+    from app.routes.health_routes import health_bp
+    from app.routes.job_routes import job_bp
+    from app.routes.cartera_routes import cartera_bp
+    from app.routes.batch_routes import batch_bp
+    from app.routes.evento_routes import evento_bp
+    
+    app.register_blueprint(agente_bp)
+    app.register_blueprint(cliente_bp)
+    app.register_blueprint(asignacion_bp)
+    app.register_blueprint(bien_bp)
+    app.register_blueprint(aseguradora_bp)
+    app.register_blueprint(opcion_seguro_bp)
+    app.register_blueprint(poliza_bp)
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(health_bp)
+    app.register_blueprint(job_bp)
+    app.register_blueprint(cartera_bp)
+    app.register_blueprint(batch_bp)
+    app.register_blueprint(evento_bp)
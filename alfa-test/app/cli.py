@@ -0,0 +1,209 @@
+"""
+Comandos de mantenimiento (flask --app run <comando>).
+"""
+import click
+
+
+def init_cli(app):
+    """Registrar los comandos de la aplicación"""
+
+    @app.cli.command('resumenes-agentes')
+    @click.option('--agente-id', 'agente_ids', type=int, multiple=True,
+                  help='Recalcular solo estos agentes (por defecto, todos)')
+    def resumenes_agentes(agente_ids):
+        """Recalcular agente_resumen_cartera (tarea nocturna)"""
+        from app import db
+        from app.services.dashboard_service import DashboardService
+
+        total = DashboardService.recalcular_resumenes(list(agente_ids) or None)
+        db.session.commit()
+        click.echo(f"Resúmenes de cartera recalculados: {total} agentes")
+
+    @app.cli.command('renovaciones')
+    @click.option('--dias', type=int, default=None,
+                  help='Días de anticipación (por defecto RENOVACION_DIAS_ANTICIPACION)')
+    @click.option('--lote', type=int, default=None,
+                  help='Pólizas por transacción (por defecto RENOVACION_TAMANO_LOTE)')
+    @click.option('--reiniciar', is_flag=True,
+                  help='Iniciar una ejecución nueva en lugar de reanudar la pendiente')
+    def renovaciones(dias, lote, reiniciar):
+        """Generar borradores de renovación (tarea nocturna)"""
+        from app.services.renovacion_service import RenovacionService
+
+        ejecucion = RenovacionService.ejecutar_renovaciones(
+            dias=dias or app.config['RENOVACION_DIAS_ANTICIPACION'],
+            tamano_lote=lote or app.config['RENOVACION_TAMANO_LOTE'],
+            reiniciar=reiniciar
+        )
+        click.echo(
+            f"Ejecución {ejecucion.id} ({ejecucion.estado}): "
+            f"{ejecucion.polizas_procesadas} pólizas, {ejecucion.opciones_generadas} borradores"
+        )
+        if ejecucion.estado != 'Completada':
+            raise click.ClickException(ejecucion.error or 'Ejecución incompleta')
+
+    @app.cli.command('worker')
+    @click.option('--cola', 'colas', multiple=True, default=('default',),
+                  help='Colas a atender (se puede repetir)')
+    @click.option('--procesos', type=int, default=None,
+                  help='Procesos worker (por defecto JOBS_PROCESOS)')
+    @click.option('--una-vez', is_flag=True,
+                  help='Terminar cuando no queden trabajos disponibles')
+    def worker(colas, procesos, una_vez):
+        """Ejecutar los trabajos en segundo plano"""
+        from app.jobs.worker import iniciar_workers
+
+        procesos = procesos or app.config['JOBS_PROCESOS']
+        click.echo(f"Worker ({app.config['JOBS_BACKEND']}) atendiendo {', '.join(colas)} con {procesos} proceso(s)")
+        procesados = iniciar_workers(app, colas, procesos=procesos, una_vez=una_vez)
+        if procesados is not None:
+            click.echo(f"Trabajos procesados: {procesados}")
+
+    @app.cli.command('relay-eventos')
+    @click.option('--una-vez', is_flag=True,
+                  help='Terminar cuando no queden eventos pendientes')
+    def relay_eventos(una_vez):
+        """Publicar los eventos del outbox (con EVENTOS_RELAY_EN_PROCESO=false)"""
+        import signal
+        from app.utils.outbox import RelayEventos
+
+        if app.config['EVENTOS_BACKEND'] == 'memoria':
+            raise click.ClickException(
+                "Con EVENTOS_BACKEND=memoria los eventos solo llegan a /api/eventos desde el relay "
+                "del proceso de la API; para un relay aparte use EVENTOS_BACKEND=redis (o ninguno)"
+            )
+        relay = RelayEventos(app)
+        signal.signal(signal.SIGTERM, lambda *_: relay.detener.set())
+        signal.signal(signal.SIGINT, lambda *_: relay.detener.set())
+        click.echo(f"Relay de eventos ({app.config['EVENTOS_BACKEND']})")
+        publicados = relay.ejecutar(una_vez=una_vez)
+        click.echo(f"Eventos publicados: {publicados}")
+
+    @app.cli.command('recordatorios-preparar')
+    @click.option('--dias', type=int, default=None,
+                  help='Días de anticipación (por defecto RECORDATORIOS_DIAS_ANTICIPACION)')
+    def recordatorios_preparar(dias):
+        """Generar links de pago y encolar recordatorios (tarea de cada mañana)"""
+        from app.services.recordatorio_service import RecordatorioService
+
+        totales = RecordatorioService.preparar_recordatorios(
+            dias=dias or app.config['RECORDATORIOS_DIAS_ANTICIPACION'],
+            tamano_lote=app.config['RECORDATORIOS_TAMANO_LOTE'],
+            base_url=app.config['PORTAL_PAGOS_URL']
+        )
+        click.echo(
+            f"Cuotas: {totales['cuotas']}, links generados: {totales['links_generados']}, "
+            f"recordatorios encolados: {totales['recordatorios_encolados']}"
+        )
+
+    @app.cli.command('recordatorios-enviar')
+    @click.option('--concurrencia', type=int, default=None,
+                  help='Envíos simultáneos (por defecto RECORDATORIOS_CONCURRENCIA)')
+    def recordatorios_enviar(concurrencia):
+        """Enviar los recordatorios pendientes del outbox"""
+        from app.services.recordatorio_service import RecordatorioService
+
+        totales = RecordatorioService.despachar_recordatorios(
+            app.config,
+            concurrencia=concurrencia or app.config['RECORDATORIOS_CONCURRENCIA'],
+            max_intentos=app.config['RECORDATORIOS_MAX_INTENTOS']
+        )
+        click.echo(
+            f"Enviados: {totales['enviados']}, reintentos pendientes: {totales['reintentos']}, "
+            f"fallidos: {totales['fallidos']}"
+        )
+
+    @app.cli.command('conciliar-extracto')
+    @click.argument('extracto', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--reporte', type=click.Path(dir_okay=False), default=None,
+                  help='CSV de resultados (por defecto <extracto>.conciliacion.csv)')
+    @click.option('--simular', is_flag=True,
+                  help='Cruzar y generar el reporte sin aplicar los pagos')
+    def conciliar_extracto(extracto, reporte, simular):
+        """Aplicar los pagos de un extracto bancario (CSV)"""
+        from decimal import Decimal
+        from app.services.conciliacion_service import ConciliacionService
+
+        totales = ConciliacionService.conciliar_extracto(
+            extracto,
+            reporte or f'{extracto}.conciliacion.csv',
+            tamano_lote=app.config['CONCILIACION_TAMANO_LOTE'],
+            dias_ventana=app.config['CONCILIACION_DIAS_VENTANA'],
+            tolerancia=Decimal(app.config['CONCILIACION_TOLERANCIA']),
+            simular=simular
+        )
+        click.echo(
+            f"Líneas: {totales['lineas']}, conciliadas: {totales['conciliadas']}, "
+            f"sin conciliar: {totales['sin_conciliar']}, duplicadas: {totales['duplicadas']}, "
+            f"pólizas actualizadas: {totales['polizas_actualizadas']}"
+        )
+        click.echo(f"Reporte: {totales['reporte']}")
+
+    @app.cli.command('mora-snapshot')
+    @click.option('--fecha', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+                  help='Fecha de corte AAAA-MM-DD (por defecto hoy)')
+    def mora_snapshot(fecha):
+        """Guardar la mora causada por póliza (tarea diaria)"""
+        from app.services.mora_service import MoraService
+
+        resumen = MoraService.generar_snapshot(fecha.date() if fecha else None)
+        click.echo(
+            f"Mora al {resumen['fecha_corte']}: {resumen['polizas_en_mora']} pólizas, "
+            f"{resumen['cuotas_vencidas']} cuotas, valor {resumen['valor_mora']:,.2f}"
+        )
+
+    @app.cli.command('comisiones-reconstruir')
+    def comisiones_reconstruir():
+        """Cargar al libro de comisiones las pólizas y pagos anteriores a él"""
+        from app.services.comision_service import ComisionService
+
+        resumen = ComisionService.reconstruir_libro()
+        click.echo(
+            f"Movimientos agregados: {resumen['causaciones']} causaciones, "
+            f"{resumen['recaudos']} recaudos, {resumen['reversos']} reversos"
+        )
+
+    @app.cli.command('comisiones-liquidar')
+    @click.option('--periodo', default=None, help='Mes AAAA-MM (por defecto el mes anterior)')
+    @click.option('--cerrar', is_flag=True, help='Cerrar las liquidaciones del mes')
+    def comisiones_liquidar(periodo, cerrar):
+        """Generar las liquidaciones de comisión por aseguradora de un mes"""
+        from app.services.comision_service import ComisionService
+
+        periodo = periodo or ComisionService.periodo_anterior()
+        resultado, status_code = ComisionService.obtener_liquidaciones(periodo, guardar=True)
+        if status_code != 200:
+            raise click.ClickException(resultado['error'])
+        for liquidacion in resultado['liquidaciones']:
+            estado = liquidacion['estado']
+            if cerrar and estado == 'Abierta':
+                cierre, status_code = ComisionService.cerrar_liquidacion(liquidacion['aseguradora_id'], periodo)
+                if status_code != 200:
+                    raise click.ClickException(cierre['error'])
+                estado = 'Cerrada'
+            click.echo(
+                f"{liquidacion['aseguradora']}: causado {liquidacion['valor_causado']:,.2f}, "
+                f"recaudado {liquidacion['valor_recaudado']:,.2f}, "
+                f"reversado {liquidacion['valor_reversado']:,.2f} ({estado})"
+            )
+        click.echo(f"{len(resultado['liquidaciones'])} liquidaciones del período {periodo}")
+
+    @app.cli.command('cartera-snapshot')
+    @click.option('--fecha', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+                  help='Fecha del snapshot AAAA-MM-DD (por defecto hoy)')
+    @click.option('--desde', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+                  help='Generar también los días desde esta fecha hasta --fecha')
+    def cartera_snapshot(fecha, desde):
+        """Guardar las cifras diarias de la cartera para las series de tiempo"""
+        from datetime import date, timedelta
+        from app.services.cartera_service import CarteraService
+
+        hasta = fecha.date() if fecha else date.today()
+        dia = desde.date() if desde else hasta
+        while dia <= hasta:
+            resumen = CarteraService.generar_snapshot(dia)
+            click.echo(
+                f"Cartera al {resumen['fecha']}: {resumen['polizas_vigentes']:.0f} pólizas vigentes, "
+                f"prima {resumen['prima_vigente']:,.2f}, vencido {resumen['valor_vencido']:,.2f}"
+            )
+            dia += timedelta(days=1)
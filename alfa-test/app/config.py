@@ -4,6 +4,8 @@ from dotenv import load_dotenv
 # Cargar variables de entorno desde .env
 load_dotenv()
 
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 class Config:
     """Configuración base"""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'clave-secreta-por-defecto'
@@ -46,6 +48,118 @@ class Config:
     )
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Versión mínima del esquema (database/migrations) que requiere el código
+    SCHEMA_VERSION_REQUERIDA = 16
+
+    # Encolar el recálculo de agente_resumen_cartera al confirmar cambios de asignaciones, pólizas y pagos
+    RESUMENES_INCREMENTALES = (os.environ.get('RESUMENES_INCREMENTALES') or 'true').lower() == 'true'
+
+    # Motor de renovaciones: días de anticipación y pólizas por transacción
+    RENOVACION_DIAS_ANTICIPACION = int(os.environ.get('RENOVACION_DIAS_ANTICIPACION') or 45)
+    RENOVACION_TAMANO_LOTE = int(os.environ.get('RENOVACION_TAMANO_LOTE') or 500)
+
+    # Portal de pagos y recordatorios de cuotas por vencer
+    PORTAL_PAGOS_URL = os.environ.get('PORTAL_PAGOS_URL') or 'https://pagos.aseguradora.com'
+    RECORDATORIOS_DIAS_ANTICIPACION = int(os.environ.get('RECORDATORIOS_DIAS_ANTICIPACION') or 7)
+    RECORDATORIOS_TAMANO_LOTE = int(os.environ.get('RECORDATORIOS_TAMANO_LOTE') or 1000)
+    # Enviador del outbox: 'archivo' (escribe .eml en RECORDATORIOS_DIRECTORIO) o 'smtp'
+    RECORDATORIOS_ENVIADOR = (os.environ.get('RECORDATORIOS_ENVIADOR') or 'archivo').lower()
+    RECORDATORIOS_DIRECTORIO = os.environ.get('RECORDATORIOS_DIRECTORIO') or os.path.join(BASE_DIR, 'instance', 'recordatorios')
+    RECORDATORIOS_REMITENTE = os.environ.get('RECORDATORIOS_REMITENTE') or 'cobranza@alfabroker.com'
+    RECORDATORIOS_CONCURRENCIA = int(os.environ.get('RECORDATORIOS_CONCURRENCIA') or 4)
+    RECORDATORIOS_MAX_INTENTOS = int(os.environ.get('RECORDATORIOS_MAX_INTENTOS') or 5)
+    SMTP_HOST = os.environ.get('SMTP_HOST') or 'localhost'
+    SMTP_PORT = int(os.environ.get('SMTP_PORT') or 25)
+    SMTP_USUARIO = os.environ.get('SMTP_USUARIO')
+    SMTP_CLAVE = os.environ.get('SMTP_CLAVE')
+    SMTP_TLS = (os.environ.get('SMTP_TLS') or 'false').lower() == 'true'
+
+    # Consecutivos reservados por proceso en cada viaje a la tabla secuencias
+    SECUENCIAS_TAMANO_BLOQUE = int(os.environ.get('SECUENCIAS_TAMANO_BLOQUE') or 1000)
+
+    # Idempotency-Key: horas que se conserva la respuesta y segundos tras los
+    # cuales una solicitud que quedó 'En proceso' se considera abandonada
+    IDEMPOTENCIA_TTL_HORAS = int(os.environ.get('IDEMPOTENCIA_TTL_HORAS') or 24)
+    IDEMPOTENCIA_BLOQUEO_SEGUNDOS = int(os.environ.get('IDEMPOTENCIA_BLOQUEO_SEGUNDOS') or 60)
+
+    # Conciliación de extractos bancarios: líneas por transacción, días entre
+    # pago y vencimiento al cruzar solo por valor, y faltante aceptado por cuota
+    CONCILIACION_TAMANO_LOTE = int(os.environ.get('CONCILIACION_TAMANO_LOTE') or 1000)
+    CONCILIACION_DIAS_VENTANA = int(os.environ.get('CONCILIACION_DIAS_VENTANA') or 5)
+    CONCILIACION_TOLERANCIA = os.environ.get('CONCILIACION_TOLERANCIA') or '1'
+
+    # Caché de respuestas GET (app.utils.cache): 'memoria' (LRU por proceso),
+    # 'redis' (compartida entre workers) o 'ninguno'
+    CACHE_RESPUESTAS_BACKEND = (os.environ.get('CACHE_RESPUESTAS_BACKEND') or 'memoria').lower()
+    CACHE_RESPUESTAS_REDIS_URL = os.environ.get('CACHE_RESPUESTAS_REDIS_URL') or 'redis://localhost:6379/1'
+    CACHE_RESPUESTAS_MAX_ENTRADAS = int(os.environ.get('CACHE_RESPUESTAS_MAX_ENTRADAS') or 2000)
+    CACHE_RESPUESTAS_TTL_SEGUNDOS = int(os.environ.get('CACHE_RESPUESTAS_TTL_SEGUNDOS') or 300)
+
+    # Eventos de dominio y /api/eventos (app.utils.eventos): 'memoria' (solo el
+    # proceso que confirma), 'redis' (pub/sub entre workers) o 'ninguno'
+    EVENTOS_BACKEND = (os.environ.get('EVENTOS_BACKEND') or 'memoria').lower()
+    EVENTOS_REDIS_URL = os.environ.get('EVENTOS_REDIS_URL') or 'redis://localhost:6379/2'
+    EVENTOS_HISTORIAL = int(os.environ.get('EVENTOS_HISTORIAL') or 1000)
+    EVENTOS_COLA_SUSCRIPTOR = int(os.environ.get('EVENTOS_COLA_SUSCRIPTOR') or 200)
+    EVENTOS_KEEPALIVE_SEGUNDOS = int(os.environ.get('EVENTOS_KEEPALIVE_SEGUNDOS') or 15)
+    # Duración máxima de una conexión; el navegador reconecta con Last-Event-ID
+    EVENTOS_DURACION_MAXIMA_SEGUNDOS = int(os.environ.get('EVENTOS_DURACION_MAXIMA_SEGUNDOS') or 300)
+    # Relay del outbox de eventos (app.utils.outbox): un hilo en el proceso de
+    # la API (nunca en el worker ni la CLI) o aparte con
+    # `flask --app run relay-eventos` (EVENTOS_RELAY_EN_PROCESO=false, backend redis)
+    EVENTOS_RELAY_EN_PROCESO = (os.environ.get('EVENTOS_RELAY_EN_PROCESO') or 'true').lower() == 'true'
+    EVENTOS_RELAY_TAMANO_LOTE = int(os.environ.get('EVENTOS_RELAY_TAMANO_LOTE') or 200)
+    EVENTOS_RELAY_ESPERA_SEGUNDOS = float(os.environ.get('EVENTOS_RELAY_ESPERA_SEGUNDOS') or 2)
+    EVENTOS_RELAY_MAX_INTENTOS = int(os.environ.get('EVENTOS_RELAY_MAX_INTENTOS') or 5)
+    # Módulos que registran suscriptores con @suscriptor (separados por coma)
+    EVENTOS_SUSCRIPTORES = [m.strip() for m in (os.environ.get('EVENTOS_SUSCRIPTORES') or '').split(',') if m.strip()]
+    EVENTOS_OUTBOX_RETENCION_DIAS = int(os.environ.get('EVENTOS_OUTBOX_RETENCION_DIAS') or 7)
+
+    # GET /api/agentes/<id>/sync: días que se conservan los cambios (validez de
+    # un token) y segundos que un cambio espera antes de entregarse, para que
+    # una transacción aún sin confirmar no quede detrás del token
+    SYNC_RETENCION_DIAS = int(os.environ.get('SYNC_RETENCION_DIAS') or 30)
+    SYNC_MARGEN_SEGUNDOS = int(os.environ.get('SYNC_MARGEN_SEGUNDOS') or 5)
+
+    # Trabajos en segundo plano (app.jobs): backend 'sql' (tabla trabajos) o 'redis'
+    JOBS_BACKEND = (os.environ.get('JOBS_BACKEND') or 'sql').lower()
+    JOBS_REDIS_URL = os.environ.get('JOBS_REDIS_URL') or 'redis://localhost:6379/0'
+    JOBS_MAX_INTENTOS = int(os.environ.get('JOBS_MAX_INTENTOS') or 3)
+    # Reintento n: JOBS_BACKOFF_SEGUNDOS * 2^(n-1), con tope JOBS_BACKOFF_MAXIMO_SEGUNDOS
+    JOBS_BACKOFF_SEGUNDOS = int(os.environ.get('JOBS_BACKOFF_SEGUNDOS') or 30)
+    JOBS_BACKOFF_MAXIMO_SEGUNDOS = int(os.environ.get('JOBS_BACKOFF_MAXIMO_SEGUNDOS') or 3600)
+    # Tiempo sin reportar progreso tras el cual un trabajo se considera abandonado
+    JOBS_VISIBILIDAD_SEGUNDOS = int(os.environ.get('JOBS_VISIBILIDAD_SEGUNDOS') or 900)
+    JOBS_ESPERA_SEGUNDOS = float(os.environ.get('JOBS_ESPERA_SEGUNDOS') or 2)
+    JOBS_PROCESOS = int(os.environ.get('JOBS_PROCESOS') or 1)
+    # Días que se conservan los resultados en Redis
+    JOBS_RESULTADO_TTL_DIAS = int(os.environ.get('JOBS_RESULTADO_TTL_DIAS') or 7)
+
+    # POST /api/batch: subsolicitudes GET por lote e hilos que las ejecutan.
+    # Por defecto 1: en orden, compartiendo la sesión de base de datos del lote.
+    # Con más hilos cada uno toma su propia conexión del pool (opcional)
+    BATCH_MAX_SOLICITUDES = int(os.environ.get('BATCH_MAX_SOLICITUDES') or 20)
+    BATCH_CONCURRENCIA = int(os.environ.get('BATCH_CONCURRENCIA') or 1)
+
+    # Segundos que se reutiliza el resultado de /api/health/ready
+    HEALTH_CACHE_SEGUNDOS = int(os.environ.get('HEALTH_CACHE_SEGUNDOS') or 5)
+
+    # Swagger UI en /docs/ (desactivable en producción; la especificación sigue disponible)
+    SWAGGER_UI = (os.environ.get('SWAGGER_UI') or 'true').lower() == 'true'
+
+    # Artefactos generados por build_openapi.py (especificación y manifiesto de rutas)
+    OPENAPI_BUILD_DIR = os.environ.get('OPENAPI_BUILD_DIR') or os.path.join(BASE_DIR, 'build')
+    OPENAPI_CACHE_SEGUNDOS = 3600
+
+    # Registrar las rutas desde el manifiesto e importar cada módulo en su primera solicitud
+    RUTAS_PEREZOSAS = (os.environ.get('RUTAS_PEREZOSAS') or 'false').lower() == 'true'
+
+    # Métricas de ejecución (/metrics en formato Prometheus)
+    METRICS_ENABLED = (os.environ.get('METRICS_ENABLED') or 'true').lower() == 'true'
+
+    # Operaciones bcrypt simultáneas (por defecto, una por CPU)
+    BCRYPT_MAX_CONCURRENCIA = int(os.environ.get('BCRYPT_MAX_CONCURRENCIA') or os.cpu_count() or 2)
     SQLALCHEMY_ENGINE_OPTIONS = {
         'pool_pre_ping': True,
         'pool_recycle': 300,
@@ -0,0 +1,131 @@
+"""
+Trabajos en segundo plano.
+
+Las operaciones largas (reportes, barridos de vencimientos, renovaciones,
+recálculos) se definen como tareas y se encolan desde los servicios; los
+workers (flask --app run worker) las ejecutan fuera del ciclo de la solicitud.
+
+    from app.jobs import encolar
+    trabajo_id = encolar('reporte_cartera')
+
+Las tareas se definen con el decorador `tarea` en app/jobs/tareas.py y
+reciben como primer argumento un ContextoTrabajo para reportar progreso.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import importlib
+import random
+
+from flask import current_app
+
+from app.jobs.backends import BackendRedis, BackendSQL, serializar_trabajo
+
+_REGISTRO = {}
+_MODULOS_TAREAS = ('app.jobs.tareas',)
+
+
+@dataclass(frozen=True)
+class DefinicionTarea:
+    nombre: str
+    funcion: object
+    cola: str = 'default'
+    max_intentos: int = None
+    # Las tareas públicas se pueden encolar desde POST /api/jobs
+    publica: bool = False
+
+
+def tarea(nombre, cola='default', max_intentos=None, publica=False):
+    """Registrar una función como tarea en segundo plano"""
+    def decorador(funcion):
+        _REGISTRO[nombre] = DefinicionTarea(nombre, funcion, cola, max_intentos, publica)
+        return funcion
+    return decorador
+
+
+def obtener_definicion(nombre):
+    """Definición registrada de una tarea (None si no existe)"""
+    for modulo in _MODULOS_TAREAS:
+        importlib.import_module(modulo)
+    return _REGISTRO.get(nombre)
+
+
+def tareas_publicas():
+    for modulo in _MODULOS_TAREAS:
+        importlib.import_module(modulo)
+    return sorted(nombre for nombre, definicion in _REGISTRO.items() if definicion.publica)
+
+
+def init_jobs(app, db):
+    """Preparar el backend configurado (se crea en el primer uso)"""
+    backend = app.config['JOBS_BACKEND']
+    if backend not in ('sql', 'redis'):
+        raise ValueError(f"JOBS_BACKEND no válido: {backend} (use 'sql' o 'redis')")
+    app.extensions['jobs'] = {'db': db, 'backend': None}
+
+
+def obtener_backend(app=None):
+    app = app or current_app._get_current_object()
+    estado = app.extensions['jobs']
+    if estado['backend'] is None:
+        if app.config['JOBS_BACKEND'] == 'redis':
+            estado['backend'] = BackendRedis(
+                app.config['JOBS_REDIS_URL'],
+                app.config['JOBS_RESULTADO_TTL_DIAS'] * 86400
+            )
+        else:
+            estado['backend'] = BackendSQL(estado['db'])
+    return estado['backend']
+
+
+def encolar(nombre, parametros=None, cola=None, retraso_segundos=0, en_transaccion=False):
+    """
+    Encolar una tarea registrada
+
+    Args:
+        parametros: argumentos de la tarea (deben ser serializables a JSON)
+        en_transaccion: con el backend SQL, confirmar el trabajo junto con la
+            transacción del llamador en lugar de inmediatamente
+
+    Returns:
+        int: id del trabajo
+    """
+    definicion = obtener_definicion(nombre)
+    if definicion is None:
+        raise ValueError(f'Tarea no registrada: {nombre}')
+    ejecutar_despues = datetime.utcnow() + timedelta(seconds=retraso_segundos) if retraso_segundos else None
+    return obtener_backend().encolar(
+        nombre,
+        parametros or {},
+        cola or definicion.cola,
+        definicion.max_intentos or current_app.config['JOBS_MAX_INTENTOS'],
+        ejecutar_despues,
+        en_transaccion=en_transaccion
+    )
+
+
+def obtener_trabajo(trabajo_id):
+    """Estado de un trabajo como diccionario serializable (None si no existe)"""
+    trabajo = obtener_backend().obtener(trabajo_id)
+    return serializar_trabajo(trabajo) if trabajo else None
+
+
+def calcular_espera_reintento(intento, base_segundos, maximo_segundos):
+    """Backoff exponencial con jitter para el reintento número `intento`"""
+    espera = min(base_segundos * (2 ** (intento - 1)), maximo_segundos)
+    return espera * random.uniform(0.8, 1.2)
+
+
+class ContextoTrabajo:
+    """Datos del trabajo en curso que recibe cada tarea"""
+
+    def __init__(self, backend, trabajo, visibilidad_segundos):
+        self._backend = backend
+        self._visibilidad = visibilidad_segundos
+        self.id = trabajo['id']
+        self.intento = trabajo['intentos']
+        self.max_intentos = trabajo['max_intentos']
+
+    def progreso(self, porcentaje, mensaje=None):
+        """Reportar el avance (0-100); también renueva el bloqueo del trabajo"""
+        porcentaje = max(0, min(100, int(porcentaje)))
+        self._backend.reportar_progreso(self.id, porcentaje, mensaje, self._visibilidad)
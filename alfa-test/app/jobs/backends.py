@@ -0,0 +1,332 @@
+"""
+Backends de la cola de trabajos.
+
+BackendSQL usa la tabla trabajos (MySQL o SQLite) y no requiere servicios
+adicionales. BackendRedis guarda cada trabajo en un hash y las colas en
+sorted sets ordenados por la fecha en que el trabajo puede ejecutarse;
+requiere el paquete opcional `redis`.
+
+Todos los backends retornan los trabajos como diccionarios con las mismas
+llaves que Trabajo.
+"""
+import json
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, select
+
+PENDIENTE = 'Pendiente'
+EN_EJECUCION = 'En ejecución'
+COMPLETADO = 'Completado'
+FALLIDO = 'Fallido'
+
+# Error de los trabajos cuyo bloqueo vence cuando ya no les quedan intentos
+ERROR_ABANDONADO = 'El bloqueo venció en el último intento: el worker no terminó el trabajo'
+
+
+def _iso(valor):
+    return valor.isoformat() if isinstance(valor, datetime) else valor
+
+
+class BackendSQL:
+    """Cola sobre la tabla trabajos con reclamación por SELECT ... FOR UPDATE SKIP LOCKED"""
+
+    def __init__(self, db):
+        self.db = db
+
+    @property
+    def _tabla(self):
+        from app.models.trabajo_model import Trabajo
+        return Trabajo.__table__
+
+    def encolar(self, tarea, parametros, cola, max_intentos, ejecutar_despues=None, en_transaccion=False):
+        """
+        Registrar un trabajo pendiente
+
+        Con en_transaccion=True el trabajo se inserta con la sesión actual y se
+        confirma junto con los cambios del llamador (no existe si hay rollback).
+        """
+        ahora = datetime.utcnow()
+        fila = {
+            'tarea': tarea,
+            'cola': cola,
+            'parametros': parametros,
+            'estado': PENDIENTE,
+            'intentos': 0,
+            'max_intentos': max_intentos,
+            'ejecutar_despues': ejecutar_despues or ahora,
+            'progreso': 0,
+            'creado_en': ahora,
+            'actualizado_en': ahora
+        }
+        if en_transaccion:
+            resultado = self.db.session.execute(self._tabla.insert().values(**fila))
+        else:
+            with self.db.engine.begin() as conexion:
+                resultado = conexion.execute(self._tabla.insert().values(**fila))
+        return resultado.inserted_primary_key[0]
+
+    def reclamar(self, colas, worker, visibilidad_segundos):
+        """Tomar el siguiente trabajo disponible de las colas (None si no hay)"""
+        tabla = self._tabla
+        ahora = datetime.utcnow()
+        abandonado = and_(tabla.c.estado == EN_EJECUCION, tabla.c.bloqueado_hasta < ahora)
+        disponible = and_(
+            tabla.c.cola.in_(colas),
+            or_(
+                and_(tabla.c.estado == PENDIENTE, tabla.c.ejecutar_despues <= ahora),
+                and_(abandonado, tabla.c.intentos < tabla.c.max_intentos)
+            )
+        )
+        with self.db.engine.begin() as conexion:
+            # Un trabajo abandonado sin intentos restantes no se reclama: queda fallido
+            conexion.execute(
+                tabla.update()
+                .where(tabla.c.cola.in_(colas), abandonado, tabla.c.intentos >= tabla.c.max_intentos)
+                .values(estado=FALLIDO, error=ERROR_ABANDONADO, bloqueado_hasta=None,
+                        finalizado_en=ahora, actualizado_en=ahora)
+            )
+            # SKIP LOCKED: los workers concurrentes no se bloquean entre sí
+            trabajo_id = conexion.execute(
+                select(tabla.c.id).where(disponible)
+                .order_by(tabla.c.ejecutar_despues, tabla.c.id)
+                .limit(1).with_for_update(skip_locked=True)
+            ).scalar()
+            if trabajo_id is None:
+                return None
+            # La condición se repite para los motores que ignoran FOR UPDATE (SQLite)
+            actualizadas = conexion.execute(
+                tabla.update().where(tabla.c.id == trabajo_id).where(disponible).values(
+                    estado=EN_EJECUCION,
+                    worker=worker,
+                    intentos=tabla.c.intentos + 1,
+                    bloqueado_hasta=ahora + timedelta(seconds=visibilidad_segundos),
+                    iniciado_en=ahora,
+                    actualizado_en=ahora
+                )
+            ).rowcount
+            if actualizadas != 1:
+                return None
+            fila = conexion.execute(select(tabla).where(tabla.c.id == trabajo_id)).mappings().one()
+        return dict(fila)
+
+    def reportar_progreso(self, trabajo_id, progreso, mensaje, visibilidad_segundos):
+        """Guardar el avance y renovar el bloqueo del trabajo"""
+        ahora = datetime.utcnow()
+        self._actualizar(
+            trabajo_id,
+            progreso=progreso,
+            mensaje_progreso=mensaje,
+            bloqueado_hasta=ahora + timedelta(seconds=visibilidad_segundos),
+            actualizado_en=ahora
+        )
+
+    def completar(self, trabajo_id, resultado):
+        ahora = datetime.utcnow()
+        self._actualizar(
+            trabajo_id,
+            estado=COMPLETADO,
+            progreso=100,
+            resultado=resultado,
+            error=None,
+            bloqueado_hasta=None,
+            finalizado_en=ahora,
+            actualizado_en=ahora
+        )
+
+    def reprogramar(self, trabajo_id, error, ejecutar_despues):
+        self._actualizar(
+            trabajo_id,
+            estado=PENDIENTE,
+            error=error,
+            ejecutar_despues=ejecutar_despues,
+            bloqueado_hasta=None,
+            actualizado_en=datetime.utcnow()
+        )
+
+    def fallar(self, trabajo_id, error):
+        ahora = datetime.utcnow()
+        self._actualizar(
+            trabajo_id,
+            estado=FALLIDO,
+            error=error,
+            bloqueado_hasta=None,
+            finalizado_en=ahora,
+            actualizado_en=ahora
+        )
+
+    def obtener(self, trabajo_id):
+        with self.db.engine.connect() as conexion:
+            fila = conexion.execute(
+                select(self._tabla).where(self._tabla.c.id == trabajo_id)
+            ).mappings().first()
+        return dict(fila) if fila else None
+
+    def _actualizar(self, trabajo_id, **valores):
+        with self.db.engine.begin() as conexion:
+            conexion.execute(self._tabla.update().where(self._tabla.c.id == trabajo_id).values(**valores))
+
+
+class BackendRedis:
+    """
+    Cola sobre Redis (o un servidor compatible)
+
+    jobs:<id>            hash con los datos del trabajo
+    jobs:cola:<cola>     sorted set de ids pendientes, puntaje = ejecutar_despues
+    jobs:en_ejecucion    sorted set de ids reclamados, puntaje = bloqueado_hasta
+    """
+
+    PREFIJO = 'jobs'
+
+    def __init__(self, url, ttl_resultado_segundos):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("JOBS_BACKEND=redis requiere el paquete 'redis' (pip install redis)") from e
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.ttl_resultado = ttl_resultado_segundos
+
+    def _llave(self, *partes):
+        return ':'.join((self.PREFIJO,) + tuple(str(p) for p in partes))
+
+    def encolar(self, tarea, parametros, cola, max_intentos, ejecutar_despues=None, en_transaccion=False):
+        # Redis no participa de la transacción SQL: el trabajo existe de inmediato
+        ahora = datetime.utcnow()
+        ejecutar_despues = ejecutar_despues or ahora
+        trabajo_id = self.redis.incr(self._llave('secuencia'))
+        with self.redis.pipeline() as pipe:
+            pipe.hset(self._llave(trabajo_id), mapping={
+                'id': trabajo_id,
+                'tarea': tarea,
+                'cola': cola,
+                'parametros': json.dumps(parametros),
+                'estado': PENDIENTE,
+                'intentos': 0,
+                'max_intentos': max_intentos,
+                'ejecutar_despues': ejecutar_despues.isoformat(),
+                'progreso': 0,
+                'creado_en': ahora.isoformat(),
+                'actualizado_en': ahora.isoformat()
+            })
+            pipe.zadd(self._llave('cola', cola), {trabajo_id: ejecutar_despues.timestamp()})
+            pipe.execute()
+        return trabajo_id
+
+    def reclamar(self, colas, worker, visibilidad_segundos):
+        ahora = time.time()
+        self._recuperar_abandonados(ahora)
+        for cola in colas:
+            for trabajo_id in self.redis.zrangebyscore(self._llave('cola', cola), '-inf', ahora, start=0, num=10):
+                # ZREM es atómico: solo un worker obtiene 1
+                if not self.redis.zrem(self._llave('cola', cola), trabajo_id):
+                    continue
+                bloqueado_hasta = datetime.utcfromtimestamp(ahora + visibilidad_segundos)
+                with self.redis.pipeline() as pipe:
+                    pipe.zadd(self._llave('en_ejecucion'), {trabajo_id: ahora + visibilidad_segundos})
+                    pipe.hincrby(self._llave(trabajo_id), 'intentos', 1)
+                    pipe.hset(self._llave(trabajo_id), mapping={
+                        'estado': EN_EJECUCION,
+                        'worker': worker,
+                        'bloqueado_hasta': bloqueado_hasta.isoformat(),
+                        'iniciado_en': datetime.utcnow().isoformat(),
+                        'actualizado_en': datetime.utcnow().isoformat()
+                    })
+                    pipe.execute()
+                return self.obtener(trabajo_id)
+        return None
+
+    def _recuperar_abandonados(self, ahora):
+        """Devolver a su cola los trabajos cuyo bloqueo venció, o marcarlos fallidos si ya no les quedan intentos"""
+        for trabajo_id in self.redis.zrangebyscore(self._llave('en_ejecucion'), '-inf', ahora, start=0, num=100):
+            if self.redis.zrem(self._llave('en_ejecucion'), trabajo_id):
+                cola, intentos, max_intentos = self.redis.hmget(
+                    self._llave(trabajo_id), 'cola', 'intentos', 'max_intentos'
+                )
+                if not cola:
+                    continue
+                if int(intentos or 0) >= int(max_intentos or 0):
+                    self._finalizar(trabajo_id, FALLIDO, error=ERROR_ABANDONADO)
+                else:
+                    self.redis.zadd(self._llave('cola', cola), {trabajo_id: ahora})
+
+    def reportar_progreso(self, trabajo_id, progreso, mensaje, visibilidad_segundos):
+        ahora = time.time()
+        with self.redis.pipeline() as pipe:
+            pipe.zadd(self._llave('en_ejecucion'), {trabajo_id: ahora + visibilidad_segundos})
+            pipe.hset(self._llave(trabajo_id), mapping={
+                'progreso': progreso,
+                'mensaje_progreso': mensaje or '',
+                'bloqueado_hasta': datetime.utcfromtimestamp(ahora + visibilidad_segundos).isoformat(),
+                'actualizado_en': datetime.utcnow().isoformat()
+            })
+            pipe.execute()
+
+    def completar(self, trabajo_id, resultado):
+        self._finalizar(trabajo_id, COMPLETADO, progreso=100, resultado=json.dumps(resultado), error='')
+
+    def reprogramar(self, trabajo_id, error, ejecutar_despues):
+        cola = self.redis.hget(self._llave(trabajo_id), 'cola')
+        with self.redis.pipeline() as pipe:
+            pipe.zrem(self._llave('en_ejecucion'), trabajo_id)
+            pipe.hset(self._llave(trabajo_id), mapping={
+                'estado': PENDIENTE,
+                'error': error,
+                'ejecutar_despues': ejecutar_despues.isoformat(),
+                'bloqueado_hasta': '',
+                'actualizado_en': datetime.utcnow().isoformat()
+            })
+            pipe.zadd(self._llave('cola', cola), {trabajo_id: ejecutar_despues.timestamp()})
+            pipe.execute()
+
+    def fallar(self, trabajo_id, error):
+        self._finalizar(trabajo_id, FALLIDO, error=error)
+
+    def _finalizar(self, trabajo_id, estado, **valores):
+        ahora = datetime.utcnow().isoformat()
+        with self.redis.pipeline() as pipe:
+            pipe.zrem(self._llave('en_ejecucion'), trabajo_id)
+            pipe.hset(self._llave(trabajo_id), mapping={
+                'estado': estado,
+                'bloqueado_hasta': '',
+                'finalizado_en': ahora,
+                'actualizado_en': ahora,
+                **valores
+            })
+            pipe.expire(self._llave(trabajo_id), self.ttl_resultado)
+            pipe.execute()
+
+    def obtener(self, trabajo_id):
+        datos = self.redis.hgetall(self._llave(trabajo_id))
+        if not datos:
+            return None
+        for campo in ('id', 'intentos', 'max_intentos', 'progreso'):
+            datos[campo] = int(datos[campo]) if datos.get(campo) else 0
+        for campo in ('parametros', 'resultado'):
+            datos[campo] = json.loads(datos[campo]) if datos.get(campo) else None
+        for campo in ('ejecutar_despues', 'bloqueado_hasta', 'creado_en', 'iniciado_en', 'finalizado_en', 'actualizado_en'):
+            datos[campo] = datetime.fromisoformat(datos[campo]) if datos.get(campo) else None
+        for campo in ('error', 'mensaje_progreso', 'worker'):
+            datos[campo] = datos.get(campo) or None
+        return datos
+
+
+def serializar_trabajo(trabajo):
+    """Representación JSON de un trabajo (para /api/jobs/<id>)"""
+    return {
+        'id': trabajo['id'],
+        'tarea': trabajo['tarea'],
+        'cola': trabajo['cola'],
+        'parametros': trabajo.get('parametros'),
+        'estado': trabajo['estado'],
+        'intentos': trabajo['intentos'],
+        'max_intentos': trabajo['max_intentos'],
+        'progreso': trabajo['progreso'],
+        'mensaje_progreso': trabajo.get('mensaje_progreso'),
+        'resultado': trabajo.get('resultado'),
+        'error': trabajo.get('error'),
+        'ejecutar_despues': _iso(trabajo.get('ejecutar_despues')),
+        'creado_en': _iso(trabajo.get('creado_en')),
+        'iniciado_en': _iso(trabajo.get('iniciado_en')),
+        'finalizado_en': _iso(trabajo.get('finalizado_en')),
+        'actualizado_en': _iso(trabajo.get('actualizado_en'))
+    }
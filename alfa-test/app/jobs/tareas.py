@@ -0,0 +1,222 @@
+"""
+Definición de las tareas en segundo plano.
+
+Cada tarea recibe un ContextoTrabajo y sus parámetros; lo que retorne se
+guarda como resultado del trabajo (debe ser serializable a JSON). Si lanza
+una excepción el worker hace rollback y la reintenta con backoff.
+"""
+from datetime import date
+
+from sqlalchemy import and_, func, select
+
+from app import db
+from app.jobs import tarea
+from app.utils.outbox import emitir
+from app.utils.sincronizacion import anotar_cambios
+
+# Cuotas por transacción del barrido de vencimientos
+TAMANO_LOTE_VENCIMIENTOS = 5000
+
+
+@tarea('reporte_cartera', publica=True)
+def reporte_cartera(trabajo):
+    """Reporte general del estado de cartera"""
+    from app.services.poliza_service import PolizaService
+
+    trabajo.progreso(10, 'Calculando reporte de cartera')
+    resultado, status_code = PolizaService.obtener_reporte_cartera()
+    if status_code != 200:
+        raise RuntimeError(resultado['error'])
+    return resultado
+
+
+@tarea('barrido_vencimientos', publica=True)
+def barrido_vencimientos(trabajo):
+    """
+    Marcar como 'Vencido' las cuotas pendientes cuya fecha máxima ya pasó
+
+    Actualiza por rangos de id con sentencias UPDATE (sin cargar las cuotas),
+    marca las pólizas afectadas como 'Vencida' y recalcula los rollups.
+    """
+    from app.models.poliza_model import Poliza
+    from app.models.poliza_plan_pago_model import PolizaPlanPago
+    from app.services.dashboard_service import DashboardService
+
+    hoy = date.today()
+    vencida = and_(
+        PolizaPlanPago.estado_pago == 'Pendiente de pago',
+        PolizaPlanPago.fecha_maxima_pago < hoy
+    )
+    minimo, maximo = db.session.execute(
+        select(func.min(PolizaPlanPago.id), func.max(PolizaPlanPago.id)).where(vencida)
+    ).one()
+
+    cuotas = 0
+    if minimo is not None:
+        tabla = PolizaPlanPago.__table__
+        for desde in range(minimo, maximo + 1, TAMANO_LOTE_VENCIMIENTOS):
+            hasta = desde + TAMANO_LOTE_VENCIMIENTOS
+            condiciones = (
+                tabla.c.id >= desde, tabla.c.id < hasta,
+                tabla.c.estado_pago == 'Pendiente de pago',
+                tabla.c.fecha_maxima_pago < hoy
+            )
+            anotar_cambios(tabla, select(tabla.c.id).where(*condiciones))
+            cuotas += db.session.execute(
+                tabla.update().where(*condiciones)
+                .values(estado_pago='Vencido', version=tabla.c.version + 1)
+            ).rowcount
+            db.session.commit()
+            trabajo.progreso(80 * (hasta - minimo) / (maximo - minimo + 1), f'{cuotas} cuotas marcadas')
+
+    # Pólizas al día con alguna cuota vencida
+    con_vencidas = select(PolizaPlanPago.poliza_id).where(
+        PolizaPlanPago.poliza_id == Poliza.id,
+        PolizaPlanPago.estado_pago == 'Vencido'
+    ).exists()
+    tabla_polizas = Poliza.__table__
+    al_dia = (func.coalesce(tabla_polizas.c.estado_cartera, 'Al Día') == 'Al Día', con_vencidas)
+    anotar_cambios(tabla_polizas, select(tabla_polizas.c.id).where(*al_dia))
+    polizas = db.session.execute(
+        tabla_polizas.update().where(*al_dia)
+        .values(estado_cartera='Vencida')
+    ).rowcount
+    if cuotas or polizas:
+        emitir('cartera.vencimientos', cuotas_vencidas=cuotas, polizas_vencidas=polizas)
+    db.session.commit()
+
+    trabajo.progreso(90, 'Recalculando resúmenes de agentes')
+    DashboardService.recalcular_resumenes()
+    return {'cuotas_vencidas': cuotas, 'polizas_vencidas': polizas}
+
+
+@tarea('purgar_idempotencia', publica=True)
+def purgar_idempotencia(trabajo):
+    """Borrar las claves de idempotencia vencidas"""
+    from app.utils.idempotencia import purgar_claves_vencidas
+
+    return {'claves_borradas': purgar_claves_vencidas()}
+
+
+@tarea('purgar_eventos', publica=True)
+def purgar_eventos(trabajo):
+    """Borrar del outbox los eventos publicados hace más de EVENTOS_OUTBOX_RETENCION_DIAS"""
+    from flask import current_app
+    from app.utils.outbox import purgar_publicados
+
+    return {'eventos_borrados': purgar_publicados(current_app.config['EVENTOS_OUTBOX_RETENCION_DIAS'])}
+
+
+@tarea('purgar_sincronizacion', publica=True)
+def purgar_sincronizacion(trabajo):
+    """Borrar los cambios de sincronización con más de SYNC_RETENCION_DIAS"""
+    from flask import current_app
+    from app.utils.sincronizacion import purgar_cambios
+
+    config = current_app.config
+    return {'cambios_borrados': purgar_cambios(config['SYNC_RETENCION_DIAS'], config['SYNC_MARGEN_SEGUNDOS'])}
+
+
+@tarea('snapshot_mora', publica=True)
+def snapshot_mora(trabajo, fecha_corte=None):
+    """Guardar la mora causada por póliza (por defecto a hoy)"""
+    from datetime import datetime
+    from app.services.mora_service import MoraService
+
+    return MoraService.generar_snapshot(
+        datetime.strptime(fecha_corte, '%Y-%m-%d').date() if fecha_corte else None,
+        progreso=lambda hechas, total: trabajo.progreso(100 * hechas / total)
+    )
+
+
+@tarea('snapshot_cartera', publica=True)
+def snapshot_cartera(trabajo, fecha=None):
+    """Guardar las cifras diarias de la cartera (por defecto de hoy)"""
+    from datetime import datetime
+    from app.services.cartera_service import CarteraService
+
+    return CarteraService.generar_snapshot(datetime.strptime(fecha, '%Y-%m-%d').date() if fecha else None)
+
+
+@tarea('renovaciones', max_intentos=5)
+def renovaciones(trabajo, dias=None, tamano_lote=None):
+    """Motor de renovaciones; un reintento reanuda desde el último lote confirmado"""
+    from flask import current_app
+    from app.services.renovacion_service import RenovacionService
+
+    ejecucion = RenovacionService.ejecutar_renovaciones(
+        dias=dias or current_app.config['RENOVACION_DIAS_ANTICIPACION'],
+        tamano_lote=tamano_lote or current_app.config['RENOVACION_TAMANO_LOTE']
+    )
+    if ejecucion.estado != 'Completada':
+        raise RuntimeError(ejecucion.error or 'Ejecución incompleta')
+    return ejecucion.to_dict()
+
+
+@tarea('resumenes_agentes', publica=True)
+def resumenes_agentes(trabajo, agente_ids=None):
+    """Recalcular agente_resumen_cartera"""
+    from app.services.dashboard_service import DashboardService
+
+    total = DashboardService.recalcular_resumenes(agente_ids)
+    return {'agentes': total}
+
+
+@tarea('preparar_recordatorios', publica=True)
+def preparar_recordatorios(trabajo, dias=None):
+    """Links del portal y recordatorios de las cuotas que vencen pronto"""
+    from flask import current_app
+    from app.services.recordatorio_service import RecordatorioService
+
+    config = current_app.config
+    return RecordatorioService.preparar_recordatorios(
+        dias=dias or config['RECORDATORIOS_DIAS_ANTICIPACION'],
+        tamano_lote=config['RECORDATORIOS_TAMANO_LOTE'],
+        base_url=config['PORTAL_PAGOS_URL'],
+        progreso=lambda t: trabajo.progreso(0, f"{t['cuotas']} cuotas, {t['recordatorios_encolados']} recordatorios")
+    )
+
+
+@tarea('despachar_recordatorios', publica=True)
+def despachar_recordatorios(trabajo):
+    """Enviar los recordatorios pendientes del outbox"""
+    from flask import current_app
+    from app.services.recordatorio_service import RecordatorioService
+
+    config = current_app.config
+    return RecordatorioService.despachar_recordatorios(
+        config,
+        concurrencia=config['RECORDATORIOS_CONCURRENCIA'],
+        max_intentos=config['RECORDATORIOS_MAX_INTENTOS'],
+        progreso=lambda t: trabajo.progreso(0, f"{t['enviados']} enviados, {t['fallidos']} fallidos")
+    )
+
+
+@tarea('conciliar_extracto')
+def conciliar_extracto(trabajo, archivo, reporte=None, simular=False):
+    """Conciliar un extracto bancario ya copiado al servidor"""
+    from decimal import Decimal
+    from flask import current_app
+    from app.services.conciliacion_service import ConciliacionService
+
+    config = current_app.config
+    return ConciliacionService.conciliar_extracto(
+        archivo,
+        reporte or f'{archivo}.conciliacion.csv',
+        tamano_lote=config['CONCILIACION_TAMANO_LOTE'],
+        dias_ventana=config['CONCILIACION_DIAS_VENTANA'],
+        tolerancia=Decimal(config['CONCILIACION_TOLERANCIA']),
+        simular=simular,
+        progreso=lambda t: trabajo.progreso(0, f"{t['lineas']} líneas, {t['conciliadas']} conciliadas")
+    )
+
+
+@tarea('liquidar_comisiones', publica=True)
+def liquidar_comisiones(trabajo, periodo=None):
+    """Generar las liquidaciones de comisión por aseguradora (por defecto del mes anterior)"""
+    from app.services.comision_service import ComisionService
+
+    resultado, status_code = ComisionService.obtener_liquidaciones(periodo or ComisionService.periodo_anterior(), guardar=True)
+    if status_code != 200:
+        raise RuntimeError(resultado['error'])
+    return resultado
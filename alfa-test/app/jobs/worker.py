@@ -0,0 +1,125 @@
+"""
+Worker de trabajos en segundo plano.
+
+Cada proceso crea su propia aplicación (y su propio pool de conexiones),
+reclama trabajos de las colas indicadas y los ejecuta uno a la vez.
+"""
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import traceback
+from datetime import datetime, timedelta
+
+from app.jobs import ContextoTrabajo, calcular_espera_reintento, obtener_backend, obtener_definicion
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+
+    def __init__(self, app, colas=('default',), nombre=None):
+        self.app = app
+        self.colas = list(colas)
+        self.nombre = nombre or f'{socket.gethostname()}:{os.getpid()}'
+        self.detener = threading.Event()
+
+    def ejecutar(self, una_vez=False):
+        """
+        Procesar trabajos hasta recibir SIGTERM/SIGINT
+
+        Con una_vez=True termina cuando las colas quedan vacías.
+
+        Returns:
+            int: número de trabajos procesados
+        """
+        procesados = 0
+        espera = self.app.config['JOBS_ESPERA_SEGUNDOS']
+        while not self.detener.is_set():
+            with self.app.app_context():
+                atendido = self.procesar_siguiente()
+            if atendido:
+                procesados += 1
+            elif una_vez:
+                break
+            else:
+                self.detener.wait(espera)
+        return procesados
+
+    def procesar_siguiente(self):
+        """Reclamar y ejecutar un trabajo (False si no había ninguno disponible)"""
+        from app import db
+
+        config = self.app.config
+        backend = obtener_backend(self.app)
+        trabajo = backend.reclamar(self.colas, self.nombre, config['JOBS_VISIBILIDAD_SEGUNDOS'])
+        if trabajo is None:
+            return False
+
+        definicion = obtener_definicion(trabajo['tarea'])
+        if definicion is None:
+            backend.fallar(trabajo['id'], f"Tarea no registrada: {trabajo['tarea']}")
+            return True
+
+        contexto = ContextoTrabajo(backend, trabajo, config['JOBS_VISIBILIDAD_SEGUNDOS'])
+        logger.info("Trabajo %s (%s) intento %s", trabajo['id'], trabajo['tarea'], trabajo['intentos'])
+        try:
+            resultado = definicion.funcion(contexto, **(trabajo['parametros'] or {}))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            error = f'{e.__class__.__name__}: {e}\n{traceback.format_exc(limit=5)}'
+            if trabajo['intentos'] < trabajo['max_intentos']:
+                espera = calcular_espera_reintento(
+                    trabajo['intentos'],
+                    config['JOBS_BACKOFF_SEGUNDOS'],
+                    config['JOBS_BACKOFF_MAXIMO_SEGUNDOS']
+                )
+                backend.reprogramar(trabajo['id'], error, datetime.utcnow() + timedelta(seconds=espera))
+                logger.warning("Trabajo %s falló; reintento en %.0f s: %s", trabajo['id'], espera, e)
+            else:
+                backend.fallar(trabajo['id'], error)
+                logger.error("Trabajo %s falló definitivamente: %s", trabajo['id'], e)
+        else:
+            backend.completar(trabajo['id'], resultado)
+        finally:
+            db.session.remove()
+        return True
+
+
+def _proceso_worker(colas, una_vez):
+    """Punto de entrada de cada proceso hijo"""
+    from app import create_app
+
+    worker = Worker(create_app(), colas)
+    signal.signal(signal.SIGTERM, lambda *_: worker.detener.set())
+    signal.signal(signal.SIGINT, lambda *_: worker.detener.set())
+    worker.ejecutar(una_vez=una_vez)
+
+
+def iniciar_workers(app, colas, procesos=1, una_vez=False):
+    """Ejecutar `procesos` workers; con uno solo se usa el proceso actual"""
+    if procesos <= 1:
+        worker = Worker(app, colas)
+        signal.signal(signal.SIGTERM, lambda *_: worker.detener.set())
+        return worker.ejecutar(una_vez=una_vez)
+
+    # spawn: cada hijo abre sus propias conexiones en lugar de heredar sockets
+    contexto = multiprocessing.get_context('spawn')
+    hijos = [contexto.Process(target=_proceso_worker, args=(list(colas), una_vez), daemon=False)
+             for _ in range(procesos)]
+    for hijo in hijos:
+        hijo.start()
+
+    def reenviar(signum, _frame):
+        for hijo in hijos:
+            if hijo.is_alive():
+                os.kill(hijo.pid, signal.SIGTERM)
+    signal.signal(signal.SIGTERM, reenviar)
+    signal.signal(signal.SIGINT, reenviar)
+
+    for hijo in hijos:
+        hijo.join()
+    return None
@@ -27,6 +27,21 @@ from .opcion_otro_model import OpcionOtro
 # Modelos de pólizas
 from .poliza_model import Poliza
 from .poliza_plan_pago_model import PolizaPlanPago
+from .renovacion_model import RenovacionEjecucion, RenovacionOpcion
+from .clave_idempotencia_model import ClaveIdempotencia
+from .secuencia_model import Secuencia
+from .mora_model import TasaMora, MoraSnapshot
+from .comision_model import ComisionMovimiento, ComisionLiquidacion
+from .recordatorio_model import RecordatorioOutbox
+from .evento_outbox_model import EventoOutbox
+from .cambio_sincronizacion_model import CambioSincronizacion
+
+# Rollups y resúmenes precalculados
+from .agente_resumen_model import AgenteResumenCartera
+from .cartera_snapshot_model import CarteraSnapshot
+
+# Trabajos en segundo plano
+from .trabajo_model import Trabajo
 
 __all__ = [
     # Modelos base
@@ -40,5 +55,13 @@ __all__ = [
     'OpcionSeguro', 'OpcionHogar', 'OpcionVehiculo', 'OpcionCopropiedad', 'OpcionOtro',
     
     # Modelos de pólizas
-    'Poliza', 'PolizaPlanPago'
+    'Poliza', 'PolizaPlanPago', 'RenovacionEjecucion', 'RenovacionOpcion',
+    'RecordatorioOutbox', 'EventoOutbox', 'CambioSincronizacion', 'ClaveIdempotencia', 'Secuencia', 'TasaMora', 'MoraSnapshot',
+    'ComisionMovimiento', 'ComisionLiquidacion',
+    
+    # Rollups
+    'AgenteResumenCartera', 'CarteraSnapshot',
+    
+    # Trabajos en segundo plano
+    'Trabajo'
 ] 
\ No newline at end of file
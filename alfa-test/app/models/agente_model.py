@@ -19,6 +19,11 @@ class Agente(db.Model):
     rol = db.Column(db.Enum('super_admin', 'admin', 'agente', name='rol_enum'), nullable=False)
     activo = db.Column(db.Boolean, default=True)
     fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Versión de la fila para los ETag de GET condicional (app.utils.http.version_filas):
+    # el ORM y los UPDATE de Core la incrementan y renuevan actualizado_en
+    version = db.Column(db.Integer, nullable=False, default=1, onupdate=db.text('version + 1'))
+    actualizado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relación con la tabla de asignaciones
     asignaciones_agente = db.relationship('AgenteCliente', 
@@ -29,7 +34,11 @@ class Agente(db.Model):
     def clientes(self):
         """Obtener clientes asignados a este agente"""
         from app.models.cliente_model import Cliente
-        return [Cliente.query.get(asig.cliente_id) for asig in self.asignaciones_agente]
+        from app.models.agente_cliente_model import AgenteCliente
+        # Una sola consulta con JOIN en lugar de una consulta por asignación
+        return Cliente.query.join(AgenteCliente, AgenteCliente.cliente_id == Cliente.id)\
+            .filter(AgenteCliente.agente_id == self.id)\
+            .order_by(Cliente.id).all()
     
     def __repr__(self):
         return f'<Agente {self.nombre}>'
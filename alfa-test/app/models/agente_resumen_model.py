@@ -0,0 +1,38 @@
+from app import db
+from datetime import datetime
+
+class AgenteResumenCartera(db.Model):
+    """Rollup precalculado de la cartera de un agente (alimenta el dashboard)"""
+    __tablename__ = 'agente_resumen_cartera'
+
+    agente_id = db.Column(db.Integer, db.ForeignKey('agente.id', ondelete='CASCADE'), primary_key=True)
+    total_clientes = db.Column(db.Integer, nullable=False, default=0)
+    total_bienes = db.Column(db.Integer, nullable=False, default=0)
+    polizas_activas = db.Column(db.Integer, nullable=False, default=0)
+    renovaciones_proximas = db.Column(db.Integer, nullable=False, default=0)
+    cuotas_vencidas = db.Column(db.Integer, nullable=False, default=0)
+    valor_cartera_vencida = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+    cuotas_por_vencer = db.Column(db.Integer, nullable=False, default=0)
+    valor_por_vencer = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+    comisiones_pendientes = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+    fecha_corte = db.Column(db.Date, nullable=False)
+    actualizado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<AgenteResumenCartera agente_id={self.agente_id}>'
+
+    def to_dict(self):
+        return {
+            'agente_id': self.agente_id,
+            'total_clientes': self.total_clientes,
+            'total_bienes': self.total_bienes,
+            'polizas_activas': self.polizas_activas,
+            'renovaciones_proximas': self.renovaciones_proximas,
+            'cuotas_vencidas': self.cuotas_vencidas,
+            'valor_cartera_vencida': float(self.valor_cartera_vencida or 0),
+            'cuotas_por_vencer': self.cuotas_por_vencer,
+            'valor_por_vencer': float(self.valor_por_vencer or 0),
+            'comisiones_pendientes': float(self.comisiones_pendientes or 0),
+            'fecha_corte': self.fecha_corte.isoformat() if self.fecha_corte else None,
+            'actualizado_en': self.actualizado_en.isoformat() if self.actualizado_en else None
+        }
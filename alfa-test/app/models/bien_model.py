@@ -21,7 +21,11 @@ class Bien(db.Model):
     def clientes(self):
         """Obtener clientes asignados a este bien"""
         from app.models.cliente_model import Cliente
-        return [Cliente.query.get(asig.cliente_id) for asig in self.asignaciones_bien]
+        from app.models.cliente_bien_model import ClienteBien
+        # Una sola consulta con JOIN en lugar de una consulta por asignación
+        return Cliente.query.join(ClienteBien, ClienteBien.cliente_id == Cliente.id)\
+            .filter(ClienteBien.bien_id == self.id)\
+            .order_by(Cliente.id).all()
     
     def get_bien_especifico(self):
         """Obtener el bien específico basado en el tipo_bien"""
@@ -39,6 +43,28 @@ class Bien(db.Model):
             return OtroBien.query.get(self.bien_especifico_id)
         return None
     
+    @staticmethod
+    def cargar_bienes_especificos(bienes):
+        """Cargar los bienes específicos de varios bienes con una consulta por tipo"""
+        from app.models.hogar_model import Hogar
+        from app.models.vehiculo_model import Vehiculo
+        from app.models.copropiedad_model import Copropiedad
+        from app.models.otro_bien_model import OtroBien
+        modelos = {'HOGAR': Hogar, 'VEHICULO': Vehiculo, 'COPROPIEDAD': Copropiedad, 'OTRO': OtroBien}
+        
+        ids_por_tipo = {}
+        for bien in bienes:
+            ids_por_tipo.setdefault(bien.tipo_bien, set()).add(bien.bien_especifico_id)
+        
+        especificos = {}
+        for tipo, ids in ids_por_tipo.items():
+            modelo = modelos.get(tipo)
+            if modelo:
+                for especifico in modelo.query.filter(modelo.id.in_(ids)).all():
+                    especificos[(tipo, especifico.id)] = especifico
+        
+        return {bien.id: especificos.get((bien.tipo_bien, bien.bien_especifico_id)) for bien in bienes}
+    
     def __repr__(self):
         return f'<Bien {self.id} - {self.tipo_bien}>'
     
@@ -0,0 +1,17 @@
+from app import db
+from datetime import datetime
+
+class CambioSincronizacion(db.Model):
+    """Cambio de un registro visible para un agente (GET /api/agentes/<id>/sync)"""
+    __tablename__ = 'cambios_sincronizacion'
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    agente_id = db.Column(db.Integer, nullable=False)
+    tabla = db.Column(db.String(30), nullable=False)
+    # Clave primaria del registro separada por coma
+    clave = db.Column(db.String(40), nullable=False)
+    operacion = db.Column(db.Enum('upsert', 'delete', name='operacion_sincronizacion_enum'), nullable=False)
+    creado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<CambioSincronizacion {self.id} {self.tabla}:{self.clave} {self.operacion}>'
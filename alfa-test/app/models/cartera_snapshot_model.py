@@ -0,0 +1,38 @@
+from app import db
+from datetime import datetime
+
+class CarteraSnapshot(db.Model):
+    """Cifras de la cartera de un día para un valor de una dimensión ('' en el total)"""
+    __tablename__ = 'cartera_snapshots'
+
+    dimension = db.Column(db.Enum('total', 'aseguradora', 'tipo', 'agente', name='dimension_snapshot_enum'), primary_key=True)
+    clave = db.Column(db.String(30), primary_key=True)
+    fecha = db.Column(db.Date, primary_key=True, index=True)
+    polizas_vigentes = db.Column(db.Integer, nullable=False)
+    prima_vigente = db.Column(db.Numeric(15, 2), nullable=False)
+    comision_vigente = db.Column(db.Numeric(15, 2), nullable=False)
+    cuotas_por_cobrar = db.Column(db.Integer, nullable=False)
+    valor_por_cobrar = db.Column(db.Numeric(15, 2), nullable=False)
+    cuotas_vencidas = db.Column(db.Integer, nullable=False)
+    valor_vencido = db.Column(db.Numeric(15, 2), nullable=False)
+    polizas_con_vencidas = db.Column(db.Integer, nullable=False)
+    generado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<CarteraSnapshot {self.fecha} {self.dimension}:{self.clave}>'
+
+    def to_dict(self):
+        return {
+            'dimension': self.dimension,
+            'clave': self.clave,
+            'fecha': self.fecha.isoformat() if self.fecha else None,
+            'polizas_vigentes': self.polizas_vigentes,
+            'prima_vigente': float(self.prima_vigente),
+            'comision_vigente': float(self.comision_vigente),
+            'cuotas_por_cobrar': self.cuotas_por_cobrar,
+            'valor_por_cobrar': float(self.valor_por_cobrar),
+            'cuotas_vencidas': self.cuotas_vencidas,
+            'valor_vencido': float(self.valor_vencido),
+            'polizas_con_vencidas': self.polizas_con_vencidas,
+            'generado_en': self.generado_en.isoformat() if self.generado_en else None
+        }
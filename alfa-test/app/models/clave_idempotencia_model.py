@@ -0,0 +1,33 @@
+from app import db
+from datetime import datetime
+
+class ClaveIdempotencia(db.Model):
+    """Respuesta registrada para un encabezado Idempotency-Key"""
+    __tablename__ = 'claves_idempotencia'
+
+    ambito = db.Column(db.String(50), primary_key=True)
+    clave = db.Column(db.String(255), primary_key=True)
+    # SHA-256 de método, ruta y cuerpo: la clave no puede reutilizarse con otra solicitud
+    hash_solicitud = db.Column(db.String(64), nullable=False)
+    estado = db.Column(db.Enum('En proceso', 'Completada'), nullable=False, default='En proceso')
+    status_code = db.Column(db.Integer)
+    respuesta = db.Column(db.Text)
+    tipo_contenido = db.Column(db.String(100))
+    creada_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expira_en = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<ClaveIdempotencia {self.ambito}:{self.clave}>'
+
+    def esta_vencida(self, ahora=None):
+        return self.expira_en <= (ahora or datetime.utcnow())
+
+    def to_dict(self):
+        return {
+            'ambito': self.ambito,
+            'clave': self.clave,
+            'estado': self.estado,
+            'status_code': self.status_code,
+            'creada_en': self.creada_en.isoformat() if self.creada_en else None,
+            'expira_en': self.expira_en.isoformat() if self.expira_en else None
+        }
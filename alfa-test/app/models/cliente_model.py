@@ -29,6 +29,11 @@ class Cliente(db.Model):
     telefono_rep_legal = db.Column(db.String(20))
     correo_rep_legal = db.Column(db.String(100))
     contacto_alternativo = db.Column(db.String(255))
+
+    # Versión de la fila para los ETag de GET condicional (app.utils.http.version_filas):
+    # el ORM y los UPDATE de Core la incrementan y renuevan actualizado_en
+    version = db.Column(db.Integer, nullable=False, default=1, onupdate=db.text('version + 1'))
+    actualizado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relación con la tabla de asignaciones agente-cliente
     asignaciones_cliente = db.relationship('AgenteCliente', 
@@ -44,13 +49,20 @@ class Cliente(db.Model):
     def agentes(self):
         """Obtener agentes asignados a este cliente"""
         from app.models.agente_model import Agente
-        return [Agente.query.get(asig.agente_id) for asig in self.asignaciones_cliente]
+        from app.models.agente_cliente_model import AgenteCliente
+        # Una sola consulta con JOIN en lugar de una consulta por asignación
+        return Agente.query.join(AgenteCliente, AgenteCliente.agente_id == Agente.id)\
+            .filter(AgenteCliente.cliente_id == self.id)\
+            .order_by(Agente.id).all()
     
     @property
     def bienes(self):
         """Obtener bienes asignados a este cliente"""
         from app.models.bien_model import Bien
-        return [Bien.query.get(asig.bien_id) for asig in self.asignaciones_bienes]
+        from app.models.cliente_bien_model import ClienteBien
+        return Bien.query.join(ClienteBien, ClienteBien.bien_id == Bien.id)\
+            .filter(ClienteBien.cliente_id == self.id)\
+            .order_by(Bien.id).all()
     
     def __repr__(self):
         if self.tipo_cliente == 'PERSONA':
@@ -0,0 +1,75 @@
+from app import db
+from datetime import datetime
+
+class ComisionMovimiento(db.Model):
+    """Movimiento del libro de comisiones (solo inserción)"""
+    __tablename__ = 'comisiones_movimientos'
+    __table_args__ = (
+        db.Index('idx_comisiones_periodo', 'periodo', 'aseguradora_id', 'tipo'),
+    )
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    # 'C-<poliza_id>', 'R-<cuota_id>' o 'X-<poliza_id>': un movimiento por hecho
+    clave = db.Column(db.String(40), unique=True, nullable=False)
+    tipo = db.Column(db.Enum('Causación', 'Recaudo', 'Reverso', name='tipo_movimiento_comision_enum'), nullable=False)
+    periodo = db.Column(db.String(7), nullable=False)
+    aseguradora_id = db.Column(db.Integer, db.ForeignKey('aseguradoras.id'), nullable=False)
+    poliza_id = db.Column(db.Integer, db.ForeignKey('polizas.id', ondelete='CASCADE'), nullable=False, index=True)
+    cuota_id = db.Column(db.Integer)
+    fecha = db.Column(db.Date, nullable=False)
+    valor_base = db.Column(db.Numeric(15, 2), nullable=False)
+    valor_comision = db.Column(db.Numeric(15, 2), nullable=False)
+    creado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ComisionMovimiento {self.clave} {self.valor_comision}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'tipo': self.tipo,
+            'periodo': self.periodo,
+            'aseguradora_id': self.aseguradora_id,
+            'poliza_id': self.poliza_id,
+            'cuota_id': self.cuota_id,
+            'fecha': self.fecha.isoformat() if self.fecha else None,
+            'valor_base': float(self.valor_base),
+            'valor_comision': float(self.valor_comision),
+            'creado_en': self.creado_en.isoformat() if self.creado_en else None
+        }
+
+
+class ComisionLiquidacion(db.Model):
+    """Estado de cuenta de comisiones de una aseguradora en un mes"""
+    __tablename__ = 'comisiones_liquidaciones'
+    __table_args__ = (
+        db.UniqueConstraint('aseguradora_id', 'periodo', name='uk_liquidacion_aseguradora_periodo'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    aseguradora_id = db.Column(db.Integer, db.ForeignKey('aseguradoras.id', ondelete='CASCADE'), nullable=False)
+    periodo = db.Column(db.String(7), nullable=False, index=True)
+    estado = db.Column(db.Enum('Abierta', 'Cerrada', name='estado_liquidacion_enum'), nullable=False, default='Abierta')
+    movimientos = db.Column(db.Integer, nullable=False, default=0)
+    valor_causado = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+    valor_recaudado = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+    valor_reversado = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+    generada_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    cerrada_en = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<ComisionLiquidacion {self.aseguradora_id} {self.periodo} {self.estado}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'aseguradora_id': self.aseguradora_id,
+            'periodo': self.periodo,
+            'estado': self.estado,
+            'movimientos': self.movimientos,
+            'valor_causado': float(self.valor_causado),
+            'valor_recaudado': float(self.valor_recaudado),
+            'valor_reversado': float(self.valor_reversado),
+            'generada_en': self.generada_en.isoformat() if self.generada_en else None,
+            'cerrada_en': self.cerrada_en.isoformat() if self.cerrada_en else None
+        }
@@ -0,0 +1,22 @@
+from app import db
+from datetime import datetime
+
+class EventoOutbox(db.Model):
+    """Evento de dominio escrito en la transacción que lo produjo (patrón outbox)"""
+    __tablename__ = 'eventos_outbox'
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    tipo = db.Column(db.String(50), nullable=False)
+    agregado = db.Column(db.String(30), nullable=False)
+    agregado_id = db.Column(db.BigInteger)
+    # JSON serializado
+    datos = db.Column(db.Text, nullable=False)
+    estado = db.Column(db.Enum('Pendiente', 'Publicado', 'Fallido', name='estado_evento_outbox_enum'),
+                       nullable=False, default='Pendiente')
+    intentos = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    creado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    publicado_en = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<EventoOutbox {self.id} {self.tipo} {self.estado}>'
@@ -0,0 +1,55 @@
+from app import db
+from datetime import datetime
+
+class TasaMora(db.Model):
+    """Tasa diaria de mora por aseguradora y/o tipo de producto (NULL = cualquiera)"""
+    __tablename__ = 'tasas_mora'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    aseguradora_id = db.Column(db.Integer, db.ForeignKey('aseguradoras.id', ondelete='CASCADE'))
+    tipo_opcion = db.Column(db.Enum('HOGAR', 'VEHICULO', 'COPROPIEDAD', 'OTRO', name='tipo_opcion_enum'))
+    tasa_diaria = db.Column(db.Numeric(9, 6), nullable=False)
+    vigente_desde = db.Column(db.Date, nullable=False)
+    vigente_hasta = db.Column(db.Date)
+    creado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<TasaMora {self.aseguradora_id}/{self.tipo_opcion} {self.tasa_diaria}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'aseguradora_id': self.aseguradora_id,
+            'tipo_opcion': self.tipo_opcion,
+            'tasa_diaria': float(self.tasa_diaria) if self.tasa_diaria is not None else None,
+            'vigente_desde': self.vigente_desde.isoformat() if self.vigente_desde else None,
+            'vigente_hasta': self.vigente_hasta.isoformat() if self.vigente_hasta else None,
+            'creado_en': self.creado_en.isoformat() if self.creado_en else None
+        }
+
+
+class MoraSnapshot(db.Model):
+    """Mora causada de una póliza a una fecha de corte"""
+    __tablename__ = 'mora_snapshots'
+
+    fecha_corte = db.Column(db.Date, primary_key=True)
+    poliza_id = db.Column(db.Integer, db.ForeignKey('polizas.id', ondelete='CASCADE'), primary_key=True)
+    cuotas_vencidas = db.Column(db.Integer, nullable=False)
+    capital_vencido = db.Column(db.Numeric(15, 2), nullable=False)
+    dias_mora_max = db.Column(db.Integer, nullable=False)
+    valor_mora = db.Column(db.Numeric(15, 2), nullable=False)
+    generado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<MoraSnapshot {self.fecha_corte} poliza={self.poliza_id}>'
+
+    def to_dict(self):
+        return {
+            'fecha_corte': self.fecha_corte.isoformat() if self.fecha_corte else None,
+            'poliza_id': self.poliza_id,
+            'cuotas_vencidas': self.cuotas_vencidas,
+            'capital_vencido': float(self.capital_vencido),
+            'dias_mora_max': self.dias_mora_max,
+            'valor_mora': float(self.valor_mora),
+            'generado_en': self.generado_en.isoformat() if self.generado_en else None
+        }
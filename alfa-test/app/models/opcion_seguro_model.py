@@ -93,12 +93,9 @@ class OpcionSeguro(db.Model):
     
     @staticmethod
     def generar_consecutivo():
-        """Generar consecutivo único para la opción"""
-        import uuid
-        from datetime import datetime
-        año = datetime.now().year
-        mes = datetime.now().month
-        return f"{año}-{mes:02d}-OPC-{str(uuid.uuid4())[:8].upper()}"
+        """Generar consecutivo único para la opción (secuencia mensual)"""
+        from app.services.secuencia_service import SecuenciaService
+        return SecuenciaService.siguiente_consecutivo('opcion_seguro')
 
 
 # Tablas de relación N:N
@@ -125,9 +125,6 @@ class Poliza(db.Model):
     
     @staticmethod
     def generar_consecutivo():
-        """Generar consecutivo único para la póliza"""
-        import uuid
-        from datetime import datetime
-        año = datetime.now().year
-        mes = datetime.now().month
-        return f"{año}-{mes:02d}-POL-{str(uuid.uuid4())[:8].upper()}" 
\ No newline at end of file
+        """Generar consecutivo único para la póliza (secuencia mensual)"""
+        from app.services.secuencia_service import SecuenciaService
+        return SecuenciaService.siguiente_consecutivo('poliza') 
\ No newline at end of file
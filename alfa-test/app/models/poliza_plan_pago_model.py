@@ -17,6 +17,12 @@ class PolizaPlanPago(db.Model):
     valor_pagado = db.Column(db.Numeric(15, 2))
     referencia_pago = db.Column(db.String(100))
     
+    # Bloqueo optimista: el ORM agrega "AND version = <leída>" a cada UPDATE
+    # y la incrementa; las actualizaciones masivas también deben incrementarla
+    version = db.Column(db.Integer, nullable=False, default=1)
+    
+    __mapper_args__ = {'version_id_col': version}
+    
     def __repr__(self):
         return f'<PolizaPlanPago {self.poliza_id}-{self.numero_cuota}>'
     
@@ -84,12 +90,36 @@ class PolizaPlanPago(db.Model):
     def generar_link_portal_pagos(self, base_url="https://pagos.aseguradora.com"):
         """Generar link para portal de pagos"""
         if not self.link_portal_pagos:
-            import uuid
-            token = str(uuid.uuid4())
-            self.link_portal_pagos = f"{base_url}/pago/{self.poliza_id}/{self.numero_cuota}?token={token}"
+            self.link_portal_pagos = PolizaPlanPago.construir_link_portal_pagos(
+                base_url, self.poliza_id, self.numero_cuota
+            )
         
         return self.link_portal_pagos
     
+    @staticmethod
+    def pendiente_a_fecha(fecha_corte):
+        """
+        Condición SQL: cuota por cobrar a la fecha de corte
+        
+        Una cuota pagada después de la fecha de corte seguía pendiente en esa
+        fecha. Para hoy o una fecha futura basta el estado, lo que permite
+        usar idx_plan_pagos_estado_fecha.
+        """
+        pendiente = PolizaPlanPago.estado_pago.in_(('Pendiente de pago', 'Vencido'))
+        if fecha_corte >= date.today():
+            return pendiente
+        return db.or_(
+            pendiente,
+            db.and_(PolizaPlanPago.estado_pago == 'Pagado', PolizaPlanPago.fecha_pago_real > fecha_corte)
+        )
+    
+    @staticmethod
+    def construir_link_portal_pagos(base_url, poliza_id, numero_cuota):
+        """Link del portal de pagos con un token aleatorio no adivinable"""
+        import secrets
+        token = secrets.token_urlsafe(24)
+        return f"{base_url}/pago/{poliza_id}/{numero_cuota}?token={token}"
+    
     @staticmethod
     def generar_plan_pagos(poliza_id, valor_prima_total, numero_cuotas, fecha_inicio_vigencia, 
                           tasa_financiacion=None, frecuencia_pago='mensual'):
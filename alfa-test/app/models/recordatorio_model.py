@@ -0,0 +1,44 @@
+from app import db
+from datetime import datetime
+
+class RecordatorioOutbox(db.Model):
+    """Recordatorio de pago pendiente de envío (patrón outbox)"""
+    __tablename__ = 'recordatorios_outbox'
+    __table_args__ = (
+        db.UniqueConstraint('cuota_id', 'cliente_id', 'fecha_programada', name='uq_recordatorio_cuota_cliente_fecha'),
+    )
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    cuota_id = db.Column(db.Integer, db.ForeignKey('poliza_plan_pagos.id', ondelete='CASCADE'), nullable=False)
+    cliente_id = db.Column(db.Integer, db.ForeignKey('clientes.id', ondelete='CASCADE'), nullable=False)
+    fecha_programada = db.Column(db.Date, nullable=False)
+    canal = db.Column(db.String(20), nullable=False, default='email')
+    destinatario = db.Column(db.String(255), nullable=False)
+    asunto = db.Column(db.String(255), nullable=False)
+    cuerpo = db.Column(db.Text, nullable=False)
+    estado = db.Column(db.Enum('Pendiente', 'Enviando', 'Enviado', 'Fallido', name='estado_recordatorio_enum'),
+                       nullable=False, default='Pendiente')
+    intentos = db.Column(db.Integer, nullable=False, default=0)
+    bloqueado_hasta = db.Column(db.DateTime)
+    error = db.Column(db.Text)
+    creado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    enviado_en = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<RecordatorioOutbox {self.id} cuota={self.cuota_id} {self.estado}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'cuota_id': self.cuota_id,
+            'cliente_id': self.cliente_id,
+            'fecha_programada': self.fecha_programada.isoformat() if self.fecha_programada else None,
+            'canal': self.canal,
+            'destinatario': self.destinatario,
+            'asunto': self.asunto,
+            'estado': self.estado,
+            'intentos': self.intentos,
+            'error': self.error,
+            'creado_en': self.creado_en.isoformat() if self.creado_en else None,
+            'enviado_en': self.enviado_en.isoformat() if self.enviado_en else None
+        }
@@ -0,0 +1,63 @@
+from app import db
+from datetime import datetime
+
+class RenovacionEjecucion(db.Model):
+    """Ejecución del motor de renovaciones con su punto de control"""
+    __tablename__ = 'renovaciones_ejecucion'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    fecha_corte = db.Column(db.Date, nullable=False)
+    fecha_limite = db.Column(db.Date, nullable=False)
+    estado = db.Column(db.Enum('En curso', 'Completada', 'Fallida', name='estado_renovacion_enum'),
+                       nullable=False, default='En curso')
+    # Última (fecha_fin_vigencia, id) confirmada: el siguiente lote empieza después
+    ultima_fecha_fin = db.Column(db.Date)
+    ultima_poliza_id = db.Column(db.Integer)
+    polizas_procesadas = db.Column(db.Integer, nullable=False, default=0)
+    opciones_generadas = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    iniciada_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    actualizada_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finalizada_en = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<RenovacionEjecucion {self.id} {self.estado}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'fecha_corte': self.fecha_corte.isoformat() if self.fecha_corte else None,
+            'fecha_limite': self.fecha_limite.isoformat() if self.fecha_limite else None,
+            'estado': self.estado,
+            'ultima_fecha_fin': self.ultima_fecha_fin.isoformat() if self.ultima_fecha_fin else None,
+            'ultima_poliza_id': self.ultima_poliza_id,
+            'polizas_procesadas': self.polizas_procesadas,
+            'opciones_generadas': self.opciones_generadas,
+            'error': self.error,
+            'iniciada_en': self.iniciada_en.isoformat() if self.iniciada_en else None,
+            'actualizada_en': self.actualizada_en.isoformat() if self.actualizada_en else None,
+            'finalizada_en': self.finalizada_en.isoformat() if self.finalizada_en else None
+        }
+
+
+class RenovacionOpcion(db.Model):
+    """Borrador de renovación generado para una póliza con una aseguradora"""
+    __tablename__ = 'renovaciones_opciones'
+
+    poliza_id = db.Column(db.Integer, db.ForeignKey('polizas.id', ondelete='CASCADE'), primary_key=True)
+    aseguradora_id = db.Column(db.Integer, db.ForeignKey('aseguradoras.id'), primary_key=True)
+    opcion_seguro_id = db.Column(db.Integer, db.ForeignKey('opciones_seguro.id', ondelete='CASCADE'), nullable=False)
+    ejecucion_id = db.Column(db.Integer, db.ForeignKey('renovaciones_ejecucion.id'), nullable=False)
+    creada_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<RenovacionOpcion poliza={self.poliza_id} aseguradora={self.aseguradora_id}>'
+
+    def to_dict(self):
+        return {
+            'poliza_id': self.poliza_id,
+            'aseguradora_id': self.aseguradora_id,
+            'opcion_seguro_id': self.opcion_seguro_id,
+            'ejecucion_id': self.ejecucion_id,
+            'creada_en': self.creada_en.isoformat() if self.creada_en else None
+        }
@@ -0,0 +1,22 @@
+from app import db
+from datetime import datetime
+
+class Secuencia(db.Model):
+    """Siguiente número disponible de una secuencia en un período"""
+    __tablename__ = 'secuencias'
+
+    nombre = db.Column(db.String(50), primary_key=True)
+    periodo = db.Column(db.String(7), primary_key=True, default='')
+    siguiente = db.Column(db.BigInteger, nullable=False, default=1)
+    actualizado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<Secuencia {self.nombre}:{self.periodo} siguiente={self.siguiente}>'
+
+    def to_dict(self):
+        return {
+            'nombre': self.nombre,
+            'periodo': self.periodo,
+            'siguiente': self.siguiente,
+            'actualizado_en': self.actualizado_en.isoformat() if self.actualizado_en else None
+        }
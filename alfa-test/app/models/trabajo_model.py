@@ -0,0 +1,30 @@
+from app import db
+from datetime import datetime
+
+class Trabajo(db.Model):
+    """Trabajo en segundo plano (cola SQL de app.jobs)"""
+    __tablename__ = 'trabajos'
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    tarea = db.Column(db.String(100), nullable=False)
+    cola = db.Column(db.String(50), nullable=False, default='default')
+    parametros = db.Column(db.JSON)
+    estado = db.Column(db.Enum('Pendiente', 'En ejecución', 'Completado', 'Fallido', name='estado_trabajo_enum'),
+                       nullable=False, default='Pendiente')
+    intentos = db.Column(db.Integer, nullable=False, default=0)
+    max_intentos = db.Column(db.Integer, nullable=False, default=3)
+    ejecutar_despues = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    progreso = db.Column(db.Integer, nullable=False, default=0)
+    mensaje_progreso = db.Column(db.String(255))
+    resultado = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    worker = db.Column(db.String(100))
+    # Un trabajo 'En ejecución' cuyo bloqueo venció se considera abandonado y se reintenta
+    bloqueado_hasta = db.Column(db.DateTime)
+    creado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    iniciado_en = db.Column(db.DateTime)
+    finalizado_en = db.Column(db.DateTime)
+    actualizado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<Trabajo {self.id} {self.tarea} {self.estado}>'
@@ -1,10 +1,22 @@
 # Paquete routes
-from .agente_routes import agente_bp
-from .cliente_routes import cliente_bp
-from .asignacion_routes import asignacion_bp
-from .bien_routes import bien_bp
-from .aseguradora_routes import aseguradora_bp
-from .opcion_seguro_routes import opcion_seguro_bp
-from .poliza_routes import poliza_bp
-
-__all__ = ['agente_bp', 'cliente_bp', 'asignacion_bp', 'bien_bp', 'aseguradora_bp', 'opcion_seguro_bp', 'poliza_bp'] 
\ No newline at end of file
+# Los blueprints se importan bajo demanda para que cargar un módulo de rutas
+# (por ejemplo, desde una vista perezosa) no importe todos los demás
+from importlib import import_module
+
+_MODULOS = {
+    'agente_bp': 'agente_routes',
+    'cliente_bp': 'cliente_routes',
+    'asignacion_bp': 'asignacion_routes',
+    'bien_bp': 'bien_routes',
+    'aseguradora_bp': 'aseguradora_routes',
+    'opcion_seguro_bp': 'opcion_seguro_routes',
+    'poliza_bp': 'poliza_routes',
+}
+
+__all__ = ['agente_bp', 'cliente_bp', 'asignacion_bp', 'bien_bp', 'aseguradora_bp', 'opcion_seguro_bp', 'poliza_bp']
+
+
+def __getattr__(nombre):
+    if nombre in _MODULOS:
+        return getattr(import_module(f'.{_MODULOS[nombre]}', __name__), nombre)
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
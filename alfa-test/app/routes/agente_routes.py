@@ -1,6 +1,11 @@
 from flask import Blueprint, jsonify, request
 from app.services.agente_service import AgenteService
 from app.services.agente_cliente_service import AgenteClienteService
+from app.services.dashboard_service import DashboardService
+from app.services.sincronizacion_service import SincronizacionService
+from app.utils.cache import cache_respuesta
+from app.utils.filtros import ErrorConsulta
+from app.utils.http import respuesta_condicional, respuesta_json_streaming, respuesta_versionada
 from datetime import datetime
 from flasgger import swag_from
 
@@ -48,7 +53,7 @@ def get_agentes():
     tags:
       - Agentes
     summary: Obtener lista de agentes
-    description: Obtiene todos los agentes con filtros opcionales por rol o estado activo
+    description: Obtiene todos los agentes con filtros opcionales por rol o estado activo. Soporta GET condicional con ETag / If-None-Match.
     parameters:
       - name: rol
         in: query
@@ -60,6 +65,27 @@ def get_agentes():
         type: string
         enum: ['true', 'false']
         description: Filtrar solo agentes activos (true) o todos (false)
+      - name: filter[campo][operador]
+        in: query
+        type: string
+        description: "Filtro por campo (id, nombre, correo, usuario, rol, activo, fecha_creacion). Operadores: eq (por defecto), ne, in (valores separados por coma) y, según el campo, gt, gte, lt, lte, prefix y null"
+      - name: sort
+        in: query
+        type: string
+        description: "Campos de orden separados por coma; '-' para descendente"
+      - name: q
+        in: query
+        type: string
+        description: "Búsqueda por prefijo en nombre, correo y usuario (mínimo 2 caracteres)"
+      - name: limite
+        in: query
+        type: integer
+        description: "Máximo de filas (1 a 1000)"
+      - name: If-None-Match
+        in: header
+        type: string
+        required: false
+        description: ETag de una respuesta anterior; si no hubo cambios se responde 304
     responses:
       200:
         description: Lista de agentes obtenida exitosamente
@@ -95,6 +121,8 @@ def get_agentes():
                   fecha_creacion:
                     type: string
                     format: date-time
+      304:
+        description: La lista no cambió desde el ETag enviado
       400:
         description: Parámetros inválidos
         schema:
@@ -111,24 +139,29 @@ def get_agentes():
     """
     try:
         rol = request.args.get('rol')  # Filtrar por rol si se proporciona
-        activo = request.args.get('activo')  # Filtrar por estado activo
         
-        if rol:
-            if rol not in ['super_admin', 'admin', 'agente']:
-                return jsonify({
-                    'status': 'error',
-                    'message': 'El rol debe ser super_admin, admin o agente'
-                }), 400
-            agentes = AgenteService.get_agentes_by_rol(rol)
-        elif activo == 'true':
-            agentes = AgenteService.get_agentes_activos()
-        else:
-            agentes = AgenteService.get_all_agentes()
-            
-        return jsonify({
-            'status': 'success',
-            'data': [agente.to_dict() for agente in agentes]
-        }), 200
+        if rol and rol not in ['super_admin', 'admin', 'agente']:
+            return jsonify({
+                'status': 'error',
+                'message': 'El rol debe ser super_admin, admin o agente'
+            }), 400
+        
+        try:
+            condiciones, orden, limite = AgenteService.interpretar_consulta(request.args)
+        except ErrorConsulta as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 400
+        
+        def construir():
+            return {
+                'status': 'success',
+                'data': AgenteService.listar_agentes(condiciones, orden, limite)
+            }, 200
+        
+        # Con If-None-Match vigente se responde 304 sin cargar los agentes
+        return respuesta_versionada(AgenteService.get_version_agentes(condiciones), construir)
     except Exception as e:
         return jsonify({
             'status': 'error',
@@ -142,7 +175,7 @@ def get_agente(agente_id):
     tags:
       - Agentes
     summary: Obtener agente específico
-    description: Obtiene los datos de un agente específico por su ID
+    description: Obtiene los datos de un agente específico por su ID. Soporta GET condicional con ETag / If-None-Match.
     parameters:
       - name: agente_id
         in: path
@@ -150,6 +183,11 @@ def get_agente(agente_id):
         required: true
         description: ID del agente a obtener
         example: 1
+      - name: If-None-Match
+        in: header
+        type: string
+        required: false
+        description: ETag de una respuesta anterior; si no hubo cambios se responde 304
     responses:
       200:
         description: Agente obtenido exitosamente
@@ -183,6 +221,8 @@ def get_agente(agente_id):
                 fecha_creacion:
                   type: string
                   format: date-time
+      304:
+        description: El agente no cambió desde el ETag enviado
       404:
         description: Agente no encontrado
         schema:
@@ -198,17 +238,19 @@ def get_agente(agente_id):
         description: Error interno del servidor
     """
     try:
-        agente = AgenteService.get_agente_by_id(agente_id)
-        if agente:
-            return jsonify({
+        def construir():
+            agente = AgenteService.get_agente_by_id(agente_id)
+            if not agente:
+                return {
+                    'status': 'error',
+                    'message': 'Agente no encontrado'
+                }, 404
+            return {
                 'status': 'success',
                 'data': agente.to_dict()
-            }), 200
-        else:
-            return jsonify({
-                'status': 'error',
-                'message': 'Agente no encontrado'
-            }), 404
+            }, 200
+        
+        return respuesta_versionada(AgenteService.get_version_agente(agente_id), construir)
     except Exception as e:
         return jsonify({
             'status': 'error',
@@ -564,6 +606,7 @@ def delete_agente(agente_id):
 
 # Endpoints para manejo de asignaciones agente-cliente
 @agente_bp.route('/agentes/<int:agente_id>/clientes', methods=['GET'])
+@cache_respuesta('agente:{agente_id}', 'clientes')
 def get_clientes_agente(agente_id):
     """Obtener todos los clientes asignados a un agente
     ---
@@ -659,6 +702,201 @@ def get_clientes_agente(agente_id):
             'message': str(e)
         }), 500
 
+@agente_bp.route('/agentes/<int:agente_id>/dashboard', methods=['GET'])
+def get_dashboard_agente(agente_id):
+    """Obtener los indicadores de cartera de un agente
+    ---
+    tags:
+      - Agentes
+    summary: Dashboard del agente
+    description: Retorna los indicadores precalculados de la cartera del agente (clientes, bienes, pólizas activas, renovaciones próximas, cuotas vencidas y por vencer, comisiones pendientes). Se leen de agente_resumen_cartera, que se actualiza al confirmar cambios de asignaciones, pólizas y pagos. Soporta GET condicional con ETag / If-None-Match.
+    parameters:
+      - name: agente_id
+        in: path
+        type: integer
+        required: true
+        description: ID del agente
+        example: 1
+      - name: If-None-Match
+        in: header
+        type: string
+        required: false
+        description: ETag de una respuesta anterior; si no hubo cambios se responde 304
+    responses:
+      200:
+        description: Dashboard obtenido exitosamente
+        headers:
+          ETag:
+            type: string
+            description: Versión de la respuesta
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              example: "success"
+            data:
+              type: object
+              properties:
+                agente:
+                  type: object
+                resumen:
+                  type: object
+                  properties:
+                    total_clientes:
+                      type: integer
+                      example: 120
+                    total_bienes:
+                      type: integer
+                      example: 180
+                    polizas_activas:
+                      type: integer
+                      example: 95
+                    renovaciones_proximas:
+                      type: integer
+                      example: 7
+                    cuotas_vencidas:
+                      type: integer
+                      example: 4
+                    valor_cartera_vencida:
+                      type: number
+                      example: 2350000.0
+                    cuotas_por_vencer:
+                      type: integer
+                      example: 12
+                    valor_por_vencer:
+                      type: number
+                      example: 5400000.0
+                    comisiones_pendientes:
+                      type: number
+                      example: 860000.0
+                    fecha_corte:
+                      type: string
+                      format: date
+                    actualizado_en:
+                      type: string
+                      format: date-time
+                ventanas:
+                  type: object
+                  properties:
+                    dias_renovacion:
+                      type: integer
+                      example: 30
+                    dias_por_vencer:
+                      type: integer
+                      example: 7
+      304:
+        description: El dashboard no cambió desde el ETag enviado
+      404:
+        description: Agente no encontrado
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              example: "error"
+            message:
+              type: string
+              example: "Agente no encontrado"
+      500:
+        description: Error interno del servidor
+    """
+    resultado, status_code = DashboardService.obtener_dashboard(agente_id)
+    if status_code == 200:
+        return respuesta_condicional({
+            'status': 'success',
+            'data': resultado
+        })
+    return jsonify({
+        'status': 'error',
+        'message': resultado['error']
+    }), status_code
+
+@agente_bp.route('/agentes/<int:agente_id>/sync', methods=['GET'])
+def sincronizar_agente(agente_id):
+    """Cambios de la cartera de un agente desde su última sincronización
+    ---
+    tags:
+      - Agentes
+    summary: Sincronización incremental de la cartera del agente
+    description: "Para aplicaciones que guardan la cartera del agente sin conexión. Sin token devuelve la cartera completa (clientes asignados, clientes_bienes, bienes y su bien específico, opciones de seguro, pólizas y cuotas) y un token. Con el token de la respuesta anterior devuelve solo las altas, cambios (upsert, con el registro completo) y bajas (delete, con la clave) ocurridos después, y un token nuevo. Si hay_mas es true, repetir con el token nuevo. Una desasignación trae la baja del cliente, de sus vínculos en clientes_bienes y de los bienes que el agente deja de ver, con lo que cuelga de ellos; un vínculo borrado trae la del bien si el agente deja de verlo. Un cliente borrado llega solo como baja del cliente: la aplicación borra sus vínculos y los bienes que quedan sin vínculos en clientes_bienes. La respuesta se envía por partes y con gzip si el cliente lo acepta."
+    parameters:
+      - name: agente_id
+        in: path
+        type: integer
+        required: true
+        description: ID del agente
+        example: 1
+      - name: token
+        in: query
+        type: string
+        required: false
+        description: Token de la sincronización anterior (omitir para la primera)
+        example: "48213-1760870400"
+      - name: limite
+        in: query
+        type: integer
+        required: false
+        description: Máximo de cambios registrados que se procesan (por defecto 500, máximo 5000)
+        example: 500
+    responses:
+      200:
+        description: Cambios desde el token
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              example: "success"
+            token:
+              type: string
+              example: "48377-1760874000"
+            completa:
+              type: boolean
+              description: true si es la cartera completa (sin token)
+              example: false
+            hay_mas:
+              type: boolean
+              example: false
+            data:
+              type: array
+              items:
+                type: object
+                properties:
+                  tabla:
+                    type: string
+                    example: "poliza_plan_pagos"
+                  operacion:
+                    type: string
+                    enum: [upsert, delete]
+                    example: "upsert"
+                  clave:
+                    type: object
+                    example: {"id": 812}
+                  datos:
+                    type: object
+                    description: Registro completo (solo en upsert)
+      400:
+        description: Token no válido
+      404:
+        description: Agente no encontrado
+      410:
+        description: El token venció; sincronizar de nuevo sin token
+      500:
+        description: Error interno del servidor
+    """
+    resultado, status_code = SincronizacionService.obtener_cambios(
+        agente_id,
+        token=request.args.get('token') or None,
+        limite=max(1, min(request.args.get('limite', 500, type=int), 5000))
+    )
+    if status_code != 200:
+        return jsonify({
+            'status': 'error',
+            'message': resultado['error']
+        }), status_code
+    return respuesta_json_streaming(resultado.pop('cambios'), **resultado)
+
 @agente_bp.route('/agentes/<int:agente_id>/clientes/<int:cliente_id>', methods=['POST'])
 def asignar_cliente(agente_id, cliente_id):
     """Asignar un cliente a un agente
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flasgger import swag_from
 from app.services.aseguradora_service import AseguradoraService
+from app.utils.cache import cache_respuesta
 
 aseguradora_bp = Blueprint('aseguradora', __name__, url_prefix='/api')
 
@@ -149,6 +150,7 @@ def crear_aseguradora():
         }
     }
 })
+@cache_respuesta('aseguradoras', compartida=True)
 def obtener_aseguradoras():
     """Obtener todas las aseguradoras"""
     try:
@@ -198,6 +200,7 @@ def obtener_aseguradoras():
         }
     }
 })
+@cache_respuesta('aseguradora:{aseguradora_id}', compartida=True)
 def obtener_aseguradora_por_id(aseguradora_id):
     """Obtener aseguradora por ID"""
     try:
@@ -347,6 +350,7 @@ def eliminar_aseguradora(aseguradora_id):
         }
     }
 })
+@cache_respuesta('aseguradora:{aseguradora_id}', compartida=True)
 def obtener_plantillas_por_tipo(aseguradora_id, tipo_poliza):
     """Obtener plantillas por tipo de póliza"""
     try:
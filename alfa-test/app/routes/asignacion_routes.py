@@ -1,5 +1,8 @@
 from flask import Blueprint, jsonify, request
 from app.services.agente_cliente_service import AgenteClienteService
+from app.utils.cache import cache_respuesta
+from app.utils.filtros import ErrorConsulta
+from app.utils.http import respuesta_json_streaming
 from flasgger import swag_from
 
 asignacion_bp = Blueprint('asignacion', __name__, url_prefix='/api')
@@ -12,6 +15,19 @@ def get_all_asignaciones():
       - Asignaciones
     summary: Obtener todas las asignaciones
     description: Obtiene todas las asignaciones entre agentes y clientes del sistema
+    parameters:
+      - name: filter[campo][operador]
+        in: query
+        type: string
+        description: "Filtro por campo (agente_id, cliente_id, fecha_asignacion). Operadores: eq (por defecto), ne, in (valores separados por coma) y, según el campo, gt, gte, lt, lte, prefix y null"
+      - name: sort
+        in: query
+        type: string
+        description: "Campos de orden separados por coma; '-' para descendente"
+      - name: limite
+        in: query
+        type: integer
+        description: "Máximo de filas (1 a 1000)"
     responses:
       200:
         description: Lista de asignaciones obtenida exitosamente
@@ -70,11 +86,15 @@ def get_all_asignaciones():
         description: Error interno del servidor
     """
     try:
-        asignaciones = AgenteClienteService.get_all_asignaciones()
-        return jsonify({
-            'status': 'success',
-            'data': [asignacion.to_dict() for asignacion in asignaciones]
-        }), 200
+        try:
+            condiciones, orden, limite = AgenteClienteService.CONSULTA_LISTADO.interpretar(request.args)
+        except ErrorConsulta as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 400
+        
+        return respuesta_json_streaming(AgenteClienteService.iterar_asignaciones(condiciones, orden, limite))
     except Exception as e:
         return jsonify({
             'status': 'error',
@@ -82,6 +102,7 @@ def get_all_asignaciones():
         }), 500
 
 @asignacion_bp.route('/clientes/<int:cliente_id>/agentes', methods=['GET'])
+@cache_respuesta('cliente:{cliente_id}', 'agentes')
 def get_agentes_by_cliente(cliente_id):
     """Obtener todos los agentes asignados a un cliente
     ---
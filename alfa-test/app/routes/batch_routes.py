@@ -0,0 +1,79 @@
+from flask import Blueprint, current_app, jsonify, request
+from app.utils.lotes import ErrorLote, ejecutar_lote, validar_lote
+
+batch_bp = Blueprint('batch', __name__, url_prefix='/api')
+
+@batch_bp.route('/batch', methods=['POST'])
+def batch():
+    """Ejecutar varias consultas GET en una sola solicitud
+    ---
+    tags:
+      - Batch
+    summary: Consultas GET agrupadas
+    description: Despacha en el servidor una lista de consultas GET a rutas de /api/ y devuelve sus respuestas en el mismo orden. El encabezado Authorization se aplica a todas. Cada subsolicitud responde su propio código sin afectar a las demás; la respuesta del lote es 200 si el lote es válido.
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - solicitudes
+          properties:
+            solicitudes:
+              type: array
+              description: URLs o objetos {id, url, encabezados}; encabezados admite If-None-Match e If-Modified-Since
+              items:
+                type: object
+                properties:
+                  id:
+                    type: string
+                    example: "cliente"
+                  url:
+                    type: string
+                    example: "/api/clientes/1"
+                  encabezados:
+                    type: object
+                    example: {"If-None-Match": "W/\\"3f2a...\\""}
+              example: [{"id": "cliente", "url": "/api/clientes/1"}, {"id": "bienes", "url": "/api/clientes/1/bienes"}, "/api/polizas?agente_id=1"]
+    responses:
+      200:
+        description: Respuestas de las subsolicitudes
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              example: "success"
+            data:
+              type: array
+              items:
+                type: object
+                properties:
+                  id:
+                    type: string
+                    example: "cliente"
+                  codigo:
+                    type: integer
+                    example: 200
+                  encabezados:
+                    type: object
+                    example: {"ETag": "W/\\"3f2a...\\""}
+                  cuerpo:
+                    type: object
+                    description: Cuerpo JSON de la subrespuesta (null en un 304)
+      400:
+        description: Lote no válido
+    """
+    try:
+        solicitudes = validar_lote(request.get_json(silent=True), current_app.config['BATCH_MAX_SOLICITUDES'])
+    except ErrorLote as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+
+    return jsonify({
+        'status': 'success',
+        'data': ejecutar_lote(solicitudes, current_app.config['BATCH_CONCURRENCIA'])
+    }), 200
@@ -1,5 +1,8 @@
 from flask import Blueprint, jsonify, request
 from app.services.bien_service import BienService
+from app.utils.cache import cache_respuesta
+from app.utils.filtros import ErrorConsulta
+from app.utils.http import respuesta_json_streaming
 from flasgger import swag_from
 
 bien_bp = Blueprint('bien', __name__, url_prefix='/api')
@@ -22,6 +25,18 @@ def get_bienes():
         in: query
         type: integer
         description: Filtrar bienes por cliente específico
+      - name: filter[campo][operador]
+        in: query
+        type: string
+        description: "Filtro por campo (id, tipo_bien, estado, vigencias_continuas, fecha_creacion). Operadores: eq (por defecto), ne, in (valores separados por coma) y, según el campo, gt, gte, lt, lte, prefix y null"
+      - name: sort
+        in: query
+        type: string
+        description: "Campos de orden separados por coma; '-' para descendente"
+      - name: limite
+        in: query
+        type: integer
+        description: "Máximo de filas (1 a 1000)"
     responses:
       200:
         description: Lista de bienes obtenida exitosamente
@@ -81,26 +96,29 @@ def get_bienes():
         if cliente_id:
             try:
                 cliente_id = int(cliente_id)
-                bienes = BienService.get_bienes_by_cliente(cliente_id)
             except ValueError:
                 return jsonify({
                     'status': 'error',
                     'message': 'cliente_id debe ser un número entero'
                 }), 400
-        elif tipo:
-            if tipo not in ['HOGAR', 'VEHICULO', 'COPROPIEDAD', 'OTRO']:
-                return jsonify({
-                    'status': 'error',
-                    'message': 'El tipo debe ser HOGAR, VEHICULO, COPROPIEDAD o OTRO'
-                }), 400
-            bienes = BienService.get_bienes_by_tipo(tipo)
         else:
-            bienes = BienService.get_all_bienes()
-            
-        return jsonify({
-            'status': 'success',
-            'data': [bien.to_dict() for bien in bienes]
-        }), 200
+            cliente_id = None
+        if tipo and tipo not in ['HOGAR', 'VEHICULO', 'COPROPIEDAD', 'OTRO']:
+            return jsonify({
+                'status': 'error',
+                'message': 'El tipo debe ser HOGAR, VEHICULO, COPROPIEDAD o OTRO'
+            }), 400
+        
+        try:
+            condiciones, orden, limite = BienService.interpretar_consulta(request.args, cliente_id)
+        except ErrorConsulta as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 400
+        
+        # La lista se envía por partes a medida que se lee, por lotes de bienes
+        return respuesta_json_streaming(BienService.iterar_bienes(condiciones, orden, limite))
     except Exception as e:
         return jsonify({
             'status': 'error',
@@ -869,6 +887,7 @@ def desasignar_bien_de_cliente(bien_id):
 
 # Rutas específicas para cada tipo de bien
 @bien_bp.route('/bienes/tipos', methods=['GET'])
+@cache_respuesta(compartida=True, ttl=3600)
 def get_tipos_bienes():
     """Obtener los tipos de bienes disponibles
     ---
@@ -924,6 +943,7 @@ def get_tipos_bienes():
 
 # Endpoint para obtener bienes de un cliente específico con detalles
 @bien_bp.route('/clientes/<int:cliente_id>/bienes', methods=['GET'])
+@cache_respuesta('cliente:{cliente_id}', 'bienes')
 def get_bienes_cliente(cliente_id):
     """Obtener todos los bienes de un cliente específico
     ---
@@ -0,0 +1,484 @@
+import csv
+import io
+import json
+from datetime import datetime
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from app.services.cartera_service import CarteraService
+from app.services.comision_service import ComisionService
+
+cartera_bp = Blueprint('cartera', __name__, url_prefix='/api')
+
+COLUMNAS_DETALLE = [
+    'cuota_id', 'poliza_id', 'consecutivo_poliza', 'numero_cuota', 'fecha_maxima_pago',
+    'valor_a_pagar', 'dias_vencido', 'tramo', 'aseguradora_id', 'cliente_id', 'cliente', 'ciudad'
+]
+
+def _leer_parametros():
+    """fecha_corte y filtros comunes de los reportes de cartera"""
+    fecha = request.args.get('fecha_corte')
+    fecha_corte = datetime.strptime(fecha, '%Y-%m-%d').date() if fecha else None
+    filtros = {
+        'aseguradora_id': request.args.get('aseguradora_id', type=int),
+        'agente_id': request.args.get('agente_id', type=int),
+        'ciudad': request.args.get('ciudad')
+    }
+    return fecha_corte, filtros
+
+@cartera_bp.route('/cartera/edades', methods=['GET'])
+def get_cartera_edades():
+    """Cartera por edades
+    ---
+    tags:
+      - Cartera
+    summary: Cartera por edades (0-30, 31-60, 61-90, más de 90 días)
+    description: Cantidad y valor de las cuotas por cobrar a la fecha de corte, por tramo de días vencidos (días entre la fecha máxima de pago y la fecha de corte). Tramos - corriente, la cuota vence después de la fecha de corte; 0_30, de 0 a 30 días (incluye la que vence en la fecha de corte); 31_60, de 31 a 60; 61_90, de 61 a 90; mas_90, 91 días o más. Se agrupan por aseguradora, agente y/o ciudad del cliente titular. Se calcula con una sola consulta agrupada. Con agrupar_por=agente una cuota cuenta para cada agente del cliente; el total no se duplica.
+    parameters:
+      - in: query
+        name: agrupar_por
+        type: string
+        description: Dimensiones separadas por coma (aseguradora, agente, ciudad). Vacío para solo totales.
+        example: "aseguradora,ciudad"
+      - in: query
+        name: fecha_corte
+        type: string
+        format: date
+        description: Fecha de corte (por defecto hoy)
+        example: "2024-03-31"
+      - in: query
+        name: aseguradora_id
+        type: integer
+      - in: query
+        name: agente_id
+        type: integer
+      - in: query
+        name: ciudad
+        type: string
+    responses:
+      200:
+        description: Cartera por edades
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              example: "success"
+            data:
+              type: object
+              properties:
+                fecha_corte:
+                  type: string
+                  format: date
+                tramos:
+                  type: array
+                  items:
+                    type: string
+                  example: ["corriente", "0_30", "31_60", "61_90", "mas_90"]
+                grupos:
+                  type: array
+                  items:
+                    type: object
+                totales:
+                  type: object
+      400:
+        description: Parámetros inválidos
+    """
+    try:
+        fecha_corte, filtros = _leer_parametros()
+    except ValueError:
+        return jsonify({
+            'status': 'error',
+            'message': 'fecha_corte debe tener formato AAAA-MM-DD'
+        }), 400
+
+    agrupar_por = [d.strip() for d in request.args.get('agrupar_por', 'aseguradora').split(',') if d.strip()]
+    invalidas = set(agrupar_por) - set(CarteraService.DIMENSIONES)
+    if invalidas:
+        return jsonify({
+            'status': 'error',
+            'message': f"Dimensiones no válidas: {', '.join(sorted(invalidas))}. Use: {', '.join(CarteraService.DIMENSIONES)}"
+        }), 400
+
+    resultado, status_code = CarteraService.obtener_edades(fecha_corte, agrupar_por, filtros)
+    if status_code != 200:
+        return jsonify({
+            'status': 'error',
+            'message': resultado['error']
+        }), status_code
+
+    return jsonify({
+        'status': 'success',
+        'data': resultado
+    }), 200
+
+@cartera_bp.route('/cartera/edades/detalle', methods=['GET'])
+def get_cartera_edades_detalle():
+    """Detalle de la cartera por edades
+    ---
+    tags:
+      - Cartera
+    summary: Cuotas detrás del reporte por edades (streaming)
+    description: Transmite las cuotas por cobrar a medida que se leen de la base de datos, en CSV o NDJSON (un objeto JSON por línea), sin armar la respuesta completa en memoria. Acepta los mismos filtros del reporte y un tramo.
+    parameters:
+      - in: query
+        name: tramo
+        type: string
+        enum: ['corriente', '0_30', '31_60', '61_90', 'mas_90']
+      - in: query
+        name: formato
+        type: string
+        enum: ['csv', 'ndjson']
+        description: Formato de salida (por defecto csv)
+      - in: query
+        name: fecha_corte
+        type: string
+        format: date
+      - in: query
+        name: aseguradora_id
+        type: integer
+      - in: query
+        name: agente_id
+        type: integer
+      - in: query
+        name: ciudad
+        type: string
+    produces:
+      - text/csv
+      - application/x-ndjson
+    responses:
+      200:
+        description: Cuotas del reporte
+      400:
+        description: Parámetros inválidos
+    """
+    try:
+        fecha_corte, filtros = _leer_parametros()
+    except ValueError:
+        return jsonify({
+            'status': 'error',
+            'message': 'fecha_corte debe tener formato AAAA-MM-DD'
+        }), 400
+
+    tramo = request.args.get('tramo')
+    if tramo and tramo not in [nombre for nombre, _ in CarteraService.TRAMOS]:
+        return jsonify({
+            'status': 'error',
+            'message': 'Tramo no válido'
+        }), 400
+    formato = request.args.get('formato', 'csv')
+    if formato not in ('csv', 'ndjson'):
+        return jsonify({
+            'status': 'error',
+            'message': 'formato debe ser csv o ndjson'
+        }), 400
+
+    cuotas = CarteraService.iterar_detalle_edades(fecha_corte, filtros, tramo)
+
+    def generar_csv():
+        buffer = io.StringIO()
+        escritor = csv.DictWriter(buffer, fieldnames=COLUMNAS_DETALLE)
+        escritor.writeheader()
+        for numero, cuota in enumerate(cuotas, start=1):
+            escritor.writerow(cuota)
+            # Enviar en bloques de filas, no una escritura por fila
+            if numero % 500 == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    def generar_ndjson():
+        for cuota in cuotas:
+            yield json.dumps(cuota, ensure_ascii=False) + '\n'
+
+    if formato == 'csv':
+        respuesta = Response(stream_with_context(generar_csv()), mimetype='text/csv')
+        respuesta.headers['Content-Disposition'] = 'attachment; filename=cartera_edades.csv'
+    else:
+        respuesta = Response(stream_with_context(generar_ndjson()), mimetype='application/x-ndjson')
+    respuesta.headers['Cache-Control'] = 'no-store'
+    return respuesta
+
+@cartera_bp.route('/cartera/series', methods=['GET'])
+def get_cartera_series():
+    """Series de tiempo de la cartera
+    ---
+    tags:
+      - Cartera
+    summary: Tendencia diaria o mensual de la cartera
+    description: Prima vigente, valor por cobrar, valor vencido y cantidades de pólizas y cuotas por día, leídos de los snapshots diarios (cartera_snapshots) sin recalcular la historia. Por defecto los últimos 24 meses.
+    parameters:
+      - in: query
+        name: dimension
+        type: string
+        enum: ['total', 'aseguradora', 'tipo', 'agente']
+        description: Una serie por cada valor de la dimensión (por defecto total)
+      - in: query
+        name: clave
+        type: string
+        description: Solo este valor de la dimensión (id de aseguradora o agente, o tipo)
+      - in: query
+        name: desde
+        type: string
+        format: date
+      - in: query
+        name: hasta
+        type: string
+        format: date
+      - in: query
+        name: intervalo
+        type: string
+        enum: ['dia', 'mes']
+        description: mes toma el último snapshot de cada mes
+      - in: query
+        name: metricas
+        type: string
+        description: Métricas separadas por coma (por defecto todas)
+        example: "prima_vigente,valor_vencido"
+    responses:
+      200:
+        description: Series de la cartera
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              example: "success"
+            data:
+              type: object
+              properties:
+                dimension:
+                  type: string
+                metricas:
+                  type: array
+                  items:
+                    type: string
+                series:
+                  type: array
+                  items:
+                    type: object
+      400:
+        description: Parámetros inválidos
+    """
+    try:
+        desde = request.args.get('desde')
+        hasta = request.args.get('hasta')
+        desde = datetime.strptime(desde, '%Y-%m-%d').date() if desde else None
+        hasta = datetime.strptime(hasta, '%Y-%m-%d').date() if hasta else None
+    except ValueError:
+        return jsonify({
+            'status': 'error',
+            'message': 'desde y hasta deben tener formato AAAA-MM-DD'
+        }), 400
+
+    metricas = [m.strip() for m in request.args.get('metricas', '').split(',') if m.strip()]
+    resultado, status_code = CarteraService.obtener_series(
+        dimension=request.args.get('dimension', 'total'),
+        clave=request.args.get('clave'),
+        desde=desde,
+        hasta=hasta,
+        intervalo=request.args.get('intervalo', 'dia'),
+        metricas=metricas or None
+    )
+    if status_code != 200:
+        return jsonify({
+            'status': 'error',
+            'message': resultado['error']
+        }), status_code
+
+    respuesta = jsonify({
+        'status': 'success',
+        'data': resultado
+    })
+    # Los snapshots cambian una vez al día
+    respuesta.headers['Cache-Control'] = 'private, max-age=300'
+    return respuesta, 200
+
+@cartera_bp.route('/cartera/comisiones', methods=['GET'])
+def get_liquidaciones_comision():
+    """Liquidaciones de comisión del mes
+    ---
+    tags:
+      - Cartera
+    summary: Liquidación de comisiones por aseguradora de un mes
+    description: Comisión causada (pólizas emitidas), recaudada (cuotas pagadas) y reversada (pólizas canceladas) por aseguradora, según el libro de comisiones. Las liquidaciones abiertas se calculan con una consulta agrupada sobre los movimientos del mes, sin guardarlas (para eso, POST /api/cartera/comisiones); las cerradas se devuelven tal como quedaron.
+    parameters:
+      - in: query
+        name: periodo
+        type: string
+        description: Mes AAAA-MM (por defecto el actual)
+        example: "2024-03"
+      - in: query
+        name: aseguradora_id
+        type: integer
+    responses:
+      200:
+        description: Liquidaciones del mes
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              example: "success"
+            data:
+              type: object
+              properties:
+                periodo:
+                  type: string
+                liquidaciones:
+                  type: array
+                  items:
+                    type: object
+                totales:
+                  type: object
+      400:
+        description: Período inválido
+    """
+    resultado, status_code = ComisionService.obtener_liquidaciones(
+        request.args.get('periodo'),
+        request.args.get('aseguradora_id', type=int)
+    )
+    if status_code != 200:
+        return jsonify({
+            'status': 'error',
+            'message': resultado['error']
+        }), status_code
+
+    return jsonify({
+        'status': 'success',
+        'data': resultado
+    }), 200
+
+@cartera_bp.route('/cartera/comisiones', methods=['POST'])
+def generar_liquidaciones_comision():
+    """Generar las liquidaciones de comisión del mes
+    ---
+    tags:
+      - Cartera
+    summary: Recalcular y guardar las liquidaciones de un mes
+    description: Recalcula desde el libro las liquidaciones abiertas del mes y las guarda en comisiones_liquidaciones (el trabajo liquidar_comisiones hace lo mismo en segundo plano). Las cerradas no cambian.
+    parameters:
+      - in: body
+        name: body
+        schema:
+          type: object
+          properties:
+            periodo:
+              type: string
+              description: Mes AAAA-MM (por defecto el actual)
+              example: "2024-03"
+            aseguradora_id:
+              type: integer
+    responses:
+      200:
+        description: Liquidaciones guardadas
+      400:
+        description: Período inválido
+    """
+    datos = request.get_json(silent=True) or {}
+    resultado, status_code = ComisionService.obtener_liquidaciones(
+        datos.get('periodo'),
+        datos.get('aseguradora_id'),
+        guardar=True
+    )
+    if status_code != 200:
+        return jsonify({
+            'status': 'error',
+            'message': resultado['error']
+        }), status_code
+
+    return jsonify({
+        'status': 'success',
+        'data': resultado
+    }), 200
+
+@cartera_bp.route('/cartera/comisiones/<int:aseguradora_id>/<periodo>', methods=['GET'])
+def get_liquidacion_comision(aseguradora_id, periodo):
+    """Liquidación de comisiones de una aseguradora
+    ---
+    tags:
+      - Cartera
+    summary: Liquidación de una aseguradora con sus movimientos
+    description: Totales del mes y movimientos del libro (póliza, cuota, prima base y comisión), paginados con cursor.
+    parameters:
+      - in: path
+        name: aseguradora_id
+        type: integer
+        required: true
+      - in: path
+        name: periodo
+        type: string
+        required: true
+        example: "2024-03"
+      - in: query
+        name: cursor
+        type: string
+        description: Valor siguiente_cursor de la página anterior
+      - in: query
+        name: limite
+        type: integer
+        description: Movimientos por página (máximo 1000)
+    responses:
+      200:
+        description: Liquidación y movimientos
+      400:
+        description: Período o cursor inválido
+      404:
+        description: Aseguradora no encontrada
+    """
+    resultado, status_code = ComisionService.obtener_liquidacion(
+        aseguradora_id,
+        periodo,
+        cursor=request.args.get('cursor'),
+        limite=min(request.args.get('limite', 100, type=int), 1000)
+    )
+    if status_code != 200:
+        return jsonify({
+            'status': 'error',
+            'message': resultado['error']
+        }), status_code
+
+    return jsonify({
+        'status': 'success',
+        'data': resultado
+    }), 200
+
+@cartera_bp.route('/cartera/comisiones/<int:aseguradora_id>/<periodo>/cerrar', methods=['POST'])
+def cerrar_liquidacion_comision(aseguradora_id, periodo):
+    """Cerrar la liquidación de comisiones de un mes
+    ---
+    tags:
+      - Cartera
+    summary: Cerrar la liquidación de una aseguradora
+    description: Recalcula la liquidación de un mes ya terminado y la deja cerrada; desde entonces sus totales no cambian. Los movimientos nuevos se registran en el mes en curso.
+    parameters:
+      - in: path
+        name: aseguradora_id
+        type: integer
+        required: true
+      - in: path
+        name: periodo
+        type: string
+        required: true
+        example: "2024-03"
+    responses:
+      200:
+        description: Liquidación cerrada
+      400:
+        description: Período inválido o mes no terminado
+      404:
+        description: Aseguradora no encontrada
+      409:
+        description: La liquidación ya estaba cerrada
+    """
+    resultado, status_code = ComisionService.cerrar_liquidacion(aseguradora_id, periodo)
+    if status_code != 200:
+        return jsonify({
+            'status': 'error',
+            'message': resultado['error']
+        }), status_code
+
+    return jsonify({
+        'status': 'success',
+        'message': resultado['message'],
+        'data': resultado['liquidacion']
+    }), 200
@@ -1,5 +1,8 @@
 from flask import Blueprint, jsonify, request
 from app.services.cliente_service import ClienteService
+from app.services.portfolio_service import PortfolioService
+from app.utils.filtros import ErrorConsulta
+from app.utils.http import respuesta_condicional, respuesta_json_streaming, respuesta_versionada
 from flasgger import swag_from
 
 cliente_bp = Blueprint('cliente', __name__, url_prefix='/api')
@@ -11,13 +14,34 @@ def get_clientes():
     tags:
       - Clientes
     summary: Obtener lista de clientes
-    description: Obtiene todos los clientes con filtro opcional por tipo (PERSONA o EMPRESA)
+    description: Obtiene todos los clientes con filtro opcional por tipo (PERSONA o EMPRESA). Soporta GET condicional con ETag / If-None-Match.
     parameters:
       - name: tipo
         in: query
         type: string
         enum: ['PERSONA', 'EMPRESA']
         description: Filtrar clientes por tipo
+      - name: filter[campo][operador]
+        in: query
+        type: string
+        description: "Filtro por campo (id, tipo_cliente, ciudad, nombre, razon_social, numero_documento, nit, correo, usuario, actualizado_en). Operadores: eq (por defecto), ne, in (valores separados por coma) y, según el campo, gt, gte, lt, lte, prefix y null"
+      - name: sort
+        in: query
+        type: string
+        description: "Campos de orden separados por coma; '-' para descendente"
+      - name: q
+        in: query
+        type: string
+        description: "Búsqueda por prefijo en nombre, razón social, documento, NIT y correo (mínimo 2 caracteres)"
+      - name: limite
+        in: query
+        type: integer
+        description: "Máximo de filas (1 a 1000)"
+      - name: If-None-Match
+        in: header
+        type: string
+        required: false
+        description: ETag de una respuesta anterior; si no hubo cambios se responde 304
     responses:
       200:
         description: Lista de clientes obtenida exitosamente
@@ -64,6 +88,8 @@ def get_clientes():
                   fecha_creacion:
                     type: string
                     format: date-time
+      304:
+        description: La lista no cambió desde el ETag enviado
       400:
         description: Parámetros inválidos
         schema:
@@ -81,20 +107,26 @@ def get_clientes():
     try:
         tipo = request.args.get('tipo')  # Filtrar por tipo si se proporciona
         
-        if tipo:
-            if tipo not in ['PERSONA', 'EMPRESA']:
-                return jsonify({
-                    'status': 'error',
-                    'message': 'El tipo debe ser PERSONA o EMPRESA'
-                }), 400
-            clientes = ClienteService.get_clientes_by_tipo(tipo)
-        else:
-            clientes = ClienteService.get_all_clientes()
-            
-        return jsonify({
-            'status': 'success',
-            'data': [cliente.to_dict() for cliente in clientes]
-        }), 200
+        if tipo and tipo not in ['PERSONA', 'EMPRESA']:
+            return jsonify({
+                'status': 'error',
+                'message': 'El tipo debe ser PERSONA o EMPRESA'
+            }), 400
+        
+        try:
+            condiciones, orden, limite = ClienteService.CONSULTA_LISTADO.interpretar(request.args)
+        except ErrorConsulta as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 400
+        
+        # Con If-None-Match vigente se responde 304 sin cargar los clientes;
+        # si no, la lista se envía por partes a medida que se lee
+        return respuesta_versionada(
+            ClienteService.get_version_clientes(condiciones),
+            lambda: respuesta_json_streaming(ClienteService.iterar_clientes(condiciones, orden, limite))
+        )
     except Exception as e:
         return jsonify({
             'status': 'error',
@@ -108,7 +140,7 @@ def get_cliente(cliente_id):
     tags:
       - Clientes
     summary: Obtener cliente específico
-    description: Obtiene los datos de un cliente específico por su ID
+    description: Obtiene los datos de un cliente específico por su ID. Soporta GET condicional con ETag / If-None-Match.
     parameters:
       - name: cliente_id
         in: path
@@ -116,6 +148,11 @@ def get_cliente(cliente_id):
         required: true
         description: ID del cliente a obtener
         example: 1
+      - name: If-None-Match
+        in: header
+        type: string
+        required: false
+        description: ETag de una respuesta anterior; si no hubo cambios se responde 304
     responses:
       200:
         description: Cliente obtenido exitosamente
@@ -160,6 +197,8 @@ def get_cliente(cliente_id):
                 fecha_creacion:
                   type: string
                   format: date-time
+      304:
+        description: El cliente no cambió desde el ETag enviado
       404:
         description: Cliente no encontrado
         schema:
@@ -184,17 +223,19 @@ def get_cliente(cliente_id):
               example: "Error interno del servidor"
     """
     try:
-        cliente = ClienteService.get_cliente_by_id(cliente_id)
-        if cliente:
-            return jsonify({
+        def construir():
+            cliente = ClienteService.get_cliente_by_id(cliente_id)
+            if not cliente:
+                return {
+                    'status': 'error',
+                    'message': 'Cliente no encontrado'
+                }, 404
+            return {
                 'status': 'success',
                 'data': cliente.to_dict()
-            }), 200
-        else:
-            return jsonify({
-                'status': 'error',
-                'message': 'Cliente no encontrado'
-            }), 404
+            }, 200
+        
+        return respuesta_versionada(ClienteService.get_version_cliente(cliente_id), construir)
     except Exception as e:
         return jsonify({
             'status': 'error',
@@ -628,4 +669,106 @@ def delete_cliente(cliente_id):
         return jsonify({
             'status': 'error',
             'message': str(e)
-        }), 500 
\ No newline at end of file
+        }), 500
+
+@cliente_bp.route('/clientes/<int:cliente_id>/portfolio', methods=['GET'])
+def get_portfolio_cliente(cliente_id):
+    """Obtener la vista consolidada (360) de un cliente
+    ---
+    tags:
+      - Clientes
+    summary: Portafolio completo del cliente
+    description: Retorna en una sola respuesta el cliente, sus agentes, sus bienes con los datos específicos, las opciones de seguro de cada bien, las pólizas emitidas y el resumen de cuotas de cada póliza. Soporta GET condicional con ETag / If-None-Match.
+    parameters:
+      - name: cliente_id
+        in: path
+        type: integer
+        required: true
+        description: ID del cliente
+        example: 1
+      - name: If-None-Match
+        in: header
+        type: string
+        required: false
+        description: ETag de una respuesta anterior; si no hubo cambios se responde 304
+    responses:
+      200:
+        description: Portafolio obtenido exitosamente
+        headers:
+          ETag:
+            type: string
+            description: Versión de la respuesta
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              example: "success"
+            data:
+              type: object
+              properties:
+                cliente:
+                  type: object
+                agentes:
+                  type: array
+                  items:
+                    type: object
+                bienes:
+                  type: array
+                  description: "Bienes con bien_especifico y opciones_seguro (cada opción incluye su póliza y resumen_pagos)"
+                  items:
+                    type: object
+                resumen:
+                  type: object
+                  properties:
+                    total_bienes:
+                      type: integer
+                      example: 3
+                    total_opciones_seguro:
+                      type: integer
+                      example: 5
+                    total_polizas:
+                      type: integer
+                      example: 2
+                    polizas_vigentes:
+                      type: integer
+                      example: 2
+                    cuotas_vencidas:
+                      type: integer
+                      example: 1
+                    valor_pendiente:
+                      type: number
+                      example: 1250000.0
+      304:
+        description: El portafolio no cambió desde el ETag enviado
+      404:
+        description: Cliente no encontrado
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              example: "error"
+            message:
+              type: string
+              example: "Cliente no encontrado"
+      500:
+        description: Error interno del servidor
+    """
+    try:
+        portfolio = PortfolioService.obtener_portfolio_cliente(cliente_id)
+        if portfolio:
+            return respuesta_condicional({
+                'status': 'success',
+                'data': portfolio
+            })
+        else:
+            return jsonify({
+                'status': 'error',
+                'message': 'Cliente no encontrado'
+            }), 404
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
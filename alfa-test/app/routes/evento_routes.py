@@ -0,0 +1,61 @@
+from flask import Blueprint, current_app, jsonify, request
+from app.utils.eventos import TIPOS_EVENTO, flujo_sse, obtener_broker
+
+evento_bp = Blueprint('evento', __name__, url_prefix='/api')
+
+@evento_bp.route('/eventos', methods=['GET'])
+def stream_eventos():
+    """Flujo de eventos de pólizas y pagos (Server-Sent Events)
+    ---
+    tags:
+      - Eventos
+    summary: Notificaciones en vivo
+    description: "Conexión text/event-stream que envía un evento por cada póliza emitida, pago registrado, cancelación o cambio de estado de cartera, en cuanto el relay del outbox lo publica. Pensado para EventSource en el navegador: reemplaza la consulta periódica de /api/polizas. Cada evento trae id, tipo, fecha y datos (poliza_id y los valores del cambio). La conexión se cierra cada EVENTOS_DURACION_MAXIMA_SEGUNDOS y EventSource reconecta enviando Last-Event-ID para recibir lo que se haya perdido."
+    produces:
+      - text/event-stream
+    parameters:
+      - name: tipos
+        in: query
+        type: string
+        description: "Tipos de evento separados por coma (por defecto todos): poliza.emitida, poliza.pago, poliza.cancelada, poliza.vencida, poliza.estado, cartera.vencimientos y los cambios <agregado>.alta/cambio/baja de cliente, bien, poliza y cuota"
+        example: "poliza.pago,poliza.cancelada"
+      - name: Last-Event-ID
+        in: header
+        type: string
+        description: Id del último evento recibido (lo envía EventSource al reconectar)
+    responses:
+      200:
+        description: "Flujo de eventos: id, event (tipo) y data (JSON con id, tipo, fecha y datos)"
+      400:
+        description: Tipo de evento no válido
+      503:
+        description: Eventos desactivados (EVENTOS_BACKEND=ninguno)
+    """
+    broker = obtener_broker()
+    if broker is None:
+        return jsonify({
+            'status': 'error',
+            'message': 'Los eventos en vivo no están habilitados'
+        }), 503
+
+    tipos = [t.strip() for t in (request.args.get('tipos') or '').split(',') if t.strip()]
+    no_validos = [t for t in tipos if t not in TIPOS_EVENTO]
+    if no_validos:
+        return jsonify({
+            'status': 'error',
+            'message': f"Tipos de evento no válidos: {', '.join(no_validos)}. Tipos disponibles: {', '.join(TIPOS_EVENTO)}"
+        }), 400
+
+    # El generador no usa la base de datos: la sesión se libera al terminar la vista
+    flujo = flujo_sse(
+        broker,
+        tipos=tipos,
+        ultimo_id=request.headers.get('Last-Event-ID'),
+        keepalive=current_app.config['EVENTOS_KEEPALIVE_SEGUNDOS'],
+        duracion_maxima=current_app.config['EVENTOS_DURACION_MAXIMA_SEGUNDOS']
+    )
+    return current_app.response_class(flujo, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Sin buffer en nginx: cada evento sale en cuanto se escribe
+        'X-Accel-Buffering': 'no'
+    })
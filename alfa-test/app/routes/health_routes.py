@@ -0,0 +1,61 @@
+from flask import Blueprint, current_app, jsonify
+from datetime import datetime
+from app.utils.salud import estado_readiness
+
+health_bp = Blueprint('health', __name__, url_prefix='/api')
+
+@health_bp.route('/health/live', methods=['GET'])
+def liveness():
+    """Verificar que el proceso está vivo (no consulta dependencias)
+    ---
+    tags:
+      - Health
+    summary: Liveness probe
+    description: Responde mientras el proceso pueda atender solicitudes. No toca la base de datos, por lo que es seguro consultarlo con alta frecuencia.
+    responses:
+      200:
+        description: Proceso vivo
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              example: "alive"
+            timestamp:
+              type: string
+              format: date-time
+    """
+    return jsonify({
+        'status': 'alive',
+        'timestamp': datetime.utcnow().isoformat()
+    }), 200
+
+@health_bp.route('/health/ready', methods=['GET'])
+def readiness():
+    """Verificar que la API puede atender tráfico
+    ---
+    tags:
+      - Health
+    summary: Readiness probe
+    description: Verifica una conexión del pool de base de datos, la versión del esquema y el calentamiento de las cachés registradas. El resultado se cachea durante HEALTH_CACHE_SEGUNDOS.
+    responses:
+      200:
+        description: API lista para recibir tráfico
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              example: "ready"
+            checks:
+              type: object
+              example: {"base_datos": {"ok": true, "detalle": "Conexión disponible", "duracion_ms": 1.2}}
+            timestamp:
+              type: string
+              format: date-time
+      503:
+        description: Alguna verificación falló
+    """
+    resultado = estado_readiness(current_app.config.get('HEALTH_CACHE_SEGUNDOS', 5))
+    codigo = 200 if resultado['status'] == 'ready' else 503
+    return jsonify(resultado), codigo
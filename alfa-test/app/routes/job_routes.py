@@ -0,0 +1,162 @@
+from flask import Blueprint, jsonify, request, url_for
+from app.jobs import encolar, obtener_definicion, obtener_trabajo, tareas_publicas
+
+job_bp = Blueprint('job', __name__, url_prefix='/api')
+
+@job_bp.route('/jobs', methods=['POST'])
+def create_job():
+    """Encolar una tarea en segundo plano
+    ---
+    tags:
+      - Trabajos
+    summary: Encolar una tarea
+    description: Registra la tarea para que la ejecute un worker (flask --app run worker) y responde de inmediato con el id del trabajo. El avance se consulta en GET /api/jobs/{id}.
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - tarea
+          properties:
+            tarea:
+              type: string
+              enum: ['barrido_vencimientos', 'despachar_recordatorios', 'liquidar_comisiones', 'preparar_recordatorios', 'purgar_eventos', 'purgar_idempotencia', 'purgar_sincronizacion', 'reporte_cartera', 'resumenes_agentes', 'snapshot_cartera', 'snapshot_mora']
+              example: "reporte_cartera"
+            parametros:
+              type: object
+              description: Argumentos de la tarea
+              example: {}
+    responses:
+      202:
+        description: Trabajo encolado
+        headers:
+          Location:
+            type: string
+            description: URL de estado del trabajo
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              example: "success"
+            data:
+              type: object
+              properties:
+                id:
+                  type: integer
+                  example: 42
+                estado:
+                  type: string
+                  example: "Pendiente"
+      400:
+        description: Tarea no válida
+    """
+    data = request.get_json() or {}
+    nombre = data.get('tarea')
+    definicion = obtener_definicion(nombre) if nombre else None
+    if not definicion or not definicion.publica:
+        return jsonify({
+            'status': 'error',
+            'message': f"Tarea no válida. Tareas disponibles: {', '.join(tareas_publicas())}"
+        }), 400
+
+    parametros = data.get('parametros') or {}
+    if not isinstance(parametros, dict):
+        return jsonify({
+            'status': 'error',
+            'message': 'parametros debe ser un objeto'
+        }), 400
+
+    try:
+        trabajo_id = encolar(nombre, parametros)
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+    respuesta = jsonify({
+        'status': 'success',
+        'data': obtener_trabajo(trabajo_id)
+    })
+    respuesta.status_code = 202
+    respuesta.headers['Location'] = url_for('job.get_job', trabajo_id=trabajo_id)
+    return respuesta
+
+@job_bp.route('/jobs/<int:trabajo_id>', methods=['GET'])
+def get_job(trabajo_id):
+    """Consultar el estado de un trabajo
+    ---
+    tags:
+      - Trabajos
+    summary: Estado de un trabajo
+    description: Retorna el estado (Pendiente, En ejecución, Completado, Fallido), el progreso reportado por la tarea, los intentos y, al terminar, el resultado o el último error.
+    parameters:
+      - name: trabajo_id
+        in: path
+        type: integer
+        required: true
+        description: ID del trabajo
+        example: 42
+    responses:
+      200:
+        description: Estado del trabajo
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              example: "success"
+            data:
+              type: object
+              properties:
+                id:
+                  type: integer
+                  example: 42
+                tarea:
+                  type: string
+                  example: "reporte_cartera"
+                estado:
+                  type: string
+                  example: "En ejecución"
+                progreso:
+                  type: integer
+                  example: 60
+                mensaje_progreso:
+                  type: string
+                intentos:
+                  type: integer
+                  example: 1
+                max_intentos:
+                  type: integer
+                  example: 3
+                resultado:
+                  type: object
+                error:
+                  type: string
+      404:
+        description: Trabajo no encontrado
+    """
+    try:
+        trabajo = obtener_trabajo(trabajo_id)
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+    if not trabajo:
+        return jsonify({
+            'status': 'error',
+            'message': 'Trabajo no encontrado'
+        }), 404
+
+    respuesta = jsonify({
+        'status': 'success',
+        'data': trabajo
+    })
+    # El estado cambia mientras el trabajo corre
+    respuesta.headers['Cache-Control'] = 'no-store'
+    return respuesta
@@ -1,6 +1,11 @@
+from datetime import datetime
 from flask import Blueprint, request, jsonify
 from app.services.poliza_service import PolizaService
+from app.services.renovacion_service import RenovacionService
+from app.services.mora_service import MoraService
 from app.models.poliza_model import Poliza
+from app.utils.filtros import ErrorConsulta
+from app.utils.idempotencia import idempotente
 
 poliza_bp = Blueprint('poliza', __name__, url_prefix='/api')
 
@@ -202,9 +207,8 @@ def get_all_polizas():
       - in: query
         name: estado
         type: string
-        enum: [ACTIVA, VENCIDA, CANCELADA, SUSPENDIDA]
-        description: Filtrar por estado de póliza
-        example: "ACTIVA"
+        description: Filtrar por estado de cartera (equivale a filter[estado_cartera])
+        example: "Vencida"
       - in: query
         name: agente_id
         type: integer
@@ -215,6 +219,18 @@ def get_all_polizas():
         type: integer
         description: Filtrar por ID de la aseguradora
         example: 1
+      - in: query
+        name: filter[campo][operador]
+        type: string
+        description: "Filtro por campo (id, consecutivo_poliza, numero_poliza_aseguradora, estado_cartera, fecha_inicio_vigencia, fecha_fin_vigencia, medio_pago, valor_prima_neta, opcion_seguro_id, aseguradora_id). Operadores: eq (por defecto), ne, in (valores separados por coma) y, según el campo, gt, gte, lt, lte, prefix y null"
+      - in: query
+        name: sort
+        type: string
+        description: "Campos de orden separados por coma; '-' para descendente (ej.: -fecha_fin_vigencia,id)"
+      - in: query
+        name: q
+        type: string
+        description: "Búsqueda por prefijo en consecutivo y número de póliza de la aseguradora (mínimo 2 caracteres)"
     responses:
       200:
         description: Lista de pólizas obtenida exitosamente
@@ -308,23 +324,25 @@ def get_all_polizas():
     """
     try:
         # Obtener parámetros de consulta
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-        estado = request.args.get('estado')
-        agente_id = request.args.get('agente_id', type=int)
-        aseguradora_id = request.args.get('aseguradora_id', type=int)
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 10, type=int), 1), 100)
         
-        # Construir filtros
-        filters = {}
-        if estado:
-            filters['estado'] = estado
-        if agente_id:
-            filters['agente_id'] = agente_id
-        if aseguradora_id:
-            filters['aseguradora_id'] = aseguradora_id
+        # Filtros, orden y búsqueda (filter[...], sort, q, estado, agente_id, aseguradora_id)
+        try:
+            condiciones, orden = PolizaService.interpretar_consulta(request.args)
+        except ErrorConsulta as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
         
         # Obtener pólizas
-        polizas_data = PolizaService.get_all_polizas(page, per_page, filters)
+        polizas_data, status_code = PolizaService.listar_polizas(condiciones, orden, page, per_page)
+        if status_code != 200:
+            return jsonify({
+                'success': False,
+                'message': polizas_data['error']
+            }), status_code
         
         return jsonify({
             'success': True,
@@ -739,18 +757,18 @@ def cancel_poliza(poliza_id):
                 'message': 'El motivo de cancelación es requerido'
             }), 400
         
-        poliza = PolizaService.cancel_poliza(poliza_id, data['motivo'], data.get('fecha_cancelacion'))
-        
-        if not poliza:
+        resultado, status_code = PolizaService.cancelar_poliza(poliza_id, data['motivo'])
+
+        if status_code != 200:
             return jsonify({
                 'success': False,
-                'message': 'Póliza no encontrada'
-            }), 404
-        
+                'message': resultado['error']
+            }), status_code
+
         return jsonify({
             'success': True,
-            'message': 'Póliza cancelada exitosamente',
-            'data': poliza.to_dict()
+            'message': resultado['message'],
+            'data': resultado['poliza']
         }), 200
         
     except Exception as e:
@@ -868,13 +886,21 @@ def get_plan_pagos(poliza_id):
 
 # Registrar pago de una cuota
 @poliza_bp.route('/polizas/<int:poliza_id>/pagos/<int:cuota_id>', methods=['POST'])
+@idempotente('pagos')
 def register_payment(poliza_id, cuota_id):
     """
     Registrar pago de una cuota
     ---
     tags:
       - Pólizas
+    description: Con el encabezado Idempotency-Key un reintento de la misma solicitud (por ejemplo, tras un timeout) recibe la respuesta original en lugar de aplicar el pago otra vez.
     parameters:
+      - in: header
+        name: Idempotency-Key
+        type: string
+        required: false
+        description: Identificador único del intento de pago generado por el cliente
+        example: "5f0c2a4e-8d1b-4c7e-9a57-3b2f1e6d9c10"
       - in: path
         name: poliza_id
         type: integer
@@ -903,6 +929,10 @@ def register_payment(poliza_id, cuota_id):
               format: date
               description: Fecha del pago (por defecto hoy)
               example: "2024-02-15"
+            referencia_pago:
+              type: string
+              description: Referencia del pago
+              example: "PSE-123456"
             observaciones:
               type: string
               description: Observaciones del pago
@@ -977,6 +1007,10 @@ def register_payment(poliza_id, cuota_id):
             message:
               type: string
               example: "El valor pagado es requerido"
+      409:
+        description: La cuota cambió durante el pago o la misma Idempotency-Key se está procesando
+      422:
+        description: La Idempotency-Key ya se usó con una solicitud diferente
       500:
         description: Error interno del servidor
         schema:
@@ -998,18 +1032,19 @@ def register_payment(poliza_id, cuota_id):
                 'message': 'El valor pagado es requerido'
             }), 400
         
-        cuota = PolizaService.register_payment(poliza_id, cuota_id, data)
+        resultado, status_code = PolizaService.registrar_pago(poliza_id, cuota_id, data)
         
-        if not cuota:
+        if status_code != 200:
             return jsonify({
                 'success': False,
-                'message': 'Cuota no encontrada'
-            }), 404
+                'message': resultado['error']
+            }), status_code
         
         return jsonify({
             'success': True,
             'message': 'Pago registrado exitosamente',
-            'data': cuota.to_dict()
+            'data': resultado['cuota'],
+            'poliza_estado': resultado['poliza_estado']
         }), 200
         
     except Exception as e:
@@ -1107,6 +1142,276 @@ def get_expired_polizas():
             'message': str(e)
         }), 500
 
+# Obtener pólizas próximas a renovar
+@poliza_bp.route('/polizas/renovaciones', methods=['GET'])
+def get_polizas_por_renovar():
+    """
+    Obtener pólizas próximas a vencer
+    ---
+    tags:
+      - Pólizas
+    description: Lista las pólizas no canceladas cuya vigencia termina en los próximos días, ordenadas por fecha de fin, con los borradores de renovación ya generados. Se pagina con cursor.
+    parameters:
+      - in: query
+        name: dias
+        type: integer
+        description: Días hacia adelante (por defecto 30)
+        example: 30
+      - in: query
+        name: solo_continuas
+        type: boolean
+        description: Solo bienes con vigencias continuas
+        example: false
+      - in: query
+        name: cursor
+        type: string
+        description: Valor siguiente_cursor de la página anterior
+        example: "2024-03-15:120"
+      - in: query
+        name: limite
+        type: integer
+        description: Pólizas por página (máximo 500)
+        example: 100
+    responses:
+      200:
+        description: Pólizas por renovar obtenidas exitosamente
+        schema:
+          type: object
+          properties:
+            success:
+              type: boolean
+              example: true
+            data:
+              type: array
+              items:
+                type: object
+                properties:
+                  id:
+                    type: integer
+                    example: 1
+                  consecutivo_poliza:
+                    type: string
+                    example: "POL-2024-001"
+                  fecha_fin_vigencia:
+                    type: string
+                    format: date
+                  dias_para_vencer:
+                    type: integer
+                    example: 12
+                  vigencias_continuas:
+                    type: boolean
+                  borradores_renovacion:
+                    type: array
+                    items:
+                      type: integer
+            siguiente_cursor:
+              type: string
+              description: Cursor de la siguiente página (null si no hay más)
+      400:
+        description: Cursor inválido
+      500:
+        description: Error interno del servidor
+    """
+    dias = request.args.get('dias', 30, type=int)
+    limite = min(request.args.get('limite', 100, type=int), 500)
+    solo_continuas = request.args.get('solo_continuas', 'false').lower() == 'true'
+
+    resultado, status_code = RenovacionService.obtener_polizas_por_renovar(
+        dias=dias,
+        cursor=request.args.get('cursor'),
+        limite=limite,
+        solo_continuas=solo_continuas
+    )
+    if status_code != 200:
+        return jsonify({
+            'success': False,
+            'message': resultado['error']
+        }), status_code
+
+    return jsonify({
+        'success': True,
+        'data': resultado['polizas'],
+        'siguiente_cursor': resultado['siguiente_cursor']
+    }), 200
+
+def _leer_fecha_corte():
+    """Parámetro fecha_corte (AAAA-MM-DD); None si no se envía"""
+    fecha = request.args.get('fecha_corte')
+    return datetime.strptime(fecha, '%Y-%m-%d').date() if fecha else None
+
+# Mora de la cartera
+@poliza_bp.route('/polizas/mora', methods=['GET'])
+def get_mora_cartera():
+    """
+    Obtener la mora causada de la cartera
+    ---
+    tags:
+      - Pólizas
+    description: Totales de mora a la fecha de corte y el detalle por póliza. La tasa diaria de cada cuota sale de la regla más específica de tasas_mora (aseguradora y tipo de producto). Si existe el snapshot diario de esa fecha se lee de allí; si no, se calcula en la base de datos.
+    parameters:
+      - in: query
+        name: fecha_corte
+        type: string
+        format: date
+        description: Fecha de corte (por defecto hoy)
+        example: "2024-03-31"
+      - in: query
+        name: orden
+        type: string
+        enum: ['valor_mora', 'poliza']
+        description: valor_mora (mayores primero) o poliza (paginable con cursor)
+      - in: query
+        name: cursor
+        type: string
+        description: Valor siguiente_cursor de la página anterior (orden=poliza)
+      - in: query
+        name: limite
+        type: integer
+        description: Pólizas por página (máximo 1000)
+        example: 100
+    responses:
+      200:
+        description: Mora de la cartera
+        schema:
+          type: object
+          properties:
+            success:
+              type: boolean
+              example: true
+            data:
+              type: object
+              properties:
+                fecha_corte:
+                  type: string
+                  format: date
+                fuente:
+                  type: string
+                  example: "snapshot"
+                resumen:
+                  type: object
+                  properties:
+                    polizas_en_mora:
+                      type: integer
+                    cuotas_vencidas:
+                      type: integer
+                    capital_vencido:
+                      type: number
+                    dias_mora_max:
+                      type: integer
+                    valor_mora:
+                      type: number
+                polizas:
+                  type: array
+                  items:
+                    type: object
+            siguiente_cursor:
+              type: string
+      400:
+        description: Fecha o cursor inválido
+      500:
+        description: Error interno del servidor
+    """
+    try:
+        fecha_corte = _leer_fecha_corte()
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'fecha_corte debe tener formato AAAA-MM-DD'
+        }), 400
+
+    resultado, status_code = MoraService.obtener_mora_cartera(
+        fecha_corte=fecha_corte,
+        cursor=request.args.get('cursor'),
+        limite=min(request.args.get('limite', 100, type=int), 1000),
+        orden=request.args.get('orden', 'valor_mora')
+    )
+    if status_code != 200:
+        return jsonify({
+            'success': False,
+            'message': resultado['error']
+        }), status_code
+
+    siguiente_cursor = resultado.pop('siguiente_cursor')
+    return jsonify({
+        'success': True,
+        'data': resultado,
+        'siguiente_cursor': siguiente_cursor
+    }), 200
+
+# Mora de una póliza
+@poliza_bp.route('/polizas/<int:poliza_id>/mora', methods=['GET'])
+def get_mora_poliza(poliza_id):
+    """
+    Obtener la mora de una póliza con el detalle por cuota
+    ---
+    tags:
+      - Pólizas
+    parameters:
+      - in: path
+        name: poliza_id
+        type: integer
+        required: true
+        description: ID de la póliza
+        example: 1
+      - in: query
+        name: fecha_corte
+        type: string
+        format: date
+        description: Fecha de corte (por defecto hoy)
+        example: "2024-03-31"
+    responses:
+      200:
+        description: Mora de la póliza
+        schema:
+          type: object
+          properties:
+            success:
+              type: boolean
+              example: true
+            data:
+              type: object
+              properties:
+                valor_mora:
+                  type: number
+                  example: 13500.0
+                cuotas:
+                  type: array
+                  items:
+                    type: object
+                    properties:
+                      numero_cuota:
+                        type: integer
+                      dias_mora:
+                        type: integer
+                      tasa_diaria:
+                        type: number
+                      valor_mora:
+                        type: number
+      400:
+        description: Fecha inválida
+      404:
+        description: Póliza no encontrada
+    """
+    try:
+        fecha_corte = _leer_fecha_corte()
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'fecha_corte debe tener formato AAAA-MM-DD'
+        }), 400
+
+    resultado, status_code = MoraService.obtener_mora_poliza(poliza_id, fecha_corte)
+    if status_code != 200:
+        return jsonify({
+            'success': False,
+            'message': resultado['error']
+        }), status_code
+
+    return jsonify({
+        'success': True,
+        'data': resultado
+    }), 200
+
 # Obtener estadísticas de pólizas
 @poliza_bp.route('/polizas/estadisticas', methods=['GET'])
 def get_polizas_statistics():
@@ -2,15 +2,43 @@ from app.models.agente_cliente_model import AgenteCliente
 from app.models.agente_model import Agente
 from app.models.cliente_model import Cliente
 from app import db
+from app.utils.filtros import Campo, ConsultaLista, OPERADORES_RANGO
+from app.utils.lectura import columnas_de, serializador
+from sqlalchemy import select
 from datetime import datetime
 
 class AgenteClienteService:
     
+    COLUMNAS_LISTADO = columnas_de(AgenteCliente)
+    _serializar = serializador(COLUMNAS_LISTADO)
+    # Filtros y orden del listado (app.utils.filtros): las dos columnas de la llave primaria
+    CONSULTA_LISTADO = ConsultaLista({
+        'agente_id': Campo(AgenteCliente.agente_id, ordenable=True),
+        'cliente_id': Campo(AgenteCliente.cliente_id, ordenable=True),
+        'fecha_asignacion': Campo(AgenteCliente.fecha_asignacion, OPERADORES_RANGO)
+    }, clave=(AgenteCliente.agente_id, AgenteCliente.cliente_id))
+    
     @staticmethod
     def get_all_asignaciones():
         """Obtener todas las asignaciones agente-cliente"""
         return AgenteCliente.query.all()
     
+    @staticmethod
+    def iterar_asignaciones(condiciones=(), orden=(AgenteCliente.agente_id, AgenteCliente.cliente_id),
+                            limite=None, tamano_lote=1000):
+        """
+        Asignaciones como dicts, para listados enviados por partes
+
+        Las condiciones, el orden y el límite salen de CONSULTA_LISTADO. Las
+        filas se leen con un cursor del servidor en lotes de `tamano_lote`,
+        sin crear instancias del ORM.
+        """
+        consulta = select(*AgenteClienteService.COLUMNAS_LISTADO)\
+            .where(*condiciones).order_by(*orden).limit(limite)
+        serializar = AgenteClienteService._serializar
+        for fila in db.session.execute(consulta, execution_options={'yield_per': tamano_lote}):
+            yield serializar(fila)
+    
     @staticmethod
     def get_clientes_by_agente(agente_id):
         """Obtener todos los clientes asignados a un agente"""
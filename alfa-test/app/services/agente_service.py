@@ -1,9 +1,27 @@
 from app.models.agente_model import Agente, RolEnum
 from app.models.agente_cliente_model import AgenteCliente
 from app import db
+from app.utils.filtros import Campo, ConsultaLista, OPERADORES_RANGO, OPERADORES_TEXTO
+from app.utils.http import version_filas
+from app.utils.lectura import columnas_de, serializador
+from sqlalchemy import select
 
 class AgenteService:
     
+    # Listados: columnas de to_dict() leídas sin el ORM (app.utils.lectura)
+    COLUMNAS_LISTADO = columnas_de(Agente, excluir=('clave', 'version', 'actualizado_en'))
+    _serializar = serializador(COLUMNAS_LISTADO)
+    # Filtros y orden del listado (app.utils.filtros); los ordenables tienen índice (migración 014)
+    CONSULTA_LISTADO = ConsultaLista({
+        'id': Campo(Agente.id, OPERADORES_RANGO, ordenable=True),
+        'nombre': Campo(Agente.nombre, OPERADORES_TEXTO, ordenable=True),
+        'correo': Campo(Agente.correo, OPERADORES_TEXTO),
+        'usuario': Campo(Agente.usuario, OPERADORES_TEXTO),
+        'rol': Campo(Agente.rol, ordenable=True),
+        'activo': Campo(Agente.activo),
+        'fecha_creacion': Campo(Agente.fecha_creacion, OPERADORES_RANGO)
+    }, clave=Agente.id, busqueda=(Agente.nombre, Agente.correo, Agente.usuario), alias={'rol': 'rol'})
+    
     @staticmethod
     def get_all_agentes():
         """Obtener todos los agentes"""
@@ -25,6 +43,35 @@ class AgenteService:
         """Obtener solo agentes activos"""
         return Agente.query.filter_by(activo=True).all()
     
+    @staticmethod
+    def interpretar_consulta(argumentos):
+        """
+        (condiciones, orden, limite) del listado según los parámetros
+
+        ?activo=true conserva su significado anterior (solo activos, salvo
+        que se filtre por rol); para activos o inactivos use filter[activo].
+        """
+        condiciones, orden, limite = AgenteService.CONSULTA_LISTADO.interpretar(argumentos)
+        if argumentos.get('activo') == 'true' and not argumentos.get('rol'):
+            condiciones.append(Agente.activo.is_(True))
+        return condiciones, orden, limite
+    
+    @staticmethod
+    def listar_agentes(condiciones=(), orden=(Agente.id,), limite=None):
+        """Agentes como dicts, sin crear instancias del ORM"""
+        consulta = select(*AgenteService.COLUMNAS_LISTADO).where(*condiciones).order_by(*orden).limit(limite)
+        return [AgenteService._serializar(fila) for fila in db.session.execute(consulta)]
+    
+    @staticmethod
+    def get_version_agentes(condiciones=()):
+        """Versión de la lista de agentes (para el ETag) sin cargarlos"""
+        return version_filas(Agente, *condiciones)
+    
+    @staticmethod
+    def get_version_agente(agente_id):
+        """Versión de un agente (para el ETag) sin cargarlo"""
+        return version_filas(Agente, Agente.id == agente_id)
+    
     @staticmethod
     def create_agente(data):
         """Crear un nuevo agente"""
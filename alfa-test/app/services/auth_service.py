@@ -1,7 +1,10 @@
 import jwt
 import bcrypt
+import threading
+import time
 from datetime import datetime, timedelta
 from app.config import Config
+from app.utils.metricas import bcrypt_en_cola, bcrypt_en_curso, duracion_bcrypt
 from app.models.agente_model import Agente
 from app.models.cliente_model import Cliente
 from app import db
@@ -14,6 +17,24 @@ class AuthService:
     JWT_ALGORITHM = 'HS256'
     JWT_EXPIRATION_HOURS = 24
 
+    # bcrypt libera el GIL: limitar la concurrencia evita que los logins saturen la CPU
+    # de los workers; las operaciones que exceden el cupo esperan en cola
+    _cupos_bcrypt = threading.BoundedSemaphore(Config.BCRYPT_MAX_CONCURRENCIA)
+
+    @staticmethod
+    def _ejecutar_bcrypt(operacion: str, funcion, *args):
+        """Ejecutar una operación bcrypt dentro del cupo, registrando cola, ejecución y duración"""
+        inicio = time.perf_counter()
+        bcrypt_en_cola.inc()
+        with AuthService._cupos_bcrypt:
+            bcrypt_en_cola.dec()
+            bcrypt_en_curso.inc()
+            try:
+                return funcion(*args)
+            finally:
+                bcrypt_en_curso.dec()
+                duracion_bcrypt.observar(time.perf_counter() - inicio, operacion)
+
     @staticmethod
     def hash_password(password: str) -> str:
         """
@@ -27,7 +48,7 @@ class AuthService:
         """
         # Generar salt y hash de la contraseña
         salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
+        hashed = AuthService._ejecutar_bcrypt('hash', bcrypt.hashpw, password.encode('utf-8'), salt)
         return hashed.decode('utf-8')
 
     @staticmethod
@@ -42,7 +63,9 @@ class AuthService:
         Returns:
             bool: True si la contraseña es correcta
         """
-        return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+        return AuthService._ejecutar_bcrypt(
+            'verificar', bcrypt.checkpw, password.encode('utf-8'), hashed_password.encode('utf-8')
+        )
 
     @staticmethod
     def generate_token(user_data: dict, user_type: str) -> str:
@@ -5,9 +5,29 @@ from app.models.copropiedad_model import Copropiedad
 from app.models.otro_bien_model import OtroBien
 from app.models.cliente_bien_model import ClienteBien
 from app import db
+from app.utils.filtros import Campo, ConsultaLista, OPERADORES_RANGO
+from app.utils.lectura import columnas_de, serializador
+from sqlalchemy import select
 
 class BienService:
     
+    # Listados: columnas de to_dict() leídas sin el ORM (app.utils.lectura)
+    COLUMNAS_LISTADO = columnas_de(Bien)
+    _serializar = serializador(COLUMNAS_LISTADO)
+    # tipo_bien -> (modelo, columnas, serializador) del bien específico
+    _ESPECIFICOS = {
+        tipo: (modelo, columnas_de(modelo), serializador(columnas_de(modelo)))
+        for tipo, modelo in (('HOGAR', Hogar), ('VEHICULO', Vehiculo), ('COPROPIEDAD', Copropiedad), ('OTRO', OtroBien))
+    }
+    # Filtros y orden del listado (app.utils.filtros); los ordenables tienen índice (migración 014)
+    CONSULTA_LISTADO = ConsultaLista({
+        'id': Campo(Bien.id, OPERADORES_RANGO, ordenable=True),
+        'tipo_bien': Campo(Bien.tipo_bien, ordenable=True),
+        'estado': Campo(Bien.estado),
+        'vigencias_continuas': Campo(Bien.vigencias_continuas),
+        'fecha_creacion': Campo(Bien.fecha_creacion, OPERADORES_RANGO)
+    }, clave=Bien.id, alias={'tipo': 'tipo_bien'})
+    
     @staticmethod
     def get_all_bienes():
         """Obtener todos los bienes"""
@@ -26,10 +46,73 @@ class BienService:
     @staticmethod
     def get_bienes_by_cliente(cliente_id):
         """Obtener todos los bienes de un cliente"""
-        asignaciones = ClienteBien.query.filter_by(cliente_id=cliente_id).all()
-        return [Bien.query.get(asig.bien_id) for asig in asignaciones]
+        return Bien.query.join(ClienteBien, ClienteBien.bien_id == Bien.id)\
+            .filter(ClienteBien.cliente_id == cliente_id)\
+            .order_by(Bien.id).all()
+    
+    @staticmethod
+    def interpretar_consulta(argumentos, cliente_id=None):
+        """
+        (condiciones, orden, limite) del listado según los parámetros
+
+        El orden es None sin ?sort= (orden por id). cliente_id limita a los
+        bienes de ese cliente.
+        """
+        condiciones, orden, limite = BienService.CONSULTA_LISTADO.interpretar(argumentos)
+        if cliente_id is not None:
+            condiciones.append(Bien.id.in_(select(ClienteBien.bien_id).where(ClienteBien.cliente_id == cliente_id)))
+        return condiciones, (orden if argumentos.get('sort') else None), limite
+    
+    @staticmethod
+    def iterar_bienes(condiciones=(), orden=None, limite=None, tamano_lote=500):
+        """
+        Bienes con sus datos específicos como dicts, para listados enviados por partes
+
+        Se leen sin crear instancias del ORM, por páginas (no con un cursor del
+        servidor) porque cada lote carga sus bienes específicos, una consulta
+        por tipo, en la misma conexión. En el orden por defecto las páginas
+        avanzan por id; con otro orden, por desplazamiento.
+        """
+        base = select(*BienService.COLUMNAS_LISTADO).where(*condiciones)
+        enviados = 0
+        ultimo_id = 0
+        while True:
+            lote = tamano_lote if limite is None else min(tamano_lote, limite - enviados)
+            if orden:
+                consulta = base.order_by(*orden).offset(enviados).limit(lote)
+            else:
+                consulta = base.where(Bien.id > ultimo_id).order_by(Bien.id).limit(lote)
+            bienes = [BienService._serializar(fila) for fila in db.session.execute(consulta)]
+            if not bienes:
+                return
+            especificos = BienService._leer_especificos(bienes)
+            for datos_bien in bienes:
+                especifico = especificos.get((datos_bien['tipo_bien'], datos_bien['bien_especifico_id']))
+                if especifico:
+                    datos_bien['bien_especifico'] = especifico
+                yield datos_bien
+            enviados += len(bienes)
+            if len(bienes) < lote or enviados == limite:
+                return
+            ultimo_id = bienes[-1]['id']
     
     @staticmethod
+    def _leer_especificos(bienes):
+        """Datos específicos de varios bienes, una consulta por tipo: {(tipo, id): dict}"""
+        ids_por_tipo = {}
+        for datos_bien in bienes:
+            ids_por_tipo.setdefault(datos_bien['tipo_bien'], set()).add(datos_bien['bien_especifico_id'])
+        
+        especificos = {}
+        for tipo, ids in ids_por_tipo.items():
+            if tipo not in BienService._ESPECIFICOS:
+                continue
+            modelo, columnas, serializar = BienService._ESPECIFICOS[tipo]
+            for fila in db.session.execute(select(*columnas).where(modelo.id.in_(ids))):
+                datos = serializar(fila)
+                especificos[(tipo, datos['id'])] = datos
+        return especificos
+    @staticmethod
     def create_bien(tipo_bien, data_especifico, data_general=None):
         """
         Crear un nuevo bien con patrón polimórfico
@@ -0,0 +1,393 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import case, delete, distinct, func, literal, select
+from app.models.agente_model import Agente
+from app.models.agente_cliente_model import AgenteCliente
+from app.models.aseguradora_model import Aseguradora
+from app.models.cartera_snapshot_model import CarteraSnapshot
+from app.models.cliente_model import Cliente
+from app.models.cliente_bien_model import ClienteBien
+from app.models.opcion_seguro_model import OpcionSeguro
+from app.models.poliza_model import Poliza
+from app.models.poliza_plan_pago_model import PolizaPlanPago
+from app.utils.sql import dias_entre, periodo_de
+from app import db
+
+class CarteraService:
+    """Reportes de cartera por cobrar calculados en la base de datos"""
+
+    # (tramo, días vencidos hasta; None = sin límite). 'corriente' = aún no vence;
+    # una cuota que vence en la fecha de corte tiene 0 días y va en '0_30'
+    TRAMOS = (
+        ('corriente', -1),
+        ('0_30', 30),
+        ('31_60', 60),
+        ('61_90', 90),
+        ('mas_90', None),
+    )
+
+    DIMENSIONES = ('aseguradora', 'agente', 'ciudad')
+
+    # Dimensiones de cartera_snapshots -> columna que da la clave
+    DIMENSIONES_SNAPSHOT = {
+        'total': None,
+        'aseguradora': OpcionSeguro.aseguradora_id,
+        'tipo': OpcionSeguro.tipo_opcion,
+        'agente': AgenteCliente.agente_id,
+    }
+
+    METRICAS_SNAPSHOT = (
+        'polizas_vigentes', 'prima_vigente', 'comision_vigente', 'cuotas_por_cobrar',
+        'valor_por_cobrar', 'cuotas_vencidas', 'valor_vencido', 'polizas_con_vencidas'
+    )
+
+    @staticmethod
+    def _tramo(dias):
+        return case(
+            *[(dias <= hasta, literal(tramo)) for tramo, hasta in CarteraService.TRAMOS if hasta is not None],
+            else_=literal(CarteraService.TRAMOS[-1][0])
+        )
+
+    @staticmethod
+    def _consulta_cuotas(columnas, fecha_corte, filtros, dimensiones):
+        """
+        Cuotas por cobrar a la fecha de corte unidas a la ruta de propiedad
+
+        El cliente de un bien compartido es su titular (el menor cliente_id),
+        así cada cuota cuenta una vez por ciudad; por agente cuenta una vez
+        por cada agente asignado al titular. Las uniones son externas: las
+        cuotas sin titular o sin agente quedan en el grupo NULL.
+        """
+        consulta = select(*columnas)\
+            .select_from(PolizaPlanPago)\
+            .join(Poliza, Poliza.id == PolizaPlanPago.poliza_id)\
+            .join(OpcionSeguro, OpcionSeguro.id == Poliza.opcion_seguro_id)\
+            .where(PolizaPlanPago.pendiente_a_fecha(fecha_corte))\
+            .where(func.coalesce(Poliza.estado_cartera, '') != 'Cancelada')
+        return CarteraService._unir_dimensiones(consulta, filtros, dimensiones)
+
+    @staticmethod
+    def _unir_dimensiones(consulta, filtros, dimensiones):
+        """Uniones y filtros de aseguradora, titular y agente sobre una consulta con OpcionSeguro"""
+        necesita_cliente = bool({'agente', 'ciudad'} & set(dimensiones)) or \
+            filtros.get('agente_id') or filtros.get('ciudad')
+        necesita_agente = 'agente' in dimensiones or filtros.get('agente_id')
+
+        if 'aseguradora' in dimensiones:
+            consulta = consulta.join(Aseguradora, Aseguradora.id == OpcionSeguro.aseguradora_id)
+        if necesita_cliente:
+            titulares = select(
+                ClienteBien.bien_id,
+                func.min(ClienteBien.cliente_id).label('cliente_id')
+            ).group_by(ClienteBien.bien_id).subquery('titulares')
+            consulta = consulta\
+                .outerjoin(titulares, titulares.c.bien_id == OpcionSeguro.bien_id)\
+                .outerjoin(Cliente, Cliente.id == titulares.c.cliente_id)
+        if necesita_agente:
+            consulta = consulta\
+                .outerjoin(AgenteCliente, AgenteCliente.cliente_id == Cliente.id)\
+                .outerjoin(Agente, Agente.id == AgenteCliente.agente_id)
+
+        if filtros.get('aseguradora_id'):
+            consulta = consulta.where(OpcionSeguro.aseguradora_id == filtros['aseguradora_id'])
+        if filtros.get('agente_id'):
+            consulta = consulta.where(AgenteCliente.agente_id == filtros['agente_id'])
+        if filtros.get('ciudad'):
+            consulta = consulta.where(Cliente.ciudad == filtros['ciudad'])
+        return consulta
+
+    @staticmethod
+    def _columnas_dimension(dimension):
+        if dimension == 'aseguradora':
+            return [OpcionSeguro.aseguradora_id.label('aseguradora_id'), Aseguradora.nombre.label('aseguradora')]
+        if dimension == 'agente':
+            return [Agente.id.label('agente_id'), Agente.nombre.label('agente')]
+        return [Cliente.ciudad.label('ciudad')]
+
+    @staticmethod
+    def _agregados(dias):
+        """Cantidad y valor por tramo como columnas SUM(CASE ...)"""
+        tramo = CarteraService._tramo(dias)
+        columnas = []
+        for nombre, _ in CarteraService.TRAMOS:
+            columnas.append(func.sum(case((tramo == nombre, 1), else_=0)).label(f'cuotas_{nombre}'))
+            columnas.append(func.sum(case((tramo == nombre, PolizaPlanPago.valor_a_pagar), else_=0)).label(f'valor_{nombre}'))
+        columnas.append(func.count().label('cuotas'))
+        columnas.append(func.sum(PolizaPlanPago.valor_a_pagar).label('valor'))
+        return columnas
+
+    @staticmethod
+    def _fila_edades(fila, dimensiones):
+        resultado = {}
+        for dimension in dimensiones:
+            if dimension == 'ciudad':
+                resultado['ciudad'] = fila['ciudad']
+            else:
+                resultado[f'{dimension}_id'] = fila[f'{dimension}_id']
+                resultado[dimension] = fila[dimension]
+        resultado['tramos'] = {
+            nombre: {
+                'cuotas': int(fila[f'cuotas_{nombre}'] or 0),
+                'valor': round(float(fila[f'valor_{nombre}'] or 0), 2)
+            }
+            for nombre, _ in CarteraService.TRAMOS
+        }
+        resultado['cuotas'] = int(fila['cuotas'] or 0)
+        resultado['valor'] = round(float(fila['valor'] or 0), 2)
+        return resultado
+
+    @staticmethod
+    def obtener_edades(fecha_corte=None, dimensiones=('aseguradora',), filtros=None):
+        """
+        Cartera por edades agrupada por aseguradora, agente y/o ciudad
+
+        Los tramos salen de una sola consulta agrupada con SUM(CASE ...) sobre
+        poliza_plan_pagos. Como una cuota puede contar para varios agentes, con
+        la dimensión agente el total se calcula aparte sin esa unión.
+
+        Returns:
+            tuple: (dict, status_code)
+        """
+        try:
+            fecha_corte = fecha_corte or date.today()
+            filtros = filtros or {}
+            dimensiones = [d for d in CarteraService.DIMENSIONES if d in dimensiones]
+            dias = dias_entre(PolizaPlanPago.fecha_maxima_pago, literal(fecha_corte))
+
+            columnas_dimension = [c for d in dimensiones for c in CarteraService._columnas_dimension(d)]
+            consulta = CarteraService._consulta_cuotas(
+                columnas_dimension + CarteraService._agregados(dias), fecha_corte, filtros, dimensiones
+            )
+            if columnas_dimension:
+                consulta = consulta.group_by(*columnas_dimension).order_by(*columnas_dimension)
+            filas = db.session.execute(consulta).mappings().all()
+            grupos = [CarteraService._fila_edades(fila, dimensiones) for fila in filas]
+
+            if not dimensiones:
+                totales = CarteraService._fila_edades(filas[0], [])
+            elif 'agente' in dimensiones:
+                sin_agente = [d for d in dimensiones if d != 'agente']
+                total = db.session.execute(CarteraService._consulta_cuotas(
+                    CarteraService._agregados(dias), fecha_corte, filtros, sin_agente
+                )).mappings().one()
+                totales = CarteraService._fila_edades(total, [])
+            else:
+                totales = {
+                    'tramos': {
+                        nombre: {
+                            'cuotas': sum(g['tramos'][nombre]['cuotas'] for g in grupos),
+                            'valor': round(sum(g['tramos'][nombre]['valor'] for g in grupos), 2)
+                        }
+                        for nombre, _ in CarteraService.TRAMOS
+                    },
+                    'cuotas': sum(g['cuotas'] for g in grupos),
+                    'valor': round(sum(g['valor'] for g in grupos), 2)
+                }
+
+            return {
+                'fecha_corte': fecha_corte.isoformat(),
+                'agrupado_por': dimensiones,
+                'tramos': [nombre for nombre, _ in CarteraService.TRAMOS],
+                'grupos': grupos if dimensiones else [],
+                'totales': totales
+            }, 200
+
+        except Exception as e:
+            return {'error': f'Error al calcular la cartera por edades: {str(e)}'}, 500
+
+    @staticmethod
+    def iterar_detalle_edades(fecha_corte=None, filtros=None, tramo=None, tamano_lote=2000):
+        """
+        Generar las cuotas detrás del reporte por edades, sin cargarlas todas
+
+        Las filas se leen con un cursor del servidor en lotes de `tamano_lote`.
+
+        Yields:
+            dict: una cuota con su tramo, aseguradora y cliente titular
+        """
+        fecha_corte = fecha_corte or date.today()
+        filtros = filtros or {}
+        dias = dias_entre(PolizaPlanPago.fecha_maxima_pago, literal(fecha_corte))
+        tramo_cuota = CarteraService._tramo(dias)
+        columnas = [
+            PolizaPlanPago.id.label('cuota_id'),
+            PolizaPlanPago.poliza_id,
+            Poliza.consecutivo_poliza,
+            PolizaPlanPago.numero_cuota,
+            PolizaPlanPago.fecha_maxima_pago,
+            PolizaPlanPago.valor_a_pagar,
+            dias.label('dias_vencido'),
+            tramo_cuota.label('tramo'),
+            OpcionSeguro.aseguradora_id,
+            Cliente.id.label('cliente_id'),
+            func.coalesce(Cliente.nombre, Cliente.razon_social).label('cliente'),
+            Cliente.ciudad
+        ]
+        consulta = CarteraService._consulta_cuotas(columnas, fecha_corte, filtros, ['ciudad'])
+        if tramo:
+            consulta = consulta.where(tramo_cuota == tramo)
+        filas = db.session.execute(
+            consulta.order_by(PolizaPlanPago.id),
+            execution_options={'yield_per': tamano_lote}
+        ).mappings()
+        for fila in filas:
+            yield {
+                'cuota_id': fila['cuota_id'],
+                'poliza_id': fila['poliza_id'],
+                'consecutivo_poliza': fila['consecutivo_poliza'],
+                'numero_cuota': fila['numero_cuota'],
+                'fecha_maxima_pago': fila['fecha_maxima_pago'].isoformat(),
+                'valor_a_pagar': float(fila['valor_a_pagar']),
+                'dias_vencido': max(int(fila['dias_vencido']), 0),
+                'tramo': fila['tramo'],
+                'aseguradora_id': fila['aseguradora_id'],
+                'cliente_id': fila['cliente_id'],
+                'cliente': fila['cliente'],
+                'ciudad': fila['ciudad']
+            }
+
+    @staticmethod
+    def generar_snapshot(fecha=None):
+        """
+        Guardar las cifras de la cartera del día en cartera_snapshots
+
+        Por cada dimensión, una consulta agrupada de pólizas vigentes y otra
+        de cuotas por cobrar. Reemplaza el snapshot de esa fecha. Con una
+        fecha pasada las cuotas se evalúan a esa fecha, pero las
+        cancelaciones son las de hoy.
+
+        Returns:
+            dict: cifras totales del día y filas escritas
+        """
+        fecha = fecha or date.today()
+        filas = []
+        for dimension, columna in CarteraService.DIMENSIONES_SNAPSHOT.items():
+            clave = columna if columna is not None else literal('')
+            uniones = ['agente'] if dimension == 'agente' else []
+
+            polizas = select(
+                clave.label('clave'),
+                func.count().label('polizas_vigentes'),
+                func.sum(func.coalesce(Poliza.valor_prima_neta, 0) + func.coalesce(Poliza.valor_iva, 0)
+                         + func.coalesce(Poliza.valor_otros_costos, 0)).label('prima_vigente'),
+                func.sum(func.coalesce(Poliza.ingreso_comision_percibido, 0)).label('comision_vigente')
+            ).select_from(Poliza)\
+                .join(OpcionSeguro, OpcionSeguro.id == Poliza.opcion_seguro_id)\
+                .where(Poliza.fecha_inicio_vigencia <= fecha)\
+                .where(Poliza.fecha_fin_vigencia >= fecha)\
+                .where(func.coalesce(Poliza.estado_cartera, '') != 'Cancelada')
+            polizas = CarteraService._unir_dimensiones(polizas, {}, uniones)
+
+            vencida = PolizaPlanPago.fecha_maxima_pago < fecha
+            cuotas = CarteraService._consulta_cuotas([
+                clave.label('clave'),
+                func.count().label('cuotas_por_cobrar'),
+                func.sum(PolizaPlanPago.valor_a_pagar).label('valor_por_cobrar'),
+                func.sum(case((vencida, 1), else_=0)).label('cuotas_vencidas'),
+                func.sum(case((vencida, PolizaPlanPago.valor_a_pagar), else_=0)).label('valor_vencido'),
+                func.count(distinct(case((vencida, PolizaPlanPago.poliza_id)))).label('polizas_con_vencidas')
+            ], fecha, {}, uniones)
+            if columna is not None:
+                polizas = polizas.group_by(columna)
+                cuotas = cuotas.group_by(columna)
+
+            por_clave = {}
+            for consulta in (polizas, cuotas):
+                for fila in db.session.execute(consulta).mappings():
+                    valores = por_clave.setdefault('' if fila['clave'] is None else str(fila['clave']), {})
+                    valores.update({k: v for k, v in fila.items() if k != 'clave'})
+            generado_en = datetime.utcnow()
+            for clave_fila, valores in por_clave.items():
+                fila = {'dimension': dimension, 'clave': clave_fila, 'fecha': fecha, 'generado_en': generado_en}
+                fila.update({metrica: valores.get(metrica) or 0 for metrica in CarteraService.METRICAS_SNAPSHOT})
+                filas.append(fila)
+
+        db.session.execute(delete(CarteraSnapshot).where(CarteraSnapshot.fecha == fecha))
+        if filas:
+            db.session.execute(CarteraSnapshot.__table__.insert(), filas)
+        db.session.commit()
+
+        total = next((f for f in filas if f['dimension'] == 'total' and f['clave'] == ''), None)
+        resumen = {metrica: float(total[metrica]) if total else 0 for metrica in CarteraService.METRICAS_SNAPSHOT}
+        resumen.update({'fecha': fecha.isoformat(), 'filas': len(filas)})
+        return resumen
+
+    @staticmethod
+    def obtener_series(dimension='total', clave=None, desde=None, hasta=None, intervalo='dia', metricas=None):
+        """
+        Series de tiempo de la cartera leídas de cartera_snapshots
+
+        Args:
+            dimension: 'total', 'aseguradora', 'tipo' o 'agente'
+            clave: un solo valor de la dimensión (id de aseguradora o agente, tipo)
+            intervalo: 'dia' o 'mes' (último snapshot de cada mes)
+            metricas: subconjunto de METRICAS_SNAPSHOT (por defecto todas)
+
+        Returns:
+            tuple: (dict, status_code)
+        """
+        try:
+            if dimension not in CarteraService.DIMENSIONES_SNAPSHOT:
+                return {'error': f"Dimensión no válida. Use: {', '.join(CarteraService.DIMENSIONES_SNAPSHOT)}"}, 400
+            if intervalo not in ('dia', 'mes'):
+                return {'error': 'intervalo debe ser dia o mes'}, 400
+            metricas = metricas or list(CarteraService.METRICAS_SNAPSHOT)
+            invalidas = set(metricas) - set(CarteraService.METRICAS_SNAPSHOT)
+            if invalidas:
+                return {'error': f"Métricas no válidas: {', '.join(sorted(invalidas))}"}, 400
+
+            hasta = hasta or date.today()
+            desde = desde or hasta - timedelta(days=730)
+            condiciones = [
+                CarteraSnapshot.dimension == dimension,
+                CarteraSnapshot.fecha >= desde,
+                CarteraSnapshot.fecha <= hasta
+            ]
+            if clave is not None:
+                condiciones.append(CarteraSnapshot.clave == str(clave))
+
+            consulta = select(
+                CarteraSnapshot.clave, CarteraSnapshot.fecha,
+                *[getattr(CarteraSnapshot, metrica) for metrica in metricas]
+            ).where(*condiciones)
+            if intervalo == 'mes':
+                cierres = select(func.max(CarteraSnapshot.fecha))\
+                    .where(*condiciones)\
+                    .group_by(periodo_de(CarteraSnapshot.fecha))
+                consulta = consulta.where(CarteraSnapshot.fecha.in_(cierres))
+
+            series = {}
+            for fila in db.session.execute(consulta.order_by(CarteraSnapshot.clave, CarteraSnapshot.fecha)).mappings():
+                punto = {'fecha': fila['fecha'].isoformat()}
+                punto.update({
+                    metrica: int(fila[metrica]) if metrica.startswith(('polizas', 'cuotas')) else float(fila[metrica])
+                    for metrica in metricas
+                })
+                series.setdefault(fila['clave'], []).append(punto)
+
+            nombres = CarteraService._nombres_dimension(dimension, series.keys())
+            return {
+                'dimension': dimension,
+                'intervalo': intervalo,
+                'desde': desde.isoformat(),
+                'hasta': hasta.isoformat(),
+                'metricas': metricas,
+                'series': [
+                    {'clave': clave_serie, 'nombre': nombres.get(clave_serie, clave_serie), 'puntos': puntos}
+                    for clave_serie, puntos in series.items()
+                ]
+            }, 200
+
+        except Exception as e:
+            return {'error': f'Error al consultar las series de cartera: {str(e)}'}, 500
+
+    @staticmethod
+    def _nombres_dimension(dimension, claves):
+        modelo = {'aseguradora': Aseguradora, 'agente': Agente}.get(dimension)
+        ids = [int(clave) for clave in claves if clave.isdigit()]
+        if modelo is None or not ids:
+            return {}
+        return {
+            str(id_): nombre for id_, nombre in db.session.execute(
+                select(modelo.id, modelo.nombre).where(modelo.id.in_(ids))
+            ).all()
+        }
@@ -1,8 +1,31 @@
 from app.models.cliente_model import Cliente
 from app import db
+from sqlalchemy import select
+from app.utils.filtros import Campo, ConsultaLista, OPERADORES_RANGO, OPERADORES_TEXTO
+from app.utils.http import version_filas
+from app.utils.lectura import columnas_de, serializador
 
 class ClienteService:
     
+    # Listados: columnas de to_dict() leídas sin el ORM (app.utils.lectura)
+    COLUMNAS_LISTADO = columnas_de(Cliente, excluir=('clave', 'version', 'actualizado_en'))
+    _serializar = serializador(COLUMNAS_LISTADO)
+    # Filtros y orden del listado (app.utils.filtros); los ordenables tienen índice (migración 014)
+    CONSULTA_LISTADO = ConsultaLista({
+        'id': Campo(Cliente.id, OPERADORES_RANGO, ordenable=True),
+        'tipo_cliente': Campo(Cliente.tipo_cliente, valores=('PERSONA', 'EMPRESA'), ordenable=True),
+        'ciudad': Campo(Cliente.ciudad, OPERADORES_TEXTO, ordenable=True),
+        'nombre': Campo(Cliente.nombre, OPERADORES_TEXTO, ordenable=True),
+        'razon_social': Campo(Cliente.razon_social, OPERADORES_TEXTO, ordenable=True),
+        'numero_documento': Campo(Cliente.numero_documento, OPERADORES_TEXTO),
+        'nit': Campo(Cliente.nit, OPERADORES_TEXTO),
+        'correo': Campo(Cliente.correo, OPERADORES_TEXTO),
+        'usuario': Campo(Cliente.usuario, OPERADORES_TEXTO),
+        'actualizado_en': Campo(Cliente.actualizado_en, OPERADORES_RANGO, ordenable=True)
+    }, clave=Cliente.id,
+        busqueda=(Cliente.nombre, Cliente.razon_social, Cliente.numero_documento, Cliente.nit, Cliente.correo),
+        alias={'tipo': 'tipo_cliente'})
+    
     @staticmethod
     def get_all_clientes():
         """Obtener todos los clientes"""
@@ -18,6 +41,30 @@ class ClienteService:
         """Obtener clientes por tipo (PERSONA o EMPRESA)"""
         return Cliente.query.filter_by(tipo_cliente=tipo_cliente).all()
     
+    @staticmethod
+    def iterar_clientes(condiciones=(), orden=(Cliente.id,), limite=None, tamano_lote=500):
+        """
+        Clientes como dicts, para listados enviados por partes
+
+        Las condiciones, el orden y el límite salen de CONSULTA_LISTADO. Las
+        filas se leen con un cursor del servidor en lotes de `tamano_lote`,
+        sin crear instancias del ORM.
+        """
+        consulta = select(*ClienteService.COLUMNAS_LISTADO).where(*condiciones).order_by(*orden).limit(limite)
+        serializar = ClienteService._serializar
+        for fila in db.session.execute(consulta, execution_options={'yield_per': tamano_lote}):
+            yield serializar(fila)
+    
+    @staticmethod
+    def get_version_clientes(condiciones=()):
+        """Versión de la lista de clientes (para el ETag) sin cargarlos"""
+        return version_filas(Cliente, *condiciones)
+    
+    @staticmethod
+    def get_version_cliente(cliente_id):
+        """Versión de un cliente (para el ETag) sin cargarlo"""
+        return version_filas(Cliente, Cliente.id == cliente_id)
+    
     @staticmethod
     def create_cliente(data):
         """Crear un nuevo cliente"""
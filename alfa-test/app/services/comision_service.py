@@ -0,0 +1,450 @@
+import re
+from datetime import date, datetime, timedelta
+from sqlalchemy import String, case, cast, func, literal, null, select
+from sqlalchemy.orm import aliased
+from app.models.aseguradora_model import Aseguradora
+from app.models.comision_model import ComisionLiquidacion, ComisionMovimiento
+from app.models.opcion_seguro_model import OpcionSeguro
+from app.models.poliza_model import Poliza
+from app.models.poliza_plan_pago_model import PolizaPlanPago
+from app.utils.sql import periodo_de
+from app import db
+
+PATRON_PERIODO = re.compile(r'^\d{4}-(0[1-9]|1[0-2])$')
+
+
+class ComisionService:
+    """
+    Libro de comisiones y liquidaciones mensuales por aseguradora
+
+    Cada hecho deja un movimiento en comisiones_movimientos dentro de la misma
+    transacción que lo produce: la causación de la comisión al emitir la
+    póliza, el recaudo de la parte de cada cuota al pagarla y el reverso de lo
+    no recaudado al cancelarla. Las liquidaciones se arman agrupando los
+    movimientos de un período por idx_comisiones_periodo, sin recorrer la
+    cartera.
+    """
+
+    COLUMNAS_MOVIMIENTO = [
+        'clave', 'tipo', 'periodo', 'aseguradora_id', 'poliza_id', 'cuota_id',
+        'fecha', 'valor_base', 'valor_comision', 'creado_en'
+    ]
+
+    @staticmethod
+    def periodo_actual():
+        hoy = date.today()
+        return f'{hoy.year}-{hoy.month:02d}'
+
+    @staticmethod
+    def periodo_anterior():
+        primero = date.today().replace(day=1)
+        anterior = primero - timedelta(days=1)
+        return f'{anterior.year}-{anterior.month:02d}'
+
+    @staticmethod
+    def periodo_valido(periodo):
+        return bool(periodo and PATRON_PERIODO.match(periodo))
+
+    @staticmethod
+    def registrar_causacion(poliza, aseguradora_id):
+        """Causar la comisión de una póliza recién emitida (sin confirmar)"""
+        if not poliza.ingreso_comision_percibido:
+            return None
+        movimiento = ComisionMovimiento(
+            clave=f'C-{poliza.id}',
+            tipo='Causación',
+            periodo=ComisionService.periodo_actual(),
+            aseguradora_id=aseguradora_id,
+            poliza_id=poliza.id,
+            fecha=date.today(),
+            valor_base=poliza.calcular_valor_prima_total(),
+            valor_comision=poliza.ingreso_comision_percibido
+        )
+        db.session.add(movimiento)
+        return movimiento
+
+    @staticmethod
+    def _consulta_recaudos(periodo=None):
+        """
+        Recaudo de comisión de las cuotas pagadas que aún no lo tienen
+
+        A cada cuota le corresponde la comisión de la póliza en proporción a
+        su valor dentro del plan de pagos. Con periodo=None el período es el
+        mes del pago (reconstrucción del libro).
+        """
+        plan = aliased(PolizaPlanPago)
+        valor_plan = select(func.sum(plan.valor_a_pagar))\
+            .where(plan.poliza_id == Poliza.id)\
+            .correlate(Poliza).scalar_subquery()
+        clave = literal('R-') + cast(PolizaPlanPago.id, String)
+        fecha = func.coalesce(PolizaPlanPago.fecha_pago_real, date.today())
+        ya_registrado = select(ComisionMovimiento.id)\
+            .where(ComisionMovimiento.clave == clave).exists()
+        return select(
+            clave,
+            literal('Recaudo'),
+            literal(periodo) if periodo else periodo_de(fecha),
+            OpcionSeguro.aseguradora_id,
+            Poliza.id,
+            PolizaPlanPago.id,
+            fecha,
+            PolizaPlanPago.valor_a_pagar,
+            func.round(Poliza.ingreso_comision_percibido * PolizaPlanPago.valor_a_pagar / valor_plan, 2),
+            literal(datetime.utcnow())
+        ).select_from(PolizaPlanPago)\
+            .join(Poliza, Poliza.id == PolizaPlanPago.poliza_id)\
+            .join(OpcionSeguro, OpcionSeguro.id == Poliza.opcion_seguro_id)\
+            .where(PolizaPlanPago.estado_pago == 'Pagado')\
+            .where(Poliza.ingreso_comision_percibido > 0)\
+            .where(~ya_registrado)
+
+    @staticmethod
+    def registrar_recaudos(cuota_ids, tamano_lote=1000):
+        """
+        Registrar el recaudo de comisión de cuotas ya marcadas como pagadas
+
+        Un INSERT ... SELECT por lote en la transacción del llamador; las
+        cuotas que ya tienen su movimiento se omiten, por lo que repetirlo es
+        seguro.
+
+        Returns:
+            int: movimientos registrados
+        """
+        ids = sorted(set(cuota_ids))
+        tabla = ComisionMovimiento.__table__
+        total = 0
+        for inicio in range(0, len(ids), tamano_lote):
+            total += db.session.execute(tabla.insert().from_select(
+                ComisionService.COLUMNAS_MOVIMIENTO,
+                ComisionService._consulta_recaudos(ComisionService.periodo_actual())
+                .where(PolizaPlanPago.id.in_(ids[inicio:inicio + tamano_lote]))
+            )).rowcount
+        return total
+
+    @staticmethod
+    def _por_recaudar(movimiento=ComisionMovimiento):
+        """
+        Suma de la comisión causada que falta por recaudar
+
+        El recaudo no se suma a la causación: es la parte de ella que ya se
+        cobró. El saldo es la causación menos los recaudos (y menos el reverso,
+        si ya existe).
+        """
+        return func.coalesce(func.sum(case(
+            (movimiento.tipo == 'Recaudo', -movimiento.valor_comision),
+            else_=movimiento.valor_comision
+        )), 0)
+
+    @staticmethod
+    def registrar_reverso(poliza_id, aseguradora_id, valor_base):
+        """
+        Reversar la comisión causada que no se recaudó (póliza cancelada)
+
+        Se ejecuta en la transacción de la cancelación, antes del commit.
+        """
+        saldo = db.session.execute(
+            select(ComisionService._por_recaudar())
+            .where(ComisionMovimiento.poliza_id == poliza_id)
+        ).scalar_one()
+        if saldo <= 0:
+            return None
+        movimiento = ComisionMovimiento(
+            clave=f'X-{poliza_id}',
+            tipo='Reverso',
+            periodo=ComisionService.periodo_actual(),
+            aseguradora_id=aseguradora_id,
+            poliza_id=poliza_id,
+            fecha=date.today(),
+            valor_base=valor_base,
+            valor_comision=-saldo
+        )
+        db.session.add(movimiento)
+        return movimiento
+
+    @staticmethod
+    def reconstruir_libro(tamano_lote=5000, progreso=None):
+        """
+        Cargar al libro las causaciones y recaudos que faltan
+
+        Para las pólizas y pagos anteriores al libro: la causación toma el mes
+        de inicio de vigencia y el recaudo el mes del pago. Los movimientos de
+        meses con liquidación cerrada no se agregan. Un INSERT ... SELECT por
+        rango de póliza, cada uno en su propia transacción.
+
+        Returns:
+            dict: movimientos agregados por tipo
+        """
+        tabla = ComisionMovimiento.__table__
+        liquidaciones = ComisionLiquidacion.__table__
+
+        def sin_liquidacion_cerrada(periodo, aseguradora_id):
+            return ~select(liquidaciones.c.id).where(
+                liquidaciones.c.periodo == periodo,
+                liquidaciones.c.aseguradora_id == aseguradora_id,
+                liquidaciones.c.estado == 'Cerrada'
+            ).exists()
+
+        clave = literal('C-') + cast(Poliza.id, String)
+        periodo_causacion = periodo_de(Poliza.fecha_inicio_vigencia)
+        causaciones = select(
+            clave,
+            literal('Causación'),
+            periodo_causacion,
+            OpcionSeguro.aseguradora_id,
+            Poliza.id,
+            null(),
+            Poliza.fecha_inicio_vigencia,
+            func.coalesce(Poliza.valor_prima_neta, 0) + func.coalesce(Poliza.valor_iva, 0)
+            + func.coalesce(Poliza.valor_otros_costos, 0),
+            Poliza.ingreso_comision_percibido,
+            literal(datetime.utcnow())
+        ).join(OpcionSeguro, OpcionSeguro.id == Poliza.opcion_seguro_id)\
+            .where(Poliza.ingreso_comision_percibido > 0)\
+            .where(~select(ComisionMovimiento.id).where(ComisionMovimiento.clave == clave).exists())\
+            .where(sin_liquidacion_cerrada(periodo_causacion, OpcionSeguro.aseguradora_id))
+
+        periodo_recaudo = periodo_de(func.coalesce(PolizaPlanPago.fecha_pago_real, date.today()))
+        recaudos = ComisionService._consulta_recaudos()\
+            .where(sin_liquidacion_cerrada(periodo_recaudo, OpcionSeguro.aseguradora_id))
+
+        # Pólizas canceladas antes del libro: se reversa lo no recaudado en el mes actual
+        clave_reverso = literal('X-') + cast(Poliza.id, String)
+        registrado = aliased(ComisionMovimiento)
+        cuotas_canceladas = select(func.coalesce(func.sum(PolizaPlanPago.valor_a_pagar), 0))\
+            .where(PolizaPlanPago.poliza_id == Poliza.id)\
+            .where(PolizaPlanPago.estado_pago == 'Cancelado')\
+            .correlate(Poliza).scalar_subquery()
+        reversos = select(
+            clave_reverso,
+            literal('Reverso'),
+            literal(ComisionService.periodo_actual()),
+            ComisionMovimiento.aseguradora_id,
+            Poliza.id,
+            null(),
+            literal(date.today()),
+            cuotas_canceladas,
+            -ComisionService._por_recaudar(),
+            literal(datetime.utcnow())
+        ).join(Poliza, Poliza.id == ComisionMovimiento.poliza_id)\
+            .where(Poliza.estado_cartera == 'Cancelada')\
+            .where(~select(registrado.id).where(registrado.clave == clave_reverso).exists())\
+            .group_by(Poliza.id, ComisionMovimiento.aseguradora_id)\
+            .having(ComisionService._por_recaudar() > 0)
+
+        resumen = {'causaciones': 0, 'recaudos': 0, 'reversos': 0}
+        minimo, maximo = db.session.execute(select(func.min(Poliza.id), func.max(Poliza.id))).one()
+        if minimo is None:
+            return resumen
+        for desde in range(minimo, maximo + 1, tamano_lote):
+            hasta = desde + tamano_lote
+            resumen['causaciones'] += db.session.execute(tabla.insert().from_select(
+                ComisionService.COLUMNAS_MOVIMIENTO,
+                causaciones.where(Poliza.id >= desde).where(Poliza.id < hasta)
+            )).rowcount
+            resumen['recaudos'] += db.session.execute(tabla.insert().from_select(
+                ComisionService.COLUMNAS_MOVIMIENTO,
+                recaudos.where(Poliza.id >= desde).where(Poliza.id < hasta)
+            )).rowcount
+            resumen['reversos'] += db.session.execute(tabla.insert().from_select(
+                ComisionService.COLUMNAS_MOVIMIENTO,
+                reversos.where(Poliza.id >= desde).where(Poliza.id < hasta)
+            )).rowcount
+            db.session.commit()
+            if progreso:
+                progreso(min(hasta, maximo + 1) - minimo, maximo + 1 - minimo)
+        return resumen
+
+    @staticmethod
+    def generar_liquidaciones(periodo, aseguradora_id=None, guardar=True):
+        """
+        Calcular las liquidaciones abiertas del período desde el libro
+
+        Una consulta agrupada por aseguradora y tipo sobre idx_comisiones_periodo.
+        Las liquidaciones cerradas no se recalculan. Con guardar=False las
+        abiertas se calculan en objetos fuera de la sesión y no se escribe nada.
+
+        Returns:
+            list[ComisionLiquidacion]: liquidaciones del período (sin confirmar)
+        """
+        consulta = select(
+            ComisionMovimiento.aseguradora_id,
+            ComisionMovimiento.tipo,
+            func.count().label('movimientos'),
+            func.sum(ComisionMovimiento.valor_comision).label('valor')
+        ).where(ComisionMovimiento.periodo == periodo)\
+            .group_by(ComisionMovimiento.aseguradora_id, ComisionMovimiento.tipo)
+        existentes = select(ComisionLiquidacion).where(ComisionLiquidacion.periodo == periodo)
+        if aseguradora_id:
+            consulta = consulta.where(ComisionMovimiento.aseguradora_id == aseguradora_id)
+            existentes = existentes.where(ComisionLiquidacion.aseguradora_id == aseguradora_id)
+
+        liquidaciones = {l.aseguradora_id: l for l in db.session.execute(existentes).scalars()}
+        totales = {}
+        for fila in db.session.execute(consulta):
+            totales.setdefault(fila.aseguradora_id, {})[fila.tipo] = (fila.movimientos, fila.valor)
+
+        ahora = datetime.utcnow()
+        for id_aseguradora in set(totales) | set(liquidaciones):
+            liquidacion = liquidaciones.get(id_aseguradora)
+            if liquidacion is not None and liquidacion.estado == 'Cerrada':
+                continue
+            if liquidacion is None or not guardar:
+                liquidacion = ComisionLiquidacion(
+                    id=liquidacion.id if liquidacion else None,
+                    aseguradora_id=id_aseguradora, periodo=periodo, estado='Abierta'
+                )
+                if guardar:
+                    db.session.add(liquidacion)
+                liquidaciones[id_aseguradora] = liquidacion
+            por_tipo = totales.get(id_aseguradora, {})
+            liquidacion.movimientos = sum(movimientos for movimientos, _ in por_tipo.values())
+            liquidacion.valor_causado = por_tipo.get('Causación', (0, 0))[1]
+            liquidacion.valor_recaudado = por_tipo.get('Recaudo', (0, 0))[1]
+            liquidacion.valor_reversado = -por_tipo.get('Reverso', (0, 0))[1]
+            liquidacion.generada_en = ahora
+        return sorted(liquidaciones.values(), key=lambda l: l.aseguradora_id)
+
+    @staticmethod
+    def obtener_liquidaciones(periodo=None, aseguradora_id=None, guardar=False):
+        """
+        Liquidaciones de comisión del período, una por aseguradora
+
+        Las abiertas se calculan desde el libro; solo con guardar=True
+        (POST /api/cartera/comisiones, comisiones-liquidar o el trabajo
+        liquidar_comisiones) quedan escritas en comisiones_liquidaciones.
+
+        Returns:
+            tuple: (dict, status_code)
+        """
+        try:
+            periodo = periodo or ComisionService.periodo_actual()
+            if not ComisionService.periodo_valido(periodo):
+                return {'error': 'periodo debe tener formato AAAA-MM'}, 400
+
+            liquidaciones = ComisionService.generar_liquidaciones(periodo, aseguradora_id, guardar)
+            if guardar:
+                db.session.commit()
+            nombres = ComisionService._nombres_aseguradoras([l.aseguradora_id for l in liquidaciones])
+            datos = [ComisionService._liquidacion_dict(l, nombres) for l in liquidaciones]
+            return {
+                'periodo': periodo,
+                'liquidaciones': datos,
+                'totales': {
+                    campo: round(sum(d[campo] for d in datos), 2)
+                    for campo in ('valor_causado', 'valor_recaudado', 'valor_reversado')
+                }
+            }, 200
+
+        except Exception as e:
+            db.session.rollback()
+            return {'error': f'Error al generar las liquidaciones: {str(e)}'}, 500
+
+    @staticmethod
+    def obtener_liquidacion(aseguradora_id, periodo, cursor=None, limite=100):
+        """
+        Liquidación de una aseguradora con sus movimientos (paginados por id)
+
+        Returns:
+            tuple: (dict, status_code)
+        """
+        try:
+            if not ComisionService.periodo_valido(periodo):
+                return {'error': 'periodo debe tener formato AAAA-MM'}, 400
+            if db.session.get(Aseguradora, aseguradora_id) is None:
+                return {'error': 'Aseguradora no encontrada'}, 404
+
+            liquidaciones = ComisionService.generar_liquidaciones(periodo, aseguradora_id, guardar=False)
+
+            consulta = select(
+                ComisionMovimiento.id, ComisionMovimiento.tipo, ComisionMovimiento.fecha,
+                ComisionMovimiento.poliza_id, Poliza.consecutivo_poliza, Poliza.numero_poliza_aseguradora,
+                ComisionMovimiento.cuota_id, PolizaPlanPago.numero_cuota,
+                ComisionMovimiento.valor_base, ComisionMovimiento.valor_comision
+            ).join(Poliza, Poliza.id == ComisionMovimiento.poliza_id)\
+                .outerjoin(PolizaPlanPago, PolizaPlanPago.id == ComisionMovimiento.cuota_id)\
+                .where(ComisionMovimiento.periodo == periodo)\
+                .where(ComisionMovimiento.aseguradora_id == aseguradora_id)
+            if cursor:
+                consulta = consulta.where(ComisionMovimiento.id > int(cursor))
+            filas = db.session.execute(
+                consulta.order_by(ComisionMovimiento.id).limit(limite + 1)
+            ).mappings().all()
+
+            hay_mas = len(filas) > limite
+            filas = filas[:limite]
+            nombres = ComisionService._nombres_aseguradoras([aseguradora_id])
+            return {
+                'liquidacion': ComisionService._liquidacion_dict(liquidaciones[0], nombres) if liquidaciones else None,
+                'movimientos': [{
+                    'id': f['id'],
+                    'tipo': f['tipo'],
+                    'fecha': f['fecha'].isoformat(),
+                    'poliza_id': f['poliza_id'],
+                    'consecutivo_poliza': f['consecutivo_poliza'],
+                    'numero_poliza_aseguradora': f['numero_poliza_aseguradora'],
+                    'cuota_id': f['cuota_id'],
+                    'numero_cuota': f['numero_cuota'],
+                    'valor_base': float(f['valor_base']),
+                    'valor_comision': float(f['valor_comision'])
+                } for f in filas],
+                'siguiente_cursor': str(filas[-1]['id']) if hay_mas else None
+            }, 200
+
+        except ValueError:
+            return {'error': 'Cursor inválido'}, 400
+        except Exception as e:
+            db.session.rollback()
+            return {'error': f'Error al consultar la liquidación: {str(e)}'}, 500
+
+    @staticmethod
+    def cerrar_liquidacion(aseguradora_id, periodo):
+        """
+        Recalcular y cerrar la liquidación de un mes ya terminado
+
+        Returns:
+            tuple: (dict, status_code)
+        """
+        try:
+            if not ComisionService.periodo_valido(periodo):
+                return {'error': 'periodo debe tener formato AAAA-MM'}, 400
+            if periodo >= ComisionService.periodo_actual():
+                return {'error': 'Solo se pueden cerrar liquidaciones de meses terminados'}, 400
+            if db.session.get(Aseguradora, aseguradora_id) is None:
+                return {'error': 'Aseguradora no encontrada'}, 404
+
+            liquidaciones = ComisionService.generar_liquidaciones(periodo, aseguradora_id)
+            if not liquidaciones:
+                liquidacion = ComisionLiquidacion(aseguradora_id=aseguradora_id, periodo=periodo, estado='Abierta')
+                db.session.add(liquidacion)
+            else:
+                liquidacion = liquidaciones[0]
+            if liquidacion.estado == 'Cerrada':
+                db.session.rollback()
+                return {'error': 'La liquidación ya está cerrada'}, 409
+
+            liquidacion.estado = 'Cerrada'
+            liquidacion.cerrada_en = datetime.utcnow()
+            db.session.commit()
+            nombres = ComisionService._nombres_aseguradoras([aseguradora_id])
+            return {
+                'message': 'Liquidación cerrada exitosamente',
+                'liquidacion': ComisionService._liquidacion_dict(liquidacion, nombres)
+            }, 200
+
+        except Exception as e:
+            db.session.rollback()
+            return {'error': f'Error al cerrar la liquidación: {str(e)}'}, 500
+
+    @staticmethod
+    def _nombres_aseguradoras(aseguradora_ids):
+        if not aseguradora_ids:
+            return {}
+        return dict(db.session.execute(
+            select(Aseguradora.id, Aseguradora.nombre).where(Aseguradora.id.in_(set(aseguradora_ids)))
+        ).all())
+
+    @staticmethod
+    def _liquidacion_dict(liquidacion, nombres):
+        datos = liquidacion.to_dict()
+        datos['aseguradora'] = nombres.get(liquidacion.aseguradora_id)
+        return datos
@@ -0,0 +1,449 @@
+import csv
+import hashlib
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import bindparam, case, func, or_, select
+from app.models.poliza_model import Poliza
+from app.models.poliza_plan_pago_model import PolizaPlanPago
+from app.services.comision_service import ComisionService
+from app.services.dashboard_service import DashboardService
+from app.utils.outbox import emitir
+from app.utils.sincronizacion import anotar_cambios
+from app import db
+
+# Encabezados aceptados en el extracto (en minúsculas) -> campo
+COLUMNAS_EXTRACTO = {
+    'fecha': 'fecha', 'fecha_pago': 'fecha', 'fecha_transaccion': 'fecha',
+    'valor': 'valor', 'monto': 'valor', 'valor_pagado': 'valor', 'credito': 'valor',
+    'referencia': 'referencia', 'referencia_pago': 'referencia', 'referencia_1': 'referencia',
+    'documento': 'documento', 'id_transaccion': 'documento', 'numero_documento': 'documento',
+    'descripcion': 'descripcion', 'concepto': 'descripcion', 'detalle': 'descripcion',
+}
+
+COLUMNAS_REPORTE = [
+    'linea', 'fecha', 'valor', 'referencia', 'documento', 'resultado', 'criterio',
+    'cuota_id', 'poliza_id', 'consecutivo_poliza', 'numero_cuota', 'detalle'
+]
+
+FORMATOS_FECHA = ('%Y-%m-%d', '%d/%m/%Y', '%Y/%m/%d', '%d-%m-%Y')
+
+# Consecutivo de póliza (Poliza.generar_consecutivo) con número de cuota opcional
+PATRON_CONSECUTIVO = re.compile(r'(\d{4}-\d{2}-POL-[0-9A-F]{8})(?:[-/ ]*C?(\d{1,3}))?\b', re.IGNORECASE)
+# Candidatos a token de los links del portal de pagos
+PATRON_TOKEN = re.compile(r'[A-Za-z0-9_-]{20,}')
+
+ESTADOS_PAGABLES = ('Pendiente de pago', 'Vencido')
+
+
+class _Cuota:
+    """Cuota pendiente en los índices en memoria"""
+    __slots__ = ('id', 'poliza_id', 'numero_cuota', 'valor', 'fecha', 'consecutivo', 'aplicada')
+
+    def __init__(self, fila):
+        self.id = fila.id
+        self.poliza_id = fila.poliza_id
+        self.numero_cuota = fila.numero_cuota
+        self.valor = Decimal(fila.valor_a_pagar).quantize(Decimal('0.01'))
+        self.fecha = fila.fecha_maxima_pago
+        self.consecutivo = fila.consecutivo_poliza.upper()
+        self.aplicada = False
+
+
+class _Linea:
+    """Línea del extracto ya normalizada"""
+    __slots__ = ('numero', 'fecha', 'valor', 'referencia', 'documento', 'descripcion', 'clave',
+                 'resultado', 'criterio', 'cuota', 'detalle')
+
+    def __init__(self, numero, fecha, valor, referencia, documento, descripcion, clave):
+        self.numero = numero
+        self.fecha = fecha
+        self.valor = valor
+        self.referencia = referencia
+        self.documento = documento
+        self.descripcion = descripcion
+        self.clave = clave
+        self.resultado = None
+        self.criterio = None
+        self.cuota = None
+        self.detalle = None
+
+
+class IndiceCuotas:
+    """
+    Cuotas pagables indexadas por token del portal, consecutivo de póliza y
+    valor, para cruzar cada línea del extracto en O(1)
+    """
+
+    def __init__(self):
+        self.por_token = {}
+        self.por_consecutivo = {}
+        self.por_valor = {}
+        self.total = 0
+
+    @classmethod
+    def cargar(cls, tamano_lote=5000):
+        """Leer las cuotas pagables en una sola consulta por lotes de filas"""
+        indice = cls()
+        consulta = select(
+            PolizaPlanPago.id,
+            PolizaPlanPago.poliza_id,
+            PolizaPlanPago.numero_cuota,
+            PolizaPlanPago.valor_a_pagar,
+            PolizaPlanPago.fecha_maxima_pago,
+            PolizaPlanPago.link_portal_pagos,
+            Poliza.consecutivo_poliza
+        ).join(Poliza, Poliza.id == PolizaPlanPago.poliza_id)\
+            .where(PolizaPlanPago.estado_pago.in_(ESTADOS_PAGABLES))\
+            .order_by(PolizaPlanPago.poliza_id, PolizaPlanPago.numero_cuota)
+        filas = db.session.execute(consulta, execution_options={'yield_per': tamano_lote})
+        for fila in filas:
+            indice.agregar(_Cuota(fila), fila.link_portal_pagos)
+        return indice
+
+    def agregar(self, cuota, link=None):
+        if link and 'token=' in link:
+            self.por_token[link.rsplit('token=', 1)[1]] = cuota
+        # Ordenadas por número de cuota: la primera pendiente es la que se paga
+        self.por_consecutivo.setdefault(cuota.consecutivo, []).append(cuota)
+        self.por_valor.setdefault(cuota.valor, []).append(cuota)
+        self.total += 1
+
+    def por_referencia(self, texto):
+        """Cuota indicada por la referencia: (cuota, criterio, detalle)"""
+        for token in PATRON_TOKEN.findall(texto):
+            cuota = self.por_token.get(token)
+            if cuota:
+                return cuota, 'token', None
+
+        coincidencia = PATRON_CONSECUTIVO.search(texto)
+        if not coincidencia:
+            return None, None, None
+        consecutivo, numero = coincidencia.group(1).upper(), coincidencia.group(2)
+        cuotas = [c for c in self.por_consecutivo.get(consecutivo, ()) if not c.aplicada]
+        if not cuotas:
+            return None, 'consecutivo', f'La póliza {consecutivo} no tiene cuotas pendientes'
+        if numero:
+            cuota = next((c for c in cuotas if c.numero_cuota == int(numero)), None)
+            if cuota:
+                return cuota, 'consecutivo_cuota', None
+            return None, 'consecutivo_cuota', f'La cuota {numero} de {consecutivo} no está pendiente'
+        return cuotas[0], 'consecutivo', None
+
+    def por_valor_fecha(self, valor, fecha, dias_ventana):
+        """Única cuota con el mismo valor y vencimiento cercano a la fecha del pago"""
+        candidatas = [
+            c for c in self.por_valor.get(valor, ())
+            if not c.aplicada and abs((c.fecha - fecha).days) <= dias_ventana
+        ]
+        if len(candidatas) == 1:
+            return candidatas[0], 'valor_fecha', None
+        if candidatas:
+            return None, 'valor_fecha', f'{len(candidatas)} cuotas con el mismo valor y fecha cercana'
+        return None, None, None
+
+
+class ConciliacionService:
+    """
+    Conciliación de extractos bancarios contra el plan de pagos
+
+    El extracto se lee línea a línea; cada lote se cruza con índices en
+    memoria de las cuotas pagables, se aplica con un UPDATE por lote y se
+    escribe al reporte. El estado de cartera se recalcula una vez por póliza
+    al final.
+    """
+
+    @staticmethod
+    def conciliar_extracto(ruta_extracto, ruta_reporte, tamano_lote=1000, dias_ventana=5,
+                           tolerancia=Decimal('1'), simular=False, progreso=None):
+        """
+        Conciliar un extracto CSV (separado por coma o punto y coma)
+
+        Cada línea queda 'Conciliada', 'Sin conciliar' o 'Duplicada' (ya
+        aplicada en una ejecución anterior: la clave de la línea se guarda en
+        referencia_pago), por lo que reprocesar un archivo es seguro.
+
+        Args:
+            dias_ventana: diferencia máxima entre el pago y el vencimiento para
+                cruzar solo por valor
+            tolerancia: faltante aceptado frente al valor de la cuota
+            simular: cruzar y generar el reporte sin aplicar pagos
+
+        Returns:
+            dict: totales por resultado y criterio
+        """
+        indice = IndiceCuotas.cargar()
+        totales = {
+            'lineas': 0, 'conciliadas': 0, 'sin_conciliar': 0, 'duplicadas': 0,
+            'valor_conciliado': 0.0, 'polizas_actualizadas': 0, 'criterios': {},
+            'cuotas_pendientes': indice.total, 'reporte': ruta_reporte, 'simulacion': simular
+        }
+        polizas_afectadas = set()
+
+        with open(ruta_extracto, newline='', encoding='utf-8-sig') as extracto, \
+                open(ruta_reporte, 'w', newline='', encoding='utf-8') as reporte:
+            escritor = csv.DictWriter(reporte, fieldnames=COLUMNAS_REPORTE)
+            escritor.writeheader()
+
+            lote = []
+            for linea in ConciliacionService.leer_extracto(extracto):
+                lote.append(linea)
+                if len(lote) >= tamano_lote:
+                    ConciliacionService._procesar_lote(
+                        lote, indice, dias_ventana, tolerancia, simular, polizas_afectadas, escritor, totales
+                    )
+                    lote = []
+                    if progreso:
+                        progreso(totales)
+            if lote:
+                ConciliacionService._procesar_lote(
+                    lote, indice, dias_ventana, tolerancia, simular, polizas_afectadas, escritor, totales
+                )
+
+        if polizas_afectadas and not simular:
+            totales['polizas_actualizadas'] = ConciliacionService.actualizar_estado_cartera(polizas_afectadas)
+            DashboardService.recalcular_resumenes(
+                DashboardService.agentes_afectados(poliza_ids=polizas_afectadas)
+            )
+            db.session.commit()
+        if progreso:
+            progreso(totales)
+        return totales
+
+    @staticmethod
+    def leer_extracto(archivo):
+        """
+        Generar las líneas del extracto sin cargar el archivo completo
+
+        Las líneas con fecha o valor ilegibles se generan como 'Sin conciliar'.
+        """
+        muestra = archivo.read(4096)
+        archivo.seek(0)
+        try:
+            dialecto = csv.Sniffer().sniff(muestra, delimiters=',;\t|')
+        except csv.Error:
+            dialecto = csv.excel
+        lector = csv.reader(archivo, dialecto)
+
+        encabezado = next(lector, None)
+        if encabezado is None:
+            return
+        campos = [COLUMNAS_EXTRACTO.get(columna.strip().lower()) for columna in encabezado]
+        if 'fecha' not in campos or 'valor' not in campos:
+            raise ValueError('El extracto debe tener columnas de fecha y valor')
+
+        ocurrencias = {}
+        documentos = set()
+        for numero, fila in enumerate(lector, start=2):
+            if not any(celda.strip() for celda in fila):
+                continue
+            datos = {campo: celda.strip() for campo, celda in zip(campos, fila) if campo}
+            crudo = '|'.join(datos.get(c, '') for c in ('fecha', 'valor', 'referencia', 'documento', 'descripcion'))
+
+            # Clave estable de la línea: el documento del banco o un hash del
+            # contenido (numerado si el mismo contenido se repite en el archivo)
+            documento = datos.get('documento') or None
+            if documento:
+                clave = f'EXT-{documento}'[:100]
+            else:
+                ocurrencias[crudo] = ocurrencias.get(crudo, 0) + 1
+                clave = 'EXT-' + hashlib.sha1(f'{crudo}|{ocurrencias[crudo]}'.encode()).hexdigest()[:32]
+
+            linea = _Linea(
+                numero,
+                ConciliacionService._leer_fecha(datos.get('fecha', '')),
+                ConciliacionService._leer_valor(datos.get('valor', '')),
+                datos.get('referencia', ''),
+                documento,
+                datos.get('descripcion', ''),
+                clave
+            )
+            if documento in documentos:
+                linea.resultado = 'Duplicada'
+                linea.detalle = 'Documento repetido en el extracto'
+            elif linea.fecha is None or linea.valor is None or linea.valor <= 0:
+                linea.resultado = 'Sin conciliar'
+                linea.detalle = 'Fecha o valor inválido'
+            if documento:
+                documentos.add(documento)
+            yield linea
+
+    @staticmethod
+    def _procesar_lote(lote, indice, dias_ventana, tolerancia, simular, polizas_afectadas, escritor, totales):
+        # 1. Líneas aplicadas en una ejecución anterior
+        aplicadas = dict(db.session.execute(
+            select(PolizaPlanPago.referencia_pago, PolizaPlanPago.poliza_id)
+            .where(PolizaPlanPago.referencia_pago.in_([l.clave for l in lote]))
+        ).all())
+
+        pagos = []
+        for linea in lote:
+            if linea.resultado:
+                continue
+            if linea.clave in aplicadas:
+                linea.resultado = 'Duplicada'
+                linea.detalle = 'La línea ya fue aplicada'
+                polizas_afectadas.add(aplicadas[linea.clave])
+                continue
+            ConciliacionService._cruzar(linea, indice, dias_ventana, tolerancia)
+            if linea.cuota:
+                linea.cuota.aplicada = True
+                pagos.append({
+                    'b_id': linea.cuota.id,
+                    'b_valor': linea.valor,
+                    'b_fecha': linea.fecha,
+                    'b_referencia': linea.clave
+                })
+
+        # 2. Un UPDATE (executemany) por lote; la condición de estado evita
+        # pisar un pago registrado por otra vía mientras corría la conciliación
+        if pagos and not simular:
+            tabla = PolizaPlanPago.__table__
+            db.session.execute(
+                tabla.update()
+                .where(tabla.c.id == bindparam('b_id'))
+                .where(or_(*(tabla.c.estado_pago == estado for estado in ESTADOS_PAGABLES)))
+                .values(
+                    estado_pago='Pagado',
+                    valor_pagado=bindparam('b_valor'),
+                    fecha_pago_real=bindparam('b_fecha'),
+                    referencia_pago=bindparam('b_referencia'),
+                    version=tabla.c.version + 1
+                ),
+                pagos
+            )
+            confirmadas = set(db.session.execute(
+                select(tabla.c.id).where(tabla.c.referencia_pago.in_([p['b_referencia'] for p in pagos]))
+            ).scalars())
+            anotar_cambios(tabla, confirmadas)
+            for linea in lote:
+                if linea.resultado == 'Conciliada' and linea.cuota.id not in confirmadas:
+                    linea.resultado = 'Sin conciliar'
+                    linea.detalle = 'La cuota fue pagada por otra vía durante la conciliación'
+                elif linea.resultado == 'Conciliada':
+                    polizas_afectadas.add(linea.cuota.poliza_id)
+                    emitir('poliza.pago',
+                           poliza_id=linea.cuota.poliza_id,
+                           cuota_id=linea.cuota.id,
+                           numero_cuota=linea.cuota.numero_cuota,
+                           valor_pagado=float(linea.valor),
+                           origen='conciliacion')
+            ComisionService.registrar_recaudos(confirmadas)
+            db.session.commit()
+
+        # 3. Reporte y totales
+        for linea in lote:
+            cuota = linea.cuota if linea.resultado == 'Conciliada' else None
+            escritor.writerow({
+                'linea': linea.numero,
+                'fecha': linea.fecha.isoformat() if linea.fecha else '',
+                'valor': linea.valor if linea.valor is not None else '',
+                'referencia': linea.referencia,
+                'documento': linea.documento or '',
+                'resultado': linea.resultado,
+                'criterio': linea.criterio or '',
+                'cuota_id': cuota.id if cuota else '',
+                'poliza_id': cuota.poliza_id if cuota else '',
+                'consecutivo_poliza': cuota.consecutivo if cuota else '',
+                'numero_cuota': cuota.numero_cuota if cuota else '',
+                'detalle': linea.detalle or ''
+            })
+            totales['lineas'] += 1
+            if linea.resultado == 'Conciliada':
+                totales['conciliadas'] += 1
+                totales['valor_conciliado'] += float(linea.valor)
+                totales['criterios'][linea.criterio] = totales['criterios'].get(linea.criterio, 0) + 1
+            elif linea.resultado == 'Duplicada':
+                totales['duplicadas'] += 1
+            else:
+                totales['sin_conciliar'] += 1
+
+    @staticmethod
+    def _cruzar(linea, indice, dias_ventana, tolerancia):
+        """Buscar la cuota de la línea: token, consecutivo y por último valor y fecha"""
+        cuota, criterio, detalle = None, None, None
+        texto = f'{linea.referencia} {linea.descripcion}'
+        if texto.strip():
+            cuota, criterio, detalle = indice.por_referencia(texto)
+        if cuota is None and criterio is None:
+            cuota, criterio, detalle = indice.por_valor_fecha(linea.valor, linea.fecha, dias_ventana)
+
+        linea.criterio = criterio
+        if cuota is None:
+            linea.resultado = 'Sin conciliar'
+            linea.detalle = detalle or 'Sin cuota que coincida'
+        elif linea.valor < cuota.valor - tolerancia:
+            linea.resultado = 'Sin conciliar'
+            linea.detalle = f'Valor inferior a la cuota ({cuota.valor})'
+        else:
+            linea.resultado = 'Conciliada'
+            linea.cuota = cuota
+
+    @staticmethod
+    def actualizar_estado_cartera(poliza_ids, tamano_lote=1000):
+        """
+        Recalcular estado_cartera de las pólizas indicadas con un UPDATE por lote
+
+        Misma regla que PolizaService.procesar_pago_cuota: 'Vencida' si le
+        queda alguna cuota sin pagar con fecha máxima pasada, si no 'Al Día'.
+        Las pólizas canceladas no se tocan.
+        """
+        tabla = Poliza.__table__
+        con_vencidas = select(PolizaPlanPago.id).where(
+            PolizaPlanPago.poliza_id == tabla.c.id,
+            PolizaPlanPago.estado_pago != 'Pagado',
+            PolizaPlanPago.fecha_maxima_pago < date.today()
+        ).exists()
+        ids = sorted(poliza_ids)
+        total = 0
+        nuevo_estado = case((con_vencidas, 'Vencida'), else_='Al Día')
+        for inicio in range(0, len(ids), tamano_lote):
+            lote = tabla.c.id.in_(ids[inicio:inicio + tamano_lote])
+            anotar_cambios(tabla, select(tabla.c.id).where(
+                lote,
+                func.coalesce(tabla.c.estado_cartera, '') != 'Cancelada',
+                func.coalesce(tabla.c.estado_cartera, '') != nuevo_estado
+            ))
+            total += db.session.execute(
+                tabla.update()
+                .where(lote)
+                .where(func.coalesce(tabla.c.estado_cartera, '') != 'Cancelada')
+                .values(estado_cartera=nuevo_estado)
+            ).rowcount
+        return total
+
+    @staticmethod
+    def _leer_fecha(texto):
+        for formato in FORMATOS_FECHA:
+            try:
+                return datetime.strptime(texto, formato).date()
+            except ValueError:
+                continue
+        return None
+
+    @staticmethod
+    def _leer_valor(texto):
+        """
+        Valor con separadores '1.234.567,89', '1,234,567.89', '150.000' o '1234567.89'
+
+        Con un solo tipo de separador, este es de miles si se repite o si lo
+        siguen exactamente 3 dígitos ('150.000' y '150,000' son 150000); si
+        no, es el decimal ('150.5', '150,50').
+        """
+        texto = texto.replace('$', '').replace(' ', '')
+        if ',' in texto and '.' in texto:
+            if texto.rfind(',') > texto.rfind('.'):
+                texto = texto.replace('.', '').replace(',', '.')
+            else:
+                texto = texto.replace(',', '')
+        else:
+            separador = ',' if ',' in texto else '.'
+            enteros, _, decimales = texto.rpartition(separador)
+            if texto.count(separador) > 1 or (enteros and len(decimales) == 3):
+                texto = texto.replace(separador, '')
+            elif enteros:
+                texto = f'{enteros}.{decimales}'
+        try:
+            return Decimal(texto).quantize(Decimal('0.01'))
+        except InvalidOperation:
+            return None
@@ -0,0 +1,199 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import and_, case, delete, func, select
+from app.models.agente_model import Agente
+from app.models.agente_cliente_model import AgenteCliente
+from app.models.cliente_bien_model import ClienteBien
+from app.models.opcion_seguro_model import OpcionSeguro
+from app.models.poliza_model import Poliza
+from app.models.poliza_plan_pago_model import PolizaPlanPago
+from app.models.agente_resumen_model import AgenteResumenCartera
+from app import db
+
+class DashboardService:
+    """Rollups de cartera por agente para el dashboard"""
+
+    # Ventanas de tiempo de los indicadores
+    DIAS_RENOVACION = 30
+    DIAS_POR_VENCER = 7
+
+    # Estados que no cuentan como cuota pendiente
+    ESTADOS_CERRADOS = ('Pagado', 'Cancelado')
+
+    @staticmethod
+    def obtener_dashboard(agente_id):
+        """
+        Obtener el dashboard de un agente
+
+        Lee el rollup precalculado; si no existe o es de un día anterior (los
+        indicadores dependen de la fecha) se recalcula solo para este agente.
+
+        Returns:
+            tuple: (dict, status_code)
+        """
+        try:
+            agente = Agente.query.get(agente_id)
+            if not agente:
+                return {'error': 'Agente no encontrado'}, 404
+
+            resumen = AgenteResumenCartera.query.get(agente_id)
+            if not resumen or resumen.fecha_corte != date.today():
+                DashboardService.recalcular_resumenes([agente_id])
+                db.session.commit()
+                resumen = AgenteResumenCartera.query.get(agente_id)
+
+            return {
+                'agente': agente.to_dict(),
+                'resumen': resumen.to_dict(),
+                'ventanas': {
+                    'dias_renovacion': DashboardService.DIAS_RENOVACION,
+                    'dias_por_vencer': DashboardService.DIAS_POR_VENCER
+                }
+            }, 200
+
+        except Exception as e:
+            db.session.rollback()
+            return {'error': f'Error interno del servidor: {str(e)}'}, 500
+
+    @staticmethod
+    def recalcular_resumenes(agente_ids=None):
+        """
+        Recalcular el rollup de los agentes indicados (todos si agente_ids es None)
+
+        Usa cuatro consultas agrupadas por agente sin importar el tamaño de la
+        cartera. No hace commit: se ejecuta dentro de la transacción en curso.
+
+        Returns:
+            int: número de agentes recalculados
+        """
+        if agente_ids is not None:
+            agente_ids = sorted(set(agente_ids))
+            if not agente_ids:
+                return 0
+
+        hoy = date.today()
+        ahora = datetime.utcnow()
+
+        def filtrar(consulta, columna):
+            return consulta.where(columna.in_(agente_ids)) if agente_ids is not None else consulta
+
+        # Agentes a recalcular (incluye agentes sin cartera para dejarlos en cero)
+        consulta_agentes = filtrar(select(Agente.id), Agente.id)
+        filas = {agente_id: DashboardService._fila_vacia(agente_id, hoy, ahora)
+                 for agente_id in db.session.execute(consulta_agentes).scalars()}
+        if not filas:
+            return 0
+
+        # 1. Clientes y bienes por agente
+        consulta = filtrar(
+            select(
+                AgenteCliente.agente_id,
+                func.count(func.distinct(AgenteCliente.cliente_id)),
+                func.count(func.distinct(ClienteBien.bien_id))
+            ).select_from(AgenteCliente)
+            .outerjoin(ClienteBien, ClienteBien.cliente_id == AgenteCliente.cliente_id)
+            .group_by(AgenteCliente.agente_id),
+            AgenteCliente.agente_id
+        )
+        for agente_id, clientes, bienes in db.session.execute(consulta):
+            filas[agente_id]['total_clientes'] = clientes
+            filas[agente_id]['total_bienes'] = bienes
+
+        # Pares (agente, póliza) sin duplicados: un bien puede tener varios
+        # clientes del mismo agente y no debe sumarse dos veces
+        pares = filtrar(
+            select(AgenteCliente.agente_id.label('agente_id'), Poliza.id.label('poliza_id'))
+            .select_from(AgenteCliente)
+            .join(ClienteBien, ClienteBien.cliente_id == AgenteCliente.cliente_id)
+            .join(OpcionSeguro, OpcionSeguro.bien_id == ClienteBien.bien_id)
+            .join(Poliza, Poliza.opcion_seguro_id == OpcionSeguro.id)
+            .distinct(),
+            AgenteCliente.agente_id
+        ).subquery()
+
+        pendiente = PolizaPlanPago.estado_pago.notin_(DashboardService.ESTADOS_CERRADOS)
+
+        # 2. Pólizas activas, renovaciones próximas y comisiones de pólizas con saldo
+        cuotas_pendientes = select(PolizaPlanPago.poliza_id)\
+            .where(pendiente)\
+            .where(PolizaPlanPago.poliza_id == Poliza.id)\
+            .exists()
+        activa = and_(
+            Poliza.fecha_inicio_vigencia <= hoy,
+            Poliza.fecha_fin_vigencia >= hoy,
+            func.coalesce(Poliza.estado_cartera, '') != 'Cancelada'
+        )
+        limite_renovacion = hoy + timedelta(days=DashboardService.DIAS_RENOVACION)
+        consulta = select(
+            pares.c.agente_id,
+            func.sum(case((activa, 1), else_=0)),
+            func.sum(case((and_(activa, Poliza.fecha_fin_vigencia <= limite_renovacion), 1), else_=0)),
+            func.sum(case((and_(activa, cuotas_pendientes), func.coalesce(Poliza.ingreso_comision_percibido, 0)), else_=0))
+        ).select_from(pares).join(Poliza, Poliza.id == pares.c.poliza_id).group_by(pares.c.agente_id)
+        for agente_id, activas, renovaciones, comisiones in db.session.execute(consulta):
+            filas[agente_id]['polizas_activas'] = int(activas or 0)
+            filas[agente_id]['renovaciones_proximas'] = int(renovaciones or 0)
+            filas[agente_id]['comisiones_pendientes'] = float(comisiones or 0)
+
+        # 3. Cuotas vencidas y por vencer
+        vencida = and_(pendiente, PolizaPlanPago.fecha_maxima_pago < hoy)
+        por_vencer = and_(
+            pendiente,
+            PolizaPlanPago.fecha_maxima_pago >= hoy,
+            PolizaPlanPago.fecha_maxima_pago <= hoy + timedelta(days=DashboardService.DIAS_POR_VENCER)
+        )
+        consulta = select(
+            pares.c.agente_id,
+            func.sum(case((vencida, 1), else_=0)),
+            func.sum(case((vencida, PolizaPlanPago.valor_a_pagar), else_=0)),
+            func.sum(case((por_vencer, 1), else_=0)),
+            func.sum(case((por_vencer, PolizaPlanPago.valor_a_pagar), else_=0))
+        ).select_from(pares).join(PolizaPlanPago, PolizaPlanPago.poliza_id == pares.c.poliza_id)\
+            .group_by(pares.c.agente_id)
+        for agente_id, vencidas, valor_vencido, proximas, valor_proximo in db.session.execute(consulta):
+            filas[agente_id]['cuotas_vencidas'] = int(vencidas or 0)
+            filas[agente_id]['valor_cartera_vencida'] = float(valor_vencido or 0)
+            filas[agente_id]['cuotas_por_vencer'] = int(proximas or 0)
+            filas[agente_id]['valor_por_vencer'] = float(valor_proximo or 0)
+
+        # 4. Reemplazar los rollups en bloque
+        borrar = delete(AgenteResumenCartera)
+        if agente_ids is not None:
+            borrar = borrar.where(AgenteResumenCartera.agente_id.in_(agente_ids))
+        db.session.execute(borrar)
+        db.session.execute(AgenteResumenCartera.__table__.insert(), list(filas.values()))
+        return len(filas)
+
+    @staticmethod
+    def _fila_vacia(agente_id, fecha_corte, actualizado_en):
+        return {
+            'agente_id': agente_id,
+            'total_clientes': 0,
+            'total_bienes': 0,
+            'polizas_activas': 0,
+            'renovaciones_proximas': 0,
+            'cuotas_vencidas': 0,
+            'valor_cartera_vencida': 0,
+            'cuotas_por_vencer': 0,
+            'valor_por_vencer': 0,
+            'comisiones_pendientes': 0,
+            'fecha_corte': fecha_corte,
+            'actualizado_en': actualizado_en
+        }
+
+    @staticmethod
+    def agentes_afectados(agente_ids=(), cliente_ids=(), poliza_ids=()):
+        """Resolver los agentes cuya cartera incluye los clientes o pólizas indicados"""
+        agentes = set(agente_ids)
+        if cliente_ids:
+            agentes.update(db.session.execute(
+                select(AgenteCliente.agente_id).where(AgenteCliente.cliente_id.in_(set(cliente_ids)))
+            ).scalars())
+        if poliza_ids:
+            agentes.update(db.session.execute(
+                select(AgenteCliente.agente_id).distinct()
+                .join(ClienteBien, ClienteBien.cliente_id == AgenteCliente.cliente_id)
+                .join(OpcionSeguro, OpcionSeguro.bien_id == ClienteBien.bien_id)
+                .join(Poliza, Poliza.opcion_seguro_id == OpcionSeguro.id)
+                .where(Poliza.id.in_(set(poliza_ids)))
+            ).scalars())
+        return agentes
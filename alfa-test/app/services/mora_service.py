@@ -0,0 +1,253 @@
+from datetime import date, datetime
+from sqlalchemy import delete, func, literal, or_, select
+from app.models.mora_model import MoraSnapshot, TasaMora
+from app.models.opcion_seguro_model import OpcionSeguro
+from app.models.poliza_model import Poliza
+from app.models.poliza_plan_pago_model import PolizaPlanPago
+from app.utils.sql import dias_entre
+from app import db
+
+class MoraService:
+    """
+    Mora causada de la cartera
+
+    Todo el cálculo ocurre en SQL: para cada cuota vencida a la fecha de corte
+    se toma la tasa vigente más específica de tasas_mora y se agrega por
+    póliza, sin cargar cuotas como objetos ORM.
+    """
+
+    # Tasa diaria si ninguna regla de tasas_mora aplica
+    TASA_DIARIA_POR_DEFECTO = 0.0015
+
+    @staticmethod
+    def _tasa_aplicable(fecha_corte):
+        """Subconsulta correlacionada con la tasa de la regla más específica vigente"""
+        return select(TasaMora.tasa_diaria).where(
+            or_(TasaMora.aseguradora_id.is_(None), TasaMora.aseguradora_id == OpcionSeguro.aseguradora_id),
+            or_(TasaMora.tipo_opcion.is_(None), TasaMora.tipo_opcion == OpcionSeguro.tipo_opcion),
+            TasaMora.vigente_desde <= fecha_corte,
+            or_(TasaMora.vigente_hasta.is_(None), TasaMora.vigente_hasta >= fecha_corte)
+        ).order_by(
+            TasaMora.aseguradora_id.is_(None),
+            TasaMora.tipo_opcion.is_(None),
+            TasaMora.vigente_desde.desc()
+        ).limit(1).correlate(OpcionSeguro).scalar_subquery()
+
+    @staticmethod
+    def consulta_cuotas(fecha_corte):
+        """
+        Cuotas en mora a la fecha de corte con sus días y valor de mora
+
+        Una cuota pagada después de la fecha de corte estaba en mora en esa
+        fecha, por lo que una fecha pasada reproduce la mora de ese día.
+        """
+        dias = dias_entre(PolizaPlanPago.fecha_maxima_pago, literal(fecha_corte))
+        tasa = func.coalesce(MoraService._tasa_aplicable(fecha_corte), MoraService.TASA_DIARIA_POR_DEFECTO)
+        return select(
+            PolizaPlanPago.id.label('cuota_id'),
+            PolizaPlanPago.poliza_id,
+            PolizaPlanPago.numero_cuota,
+            PolizaPlanPago.fecha_maxima_pago,
+            PolizaPlanPago.valor_a_pagar,
+            dias.label('dias_mora'),
+            tasa.label('tasa_diaria'),
+            func.round(PolizaPlanPago.valor_a_pagar * tasa * dias, 2).label('valor_mora')
+        ).join(Poliza, Poliza.id == PolizaPlanPago.poliza_id)\
+            .join(OpcionSeguro, OpcionSeguro.id == Poliza.opcion_seguro_id)\
+            .where(PolizaPlanPago.fecha_maxima_pago < fecha_corte)\
+            .where(PolizaPlanPago.pendiente_a_fecha(fecha_corte))\
+            .where(func.coalesce(Poliza.estado_cartera, '') != 'Cancelada')
+
+    @staticmethod
+    def consulta_polizas(fecha_corte, desde_poliza_id=None, hasta_poliza_id=None):
+        """Mora agregada por póliza (misma forma que mora_snapshots)"""
+        cuotas = MoraService.consulta_cuotas(fecha_corte)
+        if desde_poliza_id is not None:
+            cuotas = cuotas.where(PolizaPlanPago.poliza_id >= desde_poliza_id)
+        if hasta_poliza_id is not None:
+            cuotas = cuotas.where(PolizaPlanPago.poliza_id < hasta_poliza_id)
+        cuotas = cuotas.subquery()
+        return select(
+            cuotas.c.poliza_id,
+            func.count().label('cuotas_vencidas'),
+            func.sum(cuotas.c.valor_a_pagar).label('capital_vencido'),
+            func.max(cuotas.c.dias_mora).label('dias_mora_max'),
+            func.sum(cuotas.c.valor_mora).label('valor_mora')
+        ).group_by(cuotas.c.poliza_id)
+
+    @staticmethod
+    def generar_snapshot(fecha_corte=None, tamano_lote=5000, progreso=None):
+        """
+        Guardar la mora por póliza a la fecha de corte en mora_snapshots
+
+        Reemplaza el snapshot de esa fecha con un INSERT ... SELECT por rango
+        de póliza, todo en una transacción: mientras se genera, quien consulta
+        la mora sigue viendo el snapshot anterior (o el cálculo en vivo si no
+        había), nunca uno a medias. Si algo falla queda el anterior.
+
+        Returns:
+            dict: pólizas en mora y totales del corte
+        """
+        fecha_corte = fecha_corte or date.today()
+        tabla = MoraSnapshot.__table__
+        try:
+            db.session.execute(delete(MoraSnapshot).where(MoraSnapshot.fecha_corte == fecha_corte))
+
+            minimo, maximo = db.session.execute(
+                select(func.min(PolizaPlanPago.poliza_id), func.max(PolizaPlanPago.poliza_id))
+                .where(PolizaPlanPago.fecha_maxima_pago < fecha_corte)
+            ).one()
+            if minimo is not None:
+                generado_en = datetime.utcnow()
+                for desde in range(minimo, maximo + 1, tamano_lote):
+                    polizas = MoraService.consulta_polizas(fecha_corte, desde, desde + tamano_lote).subquery()
+                    db.session.execute(tabla.insert().from_select(
+                        ['fecha_corte', 'poliza_id', 'cuotas_vencidas', 'capital_vencido',
+                         'dias_mora_max', 'valor_mora', 'generado_en'],
+                        select(
+                            literal(fecha_corte), polizas.c.poliza_id, polizas.c.cuotas_vencidas,
+                            polizas.c.capital_vencido, polizas.c.dias_mora_max, polizas.c.valor_mora,
+                            literal(generado_en)
+                        )
+                    ))
+                    if progreso:
+                        progreso(min(desde + tamano_lote, maximo + 1) - minimo, maximo + 1 - minimo)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        resumen = MoraService._totales(
+            select(MoraSnapshot.cuotas_vencidas, MoraSnapshot.capital_vencido,
+                   MoraSnapshot.dias_mora_max, MoraSnapshot.valor_mora)
+            .where(MoraSnapshot.fecha_corte == fecha_corte).subquery()
+        )
+        resumen['fecha_corte'] = fecha_corte.isoformat()
+        return resumen
+
+    @staticmethod
+    def obtener_mora_cartera(fecha_corte=None, cursor=None, limite=100, orden='valor_mora'):
+        """
+        Totales de mora de la cartera y detalle por póliza
+
+        Usa el snapshot de la fecha si existe; si no, calcula en vivo.
+
+        Args:
+            cursor: último poliza_id de la página anterior (orden por póliza)
+            orden: 'valor_mora' (mayores primero, sin cursor) o 'poliza'
+
+        Returns:
+            tuple: (dict, status_code)
+        """
+        try:
+            fecha_corte = fecha_corte or date.today()
+            existe_snapshot = db.session.execute(
+                select(MoraSnapshot.poliza_id).where(MoraSnapshot.fecha_corte == fecha_corte).limit(1)
+            ).first() is not None
+
+            if existe_snapshot:
+                polizas = select(
+                    MoraSnapshot.poliza_id, MoraSnapshot.cuotas_vencidas, MoraSnapshot.capital_vencido,
+                    MoraSnapshot.dias_mora_max, MoraSnapshot.valor_mora
+                ).where(MoraSnapshot.fecha_corte == fecha_corte).subquery()
+            else:
+                polizas = MoraService.consulta_polizas(fecha_corte).subquery()
+
+            resumen = MoraService._totales(polizas)
+
+            consulta = select(polizas, Poliza.consecutivo_poliza)\
+                .join(Poliza, Poliza.id == polizas.c.poliza_id)
+            if orden == 'poliza':
+                if cursor:
+                    consulta = consulta.where(polizas.c.poliza_id > int(cursor))
+                consulta = consulta.order_by(polizas.c.poliza_id)
+            else:
+                consulta = consulta.order_by(polizas.c.valor_mora.desc(), polizas.c.poliza_id)
+            filas = db.session.execute(consulta.limit(limite + 1)).mappings().all()
+
+            hay_mas = len(filas) > limite
+            filas = filas[:limite]
+            return {
+                'fecha_corte': fecha_corte.isoformat(),
+                'fuente': 'snapshot' if existe_snapshot else 'calculo',
+                'resumen': resumen,
+                'polizas': [MoraService._fila_poliza(fila) for fila in filas],
+                'siguiente_cursor': str(filas[-1]['poliza_id']) if hay_mas and orden == 'poliza' else None
+            }, 200
+
+        except ValueError:
+            return {'error': 'Cursor inválido'}, 400
+        except Exception as e:
+            return {'error': f'Error al calcular la mora: {str(e)}'}, 500
+
+    @staticmethod
+    def obtener_mora_poliza(poliza_id, fecha_corte=None):
+        """
+        Mora de una póliza con el detalle de cada cuota
+
+        Returns:
+            tuple: (dict, status_code)
+        """
+        try:
+            poliza = db.session.execute(
+                select(Poliza.id, Poliza.consecutivo_poliza).where(Poliza.id == poliza_id)
+            ).first()
+            if not poliza:
+                return {'error': 'Póliza no encontrada'}, 404
+
+            fecha_corte = fecha_corte or date.today()
+            cuotas = db.session.execute(
+                MoraService.consulta_cuotas(fecha_corte)
+                .where(PolizaPlanPago.poliza_id == poliza_id)
+                .order_by(PolizaPlanPago.numero_cuota)
+            ).mappings().all()
+
+            detalle = [{
+                'cuota_id': c['cuota_id'],
+                'numero_cuota': c['numero_cuota'],
+                'fecha_maxima_pago': c['fecha_maxima_pago'].isoformat(),
+                'valor_a_pagar': float(c['valor_a_pagar']),
+                'dias_mora': int(c['dias_mora']),
+                'tasa_diaria': float(c['tasa_diaria']),
+                'valor_mora': float(c['valor_mora'])
+            } for c in cuotas]
+            return {
+                'poliza_id': poliza.id,
+                'consecutivo_poliza': poliza.consecutivo_poliza,
+                'fecha_corte': fecha_corte.isoformat(),
+                'cuotas_vencidas': len(detalle),
+                'capital_vencido': round(sum(c['valor_a_pagar'] for c in detalle), 2),
+                'valor_mora': round(sum(c['valor_mora'] for c in detalle), 2),
+                'cuotas': detalle
+            }, 200
+
+        except Exception as e:
+            return {'error': f'Error al calcular la mora: {str(e)}'}, 500
+
+    @staticmethod
+    def _totales(polizas):
+        fila = db.session.execute(select(
+            func.count().label('polizas_en_mora'),
+            func.coalesce(func.sum(polizas.c.cuotas_vencidas), 0).label('cuotas_vencidas'),
+            func.coalesce(func.sum(polizas.c.capital_vencido), 0).label('capital_vencido'),
+            func.coalesce(func.max(polizas.c.dias_mora_max), 0).label('dias_mora_max'),
+            func.coalesce(func.sum(polizas.c.valor_mora), 0).label('valor_mora')
+        ).select_from(polizas)).one()
+        return {
+            'polizas_en_mora': fila.polizas_en_mora,
+            'cuotas_vencidas': int(fila.cuotas_vencidas),
+            'capital_vencido': round(float(fila.capital_vencido), 2),
+            'dias_mora_max': int(fila.dias_mora_max),
+            'valor_mora': round(float(fila.valor_mora), 2)
+        }
+
+    @staticmethod
+    def _fila_poliza(fila):
+        return {
+            'poliza_id': fila['poliza_id'],
+            'consecutivo_poliza': fila['consecutivo_poliza'],
+            'cuotas_vencidas': int(fila['cuotas_vencidas']),
+            'capital_vencido': round(float(fila['capital_vencido']), 2),
+            'dias_mora_max': int(fila['dias_mora_max']),
+            'valor_mora': round(float(fila['valor_mora']), 2)
+        }
@@ -1,11 +1,36 @@
 from app import db
-from app.models import Poliza, PolizaPlanPago, OpcionSeguro
+from app.models import Poliza, PolizaPlanPago, OpcionSeguro, ClienteBien, AgenteCliente
+from app.services.comision_service import ComisionService
+from app.utils.outbox import emitir
+from app.utils.filtros import Campo, ConsultaLista, OPERADORES_RANGO, OPERADORES_TEXTO
+from app.utils.lectura import columnas_de, serializador
+from sqlalchemy import func, select
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 from datetime import datetime, date
 from dateutil.relativedelta import relativedelta
 
 class PolizaService:
     
+    # Listados: columnas de to_dict() leídas sin el ORM (app.utils.lectura)
+    COLUMNAS_LISTADO = columnas_de(Poliza)
+    _serializar = serializador(COLUMNAS_LISTADO)
+    # Filtros y orden de GET /api/polizas (app.utils.filtros); los ordenables tienen índice
+    CONSULTA_LISTADO = ConsultaLista({
+        'id': Campo(Poliza.id, OPERADORES_RANGO, ordenable=True),
+        'consecutivo_poliza': Campo(Poliza.consecutivo_poliza, OPERADORES_TEXTO, ordenable=True),
+        'numero_poliza_aseguradora': Campo(Poliza.numero_poliza_aseguradora, OPERADORES_TEXTO),
+        'estado_cartera': Campo(Poliza.estado_cartera, ordenable=True),
+        'fecha_inicio_vigencia': Campo(Poliza.fecha_inicio_vigencia, OPERADORES_RANGO, ordenable=True),
+        'fecha_fin_vigencia': Campo(Poliza.fecha_fin_vigencia, OPERADORES_RANGO, ordenable=True),
+        'medio_pago': Campo(Poliza.medio_pago),
+        'valor_prima_neta': Campo(Poliza.valor_prima_neta, OPERADORES_RANGO),
+        'opcion_seguro_id': Campo(Poliza.opcion_seguro_id),
+        'aseguradora_id': Campo(OpcionSeguro.aseguradora_id)
+    }, clave=Poliza.id,
+        busqueda=(Poliza.consecutivo_poliza, Poliza.numero_poliza_aseguradora),
+        alias={'estado': 'estado_cartera', 'aseguradora_id': 'aseguradora_id'})
+    
     @staticmethod
     def crear_poliza_desde_opcion(opcion_seguro_id, datos_poliza):
         """Crear una póliza a partir de una opción de seguro aceptada"""
@@ -70,6 +95,16 @@ class PolizaService:
                 for cuota in plan_pagos:
                     db.session.add(cuota)
             
+            # Causar la comisión en el libro en la misma transacción
+            ComisionService.registrar_causacion(poliza, opcion.aseguradora_id)
+            
+            emitir('poliza.emitida',
+                   poliza_id=poliza.id,
+                   consecutivo_poliza=poliza.consecutivo_poliza,
+                   opcion_seguro_id=opcion_seguro_id,
+                   aseguradora_id=opcion.aseguradora_id,
+                   estado_cartera=poliza.estado_cartera,
+                   valor_prima_total=valores_calculados['valor_prima_total'])
             db.session.commit()
             
             return {
@@ -131,28 +166,36 @@ class PolizaService:
     def obtener_polizas(include_plan_pagos=False, filtros=None):
         """Obtener todas las pólizas con filtros opcionales"""
         try:
-            query = Poliza.query
+            condiciones = []
             
             if filtros:
                 if filtros.get('estado_cartera'):
-                    query = query.filter(Poliza.estado_cartera == filtros['estado_cartera'])
+                    condiciones.append(Poliza.estado_cartera == filtros['estado_cartera'])
                 if filtros.get('fecha_desde'):
                     fecha_desde = datetime.strptime(filtros['fecha_desde'], '%Y-%m-%d').date()
-                    query = query.filter(Poliza.fecha_inicio_vigencia >= fecha_desde)
+                    condiciones.append(Poliza.fecha_inicio_vigencia >= fecha_desde)
                 if filtros.get('fecha_hasta'):
                     fecha_hasta = datetime.strptime(filtros['fecha_hasta'], '%Y-%m-%d').date()
-                    query = query.filter(Poliza.fecha_inicio_vigencia <= fecha_hasta)
+                    condiciones.append(Poliza.fecha_inicio_vigencia <= fecha_hasta)
                 if filtros.get('vigentes_solo'):
                     hoy = date.today()
-                    query = query.filter(
+                    condiciones.extend([
                         Poliza.fecha_inicio_vigencia <= hoy,
                         Poliza.fecha_fin_vigencia >= hoy
-                    )
+                    ])
             
-            polizas = query.all()
+            if include_plan_pagos:
+                polizas = Poliza.query.filter(*condiciones).all()
+                return {
+                    'polizas': [poliza.to_dict(include_plan_pagos=True) for poliza in polizas]
+                }, 200
             
+            # Sin plan de pagos, filas en lugar de instancias del ORM
+            filas = db.session.execute(
+                select(*PolizaService.COLUMNAS_LISTADO).where(*condiciones).order_by(Poliza.id)
+            )
             return {
-                'polizas': [poliza.to_dict(include_plan_pagos=include_plan_pagos) for poliza in polizas]
+                'polizas': [PolizaService._fila_a_dict(fila) for fila in filas]
             }, 200
             
         except ValueError as e:
@@ -160,6 +203,61 @@ class PolizaService:
         except Exception as e:
             return {'error': f'Error al obtener pólizas: {str(e)}'}, 500
     
+    @staticmethod
+    def interpretar_consulta(argumentos):
+        """
+        (condiciones, orden) de GET /api/polizas según los parámetros
+
+        Además de filter[...], sort y q se conservan estado, aseguradora_id y
+        agente_id (pólizas de bienes de clientes asignados al agente).
+        """
+        condiciones, orden, _ = PolizaService.CONSULTA_LISTADO.interpretar(argumentos)
+        agente_id = argumentos.get('agente_id', type=int)
+        if agente_id:
+            condiciones.append(OpcionSeguro.bien_id.in_(
+                select(ClienteBien.bien_id)
+                .join(AgenteCliente, AgenteCliente.cliente_id == ClienteBien.cliente_id)
+                .where(AgenteCliente.agente_id == agente_id)
+            ))
+        return condiciones, orden
+    
+    @staticmethod
+    def listar_polizas(condiciones=(), orden=(Poliza.id,), pagina=1, por_pagina=10):
+        """Una página de pólizas (sin el ORM) y los datos de paginación"""
+        try:
+            def consulta(*columnas):
+                return select(*columnas).select_from(Poliza)\
+                    .join(OpcionSeguro, OpcionSeguro.id == Poliza.opcion_seguro_id)\
+                    .where(*condiciones)
+            
+            total = db.session.execute(consulta(func.count())).scalar()
+            filas = db.session.execute(
+                consulta(*PolizaService.COLUMNAS_LISTADO)
+                .order_by(*orden).offset((pagina - 1) * por_pagina).limit(por_pagina)
+            )
+            return {
+                'polizas': [PolizaService._fila_a_dict(fila) for fila in filas],
+                'pagination': {
+                    'page': pagina,
+                    'per_page': por_pagina,
+                    'total': total,
+                    'pages': -(-total // por_pagina)
+                }
+            }, 200
+        except Exception as e:
+            return {'error': f'Error al obtener pólizas: {str(e)}'}, 500
+    
+    @staticmethod
+    def _fila_a_dict(fila):
+        """Igual que Poliza.to_dict() para una fila de COLUMNAS_LISTADO"""
+        datos = PolizaService._serializar(fila)
+        # Los cálculos del modelo solo leen atributos, que la fila también tiene
+        datos['valor_prima_total'] = Poliza.calcular_valor_prima_total(fila)
+        datos['dias_vigencia'] = Poliza.calcular_dias_vigencia(fila)
+        datos['esta_vigente'] = Poliza.esta_vigente(fila)
+        datos['porcentaje_comision'] = Poliza.calcular_porcentaje_comision(fila)
+        return datos
+    
     @staticmethod
     def obtener_poliza_por_id(poliza_id, include_plan_pagos=True):
         """Obtener una póliza por ID"""
@@ -198,7 +296,13 @@ class PolizaService:
             if nuevo_estado not in estados_validos:
                 return {'error': f'Estado no válido. Estados permitidos: {", ".join(estados_validos)}'}, 400
             
+            estado_anterior = poliza.estado_cartera
             poliza.estado_cartera = nuevo_estado
+            if nuevo_estado != estado_anterior:
+                emitir('poliza.vencida' if nuevo_estado in ('Vencida', 'En Mora') else 'poliza.estado',
+                       poliza_id=poliza.id,
+                       estado_cartera=nuevo_estado,
+                       estado_anterior=estado_anterior)
             db.session.commit()
             
             return {
@@ -213,46 +317,82 @@ class PolizaService:
     @staticmethod
     def procesar_pago_cuota(poliza_id, numero_cuota, datos_pago):
         """Procesar el pago de una cuota específica"""
-        try:
-            # Buscar la cuota
-            cuota = PolizaPlanPago.query.filter(
+        return PolizaService._pagar_cuota(
+            PolizaPlanPago.query.filter(
                 PolizaPlanPago.poliza_id == poliza_id,
                 PolizaPlanPago.numero_cuota == numero_cuota
-            ).first()
-            
-            if not cuota:
-                return {'error': 'Cuota no encontrada'}, 404
-            
-            if not cuota.puede_pagarse():
-                return {'error': 'La cuota no puede ser pagada'}, 400
-            
-            # Validar datos del pago
+            ),
+            datos_pago
+        )
+    
+    @staticmethod
+    def registrar_pago(poliza_id, cuota_id, datos_pago):
+        """Procesar el pago de una cuota por su id"""
+        return PolizaService._pagar_cuota(
+            PolizaPlanPago.query.filter(
+                PolizaPlanPago.id == cuota_id,
+                PolizaPlanPago.poliza_id == poliza_id
+            ),
+            datos_pago
+        )
+    
+    @staticmethod
+    def _pagar_cuota(consulta_cuota, datos_pago):
+        """
+        Marcar como pagada la cuota de la consulta
+        
+        La cuota se lee con SELECT ... FOR UPDATE: un segundo pago simultáneo
+        de la misma cuota espera a que el primero confirme y luego encuentra
+        la cuota pagada. Pagos de cuotas distintas no se bloquean entre sí.
+        La columna version (bloqueo optimista) protege además de cambios
+        hechos por caminos que no toman el bloqueo.
+        """
+        try:
+            # Validar datos del pago antes de bloquear la cuota
             if not datos_pago.get('valor_pagado'):
                 return {'error': 'El valor pagado es requerido'}, 400
             
             valor_pagado = float(datos_pago['valor_pagado'])
             if valor_pagado <= 0:
                 return {'error': 'El valor pagado debe ser mayor a cero'}, 400
+            fecha_pago = datetime.strptime(datos_pago['fecha_pago'], '%Y-%m-%d').date() if datos_pago.get('fecha_pago') else None
+            
+            # Buscar y bloquear la cuota
+            cuota = consulta_cuota.with_for_update().first()
+            
+            if not cuota:
+                return {'error': 'Cuota no encontrada'}, 404
+            
+            if not cuota.puede_pagarse():
+                db.session.rollback()
+                return {'error': 'La cuota no puede ser pagada'}, 400
             
             # Marcar como pagado
             cuota.marcar_como_pagado(
                 valor_pagado=valor_pagado,
                 referencia_pago=datos_pago.get('referencia_pago'),
-                fecha_pago=datetime.strptime(datos_pago['fecha_pago'], '%Y-%m-%d').date() if datos_pago.get('fecha_pago') else None
+                fecha_pago=fecha_pago
             )
+            db.session.flush()
+            ComisionService.registrar_recaudos([cuota.id])
             
-            # Actualizar estado de cartera de la póliza si es necesario
+            # Actualizar estado de cartera de la póliza con una consulta, sin
+            # cargar el plan de pagos completo mientras se tiene el bloqueo
             poliza = cuota.poliza
-            cuotas_pendientes = [c for c in poliza.plan_pagos if c.estado_pago != 'Pagado']
-            cuotas_vencidas = [c for c in cuotas_pendientes if c.esta_vencido()]
-            
-            if not cuotas_pendientes:
-                poliza.estado_cartera = 'Al Día'
-            elif cuotas_vencidas:
-                poliza.estado_cartera = 'Vencida'
-            else:
-                poliza.estado_cartera = 'Al Día'
-            
+            vencidas = db.session.query(PolizaPlanPago.id).filter(
+                PolizaPlanPago.poliza_id == poliza.id,
+                PolizaPlanPago.estado_pago != 'Pagado',
+                PolizaPlanPago.fecha_maxima_pago < date.today()
+            ).first()
+            if poliza.estado_cartera != 'Cancelada':
+                poliza.estado_cartera = 'Vencida' if vencidas else 'Al Día'
+            
+            emitir('poliza.pago',
+                   poliza_id=poliza.id,
+                   cuota_id=cuota.id,
+                   numero_cuota=cuota.numero_cuota,
+                   valor_pagado=valor_pagado,
+                   estado_cartera=poliza.estado_cartera)
             db.session.commit()
             
             return {
@@ -261,7 +401,11 @@ class PolizaService:
                 'poliza_estado': poliza.estado_cartera
             }, 200
             
+        except StaleDataError:
+            db.session.rollback()
+            return {'error': 'La cuota fue modificada por otra operación; consulte su estado e intente de nuevo'}, 409
         except ValueError as e:
+            db.session.rollback()
             return {'error': f'Error en formato de fecha o valor: {str(e)}'}, 400
         except Exception as e:
             db.session.rollback()
@@ -348,10 +492,19 @@ class PolizaService:
             poliza.estado_cartera = 'Cancelada'
             
             # Marcar todas las cuotas pendientes como canceladas
+            valor_cancelado = 0
             for cuota in poliza.plan_pagos:
                 if cuota.estado_pago in ['Pendiente de pago', 'Vencido']:
                     cuota.estado_pago = 'Cancelado'
+                    valor_cancelado += float(cuota.valor_a_pagar)
+            
+            # Reversar en el libro la comisión que ya no se recaudará
+            ComisionService.registrar_reverso(poliza.id, OpcionSeguro.query.get(poliza.opcion_seguro_id).aseguradora_id, valor_cancelado)
             
+            emitir('poliza.cancelada',
+                   poliza_id=poliza.id,
+                   motivo=motivo_cancelacion,
+                   valor_cancelado=valor_cancelado)
             db.session.commit()
             
             return {
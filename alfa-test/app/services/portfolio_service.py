@@ -0,0 +1,145 @@
+from datetime import date
+from sqlalchemy import and_, case, func
+from app.models.cliente_model import Cliente
+from app.models.agente_model import Agente
+from app.models.agente_cliente_model import AgenteCliente
+from app.models.bien_model import Bien
+from app.models.cliente_bien_model import ClienteBien
+from app.models.aseguradora_model import Aseguradora
+from app.models.opcion_seguro_model import OpcionSeguro
+from app.models.poliza_model import Poliza
+from app.models.poliza_plan_pago_model import PolizaPlanPago
+from app import db
+
+class PortfolioService:
+    """
+    Vista consolidada de un cliente (agentes, bienes, cotizaciones, pólizas y cuotas)
+
+    Cada nivel se carga con una consulta por conjunto de ids, de modo que el
+    número de consultas es fijo (máximo 10) sin importar cuántos bienes,
+    opciones o pólizas tenga el cliente.
+    """
+
+    @staticmethod
+    def obtener_portfolio_cliente(cliente_id):
+        """Obtener el portafolio completo de un cliente (None si no existe)"""
+        cliente = Cliente.query.get(cliente_id)
+        if not cliente:
+            return None
+
+        agentes = Agente.query.join(AgenteCliente, AgenteCliente.agente_id == Agente.id)\
+            .filter(AgenteCliente.cliente_id == cliente_id)\
+            .order_by(Agente.id).all()
+
+        bienes = Bien.query.join(ClienteBien, ClienteBien.bien_id == Bien.id)\
+            .filter(ClienteBien.cliente_id == cliente_id)\
+            .order_by(Bien.id).all()
+        especificos = Bien.cargar_bienes_especificos(bienes)
+
+        # Cotizaciones de todos los bienes con el nombre de la aseguradora en la misma consulta
+        opciones_por_bien = {}
+        opciones = []
+        bien_ids = [bien.id for bien in bienes]
+        if bien_ids:
+            opciones = db.session.query(OpcionSeguro, Aseguradora.nombre)\
+                .join(Aseguradora, Aseguradora.id == OpcionSeguro.aseguradora_id)\
+                .filter(OpcionSeguro.bien_id.in_(bien_ids))\
+                .order_by(OpcionSeguro.id).all()
+
+        polizas_por_opcion = {}
+        opcion_ids = [opcion.id for opcion, _ in opciones]
+        if opcion_ids:
+            polizas = Poliza.query.filter(Poliza.opcion_seguro_id.in_(opcion_ids)).order_by(Poliza.id).all()
+            resumenes = PortfolioService.resumir_planes_pago([poliza.id for poliza in polizas])
+            for poliza in polizas:
+                datos_poliza = poliza.to_dict()
+                datos_poliza['resumen_pagos'] = resumenes.get(poliza.id, PortfolioService._resumen_vacio())
+                polizas_por_opcion[poliza.opcion_seguro_id] = datos_poliza
+
+        for opcion, aseguradora_nombre in opciones:
+            poliza = polizas_por_opcion.get(opcion.id)
+            opciones_por_bien.setdefault(opcion.bien_id, []).append({
+                'id': opcion.id,
+                'consecutivo': opcion.consecutivo,
+                'aseguradora_id': opcion.aseguradora_id,
+                'aseguradora_nombre': aseguradora_nombre,
+                'tipo_opcion': opcion.tipo_opcion,
+                'valor_prima_total': float(opcion.valor_prima_total) if opcion.valor_prima_total else None,
+                'financiacion_id': opcion.financiacion_id,
+                'tiene_poliza': poliza is not None,
+                'poliza': poliza
+            })
+
+        datos_bienes = []
+        for bien in bienes:
+            datos_bien = bien.to_dict(include_specific=False)
+            especifico = especificos.get(bien.id)
+            datos_bien['bien_especifico'] = especifico.to_dict() if especifico else None
+            datos_bien['opciones_seguro'] = opciones_por_bien.get(bien.id, [])
+            datos_bienes.append(datos_bien)
+
+        polizas_cliente = list(polizas_por_opcion.values())
+        return {
+            'cliente': cliente.to_dict(),
+            'agentes': [agente.to_dict() for agente in agentes],
+            'bienes': datos_bienes,
+            'resumen': {
+                'total_bienes': len(bienes),
+                'total_opciones_seguro': len(opciones),
+                'total_polizas': len(polizas_cliente),
+                'polizas_vigentes': sum(1 for p in polizas_cliente if p['esta_vigente']),
+                'cuotas_vencidas': sum(p['resumen_pagos']['cuotas_vencidas'] for p in polizas_cliente),
+                'valor_pendiente': round(sum(p['resumen_pagos']['valor_pendiente'] for p in polizas_cliente), 2)
+            }
+        }
+
+    @staticmethod
+    def resumir_planes_pago(poliza_ids):
+        """Resumen del plan de pagos de varias pólizas con una sola consulta agrupada"""
+        if not poliza_ids:
+            return {}
+
+        pagada = PolizaPlanPago.estado_pago == 'Pagado'
+        pendiente = PolizaPlanPago.estado_pago != 'Pagado'
+        filas = db.session.query(
+            PolizaPlanPago.poliza_id,
+            func.count(PolizaPlanPago.id),
+            func.sum(case((pagada, 1), else_=0)),
+            func.sum(PolizaPlanPago.valor_a_pagar),
+            func.sum(case((pagada, PolizaPlanPago.valor_a_pagar), else_=0)),
+            func.sum(case((and_(pendiente, PolizaPlanPago.fecha_maxima_pago < date.today()), 1), else_=0)),
+            func.min(case((pendiente, PolizaPlanPago.fecha_maxima_pago)))
+        ).filter(PolizaPlanPago.poliza_id.in_(poliza_ids))\
+            .group_by(PolizaPlanPago.poliza_id).all()
+
+        resumenes = {}
+        for poliza_id, total, pagadas, valor_total, valor_pagado, vencidas, proxima in filas:
+            valor_total = float(valor_total or 0)
+            valor_pagado = float(valor_pagado or 0)
+            if isinstance(proxima, str):
+                # SQLite retorna las fechas de agregados como texto
+                proxima = date.fromisoformat(proxima)
+            resumenes[poliza_id] = {
+                'total_cuotas': total,
+                'cuotas_pagadas': int(pagadas or 0),
+                'cuotas_pendientes': total - int(pagadas or 0),
+                'cuotas_vencidas': int(vencidas or 0),
+                'valor_total_plan': valor_total,
+                'valor_pagado': valor_pagado,
+                'valor_pendiente': round(valor_total - valor_pagado, 2),
+                'proxima_fecha_pago': proxima.isoformat() if proxima else None
+            }
+        return resumenes
+
+    @staticmethod
+    def _resumen_vacio():
+        return {
+            'total_cuotas': 0,
+            'cuotas_pagadas': 0,
+            'cuotas_pendientes': 0,
+            'cuotas_vencidas': 0,
+            'valor_total_plan': 0,
+            'valor_pagado': 0,
+            'valor_pendiente': 0,
+            'proxima_fecha_pago': None
+        }
@@ -0,0 +1,272 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+import threading
+from sqlalchemy import and_, case, func, or_, select
+from app.models.cliente_model import Cliente
+from app.models.cliente_bien_model import ClienteBien
+from app.models.opcion_seguro_model import OpcionSeguro
+from app.models.poliza_model import Poliza
+from app.models.poliza_plan_pago_model import PolizaPlanPago
+from app.models.recordatorio_model import RecordatorioOutbox
+from app.utils.enviadores import crear_enviador
+from app.utils.sincronizacion import anotar_cambios
+from app import db
+
+ASUNTO_RECORDATORIO = 'Recordatorio de pago - Póliza {consecutivo_poliza}, cuota {numero_cuota}'
+CUERPO_RECORDATORIO = (
+    'Hola {nombre},\n\n'
+    'La cuota {numero_cuota} de su póliza {consecutivo_poliza} por ${valor:,.2f} '
+    'vence el {fecha_maxima_pago}.\n\n'
+    'Puede pagarla en línea en:\n{link}\n\n'
+    'Si ya realizó el pago, por favor ignore este mensaje.\n'
+)
+
+
+class RecordatorioService:
+    """
+    Recordatorios de cuotas por vencer (patrón outbox)
+
+    La preparación genera los links del portal y escribe los mensajes en
+    recordatorios_outbox por lotes; el despacho los envía aparte, de modo que
+    ningún envío ocurre dentro de una solicitud.
+    """
+
+    # Espera antes del primer reintento de un envío fallido (se duplica en cada intento)
+    ESPERA_REINTENTO_SEGUNDOS = 60
+
+    @staticmethod
+    def preparar_recordatorios(dias=7, tamano_lote=1000, base_url='https://pagos.aseguradora.com', progreso=None):
+        """
+        Generar links y encolar recordatorios de las cuotas que vencen en `dias`
+
+        Recorre idx_plan_pagos_estado_fecha por lotes (fecha, id). Cada lote
+        usa un UPDATE para los links faltantes y un INSERT multi-fila para los
+        mensajes, y se confirma por separado. Repetirla el mismo día no
+        duplica mensajes.
+
+        Returns:
+            dict: cuotas revisadas, links generados y recordatorios encolados
+        """
+        hoy = date.today()
+        limite = hoy + timedelta(days=dias)
+        tabla_cuotas = PolizaPlanPago.__table__
+        totales = {'cuotas': 0, 'links_generados': 0, 'recordatorios_encolados': 0}
+        cursor = None
+
+        while True:
+            consulta = select(
+                PolizaPlanPago.id,
+                PolizaPlanPago.poliza_id,
+                PolizaPlanPago.numero_cuota,
+                PolizaPlanPago.fecha_maxima_pago,
+                PolizaPlanPago.link_portal_pagos
+            ).where(PolizaPlanPago.estado_pago == 'Pendiente de pago')\
+                .where(PolizaPlanPago.fecha_maxima_pago >= hoy)\
+                .where(PolizaPlanPago.fecha_maxima_pago <= limite)
+            if cursor:
+                consulta = consulta.where(or_(
+                    PolizaPlanPago.fecha_maxima_pago > cursor[0],
+                    and_(PolizaPlanPago.fecha_maxima_pago == cursor[0], PolizaPlanPago.id > cursor[1])
+                ))
+            lote = db.session.execute(
+                consulta.order_by(PolizaPlanPago.fecha_maxima_pago, PolizaPlanPago.id).limit(tamano_lote)
+            ).all()
+            if not lote:
+                break
+            cursor = (lote[-1].fecha_maxima_pago, lote[-1].id)
+
+            # 1. Links faltantes: un solo UPDATE con CASE por lote
+            links = {
+                fila.id: PolizaPlanPago.construir_link_portal_pagos(base_url, fila.poliza_id, fila.numero_cuota)
+                for fila in lote if not fila.link_portal_pagos
+            }
+            if links:
+                anotar_cambios(tabla_cuotas, list(links))
+                totales['links_generados'] += db.session.execute(
+                    tabla_cuotas.update()
+                    .where(tabla_cuotas.c.id.in_(list(links)))
+                    .where(tabla_cuotas.c.link_portal_pagos.is_(None))
+                    .values(link_portal_pagos=case(links, value=tabla_cuotas.c.id),
+                            version=tabla_cuotas.c.version + 1)
+                ).rowcount
+
+            # 2. Mensajes del lote para los clientes del bien asegurado
+            totales['recordatorios_encolados'] += RecordatorioService._encolar_lote(
+                [fila.id for fila in lote], hoy
+            )
+            totales['cuotas'] += len(lote)
+            db.session.commit()
+            if progreso:
+                progreso(totales)
+
+        return totales
+
+    @staticmethod
+    def _encolar_lote(cuota_ids, fecha_programada):
+        destinatarios = db.session.execute(
+            select(
+                PolizaPlanPago.id.label('cuota_id'),
+                PolizaPlanPago.numero_cuota,
+                PolizaPlanPago.valor_a_pagar,
+                PolizaPlanPago.fecha_maxima_pago,
+                PolizaPlanPago.link_portal_pagos,
+                Poliza.consecutivo_poliza,
+                Cliente.id.label('cliente_id'),
+                Cliente.correo,
+                func.coalesce(Cliente.nombre, Cliente.razon_social).label('nombre')
+            ).join(Poliza, Poliza.id == PolizaPlanPago.poliza_id)
+            .join(OpcionSeguro, OpcionSeguro.id == Poliza.opcion_seguro_id)
+            .join(ClienteBien, ClienteBien.bien_id == OpcionSeguro.bien_id)
+            .join(Cliente, Cliente.id == ClienteBien.cliente_id)
+            .where(PolizaPlanPago.id.in_(cuota_ids))
+            .where(Cliente.correo.isnot(None))
+            .where(func.coalesce(Poliza.estado_cartera, '') != 'Cancelada')
+        ).all()
+        if not destinatarios:
+            return 0
+
+        existentes = set(db.session.execute(
+            select(RecordatorioOutbox.cuota_id, RecordatorioOutbox.cliente_id)
+            .where(RecordatorioOutbox.cuota_id.in_(cuota_ids))
+            .where(RecordatorioOutbox.fecha_programada == fecha_programada)
+        ).tuples())
+
+        ahora = datetime.utcnow()
+        filas = []
+        for d in destinatarios:
+            if (d.cuota_id, d.cliente_id) in existentes:
+                continue
+            datos = {
+                'nombre': d.nombre or 'cliente',
+                'numero_cuota': d.numero_cuota,
+                'consecutivo_poliza': d.consecutivo_poliza,
+                'valor': float(d.valor_a_pagar),
+                'fecha_maxima_pago': d.fecha_maxima_pago.isoformat(),
+                'link': d.link_portal_pagos
+            }
+            filas.append({
+                'cuota_id': d.cuota_id,
+                'cliente_id': d.cliente_id,
+                'fecha_programada': fecha_programada,
+                'canal': 'email',
+                'destinatario': d.correo,
+                'asunto': ASUNTO_RECORDATORIO.format(**datos),
+                'cuerpo': CUERPO_RECORDATORIO.format(**datos),
+                'estado': 'Pendiente',
+                'intentos': 0,
+                'creado_en': ahora
+            })
+        if filas:
+            db.session.execute(RecordatorioOutbox.__table__.insert(), filas)
+        return len(filas)
+
+    @staticmethod
+    def despachar_recordatorios(config, concurrencia=4, tamano_lote=200, max_intentos=5,
+                                visibilidad_segundos=600, progreso=None):
+        """
+        Enviar los recordatorios pendientes del outbox
+
+        Reclama lotes con FOR UPDATE SKIP LOCKED (varios despachadores pueden
+        correr a la vez) y los envía con `concurrencia` hilos, cada uno con su
+        propio enviador. Los fallos vuelven a 'Pendiente' hasta max_intentos.
+
+        Returns:
+            dict: enviados y fallidos
+        """
+        tabla = RecordatorioOutbox.__table__
+        locales = threading.local()
+        enviadores = []
+        candado = threading.Lock()
+
+        def enviar(mensaje):
+            if not hasattr(locales, 'enviador'):
+                locales.enviador = crear_enviador(config)
+                with candado:
+                    enviadores.append(locales.enviador)
+            try:
+                locales.enviador.enviar(mensaje)
+                return mensaje['id'], None
+            except Exception as e:
+                return mensaje['id'], f'{e.__class__.__name__}: {e}'
+
+        totales = {'enviados': 0, 'fallidos': 0, 'reintentos': 0}
+        try:
+            with ThreadPoolExecutor(max_workers=concurrencia) as ejecutor:
+                while True:
+                    lote = RecordatorioService._reclamar_lote(tamano_lote, visibilidad_segundos)
+                    if not lote:
+                        break
+                    resultados = list(ejecutor.map(enviar, lote))
+                    intentos = {m['id']: m['intentos'] for m in lote}
+                    ahora = datetime.utcnow()
+
+                    enviados = [i for i, error in resultados if error is None]
+                    if enviados:
+                        db.session.execute(
+                            tabla.update().where(tabla.c.id.in_(enviados))
+                            .values(estado='Enviado', enviado_en=ahora, bloqueado_hasta=None, error=None)
+                        )
+                    for mensaje_id, error in resultados:
+                        if error is None:
+                            continue
+                        agotado = intentos[mensaje_id] >= max_intentos
+                        # Mientras no se agoten los intentos, bloqueado_hasta marca el próximo reintento
+                        espera = min(RecordatorioService.ESPERA_REINTENTO_SEGUNDOS * 2 ** (intentos[mensaje_id] - 1), 3600)
+                        db.session.execute(
+                            tabla.update().where(tabla.c.id == mensaje_id).values(
+                                estado='Fallido' if agotado else 'Pendiente',
+                                error=error,
+                                bloqueado_hasta=None if agotado else ahora + timedelta(seconds=espera)
+                            )
+                        )
+                        totales['fallidos' if agotado else 'reintentos'] += 1
+                    db.session.commit()
+                    totales['enviados'] += len(enviados)
+                    if progreso:
+                        progreso(totales)
+        finally:
+            for enviador in enviadores:
+                enviador.cerrar()
+
+        return totales
+
+    @staticmethod
+    def _reclamar_lote(tamano_lote, visibilidad_segundos):
+        """Marcar como 'Enviando' el siguiente lote disponible y retornarlo"""
+        tabla = RecordatorioOutbox.__table__
+        ahora = datetime.utcnow()
+        disponible = or_(
+            and_(tabla.c.estado == 'Pendiente',
+                 or_(tabla.c.bloqueado_hasta.is_(None), tabla.c.bloqueado_hasta <= ahora)),
+            # Envíos abandonados por un despachador que terminó a la mitad
+            and_(tabla.c.estado == 'Enviando', tabla.c.bloqueado_hasta < ahora)
+        )
+        ids = db.session.execute(
+            select(tabla.c.id).where(disponible).order_by(tabla.c.id)
+            .limit(tamano_lote).with_for_update(skip_locked=True)
+        ).scalars().all()
+        if not ids:
+            db.session.commit()
+            return []
+        db.session.execute(
+            tabla.update().where(tabla.c.id.in_(ids)).where(disponible).values(
+                estado='Enviando',
+                intentos=tabla.c.intentos + 1,
+                bloqueado_hasta=ahora + timedelta(seconds=visibilidad_segundos)
+            )
+        )
+        lote = db.session.execute(
+            select(tabla.c.id, tabla.c.destinatario, tabla.c.asunto, tabla.c.cuerpo, tabla.c.intentos)
+            .where(tabla.c.id.in_(ids)).where(tabla.c.bloqueado_hasta > ahora)
+        ).mappings().all()
+        db.session.commit()
+        return [dict(m) for m in lote]
+
+    @staticmethod
+    def obtener_resumen_outbox(fecha_programada=None):
+        """Cantidad de recordatorios por estado (del día indicado o de todos)"""
+        consulta = select(RecordatorioOutbox.estado, func.count(RecordatorioOutbox.id))\
+            .group_by(RecordatorioOutbox.estado)
+        if fecha_programada:
+            consulta = consulta.where(RecordatorioOutbox.fecha_programada == fecha_programada)
+        return {estado: total for estado, total in db.session.execute(consulta)}
@@ -0,0 +1,277 @@
+import logging
+from datetime import date, datetime, timedelta
+from sqlalchemy import and_, func, or_, select
+from app.models.bien_model import Bien
+from app.models.aseguradora_model import Aseguradora
+from app.models.opcion_seguro_model import OpcionSeguro
+from app.models.opcion_hogar_model import OpcionHogar
+from app.models.opcion_vehiculo_model import OpcionVehiculo
+from app.models.opcion_copropiedad_model import OpcionCopropiedad
+from app.models.opcion_otro_model import OpcionOtro
+from app.models.poliza_model import Poliza
+from app.models.renovacion_model import RenovacionEjecucion, RenovacionOpcion
+from app.services.secuencia_service import SecuenciaService
+from app import db
+
+logger = logging.getLogger(__name__)
+
+class RenovacionService:
+    """
+    Motor de renovaciones de pólizas próximas a vencer
+
+    Recorre las pólizas cuya fecha de fin de vigencia cae en los próximos N
+    días con un rango sobre idx_polizas_fecha_fin, por lotes de (fecha, id)
+    crecientes. Cada lote se confirma en su propia transacción junto con el
+    punto de control, de modo que una ejecución interrumpida se reanuda
+    desde el último lote confirmado.
+    """
+
+    MODELOS_OPCION = {
+        'HOGAR': OpcionHogar,
+        'VEHICULO': OpcionVehiculo,
+        'COPROPIEDAD': OpcionCopropiedad,
+        'OTRO': OpcionOtro
+    }
+
+    @staticmethod
+    def _consulta_por_renovar(fecha_desde, fecha_hasta, solo_continuas=True):
+        """Pólizas no canceladas que terminan en (fecha_desde, fecha_hasta]"""
+        consulta = select(
+            Poliza.id,
+            Poliza.consecutivo_poliza,
+            Poliza.fecha_fin_vigencia,
+            OpcionSeguro.id.label('opcion_seguro_id'),
+            OpcionSeguro.bien_id,
+            OpcionSeguro.aseguradora_id,
+            OpcionSeguro.tipo_opcion,
+            OpcionSeguro.opcion_especifica_id,
+            Bien.vigencias_continuas
+        ).join(OpcionSeguro, OpcionSeguro.id == Poliza.opcion_seguro_id)\
+            .join(Bien, Bien.id == OpcionSeguro.bien_id)\
+            .where(Poliza.fecha_fin_vigencia > fecha_desde)\
+            .where(Poliza.fecha_fin_vigencia <= fecha_hasta)\
+            .where(func.coalesce(Poliza.estado_cartera, '') != 'Cancelada')
+        if solo_continuas:
+            consulta = consulta.where(Bien.vigencias_continuas.is_(True))
+        return consulta
+
+    @staticmethod
+    def _despues_de(fecha_fin, poliza_id):
+        """Condición keyset: posiciones posteriores a (fecha_fin, poliza_id)"""
+        return or_(
+            Poliza.fecha_fin_vigencia > fecha_fin,
+            and_(Poliza.fecha_fin_vigencia == fecha_fin, Poliza.id > poliza_id)
+        )
+
+    @staticmethod
+    def obtener_polizas_por_renovar(dias=30, cursor=None, limite=100, solo_continuas=False):
+        """
+        Listar pólizas que vencen en los próximos días (paginación por cursor)
+
+        Args:
+            cursor: 'AAAA-MM-DD:id' de la última póliza de la página anterior
+
+        Returns:
+            tuple: (dict, status_code)
+        """
+        try:
+            hoy = date.today()
+            consulta = RenovacionService._consulta_por_renovar(
+                hoy - timedelta(days=1), hoy + timedelta(days=dias), solo_continuas
+            )
+            if cursor:
+                try:
+                    fecha_cursor, id_cursor = cursor.split(':')
+                    consulta = consulta.where(RenovacionService._despues_de(
+                        date.fromisoformat(fecha_cursor), int(id_cursor)
+                    ))
+                except ValueError:
+                    return {'error': 'Cursor inválido'}, 400
+
+            filas = db.session.execute(
+                consulta.order_by(Poliza.fecha_fin_vigencia, Poliza.id).limit(limite + 1)
+            ).all()
+            pagina = filas[:limite]
+
+            # Borradores de renovación ya generados para las pólizas de la página
+            borradores = {}
+            if pagina:
+                for poliza_id, opcion_id in db.session.execute(
+                    select(RenovacionOpcion.poliza_id, RenovacionOpcion.opcion_seguro_id)
+                    .where(RenovacionOpcion.poliza_id.in_([fila.id for fila in pagina]))
+                ):
+                    borradores.setdefault(poliza_id, []).append(opcion_id)
+
+            siguiente = None
+            if len(filas) > limite:
+                ultima = pagina[-1]
+                siguiente = f"{ultima.fecha_fin_vigencia.isoformat()}:{ultima.id}"
+
+            return {
+                'polizas': [{
+                    'id': fila.id,
+                    'consecutivo_poliza': fila.consecutivo_poliza,
+                    'fecha_fin_vigencia': fila.fecha_fin_vigencia.isoformat(),
+                    'dias_para_vencer': (fila.fecha_fin_vigencia - hoy).days,
+                    'opcion_seguro_id': fila.opcion_seguro_id,
+                    'bien_id': fila.bien_id,
+                    'aseguradora_id': fila.aseguradora_id,
+                    'tipo_opcion': fila.tipo_opcion,
+                    'vigencias_continuas': bool(fila.vigencias_continuas),
+                    'borradores_renovacion': borradores.get(fila.id, [])
+                } for fila in pagina],
+                'siguiente_cursor': siguiente
+            }, 200
+
+        except Exception as e:
+            db.session.rollback()
+            return {'error': f'Error interno del servidor: {str(e)}'}, 500
+
+    @staticmethod
+    def ejecutar_renovaciones(dias=45, tamano_lote=500, reiniciar=False):
+        """
+        Generar borradores de renovación para bienes con vigencias continuas
+
+        Reanuda la última ejecución que no terminó (salvo reiniciar=True).
+        Por cada póliza se crea una opción de seguro sin prima con cada
+        aseguradora que hoy ofrece el tipo de bien, copiando los valores
+        asegurados de la opción que originó la póliza.
+
+        Returns:
+            RenovacionEjecucion: ejecución con sus contadores y estado final
+        """
+        ejecucion = None
+        if not reiniciar:
+            ejecucion = RenovacionEjecucion.query\
+                .filter(RenovacionEjecucion.estado != 'Completada')\
+                .order_by(RenovacionEjecucion.id.desc()).first()
+        if ejecucion is None:
+            hoy = date.today()
+            ejecucion = RenovacionEjecucion(
+                fecha_corte=hoy,
+                fecha_limite=hoy + timedelta(days=dias)
+            )
+            db.session.add(ejecucion)
+        ejecucion.estado = 'En curso'
+        ejecucion.error = None
+        db.session.commit()
+        ejecucion_id = ejecucion.id
+
+        aseguradoras_por_tipo = RenovacionService._aseguradoras_por_tipo()
+
+        try:
+            while True:
+                # La fecha de corte es exclusiva: se arranca el día anterior
+                consulta = RenovacionService._consulta_por_renovar(
+                    ejecucion.fecha_corte - timedelta(days=1), ejecucion.fecha_limite
+                )
+                if ejecucion.ultima_poliza_id is not None:
+                    consulta = consulta.where(RenovacionService._despues_de(
+                        ejecucion.ultima_fecha_fin, ejecucion.ultima_poliza_id
+                    ))
+                lote = db.session.execute(
+                    consulta.order_by(Poliza.fecha_fin_vigencia, Poliza.id).limit(tamano_lote)
+                ).all()
+                if not lote:
+                    break
+
+                generadas = RenovacionService._generar_borradores(lote, aseguradoras_por_tipo, ejecucion_id)
+
+                ejecucion.ultima_fecha_fin = lote[-1].fecha_fin_vigencia
+                ejecucion.ultima_poliza_id = lote[-1].id
+                ejecucion.polizas_procesadas += len(lote)
+                ejecucion.opciones_generadas += generadas
+                ejecucion.actualizada_en = datetime.utcnow()
+                db.session.commit()
+                # Liberar los objetos del lote para mantener la memoria constante
+                db.session.expunge_all()
+                ejecucion = db.session.get(RenovacionEjecucion, ejecucion_id)
+
+            ejecucion.estado = 'Completada'
+            ejecucion.finalizada_en = ejecucion.actualizada_en = datetime.utcnow()
+            db.session.commit()
+
+        except Exception as e:
+            db.session.rollback()
+            logger.exception("Motor de renovaciones interrumpido en la ejecución %s", ejecucion_id)
+            ejecucion = db.session.get(RenovacionEjecucion, ejecucion_id)
+            ejecucion.estado = 'Fallida'
+            ejecucion.error = str(e)
+            ejecucion.actualizada_en = datetime.utcnow()
+            db.session.commit()
+
+        return ejecucion
+
+    @staticmethod
+    def _aseguradoras_por_tipo():
+        """Aseguradoras con comisión definida para cada tipo de bien"""
+        por_tipo = {tipo: [] for tipo in RenovacionService.MODELOS_OPCION}
+        for aseguradora in Aseguradora.query.order_by(Aseguradora.id).all():
+            for tipo in por_tipo:
+                if aseguradora.get_comision_por_tipo(tipo) is not None:
+                    por_tipo[tipo].append(aseguradora.id)
+        return por_tipo
+
+    @staticmethod
+    def _generar_borradores(lote, aseguradoras_por_tipo, ejecucion_id):
+        """Crear los borradores de un lote con una consulta por tipo de opción"""
+        poliza_ids = [fila.id for fila in lote]
+        existentes = set(db.session.execute(
+            select(RenovacionOpcion.poliza_id, RenovacionOpcion.aseguradora_id)
+            .where(RenovacionOpcion.poliza_id.in_(poliza_ids))
+        ).tuples())
+
+        # Opciones específicas de origen agrupadas por tipo
+        originales = {}
+        for tipo, modelo in RenovacionService.MODELOS_OPCION.items():
+            ids = {fila.opcion_especifica_id for fila in lote if fila.tipo_opcion == tipo}
+            if ids:
+                originales[tipo] = {o.id: o for o in modelo.query.filter(modelo.id.in_(ids)).all()}
+
+        pendientes = []
+        for fila in lote:
+            original = originales.get(fila.tipo_opcion, {}).get(fila.opcion_especifica_id)
+            if original is None:
+                continue
+            # La aseguradora actual siempre se cotiza, aunque no tenga comisión cargada
+            candidatas = [fila.aseguradora_id] + [
+                a for a in aseguradoras_por_tipo.get(fila.tipo_opcion, []) if a != fila.aseguradora_id
+            ]
+            for aseguradora_id in candidatas:
+                if (fila.id, aseguradora_id) in existentes:
+                    continue
+                modelo = RenovacionService.MODELOS_OPCION[fila.tipo_opcion]
+                copia = modelo(**{
+                    columna.key: getattr(original, columna.key)
+                    for columna in modelo.__table__.columns if columna.key != 'id'
+                })
+                pendientes.append((fila, aseguradora_id, copia))
+
+        if not pendientes:
+            return 0
+
+        db.session.add_all([copia for _, _, copia in pendientes])
+        db.session.flush()
+
+        opciones = []
+        consecutivos = SecuenciaService.reservar_consecutivos('opcion_seguro', len(pendientes))
+        for (fila, aseguradora_id, copia), consecutivo in zip(pendientes, consecutivos):
+            opciones.append(OpcionSeguro(
+                consecutivo=consecutivo,
+                bien_id=fila.bien_id,
+                aseguradora_id=aseguradora_id,
+                tipo_opcion=fila.tipo_opcion,
+                opcion_especifica_id=copia.id
+            ))
+        db.session.add_all(opciones)
+        db.session.flush()
+
+        ahora = datetime.utcnow()
+        db.session.execute(RenovacionOpcion.__table__.insert(), [{
+            'poliza_id': fila.id,
+            'aseguradora_id': aseguradora_id,
+            'opcion_seguro_id': opcion.id,
+            'ejecucion_id': ejecucion_id,
+            'creada_en': ahora
+        } for (fila, aseguradora_id, _), opcion in zip(pendientes, opciones)])
+        return len(opciones)
@@ -0,0 +1,118 @@
+from datetime import datetime
+import os
+import threading
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from app.models.secuencia_model import Secuencia
+from app import db
+
+
+class SecuenciaService:
+    """
+    Consecutivos por bloques
+
+    Cada proceso reserva un bloque de números de la tabla secuencias en una
+    transacción propia y corta (un UPDATE de una fila), y luego los entrega
+    desde memoria. La transacción del llamador no bloquea la fila, por lo que
+    varios workers emiten consecutivos en paralelo sin colisiones ni
+    reintentos. Dentro de un proceso los números son crecientes; entre
+    procesos pueden intercalarse y un bloque abandonado deja un hueco.
+    """
+
+    # nombre -> (prefijo, reinicio: 'mensual', 'anual' o None)
+    SECUENCIAS = {
+        'poliza': ('POL', 'mensual'),
+        'opcion_seguro': ('OPC', 'mensual'),
+    }
+
+    # Dígitos del número dentro del consecutivo (AAAA-MM-POL-00000042)
+    DIGITOS = 8
+
+    _bloques = {}
+    _candado = threading.Lock()
+
+    @staticmethod
+    def siguiente_consecutivo(nombre, fecha=None):
+        """Siguiente consecutivo formateado, p. ej. '2024-03-POL-00000042'"""
+        return SecuenciaService.reservar_consecutivos(nombre, 1, fecha)[0]
+
+    @staticmethod
+    def reservar_consecutivos(nombre, cantidad, fecha=None):
+        """Lista de `cantidad` consecutivos para creaciones masivas"""
+        prefijo, reinicio = SecuenciaService.SECUENCIAS[nombre]
+        fecha = fecha or datetime.now()
+        return [
+            f"{fecha.year}-{fecha.month:02d}-{prefijo}-{numero:0{SecuenciaService.DIGITOS}d}"
+            for numero in SecuenciaService.siguientes_numeros(nombre, cantidad, SecuenciaService.periodo(reinicio, fecha))
+        ]
+
+    @staticmethod
+    def periodo(reinicio, fecha):
+        if reinicio == 'mensual':
+            return f'{fecha.year}-{fecha.month:02d}'
+        if reinicio == 'anual':
+            return str(fecha.year)
+        return ''
+
+    @staticmethod
+    def siguientes_numeros(nombre, cantidad, periodo=''):
+        """Tomar `cantidad` números del bloque en memoria, reservando bloques nuevos si se agota"""
+        numeros = []
+        clave = (nombre, periodo)
+        with SecuenciaService._candado:
+            while len(numeros) < cantidad:
+                bloque = SecuenciaService._bloques.get(clave)
+                # Un bloque heredado al hacer fork pertenece al proceso padre
+                if not bloque or bloque['pid'] != os.getpid() or bloque['siguiente'] >= bloque['fin']:
+                    tamano = max(current_app.config['SECUENCIAS_TAMANO_BLOQUE'], cantidad - len(numeros))
+                    inicio = SecuenciaService.reservar_bloque(nombre, periodo, tamano)
+                    bloque = {'siguiente': inicio, 'fin': inicio + tamano, 'pid': os.getpid()}
+                    SecuenciaService._bloques[clave] = bloque
+                tomados = min(cantidad - len(numeros), bloque['fin'] - bloque['siguiente'])
+                numeros.extend(range(bloque['siguiente'], bloque['siguiente'] + tomados))
+                bloque['siguiente'] += tomados
+        return numeros
+
+    @staticmethod
+    def reservar_bloque(nombre, periodo, tamano):
+        """
+        Reservar `tamano` números en una transacción independiente
+
+        Returns:
+            int: primer número del bloque
+        """
+        tabla = Secuencia.__table__
+        for _ in range(2):
+            with db.engine.begin() as conexion:
+                actualizadas = conexion.execute(
+                    tabla.update()
+                    .where(tabla.c.nombre == nombre)
+                    .where(tabla.c.periodo == periodo)
+                    .values(siguiente=tabla.c.siguiente + tamano, actualizado_en=datetime.utcnow())
+                ).rowcount
+                if actualizadas:
+                    # La fila queda bloqueada por el UPDATE hasta el commit
+                    siguiente = conexion.execute(
+                        select(tabla.c.siguiente)
+                        .where(tabla.c.nombre == nombre)
+                        .where(tabla.c.periodo == periodo)
+                    ).scalar_one()
+                    return siguiente - tamano
+            # Primer uso del período
+            try:
+                with db.engine.begin() as conexion:
+                    conexion.execute(tabla.insert().values(
+                        nombre=nombre, periodo=periodo, siguiente=1 + tamano, actualizado_en=datetime.utcnow()
+                    ))
+                return 1
+            except IntegrityError:
+                # Otro proceso creó la fila al mismo tiempo
+                continue
+        raise RuntimeError(f'No se pudo reservar un bloque de la secuencia {nombre}:{periodo}')
+
+    @staticmethod
+    def descartar_bloques():
+        """Olvidar los bloques en memoria (pruebas o cambio de base de datos)"""
+        with SecuenciaService._candado:
+            SecuenciaService._bloques.clear()
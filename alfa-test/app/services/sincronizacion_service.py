@@ -0,0 +1,286 @@
+from datetime import datetime, timedelta
+import time
+from flask import current_app
+from sqlalchemy import func, or_, select, tuple_
+from app.models.agente_model import Agente
+from app.models.cambio_sincronizacion_model import CambioSincronizacion
+from app.utils.lectura import serializador
+from app.utils.sincronizacion import COLUMNAS_OMITIDAS, TABLAS_SINCRONIZADAS, TIPOS_ESPECIFICOS
+from app import db
+
+class SincronizacionService:
+    """Cambios de la cartera de un agente desde su última sincronización"""
+
+    # Filas leídas por lote al armar los registros de la respuesta
+    TAMANO_LOTE = 500
+
+    @staticmethod
+    def obtener_cambios(agente_id, token=None, limite=500):
+        """
+        Altas, cambios y bajas de la cartera del agente posteriores al token
+
+        Sin token responde la cartera completa (clientes asignados, sus bienes
+        con el bien específico, opciones de seguro, pólizas y cuotas). Con
+        token lee solo las filas del agente en cambios_sincronizacion, hasta
+        `limite`, y arma cada alta o cambio con el estado actual del registro.
+        Una asignación nueva trae el cliente con todo lo suyo, y un bien
+        vinculado a un cliente de la cartera, el bien con todo lo suyo.
+
+        Los cambios registrados hace menos de SYNC_MARGEN_SEGUNDOS se dejan
+        para la próxima consulta: así una transacción que todavía no confirma
+        no queda detrás del token.
+
+        Returns:
+            tuple: (dict con token, completa, hay_mas y el generador cambios, status_code)
+        """
+        try:
+            if not Agente.query.get(agente_id):
+                return {'error': 'Agente no encontrado'}, 404
+
+            config = current_app.config
+            ahora = time.time()
+            corte = datetime.utcnow() - timedelta(seconds=config['SYNC_MARGEN_SEGUNDOS'])
+
+            if token is None:
+                # Lo registrado antes del corte ya está confirmado y lo cubre la cartera leída
+                ultimo = db.session.execute(
+                    select(func.max(CambioSincronizacion.id)).where(
+                        CambioSincronizacion.agente_id == agente_id,
+                        CambioSincronizacion.creado_en < corte
+                    )
+                ).scalar()
+                asignados = SincronizacionService._clientes_asignados(agente_id)
+                return {
+                    'token': SincronizacionService._token(ultimo or 0, ahora),
+                    'completa': True,
+                    'hay_mas': False,
+                    'cambios': SincronizacionService._registros_de_clientes(asignados)
+                }, 200
+
+            ultimo, emitido = SincronizacionService._leer_token(token)
+            if emitido < ahora - config['SYNC_RETENCION_DIAS'] * 86400:
+                return {'error': 'El token de sincronización venció; sincronice de nuevo sin token'}, 410
+
+            filas = db.session.execute(
+                select(CambioSincronizacion.id, CambioSincronizacion.tabla, CambioSincronizacion.clave,
+                       CambioSincronizacion.operacion, CambioSincronizacion.creado_en)
+                .where(CambioSincronizacion.agente_id == agente_id, CambioSincronizacion.id > ultimo)
+                .order_by(CambioSincronizacion.id).limit(limite + 1)
+            ).all()
+
+            # Se corta en el primer cambio reciente: los siguientes esperan con él
+            vigentes = []
+            for fila in filas[:limite]:
+                if fila.creado_en >= corte:
+                    break
+                vigentes.append(fila)
+            hay_mas = len(vigentes) == limite and len(filas) > limite
+
+            return {
+                'token': SincronizacionService._token(vigentes[-1].id if vigentes else ultimo, ahora),
+                'completa': False,
+                'hay_mas': hay_mas,
+                'cambios': SincronizacionService._cambios(vigentes, agente_id)
+            }, 200
+
+        except ValueError:
+            return {'error': 'Token de sincronización inválido'}, 400
+        except Exception as e:
+            return {'error': f'Error al obtener los cambios: {str(e)}'}, 500
+
+    @staticmethod
+    def _token(ultimo_id, emitido):
+        return f'{ultimo_id}-{int(emitido)}'
+
+    @staticmethod
+    def _leer_token(token):
+        ultimo_id, emitido = token.split('-')
+        return int(ultimo_id), int(emitido)
+
+    @staticmethod
+    def _clientes_asignados(agente_id):
+        asignaciones = db.metadata.tables['agentes_clientes']
+        return select(asignaciones.c.cliente_id).where(asignaciones.c.agente_id == agente_id)
+
+    @staticmethod
+    def _cambios(filas, agente_id):
+        """
+        Cambios de la respuesta a partir de las filas del registro, en orden
+
+        Se conserva la última operación por registro. Una asignación se
+        entrega como el cliente (alta con todo lo suyo, o baja), y un vínculo
+        cliente-bien nuevo trae además el bien con todo lo suyo. Una
+        desasignación trae también la baja de los vínculos del cliente, y una
+        desasignación o un vínculo borrado, la de los bienes que el agente deja
+        de ver, con lo que cuelga de ellos. Los registros se leen al responder,
+        así que un alta trae el estado actual.
+        """
+        ultimas = {}
+        clientes_nuevos, clientes_retirados, vinculos_nuevos = set(), set(), set()
+        for fila in filas:
+            clave = tuple(int(valor) for valor in fila.clave.split(','))
+            tabla = 'clientes' if fila.tabla == 'agentes_clientes' else fila.tabla
+            ultimas.pop((tabla, clave), None)
+            ultimas[(tabla, clave)] = fila.operacion
+            if fila.tabla == 'agentes_clientes' and fila.operacion == 'upsert':
+                clientes_nuevos.add(clave[0])
+                clientes_retirados.discard(clave[0])
+            elif fila.tabla == 'agentes_clientes':
+                clientes_retirados.add(clave[0])
+                clientes_nuevos.discard(clave[0])
+            elif tabla == 'clientes' and fila.operacion == 'delete':
+                clientes_nuevos.discard(clave[0])
+            elif fila.tabla == 'clientes_bienes' and fila.operacion == 'upsert':
+                vinculos_nuevos.add(clave)
+
+        # Lo que trae un cliente nuevo no se repite como bien nuevo ni como alta suelta
+        bienes_nuevos = {
+            bien_id for cliente_id, bien_id in vinculos_nuevos
+            if cliente_id not in clientes_nuevos and ultimas.get(('bienes', (bien_id,))) != 'delete'
+        }
+        if clientes_nuevos:
+            yield from SincronizacionService._registros_de_clientes(sorted(clientes_nuevos))
+        if bienes_nuevos:
+            yield from SincronizacionService._registros_de_bienes(sorted(bienes_nuevos))
+
+        altas = {}
+        for (tabla, clave), operacion in ultimas.items():
+            if operacion != 'upsert':
+                continue
+            if tabla == 'clientes' and clave[0] in clientes_nuevos:
+                continue
+            if tabla == 'clientes_bienes' and clave[0] in clientes_nuevos:
+                continue
+            altas.setdefault(tabla, []).append(clave)
+        for tabla in TABLAS_SINCRONIZADAS:
+            if tabla in altas:
+                yield from SincronizacionService._registros(tabla, claves=altas[tabla])
+
+        # Las bajas al final: una baja posterior a un alta del mismo registro gana
+        vinculos_retirados = {
+            clave[1] for (tabla, clave), operacion in ultimas.items()
+            if tabla == 'clientes_bienes' and operacion == 'delete'
+        }
+        if clientes_retirados or vinculos_retirados:
+            yield from SincronizacionService._bajas_de_retirados(
+                agente_id, sorted(clientes_retirados), sorted(vinculos_retirados)
+            )
+        for (tabla, clave), operacion in ultimas.items():
+            if operacion == 'delete':
+                columnas = [columna.key for columna in db.metadata.tables[tabla].primary_key.columns]
+                yield {'tabla': tabla, 'operacion': 'delete', 'clave': dict(zip(columnas, clave))}
+
+    @staticmethod
+    def _registros_de_clientes(clientes):
+        """Clientes (ids o select de ids) con sus vínculos y el detalle de sus bienes"""
+        vinculos = db.metadata.tables['clientes_bienes']
+        yield from SincronizacionService._registros('clientes', donde=lambda t: t.c.id.in_(clientes))
+        yield from SincronizacionService._registros('clientes_bienes', donde=lambda t: t.c.cliente_id.in_(clientes))
+        yield from SincronizacionService._registros_de_bienes(
+            select(vinculos.c.bien_id).where(vinculos.c.cliente_id.in_(clientes)).distinct()
+        )
+
+    @staticmethod
+    def _registros_de_bienes(bienes):
+        """Bienes (ids o select de ids) con su bien específico, opciones de seguro, pólizas y cuotas"""
+        tablas = db.metadata.tables
+        tabla_bienes = tablas['bienes']
+        opciones = tablas['opciones_seguro']
+        polizas = tablas['polizas']
+        opciones_bienes = select(opciones.c.id).where(opciones.c.bien_id.in_(bienes))
+        polizas_bienes = select(polizas.c.id).where(polizas.c.opcion_seguro_id.in_(opciones_bienes))
+
+        for tabla, tipo in TIPOS_ESPECIFICOS.items():
+            yield from SincronizacionService._registros(tabla, donde=lambda t, tipo=tipo: t.c.id.in_(
+                select(tabla_bienes.c.bien_especifico_id)
+                .where(tabla_bienes.c.tipo_bien == tipo, tabla_bienes.c.id.in_(bienes))
+            ))
+        yield from SincronizacionService._registros('bienes', donde=lambda t: t.c.id.in_(bienes))
+        yield from SincronizacionService._registros('opciones_seguro', donde=lambda t: t.c.bien_id.in_(bienes))
+        yield from SincronizacionService._registros('polizas', donde=lambda t: t.c.opcion_seguro_id.in_(opciones_bienes))
+        yield from SincronizacionService._registros('poliza_plan_pagos', donde=lambda t: t.c.poliza_id.in_(polizas_bienes))
+
+    @staticmethod
+    def _bajas_de_retirados(agente_id, clientes, bienes_desvinculados):
+        """
+        Bajas de lo que el agente deja de ver al desasignarle clientes o
+        borrarse vínculos cliente-bien
+
+        Los vínculos de los clientes desasignados y, de sus bienes y de los
+        desvinculados, los que no siguen en la cartera por otro cliente
+        asignado al agente, con su bien específico, opciones de seguro, pólizas
+        y cuotas. Un cliente borrado ya no tiene vínculos: lo que colgaba de él
+        lo borra la aplicación.
+        """
+        tablas = db.metadata.tables
+        vinculos = tablas['clientes_bienes']
+        tabla_bienes = tablas['bienes']
+        opciones = tablas['opciones_seguro']
+        polizas = tablas['polizas']
+        visibles = select(vinculos.c.bien_id).where(
+            vinculos.c.cliente_id.in_(SincronizacionService._clientes_asignados(agente_id))
+        )
+        bienes = select(tabla_bienes.c.id).where(
+            or_(
+                tabla_bienes.c.id.in_(select(vinculos.c.bien_id).where(vinculos.c.cliente_id.in_(clientes))),
+                tabla_bienes.c.id.in_(bienes_desvinculados)
+            ),
+            tabla_bienes.c.id.notin_(visibles)
+        )
+        opciones_bienes = select(opciones.c.id).where(opciones.c.bien_id.in_(bienes))
+        polizas_bienes = select(polizas.c.id).where(polizas.c.opcion_seguro_id.in_(opciones_bienes))
+
+        # En orden inverso de dependencia: primero lo que cuelga de cada registro
+        if clientes:
+            yield from SincronizacionService._bajas('clientes_bienes', lambda t: t.c.cliente_id.in_(clientes))
+        yield from SincronizacionService._bajas('poliza_plan_pagos', lambda t: t.c.poliza_id.in_(polizas_bienes))
+        yield from SincronizacionService._bajas('polizas', lambda t: t.c.opcion_seguro_id.in_(opciones_bienes))
+        yield from SincronizacionService._bajas('opciones_seguro', lambda t: t.c.bien_id.in_(bienes))
+        for tabla, tipo in TIPOS_ESPECIFICOS.items():
+            yield from SincronizacionService._bajas(tabla, lambda t, tipo=tipo: t.c.id.in_(
+                select(tabla_bienes.c.bien_especifico_id)
+                .where(tabla_bienes.c.tipo_bien == tipo, tabla_bienes.c.id.in_(bienes))
+            ))
+        yield from SincronizacionService._bajas('bienes', lambda t: t.c.id.in_(bienes))
+
+    @staticmethod
+    def _bajas(tabla, donde):
+        """Bajas (solo la clave) de los registros de una tabla que cumplen `donde`"""
+        t = db.metadata.tables[tabla]
+        llave = list(t.primary_key.columns)
+        consulta = select(*llave).where(donde(t))
+        for fila in db.session.execute(consulta, execution_options={'yield_per': SincronizacionService.TAMANO_LOTE}):
+            yield {'tabla': tabla, 'operacion': 'delete', 'clave': dict(zip([c.key for c in llave], fila))}
+
+    @staticmethod
+    def _registros(tabla, donde=None, claves=None):
+        """Altas de los registros de una tabla que cumplen `donde` o tienen las `claves` indicadas"""
+        t = db.metadata.tables[tabla]
+        columnas = [c for c in t.columns if c.key not in COLUMNAS_OMITIDAS.get(tabla, ())]
+        llave = [c.key for c in t.primary_key.columns]
+        serializar = serializador(columnas)
+
+        if claves is not None:
+            consultas = [
+                select(*columnas).where(SincronizacionService._con_claves(t, claves[i:i + SincronizacionService.TAMANO_LOTE]))
+                for i in range(0, len(claves), SincronizacionService.TAMANO_LOTE)
+            ]
+        else:
+            consultas = [select(*columnas).where(donde(t))]
+
+        for consulta in consultas:
+            for fila in db.session.execute(consulta, execution_options={'yield_per': SincronizacionService.TAMANO_LOTE}):
+                datos = serializar(fila)
+                yield {
+                    'tabla': tabla,
+                    'operacion': 'upsert',
+                    'clave': {columna: datos[columna] for columna in llave},
+                    'datos': datos
+                }
+
+    @staticmethod
+    def _con_claves(t, claves):
+        columnas = list(t.primary_key.columns)
+        if len(columnas) == 1:
+            return columnas[0].in_([clave[0] for clave in claves])
+        return tuple_(*columnas).in_(claves)
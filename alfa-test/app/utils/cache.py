@@ -0,0 +1,271 @@
+"""
+Caché de respuestas GET con invalidación por etiquetas.
+
+Las rutas de lectura que cambian poco se decoran con `cache_respuesta`,
+indicando de qué datos dependen:
+
+    @aseguradora_bp.route('/aseguradoras/<int:aseguradora_id>', methods=['GET'])
+    @cache_respuesta('aseguradora:{aseguradora_id}', compartida=True)
+    def obtener_aseguradora_por_id(aseguradora_id): ...
+
+La clave de una respuesta es la ruta, los parámetros de la URL y el alcance
+del llamador (el encabezado Authorization, salvo en respuestas compartidas).
+Cada etiqueta tiene un número de versión; una entrada guarda las versiones
+de sus etiquetas al momento de calcularse y deja de ser válida cuando alguna
+cambia. Así, una escritura confirmada mientras se calculaba la respuesta la
+invalida aunque se guarde después.
+
+Las escrituras por el ORM se detectan con eventos de sesión (tabla -> etiquetas
+en _TABLAS_ETIQUETAS) y las etiquetas se invalidan después del commit; un
+rollback las descarta. Las sentencias Core sobre estas tablas no se detectan.
+
+Backends: 'memoria' (LRU por proceso; la invalidación no llega a otros
+workers) o 'redis' (compartido; requiere el paquete opcional `redis`). Si el
+backend falla, la solicitud se atiende sin caché.
+"""
+from collections import OrderedDict
+from functools import wraps
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from flask import current_app, make_response, request
+from sqlalchemy import event
+
+from app.utils.metricas import invalidaciones_cache, registrar_consulta_cache
+
+logger = logging.getLogger(__name__)
+
+NOMBRE_CACHE = 'respuestas'
+_CLAVE_ETIQUETAS = 'cache_etiquetas_pendientes'
+
+# tabla -> (etiquetas de colección, [(prefijo, atributo)])
+_TABLAS_ETIQUETAS = {
+    'aseguradoras': (('aseguradoras',), [('aseguradora', 'id')]),
+    'aseguradora_deducibles': (('aseguradoras',), [('aseguradora', 'aseguradora_id')]),
+    'aseguradora_coberturas': (('aseguradoras',), [('aseguradora', 'aseguradora_id')]),
+    'aseguradora_financiacion': (('aseguradoras',), [('aseguradora', 'aseguradora_id')]),
+    'agente': (('agentes',), [('agente', 'id')]),
+    'clientes': (('clientes',), [('cliente', 'id')]),
+    'agentes_clientes': ((), [('agente', 'agente_id'), ('cliente', 'cliente_id')]),
+    'clientes_bienes': ((), [('cliente', 'cliente_id')]),
+    'bienes': (('bienes',), []),
+    'hogares': (('bienes',), []),
+    'vehiculos': (('bienes',), []),
+    'copropiedades': (('bienes',), []),
+    'otros_bienes': (('bienes',), []),
+}
+
+
+class CacheMemoria:
+    """LRU en memoria del proceso"""
+
+    def __init__(self, max_entradas):
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()
+        self._versiones = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return None
+            if entrada['expira'] <= time.time() or any(
+                self._versiones.get(etiqueta, 0) != version for etiqueta, version in entrada['versiones'].items()
+            ):
+                del self._entradas[clave]
+                return None
+            self._entradas.move_to_end(clave)
+            return entrada
+
+    def guardar(self, clave, entrada, ttl):
+        entrada['expira'] = time.time() + ttl
+        with self._lock:
+            self._entradas[clave] = entrada
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def versiones(self, etiquetas):
+        with self._lock:
+            return {etiqueta: self._versiones.get(etiqueta, 0) for etiqueta in etiquetas}
+
+    def invalidar(self, etiquetas):
+        with self._lock:
+            for etiqueta in etiquetas:
+                self._versiones[etiqueta] = self._versiones.get(etiqueta, 0) + 1
+
+
+class CacheRedis:
+    """Caché compartida entre workers; las versiones de etiquetas son contadores INCR"""
+
+    PREFIJO = 'alfa:cache'
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_RESPUESTAS_BACKEND=redis requiere el paquete 'redis' (pip install redis)") from e
+        self.redis = redis.Redis.from_url(url, decode_responses=True, socket_timeout=0.5)
+
+    def _llave(self, *partes):
+        return ':'.join((self.PREFIJO, *partes))
+
+    def obtener(self, clave):
+        datos = self.redis.get(self._llave('entrada', clave))
+        if datos is None:
+            return None
+        entrada = json.loads(datos)
+        etiquetas = list(entrada['versiones'])
+        if etiquetas and self.versiones(etiquetas) != entrada['versiones']:
+            return None
+        return entrada
+
+    def guardar(self, clave, entrada, ttl):
+        self.redis.set(self._llave('entrada', clave), json.dumps(entrada), ex=ttl)
+
+    def versiones(self, etiquetas):
+        etiquetas = list(etiquetas)
+        valores = self.redis.mget([self._llave('etiqueta', e) for e in etiquetas]) if etiquetas else []
+        return {etiqueta: int(valor or 0) for etiqueta, valor in zip(etiquetas, valores)}
+
+    def invalidar(self, etiquetas):
+        with self.redis.pipeline(transaction=False) as pipe:
+            for etiqueta in etiquetas:
+                pipe.incr(self._llave('etiqueta', etiqueta))
+            pipe.execute()
+
+    def verificar(self):
+        self.redis.ping()
+        return True, 'Redis disponible'
+
+
+def init_cache(app, db):
+    """Crear el backend configurado y registrar la invalidación por commit"""
+    backend = app.config['CACHE_RESPUESTAS_BACKEND']
+    if backend not in ('memoria', 'redis', 'ninguno'):
+        raise ValueError(f"CACHE_RESPUESTAS_BACKEND no válido: {backend} (use 'memoria', 'redis' o 'ninguno')")
+    if backend == 'ninguno':
+        app.extensions['cache_respuestas'] = None
+        return
+
+    if backend == 'redis':
+        cache = CacheRedis(app.config['CACHE_RESPUESTAS_REDIS_URL'])
+        # Con caché compartida, un Redis caído deja al worker sin caché: se reporta en readiness
+        from app.utils.salud import registrar_verificacion
+        registrar_verificacion('cache_respuestas', cache.verificar)
+    else:
+        cache = CacheMemoria(app.config['CACHE_RESPUESTAS_MAX_ENTRADAS'])
+    app.extensions['cache_respuestas'] = cache
+
+    event.listen(db.session, 'after_flush', _anotar_etiquetas)
+    event.listen(db.session, 'after_commit', _invalidar_pendientes)
+    event.listen(db.session, 'after_rollback', _descartar_pendientes)
+
+
+def obtener_cache(app=None):
+    app = app or current_app
+    return app.extensions.get('cache_respuestas')
+
+
+def cache_respuesta(*etiquetas, compartida=False, ttl=None):
+    """
+    Decorador de vistas GET que guarda las respuestas 200
+
+    Args:
+        etiquetas: plantillas con los argumentos de la vista, p. ej. 'cliente:{cliente_id}'
+        compartida: la respuesta no depende del llamador
+        ttl: segundos de vida (por defecto CACHE_RESPUESTAS_TTL_SEGUNDOS)
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            cache = obtener_cache()
+            if cache is None or request.method != 'GET':
+                return vista(*args, **kwargs)
+
+            clave = _clave_solicitud(compartida)
+            etiquetas_vista = {plantilla.format(**kwargs) for plantilla in etiquetas}
+            # Cache-Control: no-cache del cliente fuerza a recalcular (y refrescar la entrada)
+            if 'no-cache' not in request.headers.get('Cache-Control', ''):
+                try:
+                    entrada = cache.obtener(clave)
+                except Exception as e:
+                    logger.warning("Caché de respuestas no disponible: %s", e)
+                    return vista(*args, **kwargs)
+                registrar_consulta_cache(NOMBRE_CACHE, entrada is not None)
+                if entrada is not None:
+                    respuesta = current_app.response_class(
+                        entrada['cuerpo'], status=entrada['status'], content_type=entrada['tipo_contenido']
+                    )
+                    respuesta.headers['X-Cache'] = 'HIT'
+                    return respuesta
+
+            # Versiones leídas antes de ejecutar la vista: una escritura confirmada
+            # mientras tanto deja la entrada inválida desde el principio
+            try:
+                versiones = cache.versiones(etiquetas_vista)
+            except Exception as e:
+                logger.warning("Caché de respuestas no disponible: %s", e)
+                return vista(*args, **kwargs)
+            respuesta = make_response(vista(*args, **kwargs))
+            respuesta.headers['X-Cache'] = 'MISS'
+            if respuesta.status_code == 200 and not respuesta.is_streamed and 'Set-Cookie' not in respuesta.headers:
+                try:
+                    cache.guardar(clave, {
+                        'status': respuesta.status_code,
+                        'cuerpo': respuesta.get_data(as_text=True),
+                        'tipo_contenido': respuesta.content_type,
+                        'versiones': versiones
+                    }, ttl or current_app.config['CACHE_RESPUESTAS_TTL_SEGUNDOS'])
+                except Exception as e:
+                    logger.warning("No se pudo guardar la respuesta en caché: %s", e)
+            return respuesta
+        return envoltura
+    return decorador
+
+
+def invalidar(*etiquetas, app=None):
+    """Invalidar etiquetas de inmediato"""
+    cache = obtener_cache(app)
+    if cache is None or not etiquetas:
+        return
+    try:
+        cache.invalidar(etiquetas)
+        invalidaciones_cache.inc(NOMBRE_CACHE, cantidad=len(etiquetas))
+    except Exception as e:
+        logger.warning("No se pudieron invalidar las etiquetas %s: %s", sorted(etiquetas), e)
+
+
+def _clave_solicitud(compartida):
+    alcance = 'publico' if compartida else \
+        hashlib.sha256(request.headers.get('Authorization', '').encode()).hexdigest()[:16]
+    parametros = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+    return hashlib.sha1(f'{request.endpoint}|{request.path}|{parametros}|{alcance}'.encode()).hexdigest()
+
+
+def _anotar_etiquetas(session, flush_context):
+    pendientes = session.info.setdefault(_CLAVE_ETIQUETAS, set())
+    for objeto in (*session.new, *session.dirty, *session.deleted):
+        configuracion = _TABLAS_ETIQUETAS.get(getattr(objeto, '__tablename__', None))
+        if not configuracion:
+            continue
+        colecciones, atributos = configuracion
+        pendientes.update(colecciones)
+        for prefijo, atributo in atributos:
+            valor = getattr(objeto, atributo, None)
+            if valor is not None:
+                pendientes.add(f'{prefijo}:{valor}')
+
+
+def _invalidar_pendientes(session):
+    etiquetas = session.info.pop(_CLAVE_ETIQUETAS, None)
+    if etiquetas:
+        invalidar(*etiquetas)
+
+
+def _descartar_pendientes(session):
+    session.info.pop(_CLAVE_ETIQUETAS, None)
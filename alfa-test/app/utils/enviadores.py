@@ -0,0 +1,90 @@
+"""
+Enviadores de mensajes del outbox de recordatorios.
+
+Un enviador implementa `enviar(mensaje)` y opcionalmente `cerrar()`. Cada hilo
+del despachador crea su propia instancia, por lo que un enviador puede
+mantener una conexión abierta (SMTP) sin sincronización.
+
+    ENVIADORES['mi_canal'] = MiEnviador   # registrar uno nuevo
+"""
+import os
+import smtplib
+from email.message import EmailMessage
+
+
+def construir_email(mensaje, remitente):
+    email = EmailMessage()
+    email['From'] = remitente
+    email['To'] = mensaje['destinatario']
+    email['Subject'] = mensaje['asunto']
+    # Message-ID estable: un reenvío del mismo recordatorio se reconoce como duplicado
+    email['Message-ID'] = f"<recordatorio-{mensaje['id']}@{remitente.split('@')[-1]}>"
+    email.set_content(mensaje['cuerpo'])
+    return email
+
+
+class EnviadorArchivo:
+    """Escribe cada mensaje como .eml en un directorio local (desarrollo y pruebas)"""
+
+    def __init__(self, config):
+        self.directorio = config['RECORDATORIOS_DIRECTORIO']
+        self.remitente = config['RECORDATORIOS_REMITENTE']
+        os.makedirs(self.directorio, exist_ok=True)
+
+    def enviar(self, mensaje):
+        ruta = os.path.join(self.directorio, f"recordatorio-{mensaje['id']}.eml")
+        temporal = f'{ruta}.tmp'
+        with open(temporal, 'wb') as archivo:
+            archivo.write(bytes(construir_email(mensaje, self.remitente)))
+        os.replace(temporal, ruta)
+
+    def cerrar(self):
+        pass
+
+
+class EnviadorSMTP:
+    """Envía por SMTP reutilizando una conexión por hilo"""
+
+    def __init__(self, config):
+        self.config = config
+        self.remitente = config['RECORDATORIOS_REMITENTE']
+        self.conexion = None
+
+    def _conectar(self):
+        conexion = smtplib.SMTP(self.config['SMTP_HOST'], self.config['SMTP_PORT'], timeout=30)
+        if self.config['SMTP_TLS']:
+            conexion.starttls()
+        if self.config['SMTP_USUARIO']:
+            conexion.login(self.config['SMTP_USUARIO'], self.config['SMTP_CLAVE'])
+        return conexion
+
+    def enviar(self, mensaje):
+        if self.conexion is None:
+            self.conexion = self._conectar()
+        try:
+            self.conexion.send_message(construir_email(mensaje, self.remitente))
+        except smtplib.SMTPServerDisconnected:
+            # El servidor cerró la conexión inactiva: reconectar una vez
+            self.conexion = self._conectar()
+            self.conexion.send_message(construir_email(mensaje, self.remitente))
+
+    def cerrar(self):
+        if self.conexion is not None:
+            try:
+                self.conexion.quit()
+            except smtplib.SMTPException:
+                pass
+            self.conexion = None
+
+
+ENVIADORES = {
+    'archivo': EnviadorArchivo,
+    'smtp': EnviadorSMTP,
+}
+
+
+def crear_enviador(config):
+    nombre = config['RECORDATORIOS_ENVIADOR']
+    if nombre not in ENVIADORES:
+        raise ValueError(f"RECORDATORIOS_ENVIADOR no válido: {nombre} (disponibles: {', '.join(ENVIADORES)})")
+    return ENVIADORES[nombre](config)
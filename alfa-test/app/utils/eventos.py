@@ -0,0 +1,240 @@
+"""
+Broker de eventos de dominio y notificaciones en vivo (Server-Sent Events).
+
+Los eventos se escriben en el outbox dentro de la transacción que los produce
+(app.utils.outbox) y el relay los publica aquí, en orden, después del commit.
+El broker reparte cada evento a las conexiones abiertas de GET /api/eventos,
+de modo que los dashboards se actualizan al momento en lugar de consultar
+/api/polizas cada cierto tiempo. Backends (EVENTOS_BACKEND):
+  - 'memoria': solo reciben los eventos las conexiones del proceso cuyo relay
+    los publicó.
+  - 'redis': los eventos se publican en un canal pub/sub y cada proceso con
+    suscriptores los escucha en un hilo y los reparte localmente; así llegan
+    a todos los workers (requiere el paquete opcional `redis`).
+  - 'ninguno': sin notificaciones en vivo (el outbox y sus suscriptores
+    siguen funcionando).
+
+Cada suscriptor tiene una cola acotada: si un cliente lento la llena se
+descartan sus eventos más antiguos, sin frenar a quien publica. El broker
+guarda los últimos EVENTOS_HISTORIAL eventos para reenviar lo perdido a quien
+reconecta con Last-Event-ID.
+"""
+from collections import deque
+import json
+import logging
+import queue
+import threading
+import time
+
+from flask import current_app
+
+from app.utils.metricas import eventos_descartados, suscriptores_eventos
+
+logger = logging.getLogger(__name__)
+
+# Eventos de dominio emitidos por los servicios
+TIPOS_DOMINIO = (
+    'poliza.emitida',
+    'poliza.pago',
+    'poliza.cancelada',
+    'poliza.vencida',
+    'poliza.estado',
+    'cartera.vencimientos',
+)
+# Cambios registrados automáticamente por el outbox (<agregado>.alta/cambio/baja)
+TIPOS_CAMBIO = tuple(
+    f'{agregado}.{accion}'
+    for agregado in ('cliente', 'bien', 'poliza', 'cuota')
+    for accion in ('alta', 'cambio', 'baja')
+)
+TIPOS_EVENTO = TIPOS_DOMINIO + TIPOS_CAMBIO
+
+# Milisegundos que espera EventSource antes de reconectar
+REINTENTO_MS = 3000
+
+
+class Suscripcion:
+    """Cola de eventos de una conexión SSE"""
+
+    def __init__(self, broker, tipos, tamano_cola):
+        self.broker = broker
+        self.tipos = set(tipos) if tipos else None
+        self.cola = queue.Queue(maxsize=tamano_cola)
+
+    def acepta(self, evento):
+        return self.tipos is None or evento['tipo'] in self.tipos
+
+    def entregar(self, evento):
+        """Encolar sin bloquear; con la cola llena se descarta el evento más antiguo"""
+        while True:
+            try:
+                self.cola.put_nowait(evento)
+                return
+            except queue.Full:
+                try:
+                    self.cola.get_nowait()
+                    eventos_descartados.inc()
+                except queue.Empty:
+                    pass
+
+    def siguiente(self, espera):
+        try:
+            return self.cola.get(timeout=espera)
+        except queue.Empty:
+            return None
+
+    def cerrar(self):
+        self.broker.desuscribir(self)
+
+
+class BrokerMemoria:
+    """Reparte los eventos a los suscriptores del proceso"""
+
+    def __init__(self, historial, tamano_cola):
+        self.tamano_cola = tamano_cola
+        self._suscripciones = set()
+        self._historial = deque(maxlen=historial)
+        self._lock = threading.Lock()
+
+    def publicar(self, eventos):
+        self._repartir(eventos)
+
+    def _repartir(self, eventos):
+        # Bajo el lock: un suscriptor nuevo no puede recibir un evento dos veces
+        # (historial y reparto) ni recibirlos fuera de orden
+        with self._lock:
+            self._historial.extend(eventos)
+            for suscripcion in self._suscripciones:
+                for evento in eventos:
+                    if suscripcion.acepta(evento):
+                        suscripcion.entregar(evento)
+
+    def suscribir(self, tipos=None, ultimo_id=None):
+        """Nueva suscripción; con ultimo_id recibe primero los eventos posteriores del historial"""
+        suscripcion = Suscripcion(self, tipos, self.tamano_cola)
+        with self._lock:
+            for evento in self._posteriores(ultimo_id):
+                if suscripcion.acepta(evento):
+                    suscripcion.entregar(evento)
+            self._suscripciones.add(suscripcion)
+        suscriptores_eventos.inc()
+        return suscripcion
+
+    def desuscribir(self, suscripcion):
+        with self._lock:
+            if suscripcion not in self._suscripciones:
+                return
+            self._suscripciones.discard(suscripcion)
+        suscriptores_eventos.dec()
+
+    def _posteriores(self, ultimo_id):
+        if not ultimo_id:
+            return []
+        eventos = list(self._historial)
+        for posicion, evento in enumerate(eventos):
+            if evento['id'] == ultimo_id:
+                return eventos[posicion + 1:]
+        # Fuera del historial: el cliente debe volver a consultar los listados
+        return []
+
+
+class BrokerRedis(BrokerMemoria):
+    """Publica en un canal pub/sub de Redis; un hilo por proceso reparte lo recibido"""
+
+    CANAL = 'alfa:eventos'
+
+    def __init__(self, url, historial, tamano_cola):
+        super().__init__(historial, tamano_cola)
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("EVENTOS_BACKEND=redis requiere el paquete 'redis' (pip install redis)") from e
+        self.redis = redis.Redis.from_url(url, decode_responses=True, socket_timeout=0.5)
+        # La escucha bloquea indefinidamente: conexión propia sin timeout de lectura
+        self._redis_escucha = redis.Redis.from_url(url, decode_responses=True)
+        self._hilo = None
+        self._lock_hilo = threading.Lock()
+
+    def publicar(self, eventos):
+        with self.redis.pipeline(transaction=False) as pipe:
+            for evento in eventos:
+                pipe.publish(self.CANAL, json.dumps(evento))
+            pipe.execute()
+
+    def suscribir(self, tipos=None, ultimo_id=None):
+        # El hilo se inicia con el primer suscriptor: los procesos que solo
+        # publican (workers de trabajos) no abren la conexión de escucha
+        self._iniciar_escucha()
+        return super().suscribir(tipos, ultimo_id)
+
+    def _iniciar_escucha(self):
+        with self._lock_hilo:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._escuchar, name='eventos-redis', daemon=True)
+                self._hilo.start()
+
+    def _escuchar(self):
+        while True:
+            try:
+                pubsub = self._redis_escucha.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.CANAL)
+                for mensaje in pubsub.listen():
+                    self._repartir([json.loads(mensaje['data'])])
+            except Exception as e:
+                logger.warning("Escucha de eventos en Redis interrumpida: %s", e)
+                time.sleep(1)
+
+    def verificar(self):
+        self.redis.ping()
+        return True, 'Redis disponible'
+
+
+def init_eventos(app):
+    """Crear el broker configurado para /api/eventos"""
+    backend = app.config['EVENTOS_BACKEND']
+    if backend not in ('memoria', 'redis', 'ninguno'):
+        raise ValueError(f"EVENTOS_BACKEND no válido: {backend} (use 'memoria', 'redis' o 'ninguno')")
+    if backend == 'ninguno':
+        app.extensions['eventos'] = None
+        return
+
+    if backend == 'redis':
+        broker = BrokerRedis(app.config['EVENTOS_REDIS_URL'], app.config['EVENTOS_HISTORIAL'],
+                             app.config['EVENTOS_COLA_SUSCRIPTOR'])
+        from app.utils.salud import registrar_verificacion
+        registrar_verificacion('eventos', broker.verificar)
+    else:
+        broker = BrokerMemoria(app.config['EVENTOS_HISTORIAL'], app.config['EVENTOS_COLA_SUSCRIPTOR'])
+    app.extensions['eventos'] = broker
+
+
+def obtener_broker(app=None):
+    app = app or current_app
+    return app.extensions.get('eventos')
+
+
+def flujo_sse(broker, tipos=None, ultimo_id=None, keepalive=15, duracion_maxima=300):
+    """
+    Generador text/event-stream de los eventos del broker
+
+    La suscripción se abre al empezar a enviar y se cierra cuando el cliente
+    se desconecta o vence duracion_maxima (EventSource reconecta solo, con
+    Last-Event-ID, y el worker queda libre entre conexiones). Un comentario
+    cada `keepalive` segundos mantiene viva la conexión a través de proxies.
+    """
+    suscripcion = broker.suscribir(tipos, ultimo_id)
+    try:
+        yield f'retry: {REINTENTO_MS}\n\n'
+        limite = time.monotonic() + duracion_maxima
+        while True:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            evento = suscripcion.siguiente(min(keepalive, restante))
+            if evento is None:
+                yield ': keepalive\n\n'
+                continue
+            datos = json.dumps(evento, separators=(',', ':'), default=str)
+            yield f"id: {evento['id']}\nevent: {evento['tipo']}\ndata: {datos}\n\n"
+    finally:
+        suscripcion.cerrar()
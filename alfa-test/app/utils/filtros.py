@@ -0,0 +1,190 @@
+"""
+Filtros, orden y búsqueda de listados definidos por el servidor.
+
+Los listados aceptan parámetros de la forma
+
+    ?filter[estado_cartera]=Vencida
+    ?filter[fecha_fin_vigencia][gte]=2025-01-01&filter[fecha_fin_vigencia][lt]=2025-02-01
+    ?filter[tipo_bien][in]=HOGAR,VEHICULO&filter[ciudad][prefix]=Bog
+    ?q=gonz&sort=-fecha_fin_vigencia,id&limite=500
+
+Cada listado declara con ConsultaLista qué campos se filtran, con qué
+operadores, y por cuáles se ordena; cualquier otro campo u operador se
+rechaza con ErrorConsulta (400). Los valores se convierten al tipo de la
+columna y viajan como parámetros de la sentencia. Las condiciones comparan la
+columna sin funciones (igualdad, rango, IN, LIKE 'texto%') para que MySQL use
+sus índices, solo se ordena por columnas indexadas, y el id desempata el
+orden para que sea estable entre páginas. Sin ?limite= se devuelven todas
+las filas que cumplen los filtros.
+"""
+import operator
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import Boolean, Date, DateTime, Integer, Numeric, or_
+
+OPERADORES_IGUALDAD = ('eq', 'ne', 'in')
+OPERADORES_RANGO = OPERADORES_IGUALDAD + ('gt', 'gte', 'lt', 'lte')
+OPERADORES_TEXTO = OPERADORES_IGUALDAD + ('prefix',)
+
+MAX_FILTROS = 10
+MAX_VALORES_IN = 100
+MAX_CAMPOS_ORDEN = 3
+LIMITE_MAXIMO = 1000
+MIN_LARGO_TEXTO = 2
+
+_PARAMETRO_FILTRO = re.compile(r'^filter\[(\w+)\](?:\[(\w+)\])?$')
+_COMPARACIONES = {
+    'eq': operator.eq, 'ne': operator.ne,
+    'gt': operator.gt, 'gte': operator.ge, 'lt': operator.lt, 'lte': operator.le
+}
+
+
+class ErrorConsulta(ValueError):
+    """Filtro, orden o búsqueda no permitidos en un listado"""
+
+
+def _patron_prefijo(texto):
+    """Patrón LIKE 'texto%' con los comodines del texto escapados"""
+    if len(texto) < MIN_LARGO_TEXTO:
+        raise ErrorConsulta(f"El texto a buscar debe tener al menos {MIN_LARGO_TEXTO} caracteres")
+    return re.sub(r'([\\%_])', r'\\\1', texto) + '%'
+
+
+class Campo:
+    """Campo filtrable (y opcionalmente ordenable) de un listado"""
+
+    def __init__(self, columna, operadores=OPERADORES_IGUALDAD, ordenable=False, valores=None):
+        self.columna = columna
+        self.ordenable = ordenable
+        # Valores permitidos: los del Enum de la columna o los indicados
+        self.valores = valores or getattr(columna.type, 'enums', None)
+        anulable = getattr(columna.expression, 'nullable', False)
+        self.operadores = operadores + (('null',) if anulable else ())
+        self.nombre = None
+
+    def convertir(self, texto):
+        tipo = self.columna.type
+        try:
+            if isinstance(tipo, Boolean):
+                if texto not in ('true', 'false'):
+                    raise ValueError(texto)
+                valor = texto == 'true'
+            elif isinstance(tipo, Integer):
+                valor = int(texto)
+            elif isinstance(tipo, Numeric):
+                valor = Decimal(texto)
+            elif isinstance(tipo, DateTime):
+                valor = datetime.fromisoformat(texto)
+            elif isinstance(tipo, Date):
+                valor = date.fromisoformat(texto)
+            else:
+                valor = texto
+        except (ValueError, InvalidOperation):
+            raise ErrorConsulta(f"Valor no válido para '{self.nombre}': {texto}")
+        if self.valores and valor not in self.valores:
+            raise ErrorConsulta(f"'{self.nombre}' debe ser uno de: {', '.join(self.valores)}")
+        return valor
+
+    def condicion(self, operador, texto):
+        if operador not in self.operadores:
+            raise ErrorConsulta(f"El operador '{operador}' no está permitido para '{self.nombre}'")
+        if operador == 'null':
+            if texto not in ('true', 'false'):
+                raise ErrorConsulta(f"filter[{self.nombre}][null] debe ser true o false")
+            return self.columna.is_(None) if texto == 'true' else self.columna.isnot(None)
+        if operador == 'in':
+            partes = texto.split(',')
+            if len(partes) > MAX_VALORES_IN:
+                raise ErrorConsulta(f"filter[{self.nombre}][in] admite hasta {MAX_VALORES_IN} valores")
+            return self.columna.in_([self.convertir(parte) for parte in partes])
+        if operador == 'prefix':
+            return self.columna.like(_patron_prefijo(texto), escape='\\')
+        return _COMPARACIONES[operador](self.columna, self.convertir(texto))
+
+
+class ConsultaLista:
+    """
+    Filtros, búsqueda y orden permitidos en un listado
+
+    Args:
+        campos: {nombre: Campo} que se pueden usar en filter[...] y sort
+        clave: columna (o tupla de columnas) única que desempata el orden
+        busqueda: columnas donde ?q= busca por prefijo (idealmente indexadas)
+        alias: parámetros anteriores equivalentes a un filtro, p. ej.
+            {'tipo': 'tipo_cliente'} hace que ?tipo=X sea filter[tipo_cliente]=X
+    """
+
+    def __init__(self, campos, clave, busqueda=(), alias=None):
+        self.campos = campos
+        self.claves = clave if isinstance(clave, tuple) else (clave,)
+        self.busqueda = busqueda
+        self.alias = alias or {}
+        for nombre, campo in campos.items():
+            campo.nombre = nombre
+
+    def interpretar(self, argumentos):
+        """(condiciones, orden, limite) de los parámetros de la solicitud"""
+        return self.condiciones(argumentos), self.orden(argumentos), self.limite(argumentos)
+
+    def condiciones(self, argumentos):
+        """Condiciones WHERE de filter[...], los alias y q"""
+        filtros = [(campo, 'eq', argumentos[parametro])
+                   for parametro, campo in self.alias.items() if argumentos.get(parametro)]
+        for parametro, valor in argumentos.items(multi=True):
+            coincide = _PARAMETRO_FILTRO.match(parametro)
+            if coincide:
+                filtros.append((coincide.group(1), coincide.group(2) or 'eq', valor))
+        if len(filtros) > MAX_FILTROS:
+            raise ErrorConsulta(f"Se admiten hasta {MAX_FILTROS} filtros")
+
+        condiciones = []
+        for nombre, operador, valor in filtros:
+            campo = self.campos.get(nombre)
+            if campo is None:
+                raise ErrorConsulta(f"No se puede filtrar por '{nombre}'")
+            condiciones.append(campo.condicion(operador, valor))
+
+        texto = (argumentos.get('q') or '').strip()
+        if texto:
+            if not self.busqueda:
+                raise ErrorConsulta("Este listado no admite búsqueda")
+            patron = _patron_prefijo(texto)
+            condiciones.append(or_(*(columna.like(patron, escape='\\') for columna in self.busqueda)))
+        return condiciones
+
+    def orden(self, argumentos):
+        """Expresiones ORDER BY de sort=campo,-campo (más la clave de desempate)"""
+        texto = argumentos.get('sort')
+        if not texto:
+            return list(self.claves)
+        nombres = [parte.strip() for parte in texto.split(',') if parte.strip()]
+        if len(nombres) > MAX_CAMPOS_ORDEN:
+            raise ErrorConsulta(f"sort admite hasta {MAX_CAMPOS_ORDEN} campos")
+
+        orden = []
+        usadas = []
+        for nombre in nombres:
+            descendente = nombre.startswith('-')
+            campo = self.campos.get(nombre.lstrip('-'))
+            if campo is None or not campo.ordenable:
+                raise ErrorConsulta(f"No se puede ordenar por '{nombre.lstrip('-')}'")
+            orden.append(campo.columna.desc() if descendente else campo.columna.asc())
+            usadas.append(campo.columna)
+        orden.extend(clave for clave in self.claves if not any(clave is columna for columna in usadas))
+        return orden
+
+    @staticmethod
+    def limite(argumentos):
+        """Valor de ?limite= (None si no se envía), entre 1 y LIMITE_MAXIMO"""
+        texto = argumentos.get('limite')
+        if texto is None:
+            return None
+        try:
+            limite = int(texto)
+        except ValueError:
+            raise ErrorConsulta("limite debe ser un número entero")
+        if not 1 <= limite <= LIMITE_MAXIMO:
+            raise ErrorConsulta(f"limite debe estar entre 1 y {LIMITE_MAXIMO}")
+        return limite
@@ -0,0 +1,143 @@
+"""
+Utilidades HTTP compartidas por las rutas.
+"""
+import hashlib
+import json
+import logging
+import zlib
+
+from flask import current_app, jsonify, request, stream_with_context
+from sqlalchemy import func, select
+
+logger = logging.getLogger(__name__)
+
+# Bytes de JSON que se acumulan antes de enviar (y comprimir) un bloque
+TAMANO_BLOQUE_STREAMING = 64 * 1024
+
+
+def respuesta_condicional(datos, codigo=200, max_age=0):
+    """
+    Respuesta JSON con ETag que responde 304 si el cliente ya tiene la versión
+
+    El ETag se calcula sobre el cuerpo serializado, por lo que un 304 ahorra
+    transferencia y serialización en el cliente aunque el servidor arme la
+    respuesta completa.
+    """
+    respuesta = jsonify(datos)
+    respuesta.status_code = codigo
+    respuesta.set_etag(hashlib.sha1(respuesta.get_data()).hexdigest())
+    # private: la respuesta depende del usuario; no-cache obliga a revalidar con el ETag
+    respuesta.headers['Cache-Control'] = f'private, max-age={max_age}' if max_age else 'private, no-cache'
+    return respuesta.make_conditional(request)
+
+
+def version_filas(modelo, *condiciones):
+    """
+    Versión de las filas de un modelo con columnas version y actualizado_en
+
+    Una sola consulta agregada, sin cargar los objetos: cantidad de filas, id
+    máximo, suma de versiones y última modificación. Cualquier inserción,
+    actualización o borrado cambia al menos uno de los valores.
+    """
+    from app import db
+
+    return tuple(db.session.execute(
+        select(
+            func.count(),
+            func.max(modelo.id),
+            func.coalesce(func.sum(modelo.version), 0),
+            func.max(modelo.actualizado_en)
+        ).select_from(modelo).where(*condiciones)
+    ).one())
+
+
+def respuesta_versionada(version, construir, max_age=0):
+    """
+    GET condicional con el ETag derivado de version_filas
+
+    Si el ETag del cliente coincide se responde 304 sin llamar a construir,
+    que arma (datos, codigo) solo cuando hace falta el cuerpo (o devuelve una
+    respuesta ya armada, como respuesta_json_streaming). La versión se lee
+    antes que los datos: una escritura intermedia deja un ETag anterior al
+    cuerpo y el cliente lo recibe completo en la siguiente consulta.
+
+    La última modificación se envía como Last-Modified solo si hay una fila:
+    en un listado, un borrado no la cambia.
+    """
+    filas, _, _, ultima_modificacion = version
+    etag = hashlib.sha1(f'{request.full_path}|{version}'.encode()).hexdigest()
+    unica = filas == 1 and ultima_modificacion is not None
+
+    if (request.if_none_match.contains_weak(etag) or (
+            not request.if_none_match and unica and request.if_modified_since
+            and ultima_modificacion.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None))):
+        respuesta = current_app.response_class(status=304)
+    else:
+        resultado = construir()
+        if isinstance(resultado, current_app.response_class):
+            respuesta = resultado
+        else:
+            datos, codigo = resultado
+            respuesta = jsonify(datos)
+            respuesta.status_code = codigo
+        if respuesta.status_code != 200:
+            return respuesta
+
+    respuesta.set_etag(etag, weak=True)
+    if unica:
+        respuesta.last_modified = ultima_modificacion
+    respuesta.headers['Cache-Control'] = f'private, max-age={max_age}' if max_age else 'private, no-cache'
+    return respuesta
+
+
+def respuesta_json_streaming(elementos, **campos):
+    """
+    Respuesta {"status": "success", **campos, "data": [...]} enviada por partes
+
+    Los elementos (dicts, normalmente de un generador que lee por lotes) se
+    serializan a medida que se envían: el primer byte sale con el primer
+    bloque y la memoria del worker no depende del tamaño del listado. Si el
+    cliente acepta gzip, cada bloque se comprime al vuelo.
+
+    Un error a mitad de la respuesta ya no puede cambiar el código 200: se
+    registra y el JSON queda incompleto, lo que el cliente detecta al parsear.
+    """
+    serializar = current_app.json.default
+    encabezado = json.dumps({'status': 'success', **campos, 'data': []}, default=serializar, separators=(',', ':'))
+    # '{"status":...,"data":[' y ']}' alrededor de los elementos
+    inicio, fin = encabezado[:-2], encabezado[-2:]
+    comprimir = request.accept_encodings['gzip'] > 0
+
+    def generar_json():
+        partes = [inicio]
+        tamano = len(inicio)
+        separador = ''
+        for elemento in elementos:
+            parte = separador + json.dumps(elemento, default=serializar, separators=(',', ':'))
+            partes.append(parte)
+            tamano += len(parte)
+            separador = ','
+            if tamano >= TAMANO_BLOQUE_STREAMING:
+                yield ''.join(partes).encode('utf-8')
+                partes, tamano = [], 0
+        partes.append(fin)
+        yield ''.join(partes).encode('utf-8')
+
+    def generar():
+        try:
+            if not comprimir:
+                yield from generar_json()
+                return
+            # wbits=31: formato gzip; Z_SYNC_FLUSH entrega cada bloque completo al cliente
+            compresor = zlib.compressobj(6, zlib.DEFLATED, 31)
+            for bloque in generar_json():
+                yield compresor.compress(bloque) + compresor.flush(zlib.Z_SYNC_FLUSH)
+            yield compresor.flush()
+        except Exception:
+            logger.exception("Error generando la respuesta de %s", request.path)
+
+    respuesta = current_app.response_class(stream_with_context(generar()), mimetype='application/json')
+    if comprimir:
+        respuesta.headers['Content-Encoding'] = 'gzip'
+    respuesta.vary.add('Accept-Encoding')
+    return respuesta
@@ -0,0 +1,179 @@
+"""
+Solicitudes idempotentes con el encabezado Idempotency-Key.
+
+La primera solicitud con una clave la registra como 'En proceso' (la llave
+primaria garantiza un solo ganador entre solicitudes simultáneas), ejecuta la
+vista y guarda su respuesta. Mientras la clave no venza:
+
+- un reintento con la misma clave y el mismo cuerpo recibe la respuesta
+  guardada (encabezado Idempotent-Replayed: true) sin repetir la operación;
+- si la primera todavía se está procesando se responde 409;
+- la misma clave con otra solicitud se rechaza con 422.
+
+Las respuestas 5xx no se guardan: la clave se libera para poder reintentar.
+Sin el encabezado la vista se ejecuta como siempre.
+
+    @poliza_bp.route('/polizas/<int:poliza_id>/pagos/<int:cuota_id>', methods=['POST'])
+    @idempotente('pagos')
+    def register_payment(poliza_id, cuota_id): ...
+"""
+from datetime import datetime, timedelta
+from functools import wraps
+import hashlib
+
+from flask import current_app, jsonify, make_response, request
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+
+ENCABEZADO = 'Idempotency-Key'
+LONGITUD_MAXIMA = 255
+
+
+def idempotente(ambito):
+    """Decorador de vistas que aplica Idempotency-Key dentro de `ambito`"""
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            clave = request.headers.get(ENCABEZADO)
+            if not clave:
+                return vista(*args, **kwargs)
+            if len(clave) > LONGITUD_MAXIMA:
+                return _error(f'{ENCABEZADO} no puede superar {LONGITUD_MAXIMA} caracteres', 400)
+
+            hash_solicitud = hashlib.sha256(
+                b'\n'.join([request.method.encode(), request.path.encode(), request.get_data()])
+            ).hexdigest()
+            registro = _reservar(ambito, clave, hash_solicitud)
+            if registro is not None:
+                return _respuesta_existente(registro, hash_solicitud)
+
+            try:
+                respuesta = make_response(vista(*args, **kwargs))
+            except Exception:
+                _liberar(ambito, clave)
+                raise
+            if respuesta.status_code >= 500:
+                _liberar(ambito, clave)
+            else:
+                _completar(ambito, clave, respuesta)
+            return respuesta
+        return envoltura
+    return decorador
+
+
+def purgar_claves_vencidas():
+    """Eliminar las claves cuyo TTL ya venció; retorna cuántas se borraron"""
+    from app import db
+    from app.models.clave_idempotencia_model import ClaveIdempotencia
+
+    borradas = db.session.execute(
+        delete(ClaveIdempotencia).where(ClaveIdempotencia.expira_en <= datetime.utcnow())
+    ).rowcount
+    db.session.commit()
+    return borradas
+
+
+def _reservar(ambito, clave, hash_solicitud):
+    """
+    Registrar la clave como 'En proceso'
+
+    Returns:
+        None si esta solicitud la reservó, o el registro existente
+    """
+    from app import db
+    from app.models.clave_idempotencia_model import ClaveIdempotencia
+
+    config = current_app.config
+    for _ in range(2):
+        ahora = datetime.utcnow()
+        db.session.add(ClaveIdempotencia(
+            ambito=ambito,
+            clave=clave,
+            hash_solicitud=hash_solicitud,
+            estado='En proceso',
+            creada_en=ahora,
+            expira_en=ahora + timedelta(hours=config['IDEMPOTENCIA_TTL_HORAS'])
+        ))
+        try:
+            db.session.commit()
+            return None
+        except IntegrityError:
+            db.session.rollback()
+
+        registro = db.session.get(ClaveIdempotencia, (ambito, clave))
+        if registro is None:
+            continue
+        abandonada = (
+            registro.estado == 'En proceso'
+            and registro.creada_en <= ahora - timedelta(seconds=config['IDEMPOTENCIA_BLOQUEO_SEGUNDOS'])
+        )
+        if not registro.esta_vencida(ahora) and not abandonada:
+            return registro
+        # Clave vencida o abandonada por un proceso que terminó a la mitad: se
+        # borra solo si nadie la reemplazó entretanto y se vuelve a reservar
+        db.session.execute(
+            delete(ClaveIdempotencia)
+            .where(ClaveIdempotencia.ambito == ambito)
+            .where(ClaveIdempotencia.clave == clave)
+            .where(ClaveIdempotencia.creada_en == registro.creada_en)
+        )
+        db.session.commit()
+    # Otra solicitud la reservó entre los intentos
+    return db.session.get(ClaveIdempotencia, (ambito, clave)) or \
+        ClaveIdempotencia(estado='En proceso', hash_solicitud=hash_solicitud)
+
+
+def _respuesta_existente(registro, hash_solicitud):
+    if registro.hash_solicitud != hash_solicitud:
+        return _error(f'{ENCABEZADO} ya fue usada con una solicitud diferente', 422)
+    if registro.estado != 'Completada':
+        respuesta = _error('Una solicitud con esta Idempotency-Key se está procesando', 409)
+        respuesta.headers['Retry-After'] = '1'
+        return respuesta
+
+    respuesta = current_app.response_class(
+        registro.respuesta,
+        status=registro.status_code,
+        content_type=registro.tipo_contenido
+    )
+    respuesta.headers['Idempotent-Replayed'] = 'true'
+    return respuesta
+
+
+def _completar(ambito, clave, respuesta):
+    from app import db
+    from app.models.clave_idempotencia_model import ClaveIdempotencia
+
+    db.session.rollback()
+    db.session.execute(
+        update(ClaveIdempotencia)
+        .where(ClaveIdempotencia.ambito == ambito)
+        .where(ClaveIdempotencia.clave == clave)
+        .values(
+            estado='Completada',
+            status_code=respuesta.status_code,
+            respuesta=respuesta.get_data(as_text=True),
+            tipo_contenido=respuesta.content_type
+        )
+    )
+    db.session.commit()
+
+
+def _liberar(ambito, clave):
+    from app import db
+    from app.models.clave_idempotencia_model import ClaveIdempotencia
+
+    db.session.rollback()
+    db.session.execute(
+        delete(ClaveIdempotencia)
+        .where(ClaveIdempotencia.ambito == ambito)
+        .where(ClaveIdempotencia.clave == clave)
+        .where(ClaveIdempotencia.estado == 'En proceso')
+    )
+    db.session.commit()
+
+
+def _error(mensaje, codigo):
+    respuesta = jsonify({'success': False, 'message': mensaje})
+    respuesta.status_code = codigo
+    return respuesta
@@ -0,0 +1,49 @@
+"""
+Lectura de listados sin el ORM.
+
+En un listado de solo lectura, cargar instancias del ORM cuesta un objeto con
+seguimiento de cambios por fila, su registro en el identity map y después el
+dict de to_dict(). Un select() de columnas devuelve filas (tuplas) y
+`serializador` arma una sola vez la función fila -> dict con las mismas
+conversiones de los to_dict de los modelos:
+
+    COLUMNAS = columnas_de(Cliente, excluir=('clave',))
+    serializar = serializador(COLUMNAS)
+    datos = [serializar(fila) for fila in db.session.execute(select(*COLUMNAS))]
+
+Numeric pasa a float, Date y DateTime a ISO 8601, y los valores vacíos
+(None, 0 en Numeric) a None, como en los to_dict.
+"""
+from sqlalchemy import Date, DateTime, Numeric
+
+
+def columnas_de(modelo, excluir=()):
+    """Columnas de la tabla de un modelo, en el orden en que se declaran"""
+    return [columna for columna in modelo.__table__.columns if columna.key not in excluir]
+
+
+def _conversion(tipo):
+    if isinstance(tipo, Numeric):
+        return float
+    if isinstance(tipo, (Date, DateTime)):
+        return lambda valor: valor.isoformat()
+    return None
+
+
+def serializador(columnas):
+    """Función fila -> dict para filas de select(*columnas)"""
+    nombres = tuple(columna.key for columna in columnas)
+    conversiones = tuple(
+        (indice, nombres[indice], convertir)
+        for indice, convertir in enumerate(_conversion(columna.type) for columna in columnas)
+        if convertir is not None
+    )
+
+    def serializar(fila):
+        datos = dict(zip(nombres, fila))
+        for indice, nombre, convertir in conversiones:
+            valor = fila[indice]
+            datos[nombre] = convertir(valor) if valor else None
+        return datos
+
+    return serializar
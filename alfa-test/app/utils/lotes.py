@@ -0,0 +1,163 @@
+"""
+Varias consultas GET en una sola solicitud (POST /api/batch).
+
+Una pantalla que arma su vista con 5 a 15 GET paga en cada uno el preflight
+de CORS, el establecimiento de la conexión y la latencia de la red móvil.
+`ejecutar_lote` despacha las subsolicitudes dentro del mismo proceso, sin
+pasar otra vez por la red ni por los hooks before/after_request:
+
+  - Cada subsolicitud se resuelve con el mapa de URLs de la app y llama a la
+    vista, con sus decoradores (caché de respuestas, GET condicional), como si
+    hubiera llegado sola. Solo se admite GET bajo /api/.
+  - El encabezado Authorization del lote se reenvía a todas; cada una puede
+    agregar If-None-Match / If-Modified-Since.
+  - Por defecto (BATCH_CONCURRENCIA = 1) se ejecutan en orden dentro del
+    contexto del lote y comparten su sesión (y su conexión) de base de datos.
+    La concurrencia es opcional: con más hilos, cada hilo abre su propio
+    contexto y sesión (la sesión no es segura entre hilos) y toma otra
+    conexión del pool, así que un lote puede ocupar hasta BATCH_CONCURRENCIA
+    conexiones a la vez.
+
+Una subsolicitud que falla responde su propio código (404, 400, 500) sin
+afectar a las demás.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+from flask import current_app, request
+
+logger = logging.getLogger(__name__)
+
+PREFIJO_PERMITIDO = '/api/'
+# Encabezados que una subsolicitud puede enviar (además del Authorization del lote)
+ENCABEZADOS_PERMITIDOS = ('If-None-Match', 'If-Modified-Since')
+# Encabezados de la subrespuesta que se devuelven al cliente
+ENCABEZADOS_RESPUESTA = ('ETag', 'Last-Modified', 'Cache-Control', 'X-Cache')
+
+
+class ErrorLote(ValueError):
+    """Lote de subsolicitudes mal formado"""
+
+
+def validar_lote(datos, maximo):
+    """
+    Normalizar el cuerpo {"solicitudes": [...]} del lote
+
+    Returns:
+        list: dicts con id, url y encabezados de cada subsolicitud
+    """
+    solicitudes = (datos or {}).get('solicitudes') if isinstance(datos, dict) else None
+    if not isinstance(solicitudes, list) or not solicitudes:
+        raise ErrorLote("solicitudes debe ser una lista no vacía")
+    if len(solicitudes) > maximo:
+        raise ErrorLote(f"Se admiten hasta {maximo} solicitudes por lote")
+
+    normalizadas = []
+    ids = set()
+    for posicion, solicitud in enumerate(solicitudes):
+        if isinstance(solicitud, str):
+            solicitud = {'url': solicitud}
+        if not isinstance(solicitud, dict):
+            raise ErrorLote(f"La solicitud {posicion} debe ser un objeto o una URL")
+
+        url = solicitud.get('url')
+        if not isinstance(url, str) or not url.startswith(PREFIJO_PERMITIDO):
+            raise ErrorLote(f"La solicitud {posicion} debe tener una url que comience por {PREFIJO_PERMITIDO}")
+        if (solicitud.get('metodo') or 'GET').upper() != 'GET':
+            raise ErrorLote(f"La solicitud {posicion}: solo se admiten consultas GET")
+
+        identificador = solicitud.get('id', posicion)
+        if not isinstance(identificador, (str, int)):
+            raise ErrorLote(f"La solicitud {posicion}: id debe ser texto o número")
+        if identificador in ids:
+            raise ErrorLote(f"id repetido en el lote: {identificador}")
+        ids.add(identificador)
+
+        encabezados = solicitud.get('encabezados') or {}
+        if not isinstance(encabezados, dict):
+            raise ErrorLote(f"La solicitud {posicion}: encabezados debe ser un objeto")
+        normalizadas.append({
+            'id': identificador,
+            'url': url,
+            'encabezados': {
+                nombre: str(valor) for nombre, valor in encabezados.items()
+                if nombre in ENCABEZADOS_PERMITIDOS
+            }
+        })
+    return normalizadas
+
+
+def ejecutar_lote(solicitudes, concurrencia=1):
+    """
+    Ejecutar las subsolicitudes validadas y retornar sus respuestas en el mismo orden
+
+    Debe llamarse dentro de la solicitud del lote (toma de ella el host y el
+    encabezado Authorization).
+    """
+    app = current_app._get_current_object()
+    base_url = request.host_url
+    autorizacion = request.headers.get('Authorization')
+
+    def despachar(solicitud):
+        encabezados = dict(solicitud['encabezados'])
+        if autorizacion:
+            encabezados['Authorization'] = autorizacion
+        return {'id': solicitud['id'], **_despachar(app, solicitud['url'], encabezados, base_url)}
+
+    hilos = min(concurrencia, len(solicitudes))
+    if hilos <= 1:
+        return [despachar(solicitud) for solicitud in solicitudes]
+
+    def despachar_en_hilo(solicitud):
+        # Contexto (y sesión de base de datos) propio del hilo
+        with app.app_context():
+            return despachar(solicitud)
+
+    with ThreadPoolExecutor(max_workers=hilos) as ejecutor:
+        return list(ejecutor.map(despachar_en_hilo, solicitudes))
+
+
+def _despachar(app, url, encabezados, base_url):
+    """Llamar a la vista de una URL GET y resumir su respuesta"""
+    from app import db
+
+    ruta, _, consulta = url.partition('?')
+    with app.test_request_context(ruta, base_url=base_url, method='GET',
+                                  query_string=consulta, headers=encabezados):
+        try:
+            try:
+                resultado = app.dispatch_request()
+            except Exception as e:
+                # abort(), 404/405 del enrutador y los errorhandler registrados
+                resultado = app.handle_user_exception(e)
+            respuesta = app.make_response(resultado)
+            if respuesta.mimetype == 'text/event-stream':
+                # Un flujo SSE no termina: no se puede incluir en la respuesta del lote
+                respuesta.close()
+                return {'codigo': 400, 'encabezados': {}, 'cuerpo': {
+                    'status': 'error', 'message': 'Los flujos de eventos no se pueden consultar en un lote'
+                }}
+            # Consumir aquí las respuestas por partes, con el contexto todavía activo
+            cuerpo = respuesta.get_data()
+        except Exception:
+            logger.exception("Error en la subsolicitud %s del lote", url)
+            # La sesión puede quedar compartida con el resto del lote
+            db.session.rollback()
+            return {'codigo': 500, 'encabezados': {}, 'cuerpo': {
+                'status': 'error', 'message': 'Error interno del servidor'
+            }}
+
+        if respuesta.status_code == 304 or not cuerpo:
+            contenido = None
+        elif respuesta.is_json:
+            contenido = respuesta.get_json()
+        else:
+            contenido = respuesta.get_data(as_text=True)
+        return {
+            'codigo': respuesta.status_code,
+            'encabezados': {
+                nombre: respuesta.headers[nombre] for nombre in ENCABEZADOS_RESPUESTA
+                if nombre in respuesta.headers
+            },
+            'cuerpo': contenido
+        }
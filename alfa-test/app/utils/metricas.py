@@ -0,0 +1,353 @@
+"""
+Métricas de ejecución en formato de texto de Prometheus.
+
+Registro en memoria (por proceso) con contadores, gauges e histogramas
+etiquetados. Los hooks de Flask miden cada solicitud con una sola llamada a
+perf_counter y un incremento bajo lock, de modo que el costo por solicitud
+es de microsegundos.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, g, request
+
+# Buckets de latencia (segundos) y tamaño de respuesta (bytes)
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_BYTES = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+CONTENT_TYPE_PROMETHEUS = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _formatear_etiquetas(nombres, valores, extra=None):
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _formatear_numero(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return repr(valor) if isinstance(valor, float) else str(valor)
+
+
+class Metrica:
+    """Base de las métricas: nombre, ayuda, etiquetas y valores por combinación de etiquetas"""
+
+    tipo = None
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._lock = threading.Lock()
+        self._valores = {}
+
+    def valores(self):
+        """Copia de los valores actuales por combinación de etiquetas"""
+        with self._lock:
+            return dict(self._valores)
+
+    def exponer(self):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} {self.tipo}']
+        valores = self.valores()
+        for clave, valor in sorted(valores.items()):
+            lineas.append(f'{self.nombre}{_formatear_etiquetas(self.etiquetas, clave)} {_formatear_numero(valor)}')
+        return lineas
+
+
+class Contador(Metrica):
+    tipo = 'counter'
+
+    def inc(self, *valores_etiquetas, cantidad=1):
+        with self._lock:
+            self._valores[valores_etiquetas] = self._valores.get(valores_etiquetas, 0) + cantidad
+
+
+class Gauge(Metrica):
+    tipo = 'gauge'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), funcion=None):
+        super().__init__(nombre, ayuda, etiquetas)
+        # Si se define una función, el valor se calcula al momento de exponer
+        self.funcion = funcion
+
+    def inc(self, *valores_etiquetas, cantidad=1):
+        with self._lock:
+            self._valores[valores_etiquetas] = self._valores.get(valores_etiquetas, 0) + cantidad
+
+    def dec(self, *valores_etiquetas, cantidad=1):
+        self.inc(*valores_etiquetas, cantidad=-cantidad)
+
+    def set(self, valor, *valores_etiquetas):
+        with self._lock:
+            self._valores[valores_etiquetas] = valor
+
+    def usar_funcion(self, funcion):
+        """Calcular el valor con otra función y olvidar los valores de la anterior"""
+        with self._lock:
+            self.funcion = funcion
+            self._valores = {}
+
+    def exponer(self):
+        if self.funcion is not None:
+            try:
+                for clave, valor in self.funcion().items():
+                    self.set(valor, *(clave if isinstance(clave, tuple) else (clave,)))
+            except Exception:
+                # Una fuente caída no debe romper el endpoint de métricas
+                pass
+        return super().exponer()
+
+
+class Histograma(Metrica):
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_LATENCIA):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(buckets)
+
+    def observar(self, valor, *valores_etiquetas):
+        indice = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._valores.get(valores_etiquetas)
+            if serie is None:
+                serie = self._valores[valores_etiquetas] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            serie[0][indice] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def exponer(self):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} {self.tipo}']
+        with self._lock:
+            valores = {k: (list(v[0]), v[1], v[2]) for k, v in self._valores.items()}
+        for clave, (conteos, suma, total) in sorted(valores.items()):
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + (float('inf'),), conteos):
+                acumulado += conteo
+                etiquetas = _formatear_etiquetas(self.etiquetas, clave, f'le="{_formatear_numero(float(limite))}"')
+                lineas.append(f'{self.nombre}_bucket{etiquetas} {acumulado}')
+            etiquetas = _formatear_etiquetas(self.etiquetas, clave)
+            lineas.append(f'{self.nombre}_sum{etiquetas} {_formatear_numero(round(suma, 6))}')
+            lineas.append(f'{self.nombre}_count{etiquetas} {total}')
+        return lineas
+
+
+class RegistroMetricas:
+    """Colección de métricas del proceso"""
+
+    def __init__(self):
+        self._metricas = {}
+        self._lock = threading.Lock()
+
+    def _registrar(self, metrica):
+        with self._lock:
+            existente = self._metricas.get(metrica.nombre)
+            if existente is not None:
+                return existente
+            self._metricas[metrica.nombre] = metrica
+            return metrica
+
+    def contador(self, nombre, ayuda, etiquetas=()):
+        return self._registrar(Contador(nombre, ayuda, etiquetas))
+
+    def gauge(self, nombre, ayuda, etiquetas=(), funcion=None):
+        metrica = self._registrar(Gauge(nombre, ayuda, etiquetas, funcion))
+        # Registrado otra vez (p. ej. una segunda app con otro engine): gana la función nueva
+        if funcion is not None and metrica.funcion is not funcion:
+            metrica.usar_funcion(funcion)
+        return metrica
+
+    def histograma(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_LATENCIA):
+        return self._registrar(Histograma(nombre, ayuda, etiquetas, buckets))
+
+    def exponer(self):
+        with self._lock:
+            metricas = list(self._metricas.values())
+        lineas = []
+        for metrica in metricas:
+            lineas.extend(metrica.exponer())
+        return '\n'.join(lineas) + '\n'
+
+
+registro = RegistroMetricas()
+
+# =============================================================================
+# MÉTRICAS HTTP
+# =============================================================================
+
+solicitudes_total = registro.contador(
+    'http_requests_total', 'Solicitudes HTTP atendidas', ('blueprint', 'endpoint', 'method', 'status')
+)
+duracion_solicitudes = registro.histograma(
+    'http_request_duration_seconds', 'Latencia de las solicitudes HTTP', ('blueprint', 'endpoint', 'method')
+)
+tamano_respuestas = registro.histograma(
+    'http_response_size_bytes', 'Tamaño de las respuestas HTTP', ('blueprint', 'endpoint'), buckets=BUCKETS_BYTES
+)
+solicitudes_en_curso = registro.gauge('http_requests_in_flight', 'Solicitudes HTTP en curso')
+
+# =============================================================================
+# POOL DE CONEXIONES (SQLAlchemy)
+# =============================================================================
+
+espera_checkout_pool = registro.histograma(
+    'db_pool_checkout_wait_seconds', 'Tiempo esperando una conexión del pool de SQLAlchemy'
+)
+errores_checkout_pool = registro.contador(
+    'db_pool_checkout_errors_total', 'Fallos al obtener una conexión del pool (timeout o conexión)'
+)
+
+# =============================================================================
+# BCRYPT
+# =============================================================================
+
+bcrypt_en_cola = registro.gauge('bcrypt_queue_depth', 'Operaciones bcrypt esperando un cupo de ejecución')
+bcrypt_en_curso = registro.gauge('bcrypt_in_flight', 'Operaciones bcrypt en ejecución')
+duracion_bcrypt = registro.histograma(
+    'bcrypt_duration_seconds', 'Duración de las operaciones bcrypt (incluye la espera de cupo)', ('operacion',)
+)
+
+# =============================================================================
+# CACHÉ
+# =============================================================================
+
+consultas_cache = registro.contador(
+    'cache_requests_total', 'Consultas a cachés de la aplicación', ('cache', 'resultado')
+)
+invalidaciones_cache = registro.contador(
+    'cache_invalidations_total', 'Etiquetas invalidadas por escrituras confirmadas', ('cache',)
+)
+
+# =============================================================================
+# EVENTOS (SSE)
+# =============================================================================
+
+eventos_publicados = registro.contador(
+    'events_published_total', 'Eventos del outbox publicados por el relay', ('tipo',)
+)
+errores_relay_eventos = registro.contador(
+    'events_relay_errors_total', 'Fallos del relay de eventos (suscriptores, broker o base de datos)'
+)
+eventos_descartados = registro.contador(
+    'events_dropped_total', 'Eventos descartados por colas de suscriptores llenas'
+)
+suscriptores_eventos = registro.gauge('sse_subscribers', 'Conexiones abiertas a /api/eventos')
+
+
+def registrar_consulta_cache(nombre_cache, acierto):
+    """Registrar un acierto (True) o fallo (False) de una caché"""
+    consultas_cache.inc(nombre_cache, 'hit' if acierto else 'miss')
+
+
+def _tasa_aciertos_cache():
+    valores = consultas_cache.valores()
+    caches = {clave[0] for clave in valores}
+    tasas = {}
+    for cache in caches:
+        aciertos = valores.get((cache, 'hit'), 0)
+        total = aciertos + valores.get((cache, 'miss'), 0)
+        tasas[(cache,)] = round(aciertos / total, 4) if total else 0.0
+    return tasas
+
+
+registro.gauge('cache_hit_ratio', 'Proporción de aciertos por caché', ('cache',), funcion=_tasa_aciertos_cache)
+
+
+# =============================================================================
+# INTEGRACIÓN CON FLASK
+# =============================================================================
+
+def _etiquetas_solicitud():
+    return request.blueprint or 'app', request.endpoint or 'sin_ruta'
+
+
+def _antes_de_solicitud():
+    g.inicio_metricas = time.perf_counter()
+    g.en_curso_metricas = True
+    solicitudes_en_curso.inc()
+
+
+def _despues_de_solicitud(response):
+    inicio = g.pop('inicio_metricas', None)
+    if inicio is None:
+        return response
+
+    blueprint, endpoint = _etiquetas_solicitud()
+    duracion_solicitudes.observar(time.perf_counter() - inicio, blueprint, endpoint, request.method)
+    solicitudes_total.inc(blueprint, endpoint, request.method, str(response.status_code))
+    # Las respuestas en streaming no tienen longitud conocida
+    if response.content_length is not None:
+        tamano_respuestas.observar(response.content_length, blueprint, endpoint)
+    return response
+
+
+def _fin_de_solicitud(error=None):
+    if g.pop('en_curso_metricas', False):
+        solicitudes_en_curso.dec()
+
+
+def instrumentar_pool(engine):
+    """Medir la espera de checkout y exponer el estado del pool de un engine"""
+    pool = engine.pool
+    connect_original = pool.connect
+
+    def connect_medido():
+        inicio = time.perf_counter()
+        try:
+            return connect_original()
+        except Exception:
+            errores_checkout_pool.inc()
+            raise
+        finally:
+            espera_checkout_pool.observar(time.perf_counter() - inicio)
+
+    pool.connect = connect_medido
+
+    def estado_pool():
+        # QueuePool expone size/checkedout/overflow; otros pools (SQLite en tests) no
+        estado = {}
+        for nombre in ('size', 'checkedin', 'checkedout', 'overflow'):
+            metodo = getattr(engine.pool, nombre, None)
+            if callable(metodo):
+                # overflow() es negativo mientras el pool no se ha llenado
+                estado[(nombre,)] = max(metodo(), 0)
+        return estado
+
+    registro.gauge('db_pool_connections', 'Estado del pool de conexiones de SQLAlchemy', ('estado',),
+                   funcion=estado_pool)
+
+
+def init_metricas(app, db):
+    """Registrar los hooks de medición y el endpoint /metrics"""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    app.before_request(_antes_de_solicitud)
+    app.after_request(_despues_de_solicitud)
+    app.teardown_request(_fin_de_solicitud)
+
+    with app.app_context():
+        instrumentar_pool(db.engine)
+
+    @app.route('/metrics', methods=['GET'])
+    def metricas():
+        """
+        Métricas de ejecución en formato Prometheus
+        ---
+        tags:
+          - Health
+        produces:
+          - text/plain
+        responses:
+          200:
+            description: Métricas en formato de texto de Prometheus
+        """
+        return Response(registro.exponer(), mimetype=None, content_type=CONTENT_TYPE_PROMETHEUS)
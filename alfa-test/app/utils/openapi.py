@@ -0,0 +1,147 @@
+"""
+Especificación OpenAPI precompilada y carga perezosa de rutas.
+
+`build_openapi.py` genera en tiempo de build:
+  - apispec.json: la especificación que flasgger construiría parseando los
+    docstrings YAML de todas las rutas en la primera solicitud.
+  - rutas.json: manifiesto (regla, endpoint, métodos, módulo, función) que
+    permite registrar las rutas sin importar los módulos de rutas al arrancar.
+
+Ambos archivos guardan una huella de los módulos de rutas; si el código
+cambió después del build, la app ignora los artefactos y vuelve a la carga
+normal (flasgger dinámico y blueprints importados al inicio).
+"""
+import hashlib
+import json
+import os
+from functools import cached_property
+
+from flask import Response, request
+from werkzeug.utils import import_string
+
+DIRECTORIO_APP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARCHIVO_SPEC = 'apispec.json'
+ARCHIVO_MANIFIESTO = 'rutas.json'
+
+# Blueprints propios de flasgger que no forman parte del manifiesto
+BLUEPRINTS_EXCLUIDOS = {'flasgger'}
+
+
+def huella_rutas():
+    """Hash de los módulos que definen rutas y la plantilla de Swagger"""
+    directorio_rutas = os.path.join(DIRECTORIO_APP, 'routes')
+    archivos = [os.path.join(DIRECTORIO_APP, '__init__.py')] + sorted(
+        os.path.join(directorio_rutas, nombre)
+        for nombre in os.listdir(directorio_rutas)
+        if nombre.endswith('.py')
+    )
+    huella = hashlib.sha256()
+    for archivo in archivos:
+        huella.update(os.path.basename(archivo).encode('utf-8'))
+        with open(archivo, 'rb') as contenido:
+            huella.update(contenido.read())
+    return huella.hexdigest()[:16]
+
+
+def _leer_artefacto(directorio, nombre, huella):
+    """Leer un artefacto del build si existe y corresponde al código actual"""
+    ruta = os.path.join(directorio, nombre)
+    if not os.path.isfile(ruta):
+        return None
+    with open(ruta, 'rb') as archivo:
+        contenido = archivo.read()
+    datos = json.loads(contenido)
+    if datos.get('x-huella-rutas') != huella:
+        print(f"-----> Advertencia: {nombre} no corresponde al código actual; se ignora")
+        return None
+    return contenido, datos
+
+
+# =============================================================================
+# CARGA PEREZOSA DE RUTAS
+# =============================================================================
+
+class VistaPerezosa:
+    """Vista que importa su módulo de rutas en la primera solicitud"""
+
+    def __init__(self, modulo, funcion):
+        self.__module__ = modulo
+        self.__name__ = funcion
+        self.import_name = f'{modulo}.{funcion}'
+
+    @cached_property
+    def view(self):
+        return import_string(self.import_name)
+
+    def __call__(self, *args, **kwargs):
+        return self.view(*args, **kwargs)
+
+
+def cargar_manifiesto_rutas(app):
+    """Manifiesto de rutas vigente o None si no existe o está desactualizado"""
+    artefacto = _leer_artefacto(app.config['OPENAPI_BUILD_DIR'], ARCHIVO_MANIFIESTO, huella_rutas())
+    return artefacto[1]['rutas'] if artefacto else None
+
+
+def registrar_rutas_perezosas(app, rutas):
+    """Registrar las rutas del manifiesto sin importar sus módulos"""
+    for ruta in rutas:
+        app.add_url_rule(
+            ruta['regla'],
+            endpoint=ruta['endpoint'],
+            view_func=VistaPerezosa(ruta['modulo'], ruta['funcion']),
+            methods=ruta['metodos']
+        )
+
+
+def construir_manifiesto_rutas(app):
+    """Describir las rutas de los blueprints registrados (usado por build_openapi.py)"""
+    rutas = []
+    for regla in sorted(app.url_map.iter_rules(), key=lambda r: (r.rule, r.endpoint)):
+        blueprint, _, _ = regla.endpoint.rpartition('.')
+        if not blueprint or blueprint in BLUEPRINTS_EXCLUIDOS:
+            continue
+        vista = app.view_functions[regla.endpoint]
+        # Solo se pueden cargar perezosamente funciones accesibles desde su módulo
+        if getattr(import_string(vista.__module__), vista.__name__, None) is not vista:
+            raise ValueError(f'La vista {regla.endpoint} no es importable como {vista.__module__}.{vista.__name__}')
+        rutas.append({
+            'regla': regla.rule,
+            'endpoint': regla.endpoint,
+            'metodos': sorted(regla.methods - {'HEAD', 'OPTIONS'}),
+            'modulo': vista.__module__,
+            'funcion': vista.__name__
+        })
+    return rutas
+
+
+# =============================================================================
+# ESPECIFICACIÓN ESTÁTICA
+# =============================================================================
+
+def usar_spec_estatica(app, endpoint_spec='flasgger.apispec_1'):
+    """
+    Reemplazar la vista dinámica de flasgger por la especificación precompilada
+
+    La especificación se lee una sola vez al arrancar y se sirve con ETag y
+    Cache-Control, de modo que los clientes revalidan con un 304.
+
+    Returns:
+        bool: True si se encontró una especificación vigente
+    """
+    artefacto = _leer_artefacto(app.config['OPENAPI_BUILD_DIR'], ARCHIVO_SPEC, huella_rutas())
+    if not artefacto or endpoint_spec not in app.view_functions:
+        return False
+
+    contenido = artefacto[0]
+    etag = hashlib.sha256(contenido).hexdigest()[:32]
+    max_age = app.config.get('OPENAPI_CACHE_SEGUNDOS', 3600)
+
+    def spec_estatica():
+        respuesta = Response(contenido, mimetype='application/json')
+        respuesta.set_etag(etag)
+        respuesta.headers['Cache-Control'] = f'public, max-age={max_age}'
+        return respuesta.make_conditional(request)
+
+    app.view_functions[endpoint_spec] = spec_estatica
+    return True
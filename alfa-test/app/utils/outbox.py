@@ -0,0 +1,344 @@
+"""
+Outbox transaccional de eventos de dominio y relay que los publica.
+
+Escritura, dentro de la transacción del cambio:
+  - `emitir(tipo, **datos)` anota un evento de dominio (poliza.pago, ...).
+  - Los cambios hechos por el ORM en clientes, bienes, pólizas y cuotas se
+    anotan solos como <agregado>.alta / .cambio / .baja, con el id y los
+    campos modificados. Las sentencias Core (UPDATE masivos) no se detectan:
+    quien las ejecuta emite un evento resumen (p. ej. cartera.vencimientos).
+  - Justo antes del commit los eventos anotados se insertan en eventos_outbox
+    con un solo INSERT. Si la transacción se revierte no queda ninguno, y si
+    se confirma ninguno se pierde aunque el proceso muera a continuación.
+
+Lectura, en el relay (`RelayEventos`):
+  Toma los pendientes en orden de id con SELECT ... FOR UPDATE (dos relays no
+  publican el mismo lote a la vez), los entrega a las funciones registradas
+  con @suscriptor y al broker de /api/eventos, y los marca como publicados en
+  la misma transacción. Si algo falla antes del commit, el lote se vuelve a
+  entregar: la entrega es al menos una vez y los suscriptores deben tolerar
+  eventos repetidos (el id del evento es estable).
+
+  Cada suscriptor corre en un savepoint: lo que escriba en la base se confirma
+  junto con la marca de publicado. Si falla, el lote se detiene en ese evento
+  para no desordenar los siguientes y se reintenta; tras
+  EVENTOS_RELAY_MAX_INTENTOS el evento queda 'Fallido' y el relay continúa.
+
+El relay corre en un hilo del proceso que atiende la API
+(EVENTOS_RELAY_EN_PROCESO), que el commit despierta para publicar enseguida,
+o aparte con `flask --app run relay-eventos`. El worker de trabajos y los
+comandos de la CLI solo escriben en el outbox: con EVENTOS_BACKEND=memoria el
+broker de su proceso no tiene conexiones de /api/eventos, y lo que publicaran
+se perdería para ellas. Por lo mismo, 'memoria' exige un único proceso con
+relay. Los objetos se identifican por nombre de tabla para no importar los
+modelos al cargar este módulo.
+"""
+from datetime import datetime, timedelta
+from fnmatch import fnmatchcase
+import json
+import logging
+import os
+import threading
+
+from flask import current_app, has_request_context
+from sqlalchemy import delete, event, inspect, select
+from werkzeug.utils import import_string
+
+from app.utils.eventos import obtener_broker
+from app.utils.metricas import errores_relay_eventos, eventos_publicados
+
+logger = logging.getLogger(__name__)
+
+_CLAVE_PENDIENTES = 'outbox_pendientes'
+_CLAVE_ESCRITOS = 'outbox_escritos'
+
+# tabla -> (agregado, atributos que viajan en el evento además del id)
+_TABLAS_SEGUIDAS = {
+    'clientes': ('cliente', ()),
+    'bienes': ('bien', ('tipo_bien',)),
+    'polizas': ('poliza', ('estado_cartera',)),
+    'poliza_plan_pagos': ('cuota', ('poliza_id', 'estado_pago')),
+}
+# Columnas que cambian en cada UPDATE o que no deben salir en un evento
+_CAMPOS_OMITIDOS = {'version', 'actualizado_en', 'clave'}
+
+# [(patrones, función)] registrados con @suscriptor
+_SUSCRIPTORES = []
+
+
+def suscriptor(*patrones):
+    """
+    Registrar una función que recibe los eventos publicados por el relay
+
+    Args:
+        patrones: tipos de evento, con comodines de fnmatch ('poliza.*')
+    """
+    def decorador(funcion):
+        _SUSCRIPTORES.append((patrones, funcion))
+        return funcion
+    return decorador
+
+
+def init_outbox(app, db):
+    """Registrar la escritura del outbox en cada transacción y el relay de la API"""
+    if app.config['EVENTOS_BACKEND'] == 'memoria' and app.config['EVENTOS_RELAY_EN_PROCESO'] \
+            and int(os.environ.get('WEB_CONCURRENCY') or 1) > 1:
+        raise ValueError(
+            "EVENTOS_BACKEND=memoria admite un solo proceso con relay: con varios workers "
+            "(WEB_CONCURRENCY) use EVENTOS_BACKEND=redis"
+        )
+    # El proceso que atiende solicitudes es el que sirve /api/eventos
+    @app.before_request
+    def _iniciar_relay():
+        relay_en_proceso(app, iniciar=True)
+
+    event.listen(db.session, 'after_flush', _anotar_cambios)
+    event.listen(db.session, 'before_commit', _escribir_pendientes)
+    event.listen(db.session, 'after_commit', _despertar_relay)
+    event.listen(db.session, 'after_soft_rollback', _descartar_pendientes)
+
+
+def emitir(tipo, **datos):
+    """Anotar un evento de dominio que se escribe en el outbox al confirmar la transacción"""
+    from app import db
+
+    # Con la transacción abierta, su commit o rollback resuelve el evento
+    # aunque todavía no se haya enviado ninguna sentencia
+    sesion = db.session()
+    if not sesion.in_transaction():
+        sesion.begin()
+    agregado = tipo.split('.', 1)[0]
+    _anotar(sesion, tipo, agregado, datos.get(f'{agregado}_id'), datos)
+
+
+def _anotar(session, tipo, agregado, agregado_id, datos):
+    session.info.setdefault(_CLAVE_PENDIENTES, []).append({
+        'tipo': tipo,
+        'agregado': agregado,
+        'agregado_id': agregado_id,
+        'datos': datos,
+        'creado_en': datetime.utcnow()
+    })
+
+
+def _anotar_cambios(session, flush_context):
+    for objetos, accion in ((session.new, 'alta'), (session.dirty, 'cambio'), (session.deleted, 'baja')):
+        for objeto in objetos:
+            seguimiento = _TABLAS_SEGUIDAS.get(getattr(objeto, '__tablename__', None))
+            if not seguimiento:
+                continue
+            agregado, atributos = seguimiento
+            datos = {'id': objeto.id}
+            if accion == 'cambio':
+                estado = inspect(objeto)
+                campos = sorted(
+                    atributo.key for atributo in estado.mapper.column_attrs
+                    if atributo.key not in _CAMPOS_OMITIDOS and estado.attrs[atributo.key].history.has_changes()
+                )
+                if not campos:
+                    continue
+                datos['campos'] = campos
+            for atributo in atributos:
+                datos[atributo] = getattr(objeto, atributo, None)
+            _anotar(session, f'{agregado}.{accion}', agregado, objeto.id, datos)
+
+
+def _escribir_pendientes(session):
+    # before_commit y after_commit también se disparan al liberar un savepoint
+    # (p. ej. el de los rollups): solo cuenta el commit de la transacción raíz
+    if session.in_nested_transaction():
+        return
+    # Los cambios aún no enviados también deben quedar anotados
+    session.flush()
+    eventos = session.info.pop(_CLAVE_PENDIENTES, None)
+    if not eventos:
+        return
+
+    from app.models.evento_outbox_model import EventoOutbox
+
+    session.execute(EventoOutbox.__table__.insert(), [
+        {**evento, 'datos': json.dumps(evento['datos'], default=str, separators=(',', ':'))}
+        for evento in eventos
+    ])
+    session.info[_CLAVE_ESCRITOS] = True
+
+
+def _despertar_relay(session):
+    if session.in_nested_transaction() or not session.info.pop(_CLAVE_ESCRITOS, False):
+        return
+    relay = relay_en_proceso()
+    if relay is not None:
+        relay.despertar()
+
+
+def _descartar_pendientes(session, transaccion):
+    # El rollback de un savepoint no descarta los eventos de la transacción
+    if not transaccion.nested:
+        session.info.pop(_CLAVE_PENDIENTES, None)
+        session.info.pop(_CLAVE_ESCRITOS, None)
+
+
+# =============================================================================
+# RELAY
+# =============================================================================
+
+class RelayEventos:
+    """Publica los eventos pendientes del outbox en orden"""
+
+    def __init__(self, app):
+        self.app = app
+        self.detener = threading.Event()
+        self._aviso = threading.Event()
+        for modulo in app.config['EVENTOS_SUSCRIPTORES']:
+            import_string(modulo)
+
+    def despertar(self):
+        """Revisar el outbox sin esperar al siguiente sondeo"""
+        self._aviso.set()
+
+    def ejecutar(self, una_vez=False):
+        """
+        Publicar lotes hasta que se pida detener
+
+        Con una_vez=True termina cuando no quedan eventos pendientes.
+
+        Returns:
+            int: número de eventos publicados
+        """
+        publicados = 0
+        espera = self.app.config['EVENTOS_RELAY_ESPERA_SEGUNDOS']
+        while not self.detener.is_set():
+            self._aviso.clear()
+            try:
+                with self.app.app_context():
+                    cantidad = self.procesar_lote()
+            except Exception as e:
+                errores_relay_eventos.inc()
+                logger.warning("El relay de eventos no pudo publicar el lote: %s", e)
+                cantidad = 0
+            publicados += cantidad
+            if cantidad:
+                continue
+            if una_vez:
+                break
+            self._aviso.wait(espera)
+        return publicados
+
+    def procesar_lote(self):
+        """Entregar y marcar el siguiente lote de pendientes (0 si no había o no se avanzó)"""
+        from app import db
+        from app.models.evento_outbox_model import EventoOutbox
+
+        config = self.app.config
+        tabla = EventoOutbox.__table__
+        try:
+            filas = db.session.execute(
+                select(tabla).where(tabla.c.estado == 'Pendiente')
+                .order_by(tabla.c.id).limit(config['EVENTOS_RELAY_TAMANO_LOTE'])
+                .with_for_update()
+            ).all()
+            if not filas:
+                db.session.rollback()
+                return 0
+
+            entregados, fallido = [], None
+            for fila in filas:
+                evento = {
+                    'id': str(fila.id),
+                    'tipo': fila.tipo,
+                    'fecha': fila.creado_en.isoformat(),
+                    'datos': json.loads(fila.datos)
+                }
+                error = _entregar(evento)
+                if error is not None:
+                    fallido = (fila, error)
+                    break
+                entregados.append(evento)
+
+            if entregados:
+                broker = obtener_broker(self.app)
+                if broker is not None:
+                    broker.publicar(entregados)
+                db.session.execute(
+                    tabla.update().where(tabla.c.id.in_([int(e['id']) for e in entregados]))
+                    .values(estado='Publicado', publicado_en=datetime.utcnow(), error=None)
+                )
+            agotado = False
+            if fallido:
+                fila, error = fallido
+                agotado = fila.intentos + 1 >= config['EVENTOS_RELAY_MAX_INTENTOS']
+                db.session.execute(
+                    tabla.update().where(tabla.c.id == fila.id).values(
+                        intentos=tabla.c.intentos + 1,
+                        error=error,
+                        estado='Fallido' if agotado else 'Pendiente'
+                    )
+                )
+                if agotado:
+                    logger.error("Evento %s (%s) descartado tras %s intentos: %s",
+                                 fila.id, fila.tipo, fila.intentos + 1, error)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        for evento in entregados:
+            eventos_publicados.inc(evento['tipo'])
+        return len(entregados) + (1 if agotado else 0)
+
+
+def _entregar(evento):
+    """Llamar a los suscriptores del evento; retorna el error del primero que falle"""
+    from app import db
+
+    for patrones, funcion in _SUSCRIPTORES:
+        if not any(fnmatchcase(evento['tipo'], patron) for patron in patrones):
+            continue
+        try:
+            with db.session.begin_nested():
+                funcion(evento)
+        except Exception as e:
+            errores_relay_eventos.inc()
+            logger.warning("El suscriptor %s falló con el evento %s: %s", funcion.__qualname__, evento['id'], e)
+            return f'{funcion.__module__}.{funcion.__qualname__}: {e.__class__.__name__}: {e}'
+    return None
+
+
+_candado_relay = threading.Lock()
+
+
+def relay_en_proceso(app=None, iniciar=False):
+    """
+    Relay del proceso; None si EVENTOS_RELAY_EN_PROCESO está apagado o no se ha iniciado
+
+    Solo se inicia con iniciar=True dentro de una solicitud (la primera que
+    atiende el proceso de la API): el worker y la CLI nunca lo inician.
+    """
+    app = app or current_app._get_current_object()
+    if not app.config['EVENTOS_RELAY_EN_PROCESO']:
+        return None
+    relay = app.extensions.get('relay_eventos')
+    if relay is None and iniciar and has_request_context():
+        with _candado_relay:
+            relay = app.extensions.get('relay_eventos')
+            if relay is None:
+                relay = RelayEventos(app)
+                # Iniciado después de un fork (gunicorn): cada worker tiene su hilo
+                threading.Thread(target=relay.ejecutar, name='relay-eventos', daemon=True).start()
+                app.extensions['relay_eventos'] = relay
+    return relay
+
+
+def purgar_publicados(dias):
+    """Borrar los eventos publicados hace más de `dias` días; retorna cuántos se borraron"""
+    from app import db
+    from app.models.evento_outbox_model import EventoOutbox
+
+    borrados = db.session.execute(
+        delete(EventoOutbox).where(
+            EventoOutbox.estado == 'Publicado',
+            EventoOutbox.publicado_en < datetime.utcnow() - timedelta(days=dias)
+        )
+    ).rowcount
+    db.session.commit()
+    return borrados
@@ -0,0 +1,131 @@
+"""
+Mantenimiento incremental de los rollups de cartera por agente.
+
+Los eventos de sesión anotan qué asignaciones, relaciones cliente-bien,
+pólizas y cuotas cambiaron en cada flush. Justo antes del commit se resuelven
+los agentes afectados, y después del commit se encola la tarea
+resumenes_agentes con ellos: el recálculo (que recorre la cartera del agente)
+corre en el worker, fuera de la transacción de negocio y sin bloquear
+agente_resumen_cartera mientras esta confirma.
+
+Las bajas y los cambios de vínculo (p. ej. una asignación que pasa a otro
+agente) se resuelven antes del flush, mientras la base todavía tiene el
+estado anterior: así también se recalcula el agente que deja de ver el
+registro. Los objetos se identifican por nombre de tabla para no importar los
+modelos al cargar este módulo.
+"""
+import logging
+
+from sqlalchemy import event, inspect
+
+logger = logging.getLogger(__name__)
+
+_CLAVE_PENDIENTES = 'resumenes_pendientes'
+_CLAVE_AGENTES = 'resumenes_agentes'
+
+# tabla -> (tipo de clave, atributo que la contiene, atributos que la vinculan a un agente)
+_TABLAS_SEGUIDAS = {
+    'agentes_clientes': ('agente', 'agente_id', ('agente_id', 'cliente_id')),
+    'clientes_bienes': ('cliente', 'cliente_id', ('cliente_id', 'bien_id')),
+    'polizas': ('poliza', 'id', ('opcion_seguro_id',)),
+    'poliza_plan_pagos': ('poliza', 'poliza_id', ('poliza_id',)),
+}
+
+
+def init_resumenes(app, db):
+    """Registrar los eventos de sesión que mantienen los rollups"""
+    if not app.config.get('RESUMENES_INCREMENTALES', True):
+        return
+    event.listen(db.session, 'before_flush', _anotar_anteriores)
+    event.listen(db.session, 'after_flush', _anotar_cambios)
+    event.listen(db.session, 'before_commit', _resolver_pendientes)
+    event.listen(db.session, 'after_commit', _encolar_recalculo)
+    event.listen(db.session, 'after_soft_rollback', _descartar_pendientes)
+
+
+def _agentes(session):
+    return session.info.setdefault(_CLAVE_AGENTES, set())
+
+
+def _valor_anterior(objeto, atributo):
+    historia = inspect(objeto).attrs[atributo].history
+    return historia.deleted[0] if historia.deleted else getattr(objeto, atributo, None)
+
+
+def _anotar_anteriores(session, flush_context, instancias):
+    # Agentes que veían los registros borrados o revinculados, con el estado aún sin enviar
+    anteriores = {}
+    for objeto in (*session.deleted, *session.dirty):
+        seguimiento = _TABLAS_SEGUIDAS.get(getattr(objeto, '__tablename__', None))
+        if not seguimiento:
+            continue
+        tipo, atributo, vinculos = seguimiento
+        if objeto not in session.deleted and not any(
+            inspect(objeto).attrs[vinculo].history.deleted for vinculo in vinculos
+        ):
+            continue
+        valor = _valor_anterior(objeto, atributo)
+        if valor is not None:
+            anteriores.setdefault(tipo, set()).add(valor)
+    if not anteriores:
+        return
+
+    from app.services.dashboard_service import DashboardService
+
+    _agentes(session).update(DashboardService.agentes_afectados(
+        agente_ids=anteriores.get('agente', ()),
+        cliente_ids=anteriores.get('cliente', ()),
+        poliza_ids=anteriores.get('poliza', ())
+    ))
+
+
+def _anotar_cambios(session, flush_context):
+    pendientes = session.info.setdefault(_CLAVE_PENDIENTES, {})
+    for objeto in (*session.new, *session.dirty):
+        seguimiento = _TABLAS_SEGUIDAS.get(getattr(objeto, '__tablename__', None))
+        if not seguimiento:
+            continue
+        tipo, atributo, _ = seguimiento
+        valor = getattr(objeto, atributo, None)
+        if valor is not None:
+            pendientes.setdefault(tipo, set()).add(valor)
+
+
+def _resolver_pendientes(session):
+    # before_commit también se dispara al liberar un savepoint
+    if session.in_nested_transaction():
+        return
+    # Los cambios aún no enviados también deben quedar anotados
+    session.flush()
+    pendientes = session.info.pop(_CLAVE_PENDIENTES, None)
+    if not pendientes:
+        return
+
+    from app.services.dashboard_service import DashboardService
+
+    _agentes(session).update(DashboardService.agentes_afectados(
+        agente_ids=pendientes.get('agente', ()),
+        cliente_ids=pendientes.get('cliente', ()),
+        poliza_ids=pendientes.get('poliza', ())
+    ))
+
+
+def _encolar_recalculo(session):
+    agentes = session.info.pop(_CLAVE_AGENTES, None)
+    if not agentes:
+        return
+
+    from app.jobs import encolar
+
+    # Si no se puede encolar, el recálculo nocturno (o el del dashboard al
+    # cambiar de día) pone el rollup al día; el cambio ya está confirmado
+    try:
+        encolar('resumenes_agentes', {'agente_ids': sorted(agentes)})
+    except Exception as e:
+        logger.warning("No se pudo encolar el recálculo de agente_resumen_cartera: %s", e)
+
+
+def _descartar_pendientes(session, transaccion):
+    if not transaccion.nested:
+        session.info.pop(_CLAVE_PENDIENTES, None)
+        session.info.pop(_CLAVE_AGENTES, None)
@@ -0,0 +1,138 @@
+"""
+Verificaciones de salud (readiness) de la API.
+
+Cada verificación es una función sin argumentos que retorna (ok, detalle).
+El resultado agregado se cachea unos segundos para que las sondas del
+orquestador no agreguen carga a la base de datos.
+"""
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app import db
+
+_verificaciones = {}
+_lock_cache = threading.Lock()
+_resultado_cache = {'expira': 0.0, 'resultado': None}
+
+
+def registrar_verificacion(nombre, funcion):
+    """Registrar una verificación de readiness (por ejemplo, calentamiento de una caché)"""
+    _verificaciones[nombre] = funcion
+
+
+def verificar_base_datos():
+    """Obtener una conexión del pool y ejecutar SELECT 1"""
+    with db.engine.connect() as conexion:
+        conexion.execute(text('SELECT 1'))
+    return True, 'Conexión disponible'
+
+
+def obtener_version_esquema():
+    """Versión más alta registrada en schema_version (None si la tabla no existe)"""
+    try:
+        with db.engine.connect() as conexion:
+            return conexion.execute(text('SELECT MAX(version) FROM schema_version')).scalar()
+    except Exception:
+        return None
+
+
+def verificar_version_esquema():
+    """Comparar la versión del esquema con la requerida por el código"""
+    from flask import current_app
+
+    requerida = current_app.config.get('SCHEMA_VERSION_REQUERIDA', 0)
+    actual = obtener_version_esquema()
+    if actual is None:
+        return False, 'Tabla schema_version no encontrada (ejecutar scripts/aplicar_migraciones.sh)'
+    if actual < requerida:
+        return False, f'Esquema en versión {actual}, se requiere {requerida}'
+    return True, f'Versión {actual}'
+
+
+registrar_verificacion('base_datos', verificar_base_datos)
+registrar_verificacion('version_esquema', verificar_version_esquema)
+
+
+def ejecutar_verificaciones():
+    """Ejecutar todas las verificaciones registradas sin usar la caché"""
+    resultados = {}
+    listo = True
+    for nombre, funcion in list(_verificaciones.items()):
+        inicio = time.perf_counter()
+        try:
+            ok, detalle = funcion()
+        except Exception as e:
+            ok, detalle = False, str(e)
+        resultados[nombre] = {
+            'ok': ok,
+            'detalle': detalle,
+            'duracion_ms': round((time.perf_counter() - inicio) * 1000, 2)
+        }
+        listo = listo and ok
+
+    return {
+        'status': 'ready' if listo else 'not_ready',
+        'checks': resultados,
+        'timestamp': datetime.utcnow().isoformat()
+    }
+
+
+def estado_readiness(segundos_cache):
+    """
+    Resultado de readiness cacheado durante segundos_cache
+
+    Solo un hilo ejecuta las verificaciones a la vez; los demás reciben el
+    último resultado mientras tanto.
+    """
+    ahora = time.monotonic()
+    resultado = _resultado_cache['resultado']
+    if resultado is not None and ahora < _resultado_cache['expira']:
+        return resultado
+
+    if not _lock_cache.acquire(blocking=resultado is None):
+        return resultado
+    try:
+        if _resultado_cache['resultado'] is not None and time.monotonic() < _resultado_cache['expira']:
+            return _resultado_cache['resultado']
+        resultado = ejecutar_verificaciones()
+        _resultado_cache['resultado'] = resultado
+        _resultado_cache['expira'] = time.monotonic() + segundos_cache
+        return resultado
+    finally:
+        _lock_cache.release()
+
+
+def esperar_disponibilidad(app, tiempo_maximo=60, espera_inicial=0.5, espera_maxima=8):
+    """
+    Esperar a que la base de datos responda usando el pool de la aplicación,
+    con backoff exponencial entre intentos
+
+    Returns:
+        bool: True si la base de datos respondió antes de tiempo_maximo
+    """
+    limite = time.monotonic() + tiempo_maximo
+    espera = espera_inicial
+    intento = 0
+
+    with app.app_context():
+        while True:
+            intento += 1
+            try:
+                verificar_base_datos()
+                print(f"-----> Conexión a MySQL exitosa (intento {intento})")
+                ok, detalle = verificar_version_esquema()
+                if not ok:
+                    print(f"-----> Advertencia: {detalle}")
+                return True
+            except Exception as e:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    print(f"-----> Error: No se pudo conectar a MySQL después de {intento} intentos")
+                    print(f"-----> Error: {e}")
+                    return False
+                print(f"-----> Intento {intento} - Esperando MySQL {espera:.1f}s... ({e.__class__.__name__})")
+                time.sleep(min(espera, restante))
+                espera = min(espera * 2, espera_maxima)
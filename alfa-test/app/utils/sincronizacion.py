@@ -0,0 +1,222 @@
+"""
+Registro de cambios para la sincronización incremental de los agentes.
+
+Los eventos de sesión anotan qué registros de las tablas sincronizadas se
+crearon, cambiaron o borraron. Justo antes del commit se resuelve qué
+agentes ven cada registro (agentes_clientes -> clientes_bienes -> bien) y
+se inserta una fila por agente en cambios_sincronizacion, dentro de la misma
+transacción. Las bajas se resuelven antes del flush, mientras el registro y
+sus asignaciones todavía existen.
+
+Solo se guardan la tabla, la clave y la operación: GET /api/agentes/<id>/sync
+lee el estado actual de cada registro al responder. Las sentencias Core
+(UPDATE masivos) no pasan por el ORM; quien las ejecuta anota los registros
+con `anotar_cambios`. Los objetos se identifican por nombre de tabla para no
+importar los modelos al cargar este módulo.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, delete, event, select
+from sqlalchemy.sql import Select
+
+_CLAVE_PENDIENTES = 'sincronizacion_pendientes'
+_CLAVE_BAJAS = 'sincronizacion_bajas'
+
+# Tablas que recibe la aplicación, en orden de dependencia
+TABLAS_SINCRONIZADAS = (
+    'clientes', 'hogares', 'vehiculos', 'copropiedades', 'otros_bienes', 'bienes',
+    'clientes_bienes', 'opciones_seguro', 'polizas', 'poliza_plan_pagos',
+)
+# Bien específico -> tipo_bien del bien que lo referencia
+TIPOS_ESPECIFICOS = {
+    'hogares': 'HOGAR',
+    'vehiculos': 'VEHICULO',
+    'copropiedades': 'COPROPIEDAD',
+    'otros_bienes': 'OTRO',
+}
+# Columnas que no salen del servidor
+COLUMNAS_OMITIDAS = {'clientes': ('clave',)}
+
+# Ids por sentencia IN al resolver agentes
+_TAMANO_LOTE = 1000
+
+
+def init_sincronizacion(app, db):
+    """Registrar los eventos de sesión que alimentan cambios_sincronizacion"""
+    event.listen(db.session, 'before_flush', _anotar_bajas)
+    event.listen(db.session, 'after_flush', _anotar_cambios)
+    event.listen(db.session, 'before_commit', _escribir_pendientes)
+    event.listen(db.session, 'after_soft_rollback', _descartar_pendientes)
+
+
+def _clave_registro(tabla, objeto):
+    """Clave primaria de un registro como tupla, en el orden de la tabla"""
+    return tuple(getattr(objeto, columna.key) for columna in tabla.primary_key.columns)
+
+
+def anotar_cambios(tabla, ids):
+    """
+    Anotar como cambiados registros modificados con Core (UPDATE masivos)
+
+    Args:
+        tabla: Table de una tabla sincronizada con clave id
+        ids: ids de los registros, o un select() que los devuelve (se ejecuta
+             ya: llámese antes del UPDATE si este cambia la condición)
+    """
+    from app import db
+
+    sesion = db.session()
+    if isinstance(ids, Select):
+        ids = sesion.execute(ids).scalars().all()
+    if ids:
+        _pendientes(sesion, tabla.name).update((registro_id,) for registro_id in ids)
+
+
+def _pendientes(session, tabla):
+    return session.info.setdefault(_CLAVE_PENDIENTES, {}).setdefault(tabla, set())
+
+
+def _seguida(objeto):
+    tabla = getattr(objeto, '__table__', None)
+    if tabla is not None and (tabla.name in TABLAS_SINCRONIZADAS or tabla.name == 'agentes_clientes'):
+        return tabla
+    return None
+
+
+def _anotar_cambios(session, flush_context):
+    for objeto in (*session.new, *session.dirty):
+        tabla = _seguida(objeto)
+        if tabla is not None and (objeto in session.new or session.is_modified(objeto)):
+            _pendientes(session, tabla.name).add(_clave_registro(tabla, objeto))
+
+
+def _anotar_bajas(session, flush_context, instancias):
+    # Después del flush el registro y sus asignaciones ya no existen
+    por_tabla = {}
+    for objeto in session.deleted:
+        tabla = _seguida(objeto)
+        if tabla is not None:
+            por_tabla.setdefault(tabla.name, set()).add(_clave_registro(tabla, objeto))
+    for tabla, claves in por_tabla.items():
+        session.info.setdefault(_CLAVE_BAJAS, []).extend(
+            (agente_id, tabla, clave) for clave, agente_id in _agentes_que_ven(session, tabla, claves)
+        )
+        # Una baja anula el alta o cambio anotado antes en la transacción
+        _pendientes(session, tabla).difference_update(claves)
+
+
+def _escribir_pendientes(session):
+    # before_commit también se dispara al liberar un savepoint
+    if session.in_nested_transaction():
+        return
+    session.flush()
+    pendientes = session.info.pop(_CLAVE_PENDIENTES, None) or {}
+    bajas = session.info.pop(_CLAVE_BAJAS, None) or []
+    if not pendientes and not bajas:
+        return
+
+    from app.models.cambio_sincronizacion_model import CambioSincronizacion
+
+    ahora = datetime.utcnow()
+    # Bajas primero: un registro borrado y vuelto a crear queda como alta
+    filas = [
+        {'agente_id': agente_id, 'tabla': tabla, 'clave': _texto_clave(clave), 'operacion': 'delete', 'creado_en': ahora}
+        for agente_id, tabla, clave in bajas
+    ]
+    for tabla, claves in pendientes.items():
+        filas.extend(
+            {'agente_id': agente_id, 'tabla': tabla, 'clave': _texto_clave(clave), 'operacion': 'upsert', 'creado_en': ahora}
+            for clave, agente_id in _agentes_que_ven(session, tabla, claves)
+        )
+    if filas:
+        session.execute(CambioSincronizacion.__table__.insert(), filas)
+
+
+def _descartar_pendientes(session, transaccion):
+    if not transaccion.nested:
+        session.info.pop(_CLAVE_PENDIENTES, None)
+        session.info.pop(_CLAVE_BAJAS, None)
+
+
+def _texto_clave(clave):
+    return ','.join(str(valor) for valor in clave)
+
+
+def _agentes_que_ven(session, tabla, claves):
+    """[(clave, agente_id)] de los agentes cuya cartera incluye cada registro"""
+    from app import db
+
+    tablas = db.metadata.tables
+    asignaciones = tablas['agentes_clientes']
+    claves = list(claves)
+    if tabla == 'agentes_clientes':
+        # La asignación solo la ve su agente; la clave para la aplicación es el cliente
+        return [((cliente_id,), agente_id) for agente_id, cliente_id in claves]
+    if tabla in ('clientes', 'clientes_bienes'):
+        # clientes_bienes: (cliente_id, bien_id); clientes: (id,)
+        agentes = {}
+        cliente_ids = sorted({clave[0] for clave in claves})
+        for inicio in range(0, len(cliente_ids), _TAMANO_LOTE):
+            for cliente_id, agente_id in session.execute(
+                select(asignaciones.c.cliente_id, asignaciones.c.agente_id)
+                .where(asignaciones.c.cliente_id.in_(cliente_ids[inicio:inicio + _TAMANO_LOTE]))
+            ):
+                agentes.setdefault(cliente_id, []).append(agente_id)
+        return [(clave, agente_id) for clave in claves for agente_id in agentes.get(clave[0], ())]
+
+    vinculos = tablas['clientes_bienes']
+    ids = sorted(clave[0] for clave in claves)
+    resultado = []
+    for inicio in range(0, len(ids), _TAMANO_LOTE):
+        ruta = _ruta_a_bien(tablas, tabla, ids[inicio:inicio + _TAMANO_LOTE]).subquery()
+        resultado.extend(
+            ((registro_id,), agente_id)
+            for registro_id, agente_id in session.execute(
+                select(ruta.c.registro_id, asignaciones.c.agente_id).distinct()
+                .join(vinculos, vinculos.c.bien_id == ruta.c.bien_id)
+                .join(asignaciones, asignaciones.c.cliente_id == vinculos.c.cliente_id)
+            )
+        )
+    return resultado
+
+
+def _ruta_a_bien(tablas, tabla, ids):
+    """select(registro_id, bien_id) de los registros indicados"""
+    bienes = tablas['bienes']
+    opciones = tablas['opciones_seguro']
+    polizas = tablas['polizas']
+    if tabla == 'bienes':
+        return select(bienes.c.id.label('registro_id'), bienes.c.id.label('bien_id')).where(bienes.c.id.in_(ids))
+    if tabla in TIPOS_ESPECIFICOS:
+        especifico = tablas[tabla]
+        return select(especifico.c.id.label('registro_id'), bienes.c.id.label('bien_id'))\
+            .join(bienes, and_(bienes.c.tipo_bien == TIPOS_ESPECIFICOS[tabla],
+                               bienes.c.bien_especifico_id == especifico.c.id))\
+            .where(especifico.c.id.in_(ids))
+    if tabla == 'opciones_seguro':
+        return select(opciones.c.id.label('registro_id'), opciones.c.bien_id).where(opciones.c.id.in_(ids))
+    if tabla == 'polizas':
+        return select(polizas.c.id.label('registro_id'), opciones.c.bien_id)\
+            .join(opciones, opciones.c.id == polizas.c.opcion_seguro_id)\
+            .where(polizas.c.id.in_(ids))
+    if tabla == 'poliza_plan_pagos':
+        cuotas = tablas['poliza_plan_pagos']
+        return select(cuotas.c.id.label('registro_id'), opciones.c.bien_id)\
+            .join(polizas, polizas.c.id == cuotas.c.poliza_id)\
+            .join(opciones, opciones.c.id == polizas.c.opcion_seguro_id)\
+            .where(cuotas.c.id.in_(ids))
+    raise ValueError(f'Tabla no sincronizada: {tabla}')
+
+
+def purgar_cambios(dias, margen_segundos=0):
+    """Borrar los cambios registrados hace más de `dias` días; retorna cuántos se borraron"""
+    from app import db
+    from app.models.cambio_sincronizacion_model import CambioSincronizacion
+
+    # El margen conserva los cambios que un token de `dias` días todavía puede pedir
+    limite = datetime.utcnow() - timedelta(days=dias, seconds=margen_segundos)
+    borrados = db.session.execute(
+        delete(CambioSincronizacion).where(CambioSincronizacion.creado_en < limite)
+    ).rowcount
+    db.session.commit()
+    return borrados
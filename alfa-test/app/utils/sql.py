@@ -0,0 +1,49 @@
+"""
+Expresiones SQL que dependen del motor.
+
+Producción usa MySQL; las variantes para SQLite permiten ejecutar las mismas
+consultas en pruebas locales.
+"""
+from sqlalchemy import Integer, String, literal
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+
+
+class dias_entre(FunctionElement):
+    """Días entre dos fechas: dias_entre(desde, hasta) = hasta - desde"""
+    type = Integer()
+    inherit_cache = True
+    name = 'dias_entre'
+
+
+@compiles(dias_entre)
+def _dias_entre_mysql(elemento, compilador, **kw):
+    desde, hasta = list(elemento.clauses)
+    return f'DATEDIFF({compilador.process(hasta, **kw)}, {compilador.process(desde, **kw)})'
+
+
+@compiles(dias_entre, 'sqlite')
+def _dias_entre_sqlite(elemento, compilador, **kw):
+    desde, hasta = list(elemento.clauses)
+    return (f'CAST(julianday({compilador.process(hasta, **kw)}) - '
+            f'julianday({compilador.process(desde, **kw)}) AS INTEGER)')
+
+
+class periodo_de(FunctionElement):
+    """Mes de una fecha como texto 'AAAA-MM'"""
+    type = String(7)
+    inherit_cache = True
+    name = 'periodo_de'
+
+
+@compiles(periodo_de)
+def _periodo_de_mysql(elemento, compilador, **kw):
+    fecha, = list(elemento.clauses)
+    # El formato va como parámetro: un '%' literal depende del paramstyle del driver
+    return f"DATE_FORMAT({compilador.process(fecha, **kw)}, {compilador.process(literal('%Y-%m'), **kw)})"
+
+
+@compiles(periodo_de, 'sqlite')
+def _periodo_de_sqlite(elemento, compilador, **kw):
+    fecha, = list(elemento.clauses)
+    return f"strftime({compilador.process(literal('%Y-%m'), **kw)}, {compilador.process(fecha, **kw)})"
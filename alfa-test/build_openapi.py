@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Precompilar la especificación OpenAPI y el manifiesto de rutas.
+
+Se ejecuta en el build de la imagen (ver Dockerfile):
+    python build_openapi.py [directorio_salida]
+
+Genera apispec.json y rutas.json en OPENAPI_BUILD_DIR (por defecto build/).
+"""
+import json
+import os
+import sys
+import time
+
+# El build siempre importa los blueprints para poder describirlos
+os.environ['RUTAS_PEREZOSAS'] = 'false'
+
+from app import create_app
+from app.utils.openapi import (
+    ARCHIVO_MANIFIESTO, ARCHIVO_SPEC, construir_manifiesto_rutas, huella_rutas
+)
+
+
+def escribir_json(ruta, datos):
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(datos, archivo, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+
+
+def main():
+    inicio = time.perf_counter()
+    app = create_app()
+    directorio = sys.argv[1] if len(sys.argv) > 1 else app.config['OPENAPI_BUILD_DIR']
+    os.makedirs(directorio, exist_ok=True)
+    huella = huella_rutas()
+
+    with app.test_request_context():
+        spec = dict(app.swag.get_apispecs('apispec_1'))
+        spec['x-huella-rutas'] = huella
+        rutas = construir_manifiesto_rutas(app)
+
+    escribir_json(os.path.join(directorio, ARCHIVO_SPEC), spec)
+    escribir_json(os.path.join(directorio, ARCHIVO_MANIFIESTO), {'x-huella-rutas': huella, 'rutas': rutas})
+
+    print(f"-----> Especificación OpenAPI: {len(spec.get('paths', {}))} rutas documentadas")
+    print(f"-----> Manifiesto de rutas: {len(rutas)} reglas")
+    print(f"-----> Artefactos generados en {directorio} ({time.perf_counter() - inicio:.2f}s, huella {huella})")
+
+
+if __name__ == '__main__':
+    main()
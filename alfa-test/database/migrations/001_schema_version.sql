@@ -0,0 +1,14 @@
+-- =============================================================================
+-- MIGRACIÓN 001 - CONTROL DE VERSIÓN DEL ESQUEMA
+--
+-- Registra las migraciones aplicadas. El endpoint de readiness compara la
+-- versión más alta de esta tabla con Config.SCHEMA_VERSION_REQUERIDA.
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INT PRIMARY KEY,
+    descripcion VARCHAR(255) NOT NULL,
+    aplicada_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT IGNORE INTO schema_version (version, descripcion) VALUES (1, 'Control de versión del esquema');
@@ -0,0 +1,30 @@
+-- =============================================================================
+-- MIGRACIÓN 002 - RESUMEN DE CARTERA POR AGENTE
+--
+-- Tabla de rollups que alimenta /api/agentes/<id>/dashboard. Se mantiene de
+-- forma incremental al confirmar cambios en asignaciones, pólizas y cuotas
+-- (DashboardService) y se recalcula completa cada noche con:
+--     flask --app run resumenes-agentes
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS agente_resumen_cartera (
+    agente_id INT PRIMARY KEY,
+    total_clientes INT NOT NULL DEFAULT 0,
+    total_bienes INT NOT NULL DEFAULT 0,
+    polizas_activas INT NOT NULL DEFAULT 0,
+    renovaciones_proximas INT NOT NULL DEFAULT 0,
+    cuotas_vencidas INT NOT NULL DEFAULT 0,
+    valor_cartera_vencida DECIMAL(15, 2) NOT NULL DEFAULT 0,
+    cuotas_por_vencer INT NOT NULL DEFAULT 0,
+    valor_por_vencer DECIMAL(15, 2) NOT NULL DEFAULT 0,
+    comisiones_pendientes DECIMAL(15, 2) NOT NULL DEFAULT 0,
+    fecha_corte DATE NOT NULL,
+    actualizado_en DATETIME NOT NULL,
+    FOREIGN KEY (agente_id) REFERENCES agente(id) ON DELETE CASCADE
+);
+
+-- Las llaves foráneas ya indexan agentes_clientes, clientes_bienes y opciones_seguro;
+-- este índice cubre la agregación de cuotas por póliza sin leer la tabla
+CREATE INDEX idx_plan_pagos_poliza_estado ON poliza_plan_pagos(poliza_id, estado_pago, fecha_maxima_pago, valor_a_pagar);
+
+INSERT IGNORE INTO schema_version (version, descripcion) VALUES (2, 'Resumen de cartera por agente');
@@ -0,0 +1,44 @@
+-- =============================================================================
+-- MIGRACIÓN 003 - MOTOR DE RENOVACIONES
+--
+-- Genera borradores de opciones de seguro para las pólizas próximas a vencer
+-- de bienes con vigencias continuas. Se ejecuta cada noche con:
+--     flask --app run renovaciones
+-- =============================================================================
+
+-- Rango por fecha de fin de vigencia; el id permite recorrerlo por lotes (keyset)
+CREATE INDEX idx_polizas_fecha_fin ON polizas(fecha_fin_vigencia, id);
+
+-- Ejecuciones del motor con el punto de control del último lote confirmado
+CREATE TABLE IF NOT EXISTS renovaciones_ejecucion (
+    id INT PRIMARY KEY AUTO_INCREMENT,
+    fecha_corte DATE NOT NULL,
+    fecha_limite DATE NOT NULL,
+    estado ENUM('En curso', 'Completada', 'Fallida') NOT NULL DEFAULT 'En curso',
+    ultima_fecha_fin DATE,
+    ultima_poliza_id INT,
+    polizas_procesadas INT NOT NULL DEFAULT 0,
+    opciones_generadas INT NOT NULL DEFAULT 0,
+    error TEXT,
+    iniciada_en DATETIME NOT NULL,
+    actualizada_en DATETIME NOT NULL,
+    finalizada_en DATETIME,
+    INDEX idx_renovaciones_ejecucion_estado (estado, id)
+);
+
+-- Borradores generados por póliza y aseguradora; la llave única evita
+-- duplicarlos si un lote se repite al reanudar
+CREATE TABLE IF NOT EXISTS renovaciones_opciones (
+    poliza_id INT NOT NULL,
+    aseguradora_id INT NOT NULL,
+    opcion_seguro_id INT NOT NULL,
+    ejecucion_id INT NOT NULL,
+    creada_en DATETIME NOT NULL,
+    PRIMARY KEY (poliza_id, aseguradora_id),
+    FOREIGN KEY (poliza_id) REFERENCES polizas(id) ON DELETE CASCADE,
+    FOREIGN KEY (aseguradora_id) REFERENCES aseguradoras(id),
+    FOREIGN KEY (opcion_seguro_id) REFERENCES opciones_seguro(id) ON DELETE CASCADE,
+    FOREIGN KEY (ejecucion_id) REFERENCES renovaciones_ejecucion(id)
+);
+
+INSERT IGNORE INTO schema_version (version, descripcion) VALUES (3, 'Motor de renovaciones');
@@ -0,0 +1,33 @@
+-- =============================================================================
+-- MIGRACIÓN 004 - TRABAJOS EN SEGUNDO PLANO
+--
+-- Cola por defecto de app.jobs (JOBS_BACKEND=sql). Los workers se inician con:
+--     flask --app run worker
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS trabajos (
+    id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    tarea VARCHAR(100) NOT NULL,
+    cola VARCHAR(50) NOT NULL DEFAULT 'default',
+    parametros JSON,
+    estado ENUM('Pendiente', 'En ejecución', 'Completado', 'Fallido') NOT NULL DEFAULT 'Pendiente',
+    intentos INT NOT NULL DEFAULT 0,
+    max_intentos INT NOT NULL DEFAULT 3,
+    ejecutar_despues DATETIME NOT NULL,
+    progreso INT NOT NULL DEFAULT 0,
+    mensaje_progreso VARCHAR(255),
+    resultado JSON,
+    error TEXT,
+    worker VARCHAR(100),
+    bloqueado_hasta DATETIME,
+    creado_en DATETIME NOT NULL,
+    iniciado_en DATETIME,
+    finalizado_en DATETIME,
+    actualizado_en DATETIME NOT NULL,
+    -- Siguiente trabajo pendiente de una cola
+    INDEX idx_trabajos_cola_estado (cola, estado, ejecutar_despues),
+    -- Trabajos en ejecución con el bloqueo vencido
+    INDEX idx_trabajos_estado_bloqueo (estado, bloqueado_hasta)
+);
+
+INSERT IGNORE INTO schema_version (version, descripcion) VALUES (4, 'Trabajos en segundo plano');
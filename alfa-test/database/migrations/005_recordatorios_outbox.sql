@@ -0,0 +1,36 @@
+-- =============================================================================
+-- MIGRACIÓN 005 - RECORDATORIOS DE PAGO
+--
+-- Cada mañana se generan los links del portal de pagos de las cuotas que
+-- vencen en los próximos días y se encolan sus recordatorios en
+-- recordatorios_outbox; un proceso aparte los envía:
+--     flask --app run recordatorios-preparar
+--     flask --app run recordatorios-enviar
+-- =============================================================================
+
+-- Cuotas pendientes por fecha de vencimiento
+CREATE INDEX idx_plan_pagos_estado_fecha ON poliza_plan_pagos(estado_pago, fecha_maxima_pago, id);
+
+CREATE TABLE IF NOT EXISTS recordatorios_outbox (
+    id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    cuota_id INT NOT NULL,
+    cliente_id INT NOT NULL,
+    fecha_programada DATE NOT NULL,
+    canal VARCHAR(20) NOT NULL DEFAULT 'email',
+    destinatario VARCHAR(255) NOT NULL,
+    asunto VARCHAR(255) NOT NULL,
+    cuerpo TEXT NOT NULL,
+    estado ENUM('Pendiente', 'Enviando', 'Enviado', 'Fallido') NOT NULL DEFAULT 'Pendiente',
+    intentos INT NOT NULL DEFAULT 0,
+    bloqueado_hasta DATETIME,
+    error TEXT,
+    creado_en DATETIME NOT NULL,
+    enviado_en DATETIME,
+    -- Un recordatorio por cuota, cliente y día aunque la preparación se repita
+    UNIQUE KEY uq_recordatorio_cuota_cliente_fecha (cuota_id, cliente_id, fecha_programada),
+    INDEX idx_recordatorios_estado (estado, id),
+    FOREIGN KEY (cuota_id) REFERENCES poliza_plan_pagos(id) ON DELETE CASCADE,
+    FOREIGN KEY (cliente_id) REFERENCES clientes(id) ON DELETE CASCADE
+);
+
+INSERT IGNORE INTO schema_version (version, descripcion) VALUES (5, 'Outbox de recordatorios de pago');
@@ -0,0 +1,12 @@
+-- =============================================================================
+-- MIGRACIÓN 006 - CONCILIACIÓN DE EXTRACTOS
+--
+-- La conciliación guarda en referencia_pago la clave de cada línea del
+-- extracto aplicada y la consulta por lotes para reconocer líneas ya
+-- aplicadas al reprocesar un archivo:
+--     flask --app run conciliar-extracto extracto.csv
+-- =============================================================================
+
+CREATE INDEX idx_plan_pagos_referencia ON poliza_plan_pagos(referencia_pago);
+
+INSERT IGNORE INTO schema_version (version, descripcion) VALUES (6, 'Índice de referencias de pago para conciliación');
@@ -0,0 +1,30 @@
+-- =============================================================================
+-- MIGRACIÓN 007 - PAGOS IDEMPOTENTES Y CONCURRENTES
+--
+-- poliza_plan_pagos.version: bloqueo optimista (cada UPDATE la incrementa y
+-- verifica la versión leída), de modo que dos pagos simultáneos de la misma
+-- cuota no se aplican dos veces.
+--
+-- claves_idempotencia: respuesta guardada por cada encabezado
+-- Idempotency-Key durante IDEMPOTENCIA_TTL_HORAS; un reintento con la misma
+-- clave recibe la respuesta original en lugar de repetir la operación.
+-- =============================================================================
+
+ALTER TABLE poliza_plan_pagos ADD COLUMN version INT NOT NULL DEFAULT 1;
+
+CREATE TABLE IF NOT EXISTS claves_idempotencia (
+    ambito VARCHAR(50) NOT NULL,
+    clave VARCHAR(255) NOT NULL,
+    hash_solicitud CHAR(64) NOT NULL,
+    estado ENUM('En proceso', 'Completada') NOT NULL DEFAULT 'En proceso',
+    status_code INT,
+    respuesta MEDIUMTEXT,
+    tipo_contenido VARCHAR(100),
+    creada_en DATETIME NOT NULL,
+    expira_en DATETIME NOT NULL,
+    PRIMARY KEY (ambito, clave),
+    -- Purga de claves vencidas
+    INDEX idx_idempotencia_expira (expira_en)
+);
+
+INSERT IGNORE INTO schema_version (version, descripcion) VALUES (7, 'Versión de cuotas y claves de idempotencia');
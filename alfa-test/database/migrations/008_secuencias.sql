@@ -0,0 +1,19 @@
+-- =============================================================================
+-- MIGRACIÓN 008 - SECUENCIAS DE CONSECUTIVOS
+--
+-- Consecutivos de pólizas y opciones de seguro por período (AAAA-MM). Cada
+-- proceso reserva bloques de SECUENCIAS_TAMANO_BLOQUE números con un UPDATE
+-- corto y los entrega desde memoria (app/services/secuencia_service.py).
+-- Los números de un bloque que no se alcanzan a usar quedan sin asignar.
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS secuencias (
+    nombre VARCHAR(50) NOT NULL,
+    -- 'AAAA-MM' (reinicio mensual), 'AAAA' (anual) o '' (sin reinicio)
+    periodo VARCHAR(7) NOT NULL DEFAULT '',
+    siguiente BIGINT NOT NULL DEFAULT 1,
+    actualizado_en DATETIME NOT NULL,
+    PRIMARY KEY (nombre, periodo)
+);
+
+INSERT IGNORE INTO schema_version (version, descripcion) VALUES (8, 'Secuencias de consecutivos');
@@ -0,0 +1,42 @@
+-- =============================================================================
+-- MIGRACIÓN 009 - MORA DE CARTERA
+--
+-- tasas_mora: tasa diaria de mora por aseguradora y/o tipo de producto. Para
+-- cada cuota se usa la regla vigente más específica (aseguradora y tipo,
+-- solo aseguradora, solo tipo, general).
+--
+-- mora_snapshots: mora causada por póliza a una fecha de corte, generada
+-- cada día con:
+--     flask --app run mora-snapshot
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS tasas_mora (
+    id INT PRIMARY KEY AUTO_INCREMENT,
+    aseguradora_id INT NULL,
+    tipo_opcion ENUM('HOGAR', 'VEHICULO', 'COPROPIEDAD', 'OTRO') NULL,
+    tasa_diaria DECIMAL(9, 6) NOT NULL,
+    vigente_desde DATE NOT NULL,
+    vigente_hasta DATE NULL,
+    creado_en DATETIME NOT NULL,
+    INDEX idx_tasas_mora_regla (aseguradora_id, tipo_opcion, vigente_desde),
+    FOREIGN KEY (aseguradora_id) REFERENCES aseguradoras(id) ON DELETE CASCADE
+);
+
+-- Tasa general: la misma que usaba PolizaPlanPago.calcular_mora
+INSERT INTO tasas_mora (aseguradora_id, tipo_opcion, tasa_diaria, vigente_desde, creado_en)
+SELECT NULL, NULL, 0.001500, '2000-01-01', NOW()
+WHERE NOT EXISTS (SELECT 1 FROM tasas_mora WHERE aseguradora_id IS NULL AND tipo_opcion IS NULL);
+
+CREATE TABLE IF NOT EXISTS mora_snapshots (
+    fecha_corte DATE NOT NULL,
+    poliza_id INT NOT NULL,
+    cuotas_vencidas INT NOT NULL,
+    capital_vencido DECIMAL(15, 2) NOT NULL,
+    dias_mora_max INT NOT NULL,
+    valor_mora DECIMAL(15, 2) NOT NULL,
+    generado_en DATETIME NOT NULL,
+    PRIMARY KEY (fecha_corte, poliza_id),
+    FOREIGN KEY (poliza_id) REFERENCES polizas(id) ON DELETE CASCADE
+);
+
+INSERT IGNORE INTO schema_version (version, descripcion) VALUES (9, 'Tasas de mora y snapshots diarios');
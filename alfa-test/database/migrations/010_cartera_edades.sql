@@ -0,0 +1,11 @@
+-- =============================================================================
+-- MIGRACIÓN 010 - CARTERA POR EDADES
+--
+-- Con una fecha de corte pasada, las cuotas pagadas después de esa fecha
+-- siguen contando como pendientes (GET /api/cartera/edades?fecha_corte=...).
+-- Este índice resuelve esa parte sin recorrer todas las cuotas pagadas.
+-- =============================================================================
+
+CREATE INDEX idx_plan_pagos_estado_pago_real ON poliza_plan_pagos(estado_pago, fecha_pago_real);
+
+INSERT IGNORE INTO schema_version (version, descripcion) VALUES (10, 'Índice de cuotas pagadas por fecha de pago');
@@ -0,0 +1,55 @@
+-- =============================================================================
+-- MIGRACIÓN 011 - LIBRO DE COMISIONES Y LIQUIDACIONES POR ASEGURADORA
+--
+-- comisiones_movimientos: libro de solo inserción con la comisión de cada
+-- póliza. Se escribe una 'Causación' al emitir la póliza, un 'Recaudo' por
+-- cada cuota pagada (la parte de la comisión que corresponde a la cuota) y un
+-- 'Reverso' de lo no recaudado al cancelarla. La clave única evita registrar
+-- dos veces el mismo hecho (reintentos, conciliaciones repetidas).
+--
+-- periodo (AAAA-MM) es el mes en que se registró el movimiento, así una
+-- liquidación cerrada no cambia aunque lleguen pagos con fecha anterior.
+--
+-- comisiones_liquidaciones: estado de cuenta mensual por aseguradora, armado
+-- con una consulta agrupada sobre idx_comisiones_periodo.
+--
+-- Para cargar el libro con las pólizas y pagos existentes:
+--     flask --app run comisiones-reconstruir
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS comisiones_movimientos (
+    id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    clave VARCHAR(40) NOT NULL,
+    tipo ENUM('Causación', 'Recaudo', 'Reverso') NOT NULL,
+    periodo CHAR(7) NOT NULL,
+    aseguradora_id INT NOT NULL,
+    poliza_id INT NOT NULL,
+    cuota_id INT NULL,
+    fecha DATE NOT NULL,
+    valor_base DECIMAL(15, 2) NOT NULL,
+    valor_comision DECIMAL(15, 2) NOT NULL,
+    creado_en DATETIME NOT NULL,
+    UNIQUE KEY uk_comisiones_clave (clave),
+    INDEX idx_comisiones_periodo (periodo, aseguradora_id, tipo),
+    INDEX idx_comisiones_poliza (poliza_id),
+    FOREIGN KEY (aseguradora_id) REFERENCES aseguradoras(id),
+    FOREIGN KEY (poliza_id) REFERENCES polizas(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS comisiones_liquidaciones (
+    id INT PRIMARY KEY AUTO_INCREMENT,
+    aseguradora_id INT NOT NULL,
+    periodo CHAR(7) NOT NULL,
+    estado ENUM('Abierta', 'Cerrada') NOT NULL DEFAULT 'Abierta',
+    movimientos INT NOT NULL DEFAULT 0,
+    valor_causado DECIMAL(15, 2) NOT NULL DEFAULT 0,
+    valor_recaudado DECIMAL(15, 2) NOT NULL DEFAULT 0,
+    valor_reversado DECIMAL(15, 2) NOT NULL DEFAULT 0,
+    generada_en DATETIME NOT NULL,
+    cerrada_en DATETIME NULL,
+    UNIQUE KEY uk_liquidacion_aseguradora_periodo (aseguradora_id, periodo),
+    INDEX idx_liquidaciones_periodo (periodo),
+    FOREIGN KEY (aseguradora_id) REFERENCES aseguradoras(id) ON DELETE CASCADE
+);
+
+INSERT IGNORE INTO schema_version (version, descripcion) VALUES (11, 'Libro de comisiones y liquidaciones mensuales');
@@ -0,0 +1,28 @@
+-- =============================================================================
+-- MIGRACIÓN 012 - SNAPSHOTS DIARIOS DE CARTERA
+--
+-- Una fila por día y por valor de cada dimensión (total, aseguradora, tipo de
+-- producto y agente) con las cifras de la cartera ese día. Las gráficas de
+-- tendencia (GET /api/cartera/series) leen rangos por la llave primaria sin
+-- recalcular la historia. Se genera cada día con:
+--     flask --app run cartera-snapshot
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS cartera_snapshots (
+    dimension ENUM('total', 'aseguradora', 'tipo', 'agente') NOT NULL,
+    clave VARCHAR(30) NOT NULL,
+    fecha DATE NOT NULL,
+    polizas_vigentes INT NOT NULL,
+    prima_vigente DECIMAL(15, 2) NOT NULL,
+    comision_vigente DECIMAL(15, 2) NOT NULL,
+    cuotas_por_cobrar INT NOT NULL,
+    valor_por_cobrar DECIMAL(15, 2) NOT NULL,
+    cuotas_vencidas INT NOT NULL,
+    valor_vencido DECIMAL(15, 2) NOT NULL,
+    polizas_con_vencidas INT NOT NULL,
+    generado_en DATETIME NOT NULL,
+    PRIMARY KEY (dimension, clave, fecha),
+    INDEX idx_cartera_snapshots_fecha (fecha)
+);
+
+INSERT IGNORE INTO schema_version (version, descripcion) VALUES (12, 'Snapshots diarios de cartera');
@@ -0,0 +1,24 @@
+-- =============================================================================
+-- MIGRACIÓN 013 - VERSIÓN DE FILAS EN CLIENTES Y AGENTES
+--
+-- version y actualizado_en (UTC) permiten calcular el ETag de un cliente, un
+-- agente o un listado con una sola consulta agregada, sin cargar las filas:
+-- un GET con If-None-Match vigente responde 304 sin serializar nada. La
+-- aplicación incrementa version y renueva actualizado_en en cada UPDATE; los
+-- cambios hechos a mano en la base deben hacer lo mismo para invalidar los
+-- ETag de los clientes.
+-- =============================================================================
+
+ALTER TABLE clientes
+    ADD COLUMN version INT NOT NULL DEFAULT 1,
+    ADD COLUMN actualizado_en DATETIME NULL;
+UPDATE clientes SET actualizado_en = UTC_TIMESTAMP();
+ALTER TABLE clientes MODIFY actualizado_en DATETIME NOT NULL;
+
+ALTER TABLE agente
+    ADD COLUMN version INT NOT NULL DEFAULT 1,
+    ADD COLUMN actualizado_en DATETIME NULL;
+UPDATE agente SET actualizado_en = UTC_TIMESTAMP();
+ALTER TABLE agente MODIFY actualizado_en DATETIME NOT NULL;
+
+INSERT IGNORE INTO schema_version (version, descripcion) VALUES (13, 'Versión de filas de clientes y agentes');
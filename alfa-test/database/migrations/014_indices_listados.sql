@@ -0,0 +1,28 @@
+-- =============================================================================
+-- MIGRACIÓN 014 - ÍNDICES DE FILTROS Y ORDEN DE LISTADOS
+--
+-- Los listados aceptan filter[campo][operador], sort y q (app/utils/filtros.py)
+-- y solo permiten ordenar por columnas con índice. Estos índices cubren los
+-- campos ordenables y las búsquedas por prefijo (LIKE 'texto%') de
+-- /api/clientes, /api/agentes, /api/bienes y /api/polizas, para que la base
+-- filtre y ordene sin recorrer las tablas.
+-- =============================================================================
+
+CREATE INDEX idx_clientes_tipo ON clientes(tipo_cliente, id);
+CREATE INDEX idx_clientes_ciudad ON clientes(ciudad);
+CREATE INDEX idx_clientes_nombre ON clientes(nombre);
+CREATE INDEX idx_clientes_razon_social ON clientes(razon_social);
+CREATE INDEX idx_clientes_documento ON clientes(numero_documento);
+CREATE INDEX idx_clientes_nit ON clientes(nit);
+CREATE INDEX idx_clientes_actualizado ON clientes(actualizado_en);
+
+CREATE INDEX idx_agente_rol ON agente(rol, id);
+CREATE INDEX idx_agente_nombre ON agente(nombre);
+
+CREATE INDEX idx_bienes_tipo ON bienes(tipo_bien, id);
+
+CREATE INDEX idx_polizas_estado_fin ON polizas(estado_cartera, fecha_fin_vigencia);
+CREATE INDEX idx_polizas_fecha_inicio ON polizas(fecha_inicio_vigencia, id);
+CREATE INDEX idx_polizas_numero_aseguradora ON polizas(numero_poliza_aseguradora);
+
+INSERT IGNORE INTO schema_version (version, descripcion) VALUES (14, 'Índices de filtros y orden de listados');
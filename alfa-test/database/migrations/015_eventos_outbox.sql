@@ -0,0 +1,30 @@
+-- =============================================================================
+-- MIGRACIÓN 015 - OUTBOX DE EVENTOS DE DOMINIO
+--
+-- Cada transacción que cambia clientes, bienes, pólizas o cuotas (o que emite
+-- un evento de dominio, p. ej. poliza.pago) escribe sus eventos en
+-- eventos_outbox dentro de la misma transacción: si el cambio se confirma,
+-- el evento existe; si se revierte, tampoco queda el evento. El relay los lee
+-- en orden de id, los entrega a los suscriptores del proceso y al broker de
+-- /api/eventos, y los marca como publicados (entrega al menos una vez):
+--     flask --app run relay-eventos
+-- Los publicados se borran con el trabajo purgar_eventos.
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS eventos_outbox (
+    id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    tipo VARCHAR(50) NOT NULL,
+    agregado VARCHAR(30) NOT NULL,
+    agregado_id BIGINT,
+    datos TEXT NOT NULL,
+    estado ENUM('Pendiente', 'Publicado', 'Fallido') NOT NULL DEFAULT 'Pendiente',
+    intentos INT NOT NULL DEFAULT 0,
+    error TEXT,
+    creado_en DATETIME(6) NOT NULL,
+    publicado_en DATETIME,
+    -- El relay lee los pendientes en orden de id
+    INDEX idx_eventos_outbox_estado (estado, id),
+    INDEX idx_eventos_outbox_agregado (agregado, agregado_id, id)
+);
+
+INSERT IGNORE INTO schema_version (version, descripcion) VALUES (15, 'Outbox de eventos de dominio');
@@ -0,0 +1,28 @@
+-- =============================================================================
+-- MIGRACIÓN 016 - REGISTRO DE CAMBIOS PARA SINCRONIZACIÓN DE AGENTES
+--
+-- Una fila por cambio confirmado en clientes, bienes (y hogares, vehiculos,
+-- copropiedades, otros_bienes), opciones_seguro, polizas, poliza_plan_pagos,
+-- clientes_bienes y agentes_clientes, y por cada agente que ve el registro
+-- según sus asignaciones. GET /api/agentes/<id>/sync devuelve las altas,
+-- cambios y bajas posteriores al token de la aplicación leyendo solo las
+-- filas del agente, en orden de id, en lugar de volver a descargar la cartera
+-- completa. Los datos no se copian aquí: se leen de cada tabla al responder.
+-- Las filas con más de SYNC_RETENCION_DIAS se borran con el trabajo
+-- purgar_sincronizacion; un token más antiguo pide sincronizar de nuevo.
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS cambios_sincronizacion (
+    id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    agente_id INT NOT NULL,
+    tabla VARCHAR(30) NOT NULL,
+    -- Clave primaria del registro ('12' o, en clientes_bienes, '3,12')
+    clave VARCHAR(40) NOT NULL,
+    operacion ENUM('upsert', 'delete') NOT NULL,
+    creado_en DATETIME(6) NOT NULL,
+    -- Cambios de un agente posteriores a su token
+    INDEX idx_cambios_sincronizacion_agente (agente_id, id),
+    INDEX idx_cambios_sincronizacion_creado (creado_en)
+);
+
+INSERT IGNORE INTO schema_version (version, descripcion) VALUES (16, 'Registro de cambios para sincronización de agentes');
@@ -0,0 +1,13 @@
+# Paquete loadtest
+"""
+Harness de pruebas de carga para la API REST.
+
+Ejecuta escenarios ponderados construidos sobre las rutas reales de la API
+contra un stack local, incrementa la concurrencia por etapas y reporta
+throughput y percentiles de latencia por endpoint. Los resultados se guardan
+en JSON para poder compararlos entre commits.
+
+Uso:
+    python -m loadtest ejecutar --base-url http://localhost:5000 --usuario agente1 --clave secreta
+    python -m loadtest comparar resultados/a.json resultados/b.json
+"""
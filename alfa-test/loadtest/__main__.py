@@ -0,0 +1,237 @@
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+from loadtest.cliente_http import ClienteHTTP
+from loadtest.escenarios import ESCENARIOS, iniciar_sesion, preparar_contexto
+from loadtest.metricas import RegistroLatencias
+
+DIRECTORIO_RESULTADOS = os.path.join(os.path.dirname(__file__), 'resultados')
+
+
+class UsuarioVirtual(threading.Thread):
+    """Hilo que ejecuta escenarios ponderados hasta que se detiene la prueba"""
+
+    def __init__(self, numero, base_url, contexto, registro, escenarios, pesos, pausa, detener):
+        super().__init__(daemon=True, name=f'usuario-{numero}')
+        self.cliente = ClienteHTTP(base_url, registro)
+        self.contexto = contexto
+        self.escenarios = escenarios
+        self.pesos = pesos
+        self.pausa = pausa
+        self.detener = detener
+        self.aleatorio = random.Random(numero)
+
+    def run(self):
+        iniciar_sesion(self.cliente, self.contexto)
+        while not self.detener.is_set():
+            escenario = self.aleatorio.choices(self.escenarios, weights=self.pesos)[0]
+            escenario(self.cliente, self.contexto, self.aleatorio)
+            if self.pausa:
+                # Tiempo de "pensar" entre acciones, con jitter para no sincronizar usuarios
+                self.detener.wait(self.aleatorio.uniform(0, 2 * self.pausa))
+        self.cliente.cerrar()
+
+
+def _commit_actual():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconocido'
+
+
+def _parsear_pesos(texto):
+    """Convertir 'login=5,ver_bien=30' en un dict de pesos"""
+    pesos = {nombre: peso for nombre, (_, peso) in ESCENARIOS.items()}
+    if texto:
+        for par in texto.split(','):
+            nombre, _, valor = par.partition('=')
+            if nombre.strip() not in ESCENARIOS:
+                raise SystemExit(f'Escenario desconocido: {nombre}')
+            pesos[nombre.strip()] = float(valor)
+    return pesos
+
+
+def ejecutar(args):
+    """Ejecutar la prueba de carga por etapas de concurrencia creciente"""
+    etapas = [int(n) for n in args.etapas.split(',')]
+    pesos = _parsear_pesos(args.pesos)
+    if args.replay and not args.pesos:
+        pesos['replay'] = 50
+
+    poliza_ids = [int(p) for p in args.polizas.split(',')] if args.polizas else None
+    contexto = preparar_contexto(
+        args.base_url, args.usuario, args.clave,
+        poliza_ids=poliza_ids, solo_lectura=args.solo_lectura, archivo_replay=args.replay
+    )
+    print(f'-----> Datos descubiertos: {len(contexto.cliente_ids)} clientes, {len(contexto.bienes)} bienes, '
+          f'{len(contexto.aseguradora_ids)} aseguradoras, {len(contexto.poliza_ids)} pólizas, '
+          f'{len(contexto.rutas_replay)} rutas de replay')
+
+    nombres = [n for n, p in pesos.items() if p > 0]
+    funciones = [ESCENARIOS[n][0] for n in nombres]
+    valores_pesos = [pesos[n] for n in nombres]
+
+    registro = RegistroLatencias()
+    detener = threading.Event()
+    usuarios = []
+    resultados_etapas = []
+    capacidad_estimada = None
+
+    try:
+        for usuarios_objetivo in etapas:
+            # Rampa: agregar usuarios hasta el objetivo de la etapa
+            while len(usuarios) < usuarios_objetivo:
+                usuario = UsuarioVirtual(
+                    len(usuarios), args.base_url, contexto, registro,
+                    funciones, valores_pesos, args.pausa, detener
+                )
+                usuario.start()
+                usuarios.append(usuario)
+
+            # Calentamiento excluido de las métricas
+            time.sleep(args.calentamiento)
+            registro.reiniciar()
+            inicio = time.perf_counter()
+            time.sleep(args.duracion)
+            duracion = time.perf_counter() - inicio
+
+            resumen = registro.resumen(duracion)
+            resumen['usuarios'] = usuarios_objetivo
+            resumen['duracion_s'] = round(duracion, 2)
+            resultados_etapas.append(resumen)
+            _imprimir_etapa(resumen)
+
+            if capacidad_estimada is None and resumen['total']['p99_ms'] > args.slo_p99_ms:
+                anterior = resultados_etapas[-2]['usuarios'] if len(resultados_etapas) > 1 else 0
+                capacidad_estimada = anterior
+                print(f'-----> p99 {resumen["total"]["p99_ms"]} ms supera el SLO de {args.slo_p99_ms} ms '
+                      f'con {usuarios_objetivo} usuarios')
+                if args.detener_en_slo:
+                    break
+    finally:
+        detener.set()
+        for usuario in usuarios:
+            usuario.join(timeout=args.duracion)
+
+    resultado = {
+        'meta': {
+            'commit': _commit_actual(),
+            'fecha': datetime.utcnow().isoformat(),
+            'base_url': args.base_url,
+            'etapas': etapas,
+            'duracion_etapa_s': args.duracion,
+            'pesos': pesos,
+            'slo_p99_ms': args.slo_p99_ms,
+            'capacidad_estimada_usuarios': capacidad_estimada if capacidad_estimada is not None else etapas[-1]
+        },
+        'etapas': resultados_etapas
+    }
+
+    salida = args.salida
+    if not salida:
+        os.makedirs(DIRECTORIO_RESULTADOS, exist_ok=True)
+        marca = datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+        salida = os.path.join(DIRECTORIO_RESULTADOS, f"{marca}-{resultado['meta']['commit']}.json")
+    with open(salida, 'w', encoding='utf-8') as archivo:
+        json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+    print(f'-----> Resultados guardados en {salida}')
+
+
+def _imprimir_etapa(resumen):
+    total = resumen['total']
+    print('')
+    print(f"=== {resumen['usuarios']} usuarios | {total['rps']:.1f} req/s | p50 {total['p50_ms']} ms | "
+          f"p99 {total['p99_ms']} ms | errores {total['tasa_error'] * 100:.2f}% ===")
+    print(f"{'endpoint':<48} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err%':>6}")
+    for etiqueta, datos in resumen['endpoints'].items():
+        print(f"{etiqueta:<48} {datos['rps']:>8.1f} {datos['p50_ms']:>8.1f} {datos['p95_ms']:>8.1f} "
+              f"{datos['p99_ms']:>8.1f} {datos['tasa_error'] * 100:>6.2f}")
+
+
+def comparar(args):
+    """Comparar dos archivos de resultados etapa por etapa y endpoint por endpoint"""
+    with open(args.base, encoding='utf-8') as archivo:
+        base = json.load(archivo)
+    with open(args.nuevo, encoding='utf-8') as archivo:
+        nuevo = json.load(archivo)
+
+    print(f"-----> Base: {base['meta']['commit']}  Nuevo: {nuevo['meta']['commit']}")
+    etapas_base = {e['usuarios']: e for e in base['etapas']}
+    regresiones = 0
+
+    for etapa in nuevo['etapas']:
+        anterior = etapas_base.get(etapa['usuarios'])
+        if not anterior:
+            continue
+        print('')
+        print(f"=== {etapa['usuarios']} usuarios ===")
+        print(f"{'endpoint':<48} {'rps Δ%':>8} {'p50 Δ%':>8} {'p99 Δ%':>8}")
+        filas = [('TOTAL', anterior['total'], etapa['total'])]
+        filas += [
+            (nombre, anterior['endpoints'][nombre], datos)
+            for nombre, datos in etapa['endpoints'].items()
+            if nombre in anterior['endpoints']
+        ]
+        for nombre, antes, despues in filas:
+            delta_p99 = _delta(antes['p99_ms'], despues['p99_ms'])
+            if delta_p99 > args.umbral:
+                regresiones += 1
+            print(f"{nombre:<48} {_delta(antes['rps'], despues['rps']):>8.1f} "
+                  f"{_delta(antes['p50_ms'], despues['p50_ms']):>8.1f} {delta_p99:>8.1f}")
+
+    print('')
+    print(f"-----> Capacidad estimada: {base['meta'].get('capacidad_estimada_usuarios')} -> "
+          f"{nuevo['meta'].get('capacidad_estimada_usuarios')} usuarios")
+    if regresiones:
+        print(f'-----> {regresiones} endpoints con p99 peor en más de {args.umbral}%')
+        sys.exit(1)
+
+
+def _delta(antes, despues):
+    if not antes:
+        return 0.0
+    return (despues - antes) / antes * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='loadtest', description='Pruebas de carga de la API de seguros')
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+
+    p_ejecutar = subcomandos.add_parser('ejecutar', help='Ejecutar una prueba de carga por etapas')
+    p_ejecutar.add_argument('--base-url', default='http://localhost:5000')
+    p_ejecutar.add_argument('--usuario', required=True, help='Usuario del agente para el login')
+    p_ejecutar.add_argument('--clave', required=True, help='Contraseña del agente')
+    p_ejecutar.add_argument('--etapas', default='1,5,10,25,50', help='Usuarios concurrentes por etapa')
+    p_ejecutar.add_argument('--duracion', type=float, default=30, help='Segundos medidos por etapa')
+    p_ejecutar.add_argument('--calentamiento', type=float, default=5, help='Segundos sin medir al iniciar cada etapa')
+    p_ejecutar.add_argument('--pausa', type=float, default=0.0, help='Pausa media entre escenarios por usuario (s)')
+    p_ejecutar.add_argument('--pesos', help='Pesos de escenarios, ej: login=5,ver_bien=30,emitir_poliza=0')
+    p_ejecutar.add_argument('--polizas', help='IDs de pólizas para el escenario de pagos (separados por coma)')
+    p_ejecutar.add_argument('--replay', help='Access log de nginx cuyas solicitudes GET se repetirán')
+    p_ejecutar.add_argument('--solo-lectura', action='store_true', help='No ejecutar escenarios que escriben')
+    p_ejecutar.add_argument('--slo-p99-ms', type=float, default=500, help='Umbral de p99 para estimar capacidad')
+    p_ejecutar.add_argument('--detener-en-slo', action='store_true', help='Detener la rampa al superar el SLO')
+    p_ejecutar.add_argument('--salida', help='Archivo JSON de resultados')
+    p_ejecutar.set_defaults(funcion=ejecutar)
+
+    p_comparar = subcomandos.add_parser('comparar', help='Comparar dos ejecuciones')
+    p_comparar.add_argument('base')
+    p_comparar.add_argument('nuevo')
+    p_comparar.add_argument('--umbral', type=float, default=10, help='Regresión de p99 tolerada en %%')
+    p_comparar.set_defaults(funcion=comparar)
+
+    args = parser.parse_args()
+    args.funcion(args)
+
+
+if __name__ == '__main__':
+    main()
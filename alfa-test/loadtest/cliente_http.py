@@ -0,0 +1,72 @@
+import http.client
+import json
+import time
+from urllib.parse import urlsplit
+
+
+class ClienteHTTP:
+    """
+    Cliente HTTP mínimo con conexión keep-alive por usuario virtual.
+
+    Cada solicitud se registra en el RegistroLatencias con una etiqueta
+    normalizada (método + plantilla de ruta) para agrupar por endpoint.
+    """
+
+    def __init__(self, base_url, registro, timeout=30):
+        partes = urlsplit(base_url)
+        self.host = partes.hostname or 'localhost'
+        self.puerto = partes.port or (443 if partes.scheme == 'https' else 80)
+        self.https = partes.scheme == 'https'
+        self.prefijo = partes.path.rstrip('/')
+        self.registro = registro
+        self.timeout = timeout
+        self.token = None
+        self._conexion = None
+
+    def _conectar(self):
+        if self._conexion is None:
+            clase = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            self._conexion = clase(self.host, self.puerto, timeout=self.timeout)
+        return self._conexion
+
+    def cerrar(self):
+        if self._conexion is not None:
+            self._conexion.close()
+            self._conexion = None
+
+    def solicitar(self, metodo, ruta, etiqueta=None, cuerpo=None):
+        """
+        Ejecutar una solicitud y registrar su latencia
+
+        Returns:
+            tuple: (status, datos) donde datos es el JSON decodificado o None
+        """
+        etiqueta = etiqueta or f'{metodo} {ruta}'
+        headers = {'Accept': 'application/json', 'Connection': 'keep-alive'}
+        payload = None
+        if cuerpo is not None:
+            payload = json.dumps(cuerpo).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+
+        inicio = time.perf_counter()
+        try:
+            conexion = self._conectar()
+            conexion.request(metodo, self.prefijo + ruta, body=payload, headers=headers)
+            respuesta = conexion.getresponse()
+            contenido = respuesta.read()
+            status = respuesta.status
+        except (OSError, http.client.HTTPException):
+            # Conexión caída: se registra como error y se reabre en la siguiente solicitud
+            self.cerrar()
+            self.registro.registrar(etiqueta, (time.perf_counter() - inicio) * 1000, 0, 0)
+            return 0, None
+
+        self.registro.registrar(etiqueta, (time.perf_counter() - inicio) * 1000, status, len(contenido))
+
+        try:
+            datos = json.loads(contenido) if contenido else None
+        except ValueError:
+            datos = None
+        return status, datos
@@ -0,0 +1,226 @@
+import re
+from datetime import date, timedelta
+
+from loadtest.cliente_http import ClienteHTTP
+from loadtest.metricas import RegistroLatencias
+
+# Campo de avalúo y campo asegurado principal por tipo de bien (para cotizar sin exceder el avalúo)
+CAMPOS_VALOR_POR_TIPO = {
+    'HOGAR': ('valor_inmueble_avaluo', 'valor_inmueble_asegurado'),
+    'VEHICULO': ('valor_vehiculo', 'valor_vehiculo_asegurado'),
+    'COPROPIEDAD': ('valor_edificio_area_comun_avaluo', 'valor_area_comun_asegurado'),
+    'OTRO': ('valor_bien_asegurar', 'valor_asegurado')
+}
+
+PATRON_LOG_NGINX = re.compile(r'"(GET) (/api/\S*) HTTP/[\d.]+" (\d{3})')
+
+
+class ContextoCarga:
+    """Datos compartidos por los usuarios virtuales (ids descubiertos en la API)"""
+
+    def __init__(self, usuario, clave, solo_lectura=False):
+        self.usuario = usuario
+        self.clave = clave
+        self.solo_lectura = solo_lectura
+        self.agente_id = None
+        self.cliente_ids = []
+        self.bienes = []
+        self.aseguradora_ids = []
+        self.poliza_ids = []
+        self.rutas_replay = []
+
+
+def etiqueta_ruta(metodo, ruta):
+    """Normalizar una ruta concreta a su plantilla (/api/clientes/7 -> /api/clientes/<id>)"""
+    plantilla = re.sub(r'/\d+', '/<id>', ruta.split('?')[0])
+    return f'{metodo} {plantilla}'
+
+
+def iniciar_sesion(cliente, contexto):
+    """Login de agente; guarda el token en el cliente HTTP"""
+    status, datos = cliente.solicitar('POST', '/api/auth/agente/login', 'POST /api/auth/agente/login', {
+        'usuario': contexto.usuario,
+        'password': contexto.clave
+    })
+    if status == 200 and datos and datos.get('data'):
+        cliente.token = datos['data'].get('token')
+        return datos['data'].get('agente')
+    return None
+
+
+def preparar_contexto(base_url, usuario, clave, poliza_ids=None, solo_lectura=False, archivo_replay=None):
+    """Descubrir ids reales de la API para alimentar los escenarios"""
+    contexto = ContextoCarga(usuario, clave, solo_lectura)
+    cliente = ClienteHTTP(base_url, RegistroLatencias())
+
+    agente = iniciar_sesion(cliente, contexto)
+    if agente:
+        contexto.agente_id = agente.get('id')
+
+    status, datos = cliente.solicitar('GET', '/api/clientes')
+    if status == 200 and datos:
+        contexto.cliente_ids = [c['id'] for c in datos.get('data', [])]
+
+    status, datos = cliente.solicitar('GET', '/api/bienes')
+    if status == 200 and datos:
+        contexto.bienes = datos.get('data', [])
+
+    status, datos = cliente.solicitar('GET', '/api/aseguradoras')
+    if status == 200 and datos:
+        contexto.aseguradora_ids = [a['id'] for a in datos.get('aseguradoras', [])]
+
+    if poliza_ids:
+        contexto.poliza_ids = list(poliza_ids)
+    else:
+        status, datos = cliente.solicitar('GET', '/api/polizas?per_page=200')
+        if status == 200 and datos:
+            contexto.poliza_ids = [p['id'] for p in datos.get('data', [])]
+
+    if archivo_replay:
+        contexto.rutas_replay = cargar_rutas_replay(archivo_replay)
+
+    cliente.cerrar()
+    return contexto
+
+
+def cargar_rutas_replay(ruta_archivo):
+    """
+    Leer un access log de nginx (formato 'main') y conservar las solicitudes GET a /api/
+
+    Las rutas repetidas se conservan para que el muestreo respete la frecuencia real.
+    """
+    rutas = []
+    with open(ruta_archivo, encoding='utf-8', errors='replace') as archivo:
+        for linea in archivo:
+            coincidencia = PATRON_LOG_NGINX.search(linea)
+            if coincidencia and coincidencia.group(3) < '500':
+                rutas.append(coincidencia.group(2))
+    return rutas
+
+
+# =============================================================================
+# ESCENARIOS
+# Cada escenario recibe (cliente, contexto, aleatorio) y ejecuta una secuencia
+# de solicitudes equivalente a una acción real de un agente en el front end.
+# =============================================================================
+
+def escenario_login(cliente, contexto, aleatorio):
+    """Login de agente (ejercita bcrypt y generación de JWT)"""
+    iniciar_sesion(cliente, contexto)
+
+
+def escenario_navegar_clientes(cliente, contexto, aleatorio):
+    """Listar los clientes del agente y abrir uno con sus bienes y agentes"""
+    if contexto.agente_id:
+        cliente.solicitar('GET', f'/api/agentes/{contexto.agente_id}/clientes', 'GET /api/agentes/<id>/clientes')
+    else:
+        cliente.solicitar('GET', '/api/clientes')
+
+    if not contexto.cliente_ids:
+        return
+    cliente_id = aleatorio.choice(contexto.cliente_ids)
+    cliente.solicitar('GET', f'/api/clientes/{cliente_id}', 'GET /api/clientes/<id>')
+    cliente.solicitar('GET', f'/api/clientes/{cliente_id}/agentes', 'GET /api/clientes/<id>/agentes')
+    cliente.solicitar('GET', f'/api/clientes/{cliente_id}/bienes', 'GET /api/clientes/<id>/bienes')
+
+
+def escenario_ver_bien(cliente, contexto, aleatorio):
+    """Abrir un bien y sus opciones de seguro"""
+    if not contexto.bienes:
+        return
+    bien = aleatorio.choice(contexto.bienes)
+    cliente.solicitar('GET', f"/api/bienes/{bien['id']}", 'GET /api/bienes/<id>')
+    cliente.solicitar('GET', f"/api/bienes/{bien['id']}/opciones-seguro", 'GET /api/bienes/<id>/opciones-seguro')
+
+
+def escenario_simular_prima(cliente, contexto, aleatorio):
+    """Simular la prima de un bien con una aseguradora"""
+    if not contexto.bienes or not contexto.aseguradora_ids:
+        return
+    bien = aleatorio.choice(contexto.bienes)
+    cliente.solicitar('POST', '/api/simulacion-prima', 'POST /api/simulacion-prima', {
+        'bien_id': bien['id'],
+        'aseguradora_id': aleatorio.choice(contexto.aseguradora_ids),
+        'valores_asegurados': _valores_asegurados(bien, aleatorio)
+    })
+
+
+def escenario_emitir_poliza(cliente, contexto, aleatorio):
+    """Cotizar un bien y emitir la póliza a partir de la opción creada"""
+    if contexto.solo_lectura or not contexto.bienes or not contexto.aseguradora_ids or not contexto.cliente_ids:
+        return
+    bien = aleatorio.choice(contexto.bienes)
+    status, datos = cliente.solicitar('POST', '/api/opciones-seguro', 'POST /api/opciones-seguro', {
+        'bien_id': bien['id'],
+        'aseguradora_id': aleatorio.choice(contexto.aseguradora_ids),
+        'tipo_opcion': bien['tipo_bien'],
+        'valores_asegurados': _valores_asegurados(bien, aleatorio),
+        'valor_prima_total': aleatorio.randint(500000, 3000000)
+    })
+    if status != 201 or not datos or not datos.get('opcion_seguro'):
+        return
+
+    cliente_id = aleatorio.choice(contexto.cliente_ids)
+    inicio = date.today()
+    fin = inicio + timedelta(days=365)
+    status, datos = cliente.solicitar('POST', '/api/polizas', 'POST /api/polizas', {
+        'opcion_seguro_id': datos['opcion_seguro']['id'],
+        'tomador_id': cliente_id,
+        'beneficiario_id': cliente_id,
+        'asegurado_id': cliente_id,
+        'fecha_inicio': inicio.isoformat(),
+        'fecha_fin': fin.isoformat(),
+        'forma_pago': 'MENSUAL',
+        'fecha_inicio_vigencia': inicio.isoformat(),
+        'fecha_fin_vigencia': fin.isoformat(),
+        'medio_pago': 'Financiación',
+        'numero_cuotas': 12
+    })
+    if status == 201 and datos and datos.get('data'):
+        contexto.poliza_ids.append(datos['data']['id'])
+
+
+def escenario_registrar_pago(cliente, contexto, aleatorio):
+    """Consultar el plan de pagos de una póliza y pagar la primera cuota pendiente"""
+    if not contexto.poliza_ids:
+        return
+    poliza_id = aleatorio.choice(contexto.poliza_ids)
+    status, datos = cliente.solicitar('GET', f'/api/polizas/{poliza_id}/plan-pagos', 'GET /api/polizas/<id>/plan-pagos')
+    if contexto.solo_lectura or status != 200 or not datos:
+        return
+
+    pendientes = [c for c in datos.get('data', []) if c.get('puede_pagarse')]
+    if not pendientes:
+        return
+    cuota = pendientes[0]
+    cliente.solicitar('POST', f"/api/polizas/{poliza_id}/pagos/{cuota['id']}", 'POST /api/polizas/<id>/pagos/<id>', {
+        'valor_pagado': cuota.get('valor_a_pagar'),
+        'referencia_pago': f'LT-{aleatorio.randint(0, 10**9)}'
+    })
+
+
+def escenario_replay(cliente, contexto, aleatorio):
+    """Repetir una solicitud GET tomada del access log de producción"""
+    if not contexto.rutas_replay:
+        return
+    ruta = aleatorio.choice(contexto.rutas_replay)
+    cliente.solicitar('GET', ruta, etiqueta_ruta('GET', ruta))
+
+
+def _valores_asegurados(bien, aleatorio):
+    """Valores asegurados por debajo del avalúo del bien para que la cotización sea válida"""
+    campo_avaluo, campo_asegurado = CAMPOS_VALOR_POR_TIPO.get(bien.get('tipo_bien'), (None, 'valor_asegurado'))
+    avaluo = (bien.get('bien_especifico') or {}).get(campo_avaluo) or 100000000
+    return {campo_asegurado: round(float(avaluo) * aleatorio.uniform(0.3, 0.9), 2)}
+
+
+# Escenarios disponibles y peso por defecto (proporción aproximada del tráfico real)
+ESCENARIOS = {
+    'login': (escenario_login, 5),
+    'navegar_clientes': (escenario_navegar_clientes, 35),
+    'ver_bien': (escenario_ver_bien, 25),
+    'simular_prima': (escenario_simular_prima, 15),
+    'emitir_poliza': (escenario_emitir_poliza, 5),
+    'registrar_pago': (escenario_registrar_pago, 15),
+    'replay': (escenario_replay, 0)
+}
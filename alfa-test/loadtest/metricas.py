@@ -0,0 +1,88 @@
+import threading
+
+
+def percentil(valores_ordenados, p):
+    """Calcular el percentil p (0-100) sobre una lista ya ordenada"""
+    if not valores_ordenados:
+        return 0.0
+    if len(valores_ordenados) == 1:
+        return valores_ordenados[0]
+
+    # Interpolación lineal entre los dos rangos más cercanos
+    posicion = (len(valores_ordenados) - 1) * (p / 100.0)
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(valores_ordenados) - 1)
+    fraccion = posicion - inferior
+    return valores_ordenados[inferior] + (valores_ordenados[superior] - valores_ordenados[inferior]) * fraccion
+
+
+class RegistroLatencias:
+    """Acumula latencias, errores y tamaños de respuesta por endpoint (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._muestras = {}
+
+    def registrar(self, etiqueta, latencia_ms, status, bytes_respuesta):
+        """Registrar una solicitud completada (status 0 = error de conexión)"""
+        with self._lock:
+            muestra = self._muestras.setdefault(etiqueta, {
+                'latencias': [],
+                'errores': 0,
+                'bytes': 0,
+                'status': {}
+            })
+            muestra['latencias'].append(latencia_ms)
+            muestra['bytes'] += bytes_respuesta
+            muestra['status'][str(status)] = muestra['status'].get(str(status), 0) + 1
+            if status == 0 or status >= 500:
+                muestra['errores'] += 1
+
+    def reiniciar(self):
+        """Descartar todas las muestras (al iniciar una nueva etapa)"""
+        with self._lock:
+            self._muestras = {}
+
+    def resumen(self, duracion_segundos):
+        """Construir el resumen por endpoint y el total de la etapa"""
+        with self._lock:
+            muestras = {k: dict(v, latencias=list(v['latencias'])) for k, v in self._muestras.items()}
+
+        endpoints = {}
+        todas = []
+        total_errores = 0
+        for etiqueta, muestra in sorted(muestras.items()):
+            latencias = sorted(muestra['latencias'])
+            todas.extend(latencias)
+            total_errores += muestra['errores']
+            endpoints[etiqueta] = RegistroLatencias._resumir(
+                latencias, muestra['errores'], duracion_segundos,
+                bytes_totales=muestra['bytes'], status=muestra['status']
+            )
+
+        todas.sort()
+        return {
+            'total': RegistroLatencias._resumir(todas, total_errores, duracion_segundos),
+            'endpoints': endpoints
+        }
+
+    @staticmethod
+    def _resumir(latencias, errores, duracion_segundos, bytes_totales=None, status=None):
+        """Resumir una lista ordenada de latencias en milisegundos"""
+        cantidad = len(latencias)
+        resultado = {
+            'solicitudes': cantidad,
+            'errores': errores,
+            'tasa_error': (errores / cantidad) if cantidad else 0.0,
+            'rps': (cantidad / duracion_segundos) if duracion_segundos > 0 else 0.0,
+            'p50_ms': round(percentil(latencias, 50), 2),
+            'p90_ms': round(percentil(latencias, 90), 2),
+            'p95_ms': round(percentil(latencias, 95), 2),
+            'p99_ms': round(percentil(latencias, 99), 2),
+            'max_ms': round(latencias[-1], 2) if latencias else 0.0
+        }
+        if bytes_totales is not None:
+            resultado['bytes_promedio'] = int(bytes_totales / cantidad) if cantidad else 0
+        if status is not None:
+            resultado['status'] = status
+        return resultado
@@ -1,55 +1,23 @@
 #!/usr/bin/env python3
 
 import sys
-import time
-import pymysql
 from app import create_app
-import os
-
-def check_mysql_connection():
-    """Verificar si MySQL está disponible antes de iniciar la API"""
-    max_retries = 30
-    retry_count = 0
-    
-    while retry_count < max_retries:
-        try:
-            # Intentar conectar a MySQL
-            connection = pymysql.connect(
-                host=os.getenv('DB_HOST', 'localhost'),
-                port=3306,
-                user='alfa_user',
-                password='AlfaUser2024!',
-                database='alfa_db'
-            )
-            connection.close()
-            print("-----> Conexión a MySQL exitosa!")
-            return True
-        except Exception as e:
-            retry_count += 1
-            print(f"-----> Intento {retry_count}/{max_retries} - Esperando MySQL...")
-            print(f"-----> Error: {e}")
-            if retry_count >= max_retries:
-                print(f"-----> Error: No se pudo conectar a MySQL después de {max_retries} intentos")
-                print("-----> Asegúrate de que MySQL esté corriendo:")
-                print("   cd alfa-test && bash scripts/start_mysql.sh")
-                return False
-            time.sleep(2)
-    
-    return False
+from app.utils.salud import esperar_disponibilidad
 
 def main():
     print("-----> Iniciando API Flask...")
     
-    # Verificar conexión a MySQL
-    if not check_mysql_connection():
-        sys.exit(1)
-    
-    # Crear e iniciar la aplicación
+    # Crear la aplicación y verificar MySQL con el mismo pool que usará la API
     app = create_app()
+    if not esperar_disponibilidad(app):
+        print("-----> Asegúrate de que MySQL esté corriendo:")
+        print("   cd alfa-test && bash scripts/start_mysql.sh")
+        sys.exit(1)
     
     print("-----> API iniciada exitosamente!")
     print("-----> Endpoints disponibles:")
     print("   - Health Check: http://localhost:5000/api/health")
+    print("   - Liveness / Readiness: http://localhost:5000/api/health/live | /api/health/ready")
     print("   - 🔐 Autenticación: http://localhost:5000/api/auth/[agente|cliente]/login")
     print("   - Agentes: http://localhost:5000/api/agentes")
     print("   - Clientes: http://localhost:5000/api/clientes")
@@ -59,6 +27,7 @@ def main():
     print("   - Opciones de Seguro: http://localhost:5000/api/opciones-seguro")
     print("   - Pólizas: http://localhost:5000/api/polizas")
     print("   - Documentación Swagger: http://localhost:5000/docs/")
+    print("   - Métricas (Prometheus): http://localhost:5000/metrics")
     print("")
     print("-----> Sistema de autenticación JWT habilitado:")
     print("   - Login agentes: POST /api/auth/agente/login")
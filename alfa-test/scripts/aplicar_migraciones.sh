@@ -0,0 +1,42 @@
+#!/bin/bash
+
+# Script para aplicar las migraciones pendientes de database/migrations/
+# Cada archivo NNN_descripcion.sql se aplica una sola vez, en orden, y
+# registra su versión en la tabla schema_version.
+
+DB_HOST=${DB_HOST:-localhost}
+DB_USER=${DB_USER:-alfa_user}
+DB_PASSWORD=${DB_PASSWORD:-alfa_password}
+DB_NAME=${DB_NAME:-alfa_db}
+
+MYSQL="mysql -h $DB_HOST -u $DB_USER -p$DB_PASSWORD"
+
+echo "=====> Aplicando migraciones de base de datos..."
+
+# Verificar que MySQL esté corriendo
+if ! $MYSQL -e "SELECT 1" > /dev/null 2>&1; then
+    echo "=====> Error: No se pudo conectar a MySQL en $DB_HOST"
+    echo "=====> Asegúrate de que MySQL esté corriendo:"
+    echo "   bash scripts/start_mysql.sh"
+    exit 1
+fi
+
+# Versión actual (0 si la tabla schema_version aún no existe)
+VERSION_ACTUAL=$($MYSQL -N -s $DB_NAME -e "SELECT COALESCE(MAX(version), 0) FROM schema_version" 2>/dev/null)
+VERSION_ACTUAL=${VERSION_ACTUAL:-0}
+echo "=====> Versión actual del esquema: $VERSION_ACTUAL"
+
+for archivo in database/migrations/[0-9][0-9][0-9]_*.sql; do
+    version=$((10#$(basename "$archivo" | cut -c1-3)))
+    if [ "$version" -le "$VERSION_ACTUAL" ]; then
+        continue
+    fi
+
+    echo "=====> Aplicando $(basename "$archivo")..."
+    if ! $MYSQL $DB_NAME < "$archivo"; then
+        echo "=====> Error al aplicar $(basename "$archivo")"
+        exit 1
+    fi
+done
+
+echo "=====> Esquema actualizado a la versión $($MYSQL -N -s $DB_NAME -e "SELECT MAX(version) FROM schema_version")"
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Script de prueba de la cartera por edades: límites de los tramos
+
+No necesita la API corriendo ni MySQL: crea la aplicación sobre una base
+SQLite temporal.
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+ARCHIVO_BD = os.path.join(tempfile.mkdtemp(), 'cartera.db')
+
+from app.config import Config
+Config.SQLALCHEMY_DATABASE_URI = f'sqlite:///{ARCHIVO_BD}'
+Config.SQLALCHEMY_ENGINE_OPTIONS = {}
+
+from app import create_app, db
+from app.models.aseguradora_model import Aseguradora
+from app.models.bien_model import Bien
+from app.models.hogar_model import Hogar
+from app.models.opcion_seguro_model import OpcionSeguro
+from app.models.poliza_model import Poliza
+from app.models.poliza_plan_pago_model import PolizaPlanPago
+from app.services.cartera_service import CarteraService
+
+FECHA_CORTE = date(2025, 3, 31)
+
+# Días vencidos a la fecha de corte -> tramo esperado
+CASOS = [
+    (-1, 'corriente'),
+    (0, '0_30'),
+    (1, '0_30'),
+    (30, '0_30'),
+    (31, '31_60'),
+    (60, '31_60'),
+    (61, '61_90'),
+    (90, '61_90'),
+    (91, 'mas_90'),
+]
+
+errores = 0
+
+def verificar(descripcion, obtenido, esperado):
+    global errores
+    if obtenido == esperado:
+        print(f"✅ {descripcion}: {obtenido}")
+    else:
+        errores += 1
+        print(f"❌ {descripcion}: se esperaba {esperado}, se obtuvo {obtenido}")
+
+def crear_cuotas():
+    """Una póliza con una cuota pendiente por cada caso"""
+    aseguradora = Aseguradora(nombre='Aseguradora de prueba')
+    hogar = Hogar(tipo_inmueble='Casa', valor_inmueble_avaluo=100000000)
+    db.session.add_all([aseguradora, hogar])
+    db.session.flush()
+    bien = Bien(tipo_bien='HOGAR', bien_especifico_id=hogar.id, estado='Activo')
+    db.session.add(bien)
+    db.session.flush()
+    opcion = OpcionSeguro(consecutivo='OPC-EDADES', bien_id=bien.id, aseguradora_id=aseguradora.id,
+                          tipo_opcion='HOGAR', opcion_especifica_id=1, valor_prima_total=1200000)
+    db.session.add(opcion)
+    db.session.flush()
+    poliza = Poliza(opcion_seguro_id=opcion.id, consecutivo_poliza='POL-EDADES',
+                    fecha_inicio_vigencia=FECHA_CORTE - timedelta(days=120),
+                    fecha_fin_vigencia=FECHA_CORTE + timedelta(days=245),
+                    estado_cartera='Vencida', valor_prima_neta=1000000, valor_iva=190000)
+    db.session.add(poliza)
+    db.session.flush()
+    for numero, (dias, _) in enumerate(CASOS, start=1):
+        db.session.add(PolizaPlanPago(
+            poliza_id=poliza.id, numero_cuota=numero, valor_a_pagar=100000,
+            fecha_maxima_pago=FECHA_CORTE - timedelta(days=dias), estado_pago='Pendiente de pago'
+        ))
+    db.session.commit()
+
+def main():
+    print("🧪 Probando los tramos de la cartera por edades")
+    print("=" * 60)
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        crear_cuotas()
+
+        datos, status = CarteraService.obtener_edades(FECHA_CORTE, dimensiones=())
+        verificar("Reporte", status, 200)
+        esperado = {nombre: 0 for nombre, _ in CarteraService.TRAMOS}
+        for _, tramo in CASOS:
+            esperado[tramo] += 1
+        verificar("Cuotas por tramo",
+                  {nombre: tramo['cuotas'] for nombre, tramo in datos['totales']['tramos'].items()}, esperado)
+
+        detalle = {cuota['numero_cuota']: cuota['tramo'] for cuota in CarteraService.iterar_detalle_edades(FECHA_CORTE)}
+        for numero, (dias, tramo) in enumerate(CASOS, start=1):
+            verificar(f"Tramo de la cuota con {dias} días vencidos", detalle.get(numero), tramo)
+
+    print("=" * 60)
+    if errores:
+        print(f"❌ {errores} verificaciones fallaron")
+        sys.exit(1)
+    print("✅ Todas las verificaciones pasaron")
+
+if __name__ == "__main__":
+    main()
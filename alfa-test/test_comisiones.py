@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Script de prueba del libro de comisiones: reverso al cancelar y liquidaciones
+
+No necesita la API corriendo ni MySQL: crea la aplicación sobre una base
+SQLite temporal.
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+ARCHIVO_BD = os.path.join(tempfile.mkdtemp(), 'comisiones.db')
+
+from app.config import Config
+Config.SQLALCHEMY_DATABASE_URI = f'sqlite:///{ARCHIVO_BD}'
+Config.SQLALCHEMY_ENGINE_OPTIONS = {}
+
+from sqlalchemy import func, select
+from app import create_app, db
+from app.models.aseguradora_model import Aseguradora
+from app.models.bien_model import Bien
+from app.models.comision_model import ComisionLiquidacion, ComisionMovimiento
+from app.models.hogar_model import Hogar
+from app.models.opcion_seguro_model import OpcionSeguro
+from app.models.poliza_model import Poliza
+from app.models.poliza_plan_pago_model import PolizaPlanPago
+from app.services.comision_service import ComisionService
+
+errores = 0
+
+def verificar(descripcion, obtenido, esperado):
+    global errores
+    if obtenido == esperado:
+        print(f"✅ {descripcion}: {obtenido}")
+    else:
+        errores += 1
+        print(f"❌ {descripcion}: se esperaba {esperado}, se obtuvo {obtenido}")
+
+def crear_poliza(aseguradora_id, consecutivo, cuotas_pagadas):
+    """Póliza de prima 800.000 y comisión 144.000 en 6 cuotas, con las primeras pagadas"""
+    hogar = Hogar(tipo_inmueble='Casa', valor_inmueble_avaluo=100000000)
+    db.session.add(hogar)
+    db.session.flush()
+    bien = Bien(tipo_bien='HOGAR', bien_especifico_id=hogar.id, estado='Activo')
+    db.session.add(bien)
+    db.session.flush()
+    opcion = OpcionSeguro(consecutivo=f'OPC-{consecutivo}', bien_id=bien.id, aseguradora_id=aseguradora_id,
+                          tipo_opcion='HOGAR', opcion_especifica_id=1, valor_prima_total=800000)
+    db.session.add(opcion)
+    db.session.flush()
+    poliza = Poliza(opcion_seguro_id=opcion.id, consecutivo_poliza=consecutivo,
+                    fecha_inicio_vigencia=date.today() - timedelta(days=60),
+                    fecha_fin_vigencia=date.today() + timedelta(days=300),
+                    estado_cartera='Al Día', valor_prima_neta=800000, valor_iva=0,
+                    ingreso_comision_percibido=144000)
+    db.session.add(poliza)
+    db.session.flush()
+    for numero in range(1, 7):
+        db.session.add(PolizaPlanPago(
+            poliza_id=poliza.id, numero_cuota=numero,
+            valor_a_pagar=133333.35 if numero == 6 else 133333.33,
+            fecha_maxima_pago=date.today() + timedelta(days=30 * (numero - 2)),
+            estado_pago='Pagado' if numero <= cuotas_pagadas else 'Pendiente de pago',
+            fecha_pago_real=date.today() if numero <= cuotas_pagadas else None
+        ))
+    db.session.flush()
+    return poliza
+
+def movimiento(clave):
+    return db.session.execute(
+        select(ComisionMovimiento.valor_comision).where(ComisionMovimiento.clave == clave)
+    ).scalar()
+
+def main():
+    print("🧪 Probando el libro de comisiones")
+    print("=" * 60)
+
+    app = create_app()
+    client = app.test_client()
+    with app.app_context():
+        db.create_all()
+        aseguradora = Aseguradora(nombre='Aseguradora de prueba')
+        db.session.add(aseguradora)
+        db.session.flush()
+        aseguradora_id = aseguradora.id
+
+        # 1. Causación, dos recaudos por pago y cancelación
+        print("1. Reverso después de un recaudo parcial")
+        poliza = crear_poliza(aseguradora_id, 'POL-PARCIAL', cuotas_pagadas=0)
+        ComisionService.registrar_causacion(poliza, aseguradora_id)
+        db.session.commit()
+        poliza_id = poliza.id
+        cuotas = db.session.execute(
+            select(PolizaPlanPago.id).where(PolizaPlanPago.poliza_id == poliza_id).order_by(PolizaPlanPago.numero_cuota)
+        ).scalars().all()
+
+    for cuota_id in cuotas[:2]:
+        response = client.post(f"/api/polizas/{poliza_id}/pagos/{cuota_id}", json={'valor_pagado': 133333.33})
+        verificar(f"Pago de la cuota {cuota_id}", response.status_code, 200)
+    response = client.post(f"/api/polizas/{poliza_id}/cancelar", json={'motivo': 'Solicitud del cliente'})
+    verificar("Cancelación", response.status_code, 200)
+
+    with app.app_context():
+        verificar("Causación", float(movimiento(f'C-{poliza_id}')), 144000.0)
+        verificar("Recaudo cuota 1", float(movimiento(f'R-{cuotas[0]}')), 24000.0)
+        verificar("Reverso (causado menos recaudado)", float(movimiento(f'X-{poliza_id}')), -96000.0)
+        saldo = db.session.execute(
+            select(func.sum(ComisionMovimiento.valor_comision))
+            .where(ComisionMovimiento.poliza_id == poliza_id, ComisionMovimiento.tipo != 'Recaudo')
+        ).scalar()
+        verificar("Comisión que queda causada", float(saldo), 48000.0)
+    print("-" * 50)
+
+    # 2. Póliza cancelada antes del libro: reconstruir_libro usa la misma regla
+    print("2. Reverso al reconstruir el libro")
+    with app.app_context():
+        poliza = crear_poliza(aseguradora_id, 'POL-ANTERIOR', cuotas_pagadas=2)
+        poliza.estado_cartera = 'Cancelada'
+        db.session.query(PolizaPlanPago)\
+            .filter(PolizaPlanPago.poliza_id == poliza.id, PolizaPlanPago.estado_pago != 'Pagado')\
+            .update({'estado_pago': 'Cancelado'})
+        db.session.commit()
+        poliza_id = poliza.id
+        resumen = ComisionService.reconstruir_libro()
+        verificar("Movimientos agregados", resumen, {'causaciones': 1, 'recaudos': 2, 'reversos': 1})
+        verificar("Reverso reconstruido", float(movimiento(f'X-{poliza_id}')), -96000.0)
+        verificar("Segunda reconstrucción", ComisionService.reconstruir_libro(),
+                  {'causaciones': 0, 'recaudos': 0, 'reversos': 0})
+    print("-" * 50)
+
+    # 3. El GET calcula sin escribir; el POST guarda
+    print("3. GET /cartera/comisiones no escribe")
+    with app.app_context():
+        periodo = ComisionService.periodo_actual()
+    response = client.get(f"/api/cartera/comisiones?periodo={periodo}")
+    verificar("GET", response.status_code, 200)
+    liquidacion = response.get_json()['data']['liquidaciones'][0]
+    verificar("Causado", liquidacion['valor_causado'], 144000.0)
+    verificar("Reversado", liquidacion['valor_reversado'], 192000.0)
+    with app.app_context():
+        verificar("Liquidaciones guardadas tras el GET", ComisionLiquidacion.query.count(), 0)
+    response = client.post("/api/cartera/comisiones", json={'periodo': periodo})
+    verificar("POST", response.status_code, 200)
+    with app.app_context():
+        verificar("Liquidaciones guardadas tras el POST", ComisionLiquidacion.query.count(), 1)
+
+    print("=" * 60)
+    if errores:
+        print(f"❌ {errores} verificaciones fallaron")
+        sys.exit(1)
+    print("✅ Todas las verificaciones pasaron")
+
+if __name__ == "__main__":
+    main()
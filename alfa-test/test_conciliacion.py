@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Script de prueba de la lectura de valores del extracto bancario (conciliación)
+
+No necesita la API corriendo ni la base de datos.
+"""
+
+import sys
+from decimal import Decimal
+
+from app.services.conciliacion_service import ConciliacionService
+
+CASOS = [
+    # Separador de miles con punto, como se escriben los valores en Colombia
+    ('150.000', Decimal('150000.00')),
+    ('1.500.000', Decimal('1500000.00')),
+    ('$ 1.500.000', Decimal('1500000.00')),
+    ('1.500.000,50', Decimal('1500000.50')),
+    # Separador de miles con coma
+    ('150,000', Decimal('150000.00')),
+    ('1,234,567.89', Decimal('1234567.89')),
+    # Separador decimal
+    ('150.5', Decimal('150.50')),
+    ('150,50', Decimal('150.50')),
+    ('1234567.89', Decimal('1234567.89')),
+    ('150', Decimal('150.00')),
+    # Valores inválidos
+    ('', None),
+    ('abc', None),
+]
+
+def main():
+    print("🧪 Probando la lectura de valores del extracto")
+    print("=" * 60)
+
+    errores = 0
+    for texto, esperado in CASOS:
+        obtenido = ConciliacionService._leer_valor(texto)
+        if obtenido == esperado:
+            print(f"✅ {texto!r} -> {obtenido}")
+        else:
+            errores += 1
+            print(f"❌ {texto!r} -> {obtenido} (se esperaba {esperado})")
+
+    print("=" * 60)
+    if errores:
+        print(f"❌ {errores} casos fallaron")
+        sys.exit(1)
+    print("✅ Todos los casos pasaron")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Script de prueba del snapshot de mora: lectura mientras se genera
+
+No necesita la API corriendo ni MySQL: crea la aplicación sobre una base
+SQLite temporal. Cada consulta concurrente corre en otro hilo, con su propia
+conexión.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from datetime import date, timedelta
+
+ARCHIVO_BD = os.path.join(tempfile.mkdtemp(), 'mora.db')
+
+from app.config import Config
+Config.SQLALCHEMY_DATABASE_URI = f'sqlite:///{ARCHIVO_BD}'
+Config.SQLALCHEMY_ENGINE_OPTIONS = {}
+
+from app import create_app, db
+from app.models.aseguradora_model import Aseguradora
+from app.models.bien_model import Bien
+from app.models.hogar_model import Hogar
+from app.models.opcion_seguro_model import OpcionSeguro
+from app.models.poliza_model import Poliza
+from app.models.poliza_plan_pago_model import PolizaPlanPago
+from app.services.mora_service import MoraService
+
+POLIZAS = 6
+
+errores = 0
+
+def verificar(descripcion, obtenido, esperado):
+    global errores
+    if obtenido == esperado:
+        print(f"✅ {descripcion}: {obtenido}")
+    else:
+        errores += 1
+        print(f"❌ {descripcion}: se esperaba {esperado}, se obtuvo {obtenido}")
+
+def crear_cartera():
+    """POLIZAS pólizas con dos cuotas vencidas cada una"""
+    aseguradora = Aseguradora(nombre='Aseguradora de prueba')
+    db.session.add(aseguradora)
+    db.session.flush()
+    for numero in range(POLIZAS):
+        hogar = Hogar(tipo_inmueble='Casa', valor_inmueble_avaluo=100000000)
+        db.session.add(hogar)
+        db.session.flush()
+        bien = Bien(tipo_bien='HOGAR', bien_especifico_id=hogar.id, estado='Activo')
+        db.session.add(bien)
+        db.session.flush()
+        opcion = OpcionSeguro(consecutivo=f'OPC-MORA-{numero}', bien_id=bien.id, aseguradora_id=aseguradora.id,
+                              tipo_opcion='HOGAR', opcion_especifica_id=1, valor_prima_total=1200000)
+        db.session.add(opcion)
+        db.session.flush()
+        poliza = Poliza(opcion_seguro_id=opcion.id, consecutivo_poliza=f'POL-MORA-{numero}',
+                        fecha_inicio_vigencia=date.today() - timedelta(days=90),
+                        fecha_fin_vigencia=date.today() + timedelta(days=270),
+                        estado_cartera='Vencida', valor_prima_neta=1000000, valor_iva=190000)
+        db.session.add(poliza)
+        db.session.flush()
+        for cuota in (1, 2):
+            db.session.add(PolizaPlanPago(
+                poliza_id=poliza.id, numero_cuota=cuota, valor_a_pagar=100000,
+                fecha_maxima_pago=date.today() - timedelta(days=90 - 30 * cuota),
+                estado_pago='Pendiente de pago'
+            ))
+    db.session.commit()
+
+def leer_en_otro_hilo(app):
+    """Resumen de mora consultado desde otra conexión, como lo haría otra solicitud"""
+    resultado = {}
+
+    def leer():
+        with app.app_context():
+            resultado['datos'], resultado['status'] = MoraService.obtener_mora_cartera()
+
+    hilo = threading.Thread(target=leer)
+    hilo.start()
+    hilo.join(30)
+    return resultado.get('datos') or {}
+
+def main():
+    print("🧪 Probando el snapshot de mora")
+    print("=" * 60)
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        crear_cartera()
+
+        # 1. Sin snapshot: mientras se genera el primero se calcula en vivo, completo
+        print("1. Lectura durante la primera generación")
+        en_vivo = MoraService.obtener_mora_cartera()[0]['resumen']
+        lecturas = []
+        resumen = MoraService.generar_snapshot(
+            tamano_lote=1, progreso=lambda hechas, total: lecturas.append(leer_en_otro_hilo(app))
+        )
+        verificar("Lecturas hechas durante la generación", len(lecturas) >= POLIZAS, True)
+        verificar("Fuente durante la generación", {l.get('fuente') for l in lecturas}, {'calculo'})
+        verificar("Pólizas en mora vistas", {l['resumen']['polizas_en_mora'] for l in lecturas}, {POLIZAS})
+        verificar("Snapshot igual al cálculo en vivo",
+                  {k: v for k, v in resumen.items() if k != 'fecha_corte'}, en_vivo)
+        print("-" * 50)
+
+        # 2. Con snapshot: mientras se regenera se sigue viendo el anterior
+        print("2. Lectura durante la regeneración")
+        anterior = MoraService.obtener_mora_cartera()[0]
+        verificar("Fuente con snapshot", anterior['fuente'], 'snapshot')
+        PolizaPlanPago.query.filter(PolizaPlanPago.numero_cuota == 1)\
+            .update({'estado_pago': 'Pagado', 'fecha_pago_real': date.today()})
+        db.session.commit()
+        lecturas = []
+        resumen = MoraService.generar_snapshot(
+            tamano_lote=1, progreso=lambda hechas, total: lecturas.append(leer_en_otro_hilo(app))
+        )
+        verificar("Lecturas hechas durante la regeneración", len(lecturas) >= POLIZAS, True)
+        verificar("Resúmenes vistos durante la regeneración",
+                  [l['resumen'] for l in lecturas], [anterior['resumen']] * len(lecturas))
+        nuevo = MoraService.obtener_mora_cartera()[0]['resumen']
+        verificar("Cuotas vencidas después", nuevo['cuotas_vencidas'], POLIZAS)
+        verificar("Resumen después", nuevo, {k: v for k, v in resumen.items() if k != 'fecha_corte'})
+
+    print("=" * 60)
+    if errores:
+        print(f"❌ {errores} verificaciones fallaron")
+        sys.exit(1)
+    print("✅ Todas las verificaciones pasaron")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el endpoint de portafolio (vista 360) de un cliente
+"""
+
+import requests
+import sys
+
+BASE_URL = "http://localhost:5000/api"
+
+def main():
+    print("🧪 Probando endpoint de portafolio de cliente")
+    print("=" * 60)
+
+    try:
+        # 1. Obtener un cliente existente
+        print("1. Obtener clientes")
+        response = requests.get(f"{BASE_URL}/clientes")
+        clientes = response.json().get('data', [])
+        if not clientes:
+            print("❌ No hay clientes en la base de datos")
+            sys.exit(1)
+        cliente_id = clientes[0]['id']
+        print(f"✅ Usando cliente {cliente_id}")
+        print("-" * 50)
+
+        # 2. Obtener el portafolio completo
+        print(f"2. GET /clientes/{cliente_id}/portfolio")
+        response = requests.get(f"{BASE_URL}/clientes/{cliente_id}/portfolio")
+        print(f"Status: {response.status_code}")
+        if response.status_code != 200:
+            print(f"❌ Error - Expected 200, got {response.status_code}")
+            sys.exit(1)
+
+        data = response.json()['data']
+        etag = response.headers.get('ETag')
+        print("✅ OK")
+        print(f"Agentes: {len(data['agentes'])}")
+        print(f"Bienes: {len(data['bienes'])}")
+        print(f"Resumen: {data['resumen']}")
+        print(f"ETag: {etag}")
+
+        # Cada bien debe incluir sus datos específicos y sus opciones de seguro
+        for bien in data['bienes']:
+            assert 'bien_especifico' in bien, "Falta bien_especifico"
+            assert 'opciones_seguro' in bien, "Faltan opciones_seguro"
+        print("-" * 50)
+
+        # 3. GET condicional con el ETag recibido
+        print("3. GET condicional (If-None-Match)")
+        response = requests.get(
+            f"{BASE_URL}/clientes/{cliente_id}/portfolio",
+            headers={'If-None-Match': etag}
+        )
+        print(f"Status: {response.status_code}")
+        print("✅ OK" if response.status_code == 304 else f"❌ Error - Expected 304, got {response.status_code}")
+        print("-" * 50)
+
+        # 4. Cliente inexistente
+        print("4. Cliente inexistente")
+        response = requests.get(f"{BASE_URL}/clientes/999999/portfolio")
+        print(f"Status: {response.status_code}")
+        print("✅ OK" if response.status_code == 404 else f"❌ Error - Expected 404, got {response.status_code}")
+
+    except requests.exceptions.ConnectionError:
+        print("❌ Error: No se pudo conectar a la API")
+        print("Asegúrate de que la API esté corriendo con: python run_api.py")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
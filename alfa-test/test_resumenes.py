@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Script de prueba de los rollups de cartera por agente: recálculo encolado
+
+No necesita la API corriendo ni MySQL: crea la aplicación sobre una base
+SQLite temporal, con el backend SQL de trabajos.
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+ARCHIVO_BD = os.path.join(tempfile.mkdtemp(), 'resumenes.db')
+
+from app.config import Config
+Config.SQLALCHEMY_DATABASE_URI = f'sqlite:///{ARCHIVO_BD}'
+Config.SQLALCHEMY_ENGINE_OPTIONS = {}
+Config.JOBS_BACKEND = 'sql'
+
+from app import create_app, db
+from app.models.agente_cliente_model import AgenteCliente
+from app.models.agente_model import Agente
+from app.models.agente_resumen_model import AgenteResumenCartera
+from app.models.aseguradora_model import Aseguradora
+from app.models.bien_model import Bien
+from app.models.cliente_bien_model import ClienteBien
+from app.models.cliente_model import Cliente
+from app.models.hogar_model import Hogar
+from app.models.opcion_seguro_model import OpcionSeguro
+from app.models.poliza_model import Poliza
+from app.models.poliza_plan_pago_model import PolizaPlanPago
+from app.models.trabajo_model import Trabajo
+from app.services.dashboard_service import DashboardService
+
+errores = 0
+
+def verificar(descripcion, obtenido, esperado):
+    global errores
+    if obtenido == esperado:
+        print(f"✅ {descripcion}: {obtenido}")
+    else:
+        errores += 1
+        print(f"❌ {descripcion}: se esperaba {esperado}, se obtuvo {obtenido}")
+
+def agentes_encolados():
+    """Agentes de los trabajos resumenes_agentes encolados desde la última consulta"""
+    trabajos = Trabajo.query.filter_by(tarea='resumenes_agentes', estado='Pendiente').all()
+    agentes = set()
+    for trabajo in trabajos:
+        agentes.update(trabajo.parametros['agente_ids'])
+        db.session.delete(trabajo)
+    db.session.commit()
+    return sorted(agentes)
+
+def crear_agente(usuario):
+    agente = Agente(nombre=usuario, correo=f'{usuario}@prueba.com', usuario=usuario, clave='x', rol='agente')
+    db.session.add(agente)
+    db.session.flush()
+    return agente.id
+
+def crear_cartera(agente_id):
+    """Cliente del agente con un bien y una póliza de dos cuotas"""
+    cliente = Cliente(tipo_cliente='PERSONA', usuario='cliente-resumen', clave='x', nombre='Cliente')
+    aseguradora = Aseguradora(nombre='Aseguradora de prueba')
+    hogar = Hogar(tipo_inmueble='Casa', valor_inmueble_avaluo=100000000)
+    db.session.add_all([cliente, aseguradora, hogar])
+    db.session.flush()
+    bien = Bien(tipo_bien='HOGAR', bien_especifico_id=hogar.id, estado='Activo')
+    db.session.add(bien)
+    db.session.flush()
+    db.session.add_all([AgenteCliente(agente_id=agente_id, cliente_id=cliente.id),
+                        ClienteBien(cliente_id=cliente.id, bien_id=bien.id)])
+    opcion = OpcionSeguro(consecutivo='OPC-RESUMEN', bien_id=bien.id, aseguradora_id=aseguradora.id,
+                          tipo_opcion='HOGAR', opcion_especifica_id=1, valor_prima_total=1200000)
+    db.session.add(opcion)
+    db.session.flush()
+    poliza = Poliza(opcion_seguro_id=opcion.id, consecutivo_poliza='POL-RESUMEN',
+                    fecha_inicio_vigencia=date.today() - timedelta(days=30),
+                    fecha_fin_vigencia=date.today() + timedelta(days=330),
+                    estado_cartera='Al Día', valor_prima_neta=1000000, valor_iva=190000)
+    db.session.add(poliza)
+    db.session.flush()
+    for cuota in (1, 2):
+        db.session.add(PolizaPlanPago(
+            poliza_id=poliza.id, numero_cuota=cuota, valor_a_pagar=595000,
+            fecha_maxima_pago=date.today() + timedelta(days=30 * cuota),
+            estado_pago='Pendiente de pago'
+        ))
+    db.session.commit()
+    return cliente.id, poliza.id
+
+def main():
+    print("🧪 Probando el recálculo encolado de agente_resumen_cartera")
+    print("=" * 60)
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        agente_a = crear_agente('agente-a')
+        agente_b = crear_agente('agente-b')
+        db.session.commit()
+        agentes_encolados()
+
+        # 1. El commit de negocio encola el recálculo y no escribe el rollup
+        print("1. Alta de la cartera y pago de una cuota")
+        cliente_id, poliza_id = crear_cartera(agente_a)
+        verificar("Agentes encolados por el alta", agentes_encolados(), [agente_a])
+        verificar("Rollups escritos en la transacción", AgenteResumenCartera.query.count(), 0)
+        cuota = PolizaPlanPago.query.filter_by(poliza_id=poliza_id, numero_cuota=1).one()
+        cuota.estado_pago = 'Pagado'
+        db.session.commit()
+        verificar("Agentes encolados por el pago", agentes_encolados(), [agente_a])
+        print("-" * 50)
+
+        # 2. Un rollback no encola nada
+        print("2. Cambio descartado")
+        cuota = PolizaPlanPago.query.filter_by(poliza_id=poliza_id, numero_cuota=2).one()
+        cuota.estado_pago = 'Pagado'
+        db.session.flush()
+        db.session.rollback()
+        db.session.commit()
+        verificar("Agentes encolados tras el rollback", agentes_encolados(), [])
+        print("-" * 50)
+
+        # 3. Reasignar el cliente recalcula también al agente anterior
+        print("3. Reasignación del cliente")
+        asignacion = AgenteCliente.query.filter_by(agente_id=agente_a, cliente_id=cliente_id).one()
+        asignacion.agente_id = agente_b
+        db.session.commit()
+        verificar("Agentes encolados por la reasignación", agentes_encolados(), [agente_a, agente_b])
+        DashboardService.recalcular_resumenes([agente_a, agente_b])
+        db.session.commit()
+        verificar("Clientes del agente anterior", db.session.get(AgenteResumenCartera, agente_a).total_clientes, 0)
+        verificar("Clientes del agente nuevo", db.session.get(AgenteResumenCartera, agente_b).total_clientes, 1)
+        agentes_encolados()
+        print("-" * 50)
+
+        # 4. Borrar la póliza recalcula al agente que la veía
+        print("4. Baja de la póliza")
+        PolizaPlanPago.query.filter_by(poliza_id=poliza_id).delete()
+        db.session.delete(db.session.get(Poliza, poliza_id))
+        db.session.commit()
+        verificar("Agentes encolados por la baja", agentes_encolados(), [agente_b])
+
+    print("=" * 60)
+    if errores:
+        print(f"❌ {errores} verificaciones fallaron")
+        sys.exit(1)
+    print("✅ Todas las verificaciones pasaron")
+
+if __name__ == "__main__":
+    main()
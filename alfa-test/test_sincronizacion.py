@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Script de prueba de la sincronización de la cartera: desasignación de un
+cliente y vínculos cliente-bien borrados
+
+No necesita la API corriendo ni MySQL: crea la aplicación sobre una base
+SQLite temporal.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ARCHIVO_BD = os.path.join(tempfile.mkdtemp(), 'sincronizacion.db')
+
+from app.config import Config
+Config.SQLALCHEMY_DATABASE_URI = f'sqlite:///{ARCHIVO_BD}'
+Config.SQLALCHEMY_ENGINE_OPTIONS = {}
+Config.SYNC_MARGEN_SEGUNDOS = 0
+
+from app import create_app, db
+from app.models.agente_cliente_model import AgenteCliente
+from app.models.agente_model import Agente
+from app.models.aseguradora_model import Aseguradora
+from app.models.bien_model import Bien
+from app.models.cliente_bien_model import ClienteBien
+from app.models.cliente_model import Cliente
+from app.models.hogar_model import Hogar
+from app.models.opcion_seguro_model import OpcionSeguro
+from app.models.poliza_model import Poliza
+from app.models.poliza_plan_pago_model import PolizaPlanPago
+from app.services.sincronizacion_service import SincronizacionService
+
+errores = 0
+
+def verificar(descripcion, obtenido, esperado):
+    global errores
+    if obtenido == esperado:
+        print(f"✅ {descripcion}: {obtenido}")
+    else:
+        errores += 1
+        print(f"❌ {descripcion}: se esperaba {esperado}, se obtuvo {obtenido}")
+
+def crear_bien(aseguradora_id, clientes, consecutivo):
+    """Bien de los clientes indicados con una opción, una póliza y una cuota; retorna los ids"""
+    hogar = Hogar(tipo_inmueble='Casa', valor_inmueble_avaluo=100000000)
+    db.session.add(hogar)
+    db.session.flush()
+    bien = Bien(tipo_bien='HOGAR', bien_especifico_id=hogar.id, estado='Activo')
+    db.session.add(bien)
+    db.session.flush()
+    db.session.add_all([ClienteBien(cliente_id=cliente_id, bien_id=bien.id) for cliente_id in clientes])
+    opcion = OpcionSeguro(consecutivo=f'OPC-{consecutivo}', bien_id=bien.id, aseguradora_id=aseguradora_id,
+                          tipo_opcion='HOGAR', opcion_especifica_id=1, valor_prima_total=1200000)
+    db.session.add(opcion)
+    db.session.flush()
+    poliza = Poliza(opcion_seguro_id=opcion.id, consecutivo_poliza=consecutivo,
+                    fecha_inicio_vigencia=date.today(), fecha_fin_vigencia=date.today() + timedelta(days=365),
+                    estado_cartera='Al Día', valor_prima_neta=1000000, valor_iva=190000)
+    db.session.add(poliza)
+    db.session.flush()
+    cuota = PolizaPlanPago(poliza_id=poliza.id, numero_cuota=1, valor_a_pagar=1190000,
+                           fecha_maxima_pago=date.today() + timedelta(days=30), estado_pago='Pendiente de pago')
+    db.session.add(cuota)
+    db.session.flush()
+    return {
+        'hogares': [{'id': hogar.id}], 'bienes': [{'id': bien.id}], 'opciones_seguro': [{'id': opcion.id}],
+        'polizas': [{'id': poliza.id}], 'poliza_plan_pagos': [{'id': cuota.id}]
+    }
+
+def bajas(cambios):
+    """Claves de las bajas de la respuesta, por tabla"""
+    resultado = {}
+    for cambio in cambios:
+        if cambio['operacion'] == 'delete':
+            resultado.setdefault(cambio['tabla'], []).append(cambio['clave'])
+    return {tabla: sorted(claves, key=lambda clave: tuple(clave.values())) for tabla, claves in resultado.items()}
+
+def main():
+    print("🧪 Probando la sincronización al desasignar un cliente")
+    print("=" * 60)
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        agente = Agente(nombre='Agente', correo='agente@prueba.com', usuario='agente', clave='x', rol='agente')
+        aseguradora = Aseguradora(nombre='Aseguradora de prueba')
+        retirado = Cliente(tipo_cliente='PERSONA', usuario='retirado', clave='x', nombre='Retirado')
+        otro = Cliente(tipo_cliente='PERSONA', usuario='otro', clave='x', nombre='Otro')
+        db.session.add_all([agente, aseguradora, retirado, otro])
+        db.session.flush()
+        agente_id, aseguradora_id, retirado_id, otro_id = agente.id, aseguradora.id, retirado.id, otro.id
+        db.session.add_all([AgenteCliente(agente_id=agente_id, cliente_id=retirado_id),
+                            AgenteCliente(agente_id=agente_id, cliente_id=otro_id)])
+        propio = crear_bien(aseguradora_id, [retirado_id], 'POL-PROPIO')
+        crear_bien(aseguradora_id, [retirado_id, otro_id], 'POL-COMPARTIDO')
+        compartido_id = ClienteBien.query.filter_by(cliente_id=otro_id).one().bien_id
+        db.session.commit()
+
+        # 1. El cliente deja de estar asignado; sus bienes siguen existiendo
+        print("1. Desasignación de un cliente")
+        datos, status = SincronizacionService.obtener_cambios(agente_id)
+        verificar("Sincronización completa", status, 200)
+        verificar("Registros de la cartera completa", len(list(datos['cambios'])), 15)
+        token = datos['token']
+
+        time.sleep(1)
+        db.session.delete(AgenteCliente.query.filter_by(agente_id=agente_id, cliente_id=retirado_id).one())
+        db.session.commit()
+        time.sleep(1)
+
+        datos, status = SincronizacionService.obtener_cambios(agente_id, token)
+        verificar("Sincronización incremental", status, 200)
+        cambios = list(datos['cambios'])
+        esperado = {
+            'clientes': [{'id': retirado_id}],
+            'clientes_bienes': sorted([{'cliente_id': retirado_id, 'bien_id': propio['bienes'][0]['id']},
+                                       {'cliente_id': retirado_id, 'bien_id': compartido_id}],
+                                      key=lambda clave: tuple(clave.values())),
+            **propio
+        }
+        obtenido = bajas(cambios)
+        for tabla in sorted(set(esperado) | set(obtenido)):
+            verificar(f"Bajas de {tabla}", obtenido.get(tabla), esperado.get(tabla))
+        verificar("Altas", [cambio for cambio in cambios if cambio['operacion'] != 'delete'], [])
+        token = datos['token']
+        print("-" * 50)
+
+        # 2. Vínculos borrados con el cliente todavía asignado
+        print("2. Vínculos cliente-bien borrados")
+        tercero = Cliente(tipo_cliente='PERSONA', usuario='tercero', clave='x', nombre='Tercero')
+        db.session.add(tercero)
+        db.session.flush()
+        tercero_id = tercero.id
+        db.session.add(AgenteCliente(agente_id=agente_id, cliente_id=tercero_id))
+        solo = crear_bien(aseguradora_id, [otro_id], 'POL-SOLO')
+        crear_bien(aseguradora_id, [otro_id, tercero_id], 'POL-DOS')
+        dos_id = ClienteBien.query.filter_by(cliente_id=tercero_id).one().bien_id
+        db.session.commit()
+        time.sleep(1)
+        datos, _ = SincronizacionService.obtener_cambios(agente_id, token)
+        list(datos['cambios'])
+        token = datos['token']
+
+        time.sleep(1)
+        for bien_id in (solo['bienes'][0]['id'], dos_id):
+            db.session.delete(ClienteBien.query.filter_by(cliente_id=otro_id, bien_id=bien_id).one())
+        db.session.commit()
+        time.sleep(1)
+
+        datos, status = SincronizacionService.obtener_cambios(agente_id, token)
+        verificar("Sincronización incremental", status, 200)
+        esperado = {
+            'clientes_bienes': sorted([{'cliente_id': otro_id, 'bien_id': solo['bienes'][0]['id']},
+                                       {'cliente_id': otro_id, 'bien_id': dos_id}],
+                                      key=lambda clave: tuple(clave.values())),
+            **solo
+        }
+        obtenido = bajas(datos['cambios'])
+        for tabla in sorted(set(esperado) | set(obtenido)):
+            verificar(f"Bajas de {tabla}", obtenido.get(tabla), esperado.get(tabla))
+
+    print("=" * 60)
+    if errores:
+        print(f"❌ {errores} verificaciones fallaron")
+        sys.exit(1)
+    print("✅ Todas las verificaciones pasaron")
+
+if __name__ == "__main__":
+    main()
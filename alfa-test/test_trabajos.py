@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Script de prueba de la cola de trabajos: reclamación de trabajos abandonados
+
+No necesita la API corriendo ni MySQL: crea la aplicación sobre una base
+SQLite temporal, con el backend SQL.
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+ARCHIVO_BD = os.path.join(tempfile.mkdtemp(), 'trabajos.db')
+
+from app.config import Config
+Config.SQLALCHEMY_DATABASE_URI = f'sqlite:///{ARCHIVO_BD}'
+Config.SQLALCHEMY_ENGINE_OPTIONS = {}
+Config.JOBS_BACKEND = 'sql'
+
+from app import create_app, db
+from app.jobs import encolar, obtener_backend
+from app.models.trabajo_model import Trabajo
+
+errores = 0
+
+def verificar(descripcion, obtenido, esperado):
+    global errores
+    if obtenido == esperado:
+        print(f"✅ {descripcion}: {obtenido}")
+    else:
+        errores += 1
+        print(f"❌ {descripcion}: se esperaba {esperado}, se obtuvo {obtenido}")
+
+def vencer_bloqueo(trabajo_id):
+    """Simula un worker que murió: el bloqueo del trabajo ya venció"""
+    db.session.query(Trabajo).filter(Trabajo.id == trabajo_id)\
+        .update({'bloqueado_hasta': datetime.utcnow() - timedelta(seconds=1)})
+    db.session.commit()
+
+def main():
+    print("🧪 Probando la reclamación de trabajos abandonados")
+    print("=" * 60)
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        backend = obtener_backend()
+        trabajo_id = encolar('resumenes_agentes')
+        max_intentos = backend.obtener(trabajo_id)['max_intentos']
+
+        for intento in range(1, max_intentos + 1):
+            trabajo = backend.reclamar(['default'], 'worker-prueba', 60)
+            verificar(f"Intento {intento} reclamado", (trabajo or {}).get('intentos'), intento)
+            vencer_bloqueo(trabajo_id)
+
+        verificar("Reclamación sin intentos restantes", backend.reclamar(['default'], 'worker-prueba', 60), None)
+        trabajo = backend.obtener(trabajo_id)
+        verificar("Estado del trabajo abandonado", trabajo['estado'], 'Fallido')
+        verificar("Intentos", trabajo['intentos'], max_intentos)
+
+    print("=" * 60)
+    if errores:
+        print(f"❌ {errores} verificaciones fallaron")
+        sys.exit(1)
+    print("✅ Todas las verificaciones pasaron")
+
+if __name__ == "__main__":
+    main()